@@ -0,0 +1,68 @@
+"""Benchmark Piston throughput: one-off requests vs the pooled PistonClient.
+Starts the local Piston stub unless --url points at a real instance.
+
+    python scripts/benchmark_piston.py --requests 200 --concurrency 8
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import requests
+
+from infrastructure.sandbox.piston_client import PistonClient
+from infrastructure.sandbox.piston_stub import start_stub_server
+
+PAYLOAD = {
+    'language': 'python',
+    'version': '*',
+    'files': [{'content': 'print(sum(map(int, input().split())))'}],
+    'stdin': '1 2 3',
+    'run_timeout': 3000
+}
+
+
+def _timed(label, send, total, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(lambda _: send().status_code, range(total)))
+    elapsed = time.perf_counter() - start
+    ok = statuses.count(200)
+    print(f"{label:<10} {total} requests in {elapsed:6.2f}s  {total / elapsed:7.1f} req/s  ({ok} ok)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Piston base URL (default: start the local stub)')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='artificial latency for the local stub (seconds)')
+    parser.add_argument('--echo', action='store_true',
+                        help='local stub skips execution, so only transport cost is measured')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = start_stub_server(latency=args.latency, echo=args.echo)
+        url = server.url
+        print(f"Using local Piston stub at {url}")
+
+    client = PistonClient(base_url=url, max_concurrency=args.concurrency)
+    print(f"Discovered runtimes: {client.get_runtimes()}")
+
+    _timed('one-off', lambda: requests.post(f"{url}/execute", json=PAYLOAD, timeout=30),
+           args.requests, args.concurrency)
+    _timed('pooled', lambda: client.execute(PAYLOAD, timeout=30), args.requests, args.concurrency)
+
+    client.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+"""Run the background grading worker pool (FR-05).
+Submissions are only queued by the web app; this process claims queued
+sandbox jobs and grades them. Scale with --workers / GRADER_WORKERS.
+"""
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+load_dotenv()
+
+from infrastructure.workers.grading_pool import main
+
+
+if __name__ == '__main__':
+    main()
@@ -32,7 +32,95 @@ AI_TEMPERATURE = float(os.getenv("AI_TEMPERATURE", "0.7"))
 # Sandbox configuration
 SANDBOX_PATH = os.getenv("SANDBOX_PATH", "./sandbox")
 SANDBOX_TIMEOUT = int(os.getenv("SANDBOX_TIMEOUT", "5"))
+# Test cases of one submission graded concurrently (1 = sequential)
+SANDBOX_PARALLELISM = int(os.getenv("SANDBOX_PARALLELISM", "4"))
+# Local Python executor: "subprocess" (new interpreter per run) or
+# "zygote" (pre-started interpreters that fork a child per run, POSIX only)
+SANDBOX_EXECUTOR = os.getenv("SANDBOX_EXECUTOR", "subprocess")
+SANDBOX_ZYGOTE_POOL_SIZE = int(os.getenv("SANDBOX_ZYGOTE_POOL_SIZE", str(SANDBOX_PARALLELISM)))
+# Run all test cases of a Python submission in one sandbox execution
+SANDBOX_BATCH_MODE = os.getenv("SANDBOX_BATCH_MODE", "False").lower() == "true"
 SANDBOX_MEMORY_LIMIT_MB = int(os.getenv("SANDBOX_MEMORY_LIMIT_MB", "256"))
+# rlimits for local runs (POSIX); the process limit counts every process of
+# the account running the sandbox (ignored for root), 0 disables it
+SANDBOX_MAX_OPEN_FILES = int(os.getenv("SANDBOX_MAX_OPEN_FILES", "64"))
+SANDBOX_MAX_PROCESSES = int(os.getenv("SANDBOX_MAX_PROCESSES", "256"))
+# Bytes of stdout / stderr kept per run; a program writing more is killed
+SANDBOX_MAX_OUTPUT_KB = int(os.getenv("SANDBOX_MAX_OUTPUT_KB", "1024"))
+# Local C / C++ / Java: compiled once per source into a cache of artifacts
+# (least recently used evicted past the size limit), then run per test case
+SANDBOX_ARTIFACT_PATH = os.getenv("SANDBOX_ARTIFACT_PATH", os.path.join(SANDBOX_PATH, "artifacts"))
+SANDBOX_ARTIFACT_CACHE_MB = int(os.getenv("SANDBOX_ARTIFACT_CACHE_MB", "512"))
+SANDBOX_COMPILE_TIMEOUT = int(os.getenv("SANDBOX_COMPILE_TIMEOUT", "15"))
+SANDBOX_COMPILE_MEMORY_MB = int(os.getenv("SANDBOX_COMPILE_MEMORY_MB", "1024"))
+# Admission control for code run inside web requests (/api/test-code): slots
+# shared by every web worker on the host, a few per user, and a bounded wait
+# for a slot; beyond that a request is refused with 429 and Retry-After
+SANDBOX_ADMISSION_ENABLED = os.getenv("SANDBOX_ADMISSION_ENABLED", "True").lower() == "true"
+SANDBOX_ADMISSION_PATH = os.getenv("SANDBOX_ADMISSION_PATH", os.path.join(SANDBOX_PATH, "admission"))
+SANDBOX_MAX_CONCURRENT = int(os.getenv("SANDBOX_MAX_CONCURRENT", str(os.cpu_count() or 2)))
+SANDBOX_MAX_PER_USER = int(os.getenv("SANDBOX_MAX_PER_USER", "1"))
+SANDBOX_MAX_WAITING = int(os.getenv("SANDBOX_MAX_WAITING", "16"))
+SANDBOX_MAX_WAIT_SECONDS = float(os.getenv("SANDBOX_MAX_WAIT_SECONDS", "5"))
+SANDBOX_BUSY_RETRY_AFTER = int(os.getenv("SANDBOX_BUSY_RETRY_AFTER", "5"))
+# Practice runs are refused while this many final submissions wait to be
+# graded, so the graders catch up first (0 never sheds)
+SANDBOX_SHED_PRACTICE_QUEUE_DEPTH = int(os.getenv("SANDBOX_SHED_PRACTICE_QUEUE_DEPTH", "200"))
+
+# Test case stdin / expected output larger than this is stored as a
+# content-addressed file under TEST_CASE_PAYLOAD_PATH instead of in the database
+TEST_CASE_PAYLOAD_PATH = os.getenv("TEST_CASE_PAYLOAD_PATH", str(DATA_DIR / "test_case_payloads"))
+TEST_CASE_INLINE_MAX_KB = int(os.getenv("TEST_CASE_INLINE_MAX_KB", "256"))
+
+# Limits on a zip of NAME.in / NAME.out files imported as test cases
+TEST_CASE_IMPORT_MAX_MB = int(os.getenv("TEST_CASE_IMPORT_MAX_MB", "64"))
+TEST_CASE_IMPORT_MAX_CASES = int(os.getenv("TEST_CASE_IMPORT_MAX_CASES", "500"))
+
+# Largest input a test case's generator (complexity or generated input) may
+# print, and largest output its reference solution may print
+GENERATOR_OUTPUT_MAX_MB = int(os.getenv("GENERATOR_OUTPUT_MAX_MB", "32"))
+
+# Inputs and reference outputs of generated test cases, produced once and
+# reused by every submission (least recently used evicted past the limits)
+GENERATED_DATASET_PATH = os.getenv("GENERATED_DATASET_PATH", str(DATA_DIR / "generated_datasets"))
+GENERATED_DATASET_MAX_ENTRIES = int(os.getenv("GENERATED_DATASET_MAX_ENTRIES", "5000"))
+GENERATED_DATASET_MAX_MB = int(os.getenv("GENERATED_DATASET_MAX_MB", "2048"))
+
+# Content-addressed cache of test case outcomes (result_cache table)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "50000"))
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+
+# Piston code execution API; when disabled, code runs locally. C / C++ / Java
+# run locally whenever their compiler is installed, with or without Piston
+SANDBOX_USE_PISTON = os.getenv("SANDBOX_USE_PISTON", "True").lower() == "true"
+PISTON_API_URL = os.getenv("PISTON_API_URL", "https://emkc.org/api/v2/piston")
+# Max concurrent requests (and pooled connections) per process
+PISTON_MAX_CONCURRENCY = int(os.getenv("PISTON_MAX_CONCURRENCY", "4"))
+# Retries on 5xx responses and connection errors, with exponential backoff
+PISTON_MAX_RETRIES = int(os.getenv("PISTON_MAX_RETRIES", "2"))
+PISTON_RETRY_BACKOFF = float(os.getenv("PISTON_RETRY_BACKOFF", "0.25"))
+
+# Background grading workers (FR-05)
+# Number of grader processes; independent of the number of web workers
+GRADER_WORKERS = int(os.getenv("GRADER_WORKERS", str(os.cpu_count() or 2)))
+# Seconds between sandbox_jobs queue polls when idle
+GRADER_POLL_INTERVAL = float(os.getenv("GRADER_POLL_INTERVAL", "1.0"))
+# Graders kept free for interactive-lane jobs while submissions and regrades
+# are queued (capped at GRADER_WORKERS - 1)
+GRADER_INTERACTIVE_RESERVE = int(os.getenv("GRADER_INTERACTIVE_RESERVE", "1"))
+# A claimed job is leased to its grader for this many seconds and the lease
+# renewed every GRADER_HEARTBEAT_INTERVAL; a job whose lease lapses (its
+# grader died) is queued again, up to GRADER_MAX_ATTEMPTS claims in all
+GRADER_LEASE_SECONDS = float(os.getenv("GRADER_LEASE_SECONDS", "60"))
+GRADER_HEARTBEAT_INTERVAL = float(os.getenv("GRADER_HEARTBEAT_INTERVAL", "15"))
+GRADER_MAX_ATTEMPTS = int(os.getenv("GRADER_MAX_ATTEMPTS", "3"))
+
+# Asynchronous editor test runs (/api/test-runs)
+# Longest a results poll is held open waiting for progress (seconds)
+TEST_RUN_LONG_POLL_SECONDS = float(os.getenv("TEST_RUN_LONG_POLL_SECONDS", "10"))
+# How often a held poll re-checks the database (seconds)
+TEST_RUN_POLL_INTERVAL = float(os.getenv("TEST_RUN_POLL_INTERVAL", "0.25"))
 
 # Environment
 APP_ENV = os.getenv("APP_ENV", "development")
@@ -0,0 +1,51 @@
+"""
+Payload File
+A large test case stdin or expected output kept as a content-addressed file
+instead of in the database. Only the digest is loaded with the test case;
+the content is read, streamed or memory-mapped when it is needed.
+"""
+import mmap
+from contextlib import contextmanager
+
+
+class PayloadFile:
+    def __init__(self, digest, path, size_bytes=None):
+        self.digest = digest  # sha256 of the UTF-8 content
+        self.path = path
+        self.size_bytes = size_bytes
+
+    def read(self) -> str:
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def head(self, chars: int) -> str:
+        """The first `chars` characters."""
+        with open(self.path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            return f.read(chars)
+
+    def open(self):
+        """Binary file object, e.g. to hand to a child process as its stdin."""
+        return open(self.path, 'rb')
+
+    @contextmanager
+    def mapped(self):
+        """The content as a read-only mmap (b'' for an empty payload)."""
+        with open(self.path, 'rb') as f:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                yield b''
+                return
+            try:
+                yield mapping
+            finally:
+                mapping.close()
+
+    def __eq__(self, other):
+        return isinstance(other, PayloadFile) and other.digest == self.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"PayloadFile({self.digest[:12]})"
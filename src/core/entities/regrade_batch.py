@@ -0,0 +1,61 @@
+"""
+Regrade Batch Entity
+A bulk regrade of every latest submission of an assignment or a course
+"""
+from datetime import datetime
+
+
+class RegradeBatch:
+    valid_scopes = ('assignment', 'course')
+    valid_statuses = ('running', 'completed', 'cancelled')
+
+    def __init__(
+        self,
+        id,
+        scope,
+        scope_id,
+        requested_by=None,
+        status='running',
+        total=0,
+        created_at=None,
+        finished_at=None
+    ):
+        if scope not in RegradeBatch.valid_scopes:
+            raise ValueError(f"Invalid scope: {scope}. Allowed: {RegradeBatch.valid_scopes}")
+        if status not in RegradeBatch.valid_statuses:
+            raise ValueError(f"Invalid status: {status}. Allowed: {RegradeBatch.valid_statuses}")
+
+        self.__id = id
+        self.scope = scope
+        self.scope_id = scope_id
+        self.requested_by = requested_by
+        self.status = status
+        self.total = total
+        self.created_at = created_at or datetime.utcnow()
+        self.finished_at = finished_at
+
+    def get_id(self):
+        return self.__id
+
+    def mark_completed(self):
+        self.status = 'completed'
+        self.finished_at = datetime.utcnow()
+
+    def mark_cancelled(self):
+        self.status = 'cancelled'
+        self.finished_at = datetime.utcnow()
+
+    def is_finished(self):
+        return self.status in ('completed', 'cancelled')
+
+    def to_dict(self):
+        return {
+            'id': self.get_id(),
+            'scope': self.scope,
+            'scope_id': self.scope_id,
+            'requested_by': self.requested_by,
+            'status': self.status,
+            'total': self.total,
+            'created_at': self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else self.created_at,
+            'finished_at': self.finished_at.isoformat() if hasattr(self.finished_at, 'isoformat') else self.finished_at
+        }
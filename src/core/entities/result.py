@@ -1,5 +1,5 @@
 class Result : 
-    def __init__(self, id , submission_id ,test_case_id , passed ,stdout, stderr , runtime_ms , memory_kb , exit_code , error_message , created_at):
+    def __init__(self, id , submission_id ,test_case_id , passed ,stdout, stderr , runtime_ms , memory_kb , exit_code , error_message , created_at, test_case_hash=None, measurements=None):
         self.__id = id
         self.__submission_id = submission_id
         self.__test_case_id = test_case_id
@@ -11,6 +11,10 @@ class Result :
         self.exit_code = exit_code
         self.error_message = error_message
         self.created_at = created_at
+        # Content hash of the test case this result was produced against
+        self.test_case_hash = test_case_hash
+        # Complexity test cases: sizes, CPU times and the fitted growth class
+        self.measurements = measurements
     def get_id(self):
             return self.__id
     def get_submission_id(self):
@@ -33,5 +37,6 @@ class Result :
                 "memory_kb": self.memory_kb,
                 "exit_code": self.exit_code,
                 "error_message": self.error_message,
+                "measurements": self.measurements,
                 "created_at": self.created_at
             }
\ No newline at end of file
@@ -6,7 +6,9 @@ from datetime import datetime
 
 
 class SandboxJob:
-    valid_statuses = ('queued', 'running', 'completed', 'failed', 'timeout')
+    valid_statuses = ('queued', 'running', 'completed', 'failed', 'timeout', 'cancelled')
+    # Scheduling lanes, highest priority first
+    valid_lanes = ('interactive', 'submission', 'regrade')
     
     def __init__(
         self,
@@ -19,10 +21,19 @@ class SandboxJob:
         memory_limit_mb=256,
         exit_code=None,
         error_message=None,
-        created_at=None
+        created_at=None,
+        lane='submission',
+        student_id=None,
+        test_run_id=None,
+        batch_id=None,
+        worker_id=None,
+        lease_expires_at=None,
+        attempts=0
     ):
         if status not in SandboxJob.valid_statuses:
             raise ValueError(f"Invalid status: {status}. Allowed: {SandboxJob.valid_statuses}")
+        if lane not in SandboxJob.valid_lanes:
+            raise ValueError(f"Invalid lane: {lane}. Allowed: {SandboxJob.valid_lanes}")
         
         self.__id = id
         self.__submission_id = submission_id
@@ -34,6 +45,17 @@ class SandboxJob:
         self.exit_code = exit_code
         self.error_message = error_message
         self.created_at = created_at or datetime.utcnow()
+        self.lane = lane
+        self.student_id = student_id
+        # Set instead of submission_id for editor test runs
+        self.test_run_id = test_run_id
+        # Regrade batch the job belongs to, if any
+        self.batch_id = batch_id
+        # Grader holding the job while it runs, and until when (epoch seconds)
+        self.worker_id = worker_id
+        self.lease_expires_at = lease_expires_at
+        # Times the job was claimed; a claim after a lost lease counts again
+        self.attempts = attempts or 0
     
     def get_id(self):
         return self.__id
@@ -67,7 +89,7 @@ class SandboxJob:
     
     def is_finished(self):
         """Check if job has finished (regardless of outcome)."""
-        return self.status in ('completed', 'failed', 'timeout')
+        return self.status in ('completed', 'failed', 'timeout', 'cancelled')
     
     def get_duration_ms(self):
         """Get execution duration in milliseconds."""
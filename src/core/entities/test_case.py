@@ -1,5 +1,15 @@
 class Testcase:
-    def __init__(self, id, assignment_id, name, stdin, descripion, expected_out, timeout_ms, memory_limit_mb, points, is_visible, sort_order, created_at):
+    # How program output is matched against expected_out; see core.services.output_comparator
+    valid_compare_modes = ('exact', 'whitespace', 'lines', 'float', 'unordered', 'regex')
+    # 'io' checks output for a fixed stdin; 'complexity' times the program on
+    # generated inputs; 'function' calls one function with JSON arguments;
+    # 'generated' is an io case whose stdin and expected output are produced
+    # by a generator and a reference solution
+    valid_kinds = ('io', 'complexity', 'function', 'generated')
+    # Growth classes a complexity test case may set as its limit, simplest first
+    valid_complexity_classes = ('1', 'log n', 'n', 'n log n', 'n^2', 'n^3')
+
+    def __init__(self, id, assignment_id, name, stdin, descripion, expected_out, timeout_ms, memory_limit_mb, points, is_visible, sort_order, created_at, compare_mode='exact', compare_tolerance=None, stdin_file=None, expected_out_file=None, kind='io', generator=None, complexity_sizes=None, complexity_repeats=None, complexity_max_class=None, function_name=None, generator_size=None, generator_seed=None, reference_solution=None):
         self.__id = id
         self.__assignment_id = assignment_id
         self.name = name
@@ -12,6 +22,57 @@ class Testcase:
         self.is_visible = bool(is_visible)
         self.sort_order = sort_order
         self.created_at = created_at
+        self.compare_mode = compare_mode or 'exact'
+        self.compare_tolerance = float(compare_tolerance) if compare_tolerance is not None else None
+        # Large payloads live in files; stdin / expected_out read them on access
+        self.stdin_file = stdin_file
+        self.expected_out_file = expected_out_file
+        self.kind = kind or 'io'
+        # Complexity cases: a Python script that reads a size n from stdin and
+        # prints an input of that size, the sizes to run, runs per size, and
+        # the worst growth class that still passes
+        self.generator = generator
+        self.complexity_sizes = [int(n) for n in complexity_sizes] if complexity_sizes else []
+        self.complexity_repeats = int(complexity_repeats) if complexity_repeats is not None else 3
+        self.complexity_max_class = complexity_max_class
+        # Function cases: the function called, with stdin holding its
+        # arguments as JSON and expected_out the JSON of its return value
+        self.function_name = function_name
+        # Generated cases: the generator reads "size seed" from stdin, and
+        # the reference solution's output on its input is expected_out
+        self.generator_size = int(generator_size) if generator_size is not None else None
+        self.generator_seed = int(generator_seed) if generator_seed is not None else 0
+        self.reference_solution = reference_solution
+
+    @property
+    def stdin(self):
+        if self.stdin_file is not None:
+            return self.stdin_file.read()
+        return self._stdin
+
+    @stdin.setter
+    def stdin(self, value):
+        self._stdin = value
+        self.stdin_file = None
+
+    @property
+    def expected_out(self):
+        if self.expected_out_file is not None:
+            return self.expected_out_file.read()
+        return self._expected_out
+
+    @expected_out.setter
+    def expected_out(self, value):
+        self._expected_out = value
+        self.expected_out_file = None
+
+    def stdin_source(self):
+        """The stdin as stored: a PayloadFile, or the text itself."""
+        return self.stdin_file if self.stdin_file is not None else self._stdin
+
+    def expected_out_source(self):
+        """The expected output as stored: a PayloadFile, or the text itself."""
+        return self.expected_out_file if self.expected_out_file is not None else self._expected_out
 
     def get_id(self):
         return self.__id
@@ -27,6 +88,31 @@ class Testcase:
             raise ValueError("Test case name cannot be empty")
         if self.points < 0:
             raise ValueError("Points cannot be negative")
+        if self.compare_mode not in Testcase.valid_compare_modes:
+            raise ValueError(f"Invalid compare mode: {self.compare_mode}. Allowed: {Testcase.valid_compare_modes}")
+        if self.compare_tolerance is not None and self.compare_tolerance < 0:
+            raise ValueError("Tolerance cannot be negative")
+        if self.kind not in Testcase.valid_kinds:
+            raise ValueError(f"Invalid test case kind: {self.kind}. Allowed: {Testcase.valid_kinds}")
+        if self.kind == 'complexity':
+            if not self.generator:
+                raise ValueError("A complexity test case needs an input generator")
+            if len(set(self.complexity_sizes)) < 3 or min(self.complexity_sizes) < 1:
+                raise ValueError("A complexity test case needs at least three distinct positive sizes")
+            if self.complexity_repeats < 1:
+                raise ValueError("Repetitions must be at least 1")
+            if self.complexity_max_class not in Testcase.valid_complexity_classes:
+                raise ValueError(
+                    f"Invalid complexity class: {self.complexity_max_class}. "
+                    f"Allowed: {Testcase.valid_complexity_classes}"
+                )
+        if self.kind == 'function' and not (self.function_name or '').isidentifier():
+            raise ValueError("A function test case needs the name of the function to call")
+        if self.kind == 'generated':
+            if not self.generator or not self.reference_solution:
+                raise ValueError("A generated test case needs an input generator and a reference solution")
+            if self.generator_size is None or self.generator_size < 1:
+                raise ValueError("Input size must be at least 1")
         return True
 
     def clone(self):
@@ -34,13 +120,26 @@ class Testcase:
             id=None,
             assignment_id=self.__assignment_id,
             name=f"{self.name} (Copy)",
-            stdin=self.stdin,
+            stdin=self._stdin,
             descripion=self.descripion,
-            expected_out=self.expected_out,
+            expected_out=self._expected_out,
             timeout_ms=self.timeout_ms,
             memory_limit_mb=self.memory_limit_mb,
             points=self.points,
             is_visible=self.is_visible,
             sort_order=self.sort_order,
-            created_at=self.created_at
+            created_at=self.created_at,
+            compare_mode=self.compare_mode,
+            compare_tolerance=self.compare_tolerance,
+            stdin_file=self.stdin_file,
+            expected_out_file=self.expected_out_file,
+            kind=self.kind,
+            generator=self.generator,
+            complexity_sizes=list(self.complexity_sizes),
+            complexity_repeats=self.complexity_repeats,
+            complexity_max_class=self.complexity_max_class,
+            function_name=self.function_name,
+            generator_size=self.generator_size,
+            generator_seed=self.generator_seed,
+            reference_solution=self.reference_solution
         )
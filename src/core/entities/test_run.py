@@ -0,0 +1,89 @@
+"""
+Test Run Entity
+An editor "Run tests" request, executed asynchronously by the graders
+"""
+from datetime import datetime
+
+
+class TestRun:
+    valid_statuses = ('queued', 'running', 'completed', 'failed')
+
+    def __init__(
+        self,
+        id,
+        user_id,
+        assignment_id,
+        code,
+        language='python',
+        visible_only=True,
+        status='queued',
+        total_count=None,
+        passed_count=0,
+        score=None,
+        ai_feedback=None,
+        error_message=None,
+        created_at=None,
+        completed_at=None
+    ):
+        if status not in TestRun.valid_statuses:
+            raise ValueError(f"Invalid status: {status}. Allowed: {TestRun.valid_statuses}")
+
+        self.__id = id
+        self.__user_id = user_id
+        self.__assignment_id = assignment_id
+        self.code = code
+        self.language = language
+        # Students only run the test cases they can see
+        self.visible_only = bool(visible_only)
+        self.status = status
+        self.total_count = total_count
+        self.passed_count = passed_count
+        self.score = score
+        self.ai_feedback = ai_feedback
+        self.error_message = error_message
+        self.created_at = created_at or datetime.utcnow()
+        self.completed_at = completed_at
+
+    def get_id(self):
+        return self.__id
+
+    def get_user_id(self):
+        return self.__user_id
+
+    def get_assignment_id(self):
+        return self.__assignment_id
+
+    def mark_running(self):
+        self.status = 'running'
+
+    def mark_completed(self, passed_count, total_count, score, ai_feedback=None):
+        self.status = 'completed'
+        self.passed_count = passed_count
+        self.total_count = total_count
+        self.score = score
+        self.ai_feedback = ai_feedback
+        self.completed_at = datetime.utcnow()
+
+    def mark_failed(self, error_message):
+        self.status = 'failed'
+        self.error_message = error_message
+        self.completed_at = datetime.utcnow()
+
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self):
+        """Status and summary for API responses; the code is left out."""
+        return {
+            'id': self.get_id(),
+            'assignment_id': self.get_assignment_id(),
+            'language': self.language,
+            'status': self.status,
+            'total_count': self.total_count,
+            'passed_count': self.passed_count,
+            'score': self.score,
+            'ai_feedback': self.ai_feedback,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else self.created_at,
+            'completed_at': self.completed_at.isoformat() if hasattr(self.completed_at, 'isoformat') else self.completed_at
+        }
@@ -0,0 +1,14 @@
+class SandboxBusyError(Exception):
+    """The sandbox is at capacity; the request may be retried after `retry_after` seconds."""
+
+    def __init__(self, message="The sandbox is busy", retry_after=5):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        return {
+            "error": "sandbox_busy",
+            "message": self.message,
+            "retry_after": self.retry_after
+        }
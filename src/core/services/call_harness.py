@@ -0,0 +1,247 @@
+"""
+Function-call harness for Python submissions.
+
+Builds a single program that imports the student code once, as a module
+named `solution` (so an `if __name__ == "__main__":` block does not run),
+then calls the named function once per test case with that case's JSON
+arguments under its own time limit, and prints the per-call outcomes as JSON
+after a marker line. Thousands of small calls then cost one interpreter
+start-up and one import instead of one process each.
+
+A case's arguments are a JSON array of positional arguments, or an object
+{"args": [...], "kwargs": {...}}. Each call gets freshly decoded arguments,
+but module globals persist between calls, as they would for a test suite
+importing the module.
+
+Each outcome has `return_value`, the returned value as JSON (None if the
+call raised), with tuples and sets as lists (sets sorted) and other objects
+as their repr(); `stdout` is whatever the call printed, `stderr` the
+traceback of an exception. Per-call runtime_ms is CPU time; memory_kb is
+the harness process's peak RSS so far.
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+from core.services.sandbox_harness import RESULTS_MARKER
+
+_CALL_HARNESS_TEMPLATE = r'''
+import base64, builtins, io, json, linecache, math, signal, sys, time, traceback, types
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_PAYLOAD = json.loads(base64.b64decode(b"__PAYLOAD__").decode("utf-8"))
+_MARKER = __MARKER__
+_FILENAME = "main.py"
+_MAX_OUTPUT = _PAYLOAD["max_output"]
+_MAX_DEPTH = 100
+
+
+class _CallTimeout(BaseException):
+    pass
+
+
+class _OutputLimit(BaseException):
+    pass
+
+
+class _CappedBuffer(io.BytesIO):
+    """Keeps up to _MAX_OUTPUT bytes; writing past that stops the call."""
+
+    def write(self, data):
+        if _MAX_OUTPUT is not None:
+            room = _MAX_OUTPUT - self.getbuffer().nbytes
+            if len(data) > room:
+                super().write(bytes(data[:max(room, 0)]))
+                raise _OutputLimit()
+        return super().write(data)
+
+
+def _on_alarm(signum, frame):
+    raise _CallTimeout()
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _encode(value, depth=0):
+    """value as plain JSON data."""
+    if depth > _MAX_DEPTH:
+        return repr(value)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else repr(value)
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, depth + 1) for item in value]
+    if isinstance(value, (set, frozenset)):
+        items = [_encode(item, depth + 1) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, dict):
+        return {str(key): _encode(item, depth + 1) for key, item in value.items()}
+    return repr(value)
+
+
+def _exit_status(exc):
+    if exc.code is None:
+        return 0, ""
+    if isinstance(exc.code, int):
+        return exc.code & 0xFF, ""
+    return 1, str(exc.code) + "\n"
+
+
+def _run(target, timeout):
+    """Run target() with captured output and a time limit; (outcome, returned value)."""
+    real = (sys.stdin, sys.stdout, sys.stderr)
+    recursion_limit = sys.getrecursionlimit()
+    out = io.TextIOWrapper(_CappedBuffer(), encoding="utf-8", errors="replace")
+    err = io.TextIOWrapper(_CappedBuffer(), encoding="utf-8", errors="replace")
+    sys.stdin = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    sys.stdout, sys.stderr = out, err
+
+    value, raised = None, True
+    exit_code, timed_out, truncated, extra = 0, False, False, ""
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        value = target()
+        raised = False
+    except _CallTimeout:
+        timed_out, exit_code = True, -1
+    except _OutputLimit:
+        truncated, exit_code = True, -signal.SIGKILL
+    except SystemExit as e:
+        exit_code, extra = _exit_status(e)
+        exit_code = exit_code or 1
+    except BaseException as e:
+        # Start the traceback at the student's code, past the harness frames
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != _FILENAME:
+            tb = tb.tb_next
+        try:
+            traceback.print_exception(type(e), e, tb)
+        except _OutputLimit:
+            truncated = True
+        exit_code = 1
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    wall_ms = int((time.perf_counter() - start) * 1000)
+    cpu_ms = round((time.process_time() - cpu_start) * 1000)
+
+    for stream in (out, err):
+        try:
+            stream.flush()
+        except _OutputLimit:
+            truncated = True
+        except Exception:
+            pass
+    sys.stdin, sys.stdout, sys.stderr = real
+    sys.setrecursionlimit(recursion_limit)
+
+    return {
+        "stdout": out.buffer.getvalue().decode("utf-8", errors="replace"),
+        "stderr": err.buffer.getvalue().decode("utf-8", errors="replace") + extra,
+        "exit_code": exit_code,
+        "runtime_ms": cpu_ms,
+        "wall_ms": wall_ms,
+        "memory_kb": _peak_rss_kb(),
+        "timed_out": timed_out,
+        "output_truncated": truncated,
+        "return_value": None,
+    }, (None if raised else value)
+
+
+def _failed(message):
+    return {"stdout": "", "stderr": message, "exit_code": 1, "runtime_ms": 0, "wall_ms": 0,
+            "memory_kb": None, "timed_out": False, "output_truncated": False, "return_value": None}
+
+
+def _call(module, case):
+    func = getattr(module, case["function"], None)
+    if not callable(func):
+        return _failed("main.py does not define a function %s()\n" % case["function"])
+    try:
+        arguments = json.loads(case["args"]) if case["args"].strip() else []
+    except ValueError as e:
+        return _failed("Test case arguments are not valid JSON: %s\n" % e)
+    if isinstance(arguments, dict):
+        args, kwargs = arguments.get("args", []), arguments.get("kwargs", {})
+    else:
+        args, kwargs = arguments, {}
+
+    outcome, value = _run(lambda: func(*args, **kwargs), case["timeout"])
+    if outcome["exit_code"] == 0:
+        try:
+            returned = json.dumps(_encode(value))
+        except (TypeError, ValueError, RecursionError):
+            returned = json.dumps(repr(value))
+        if _MAX_OUTPUT is not None and len(returned) > _MAX_OUTPUT:
+            outcome.update(exit_code=1, stderr=outcome["stderr"] + "Return value exceeds the output limit\n")
+        else:
+            outcome["return_value"] = returned
+    return outcome
+
+
+def _main():
+    code = _PAYLOAD["code"]
+    linecache.cache[_FILENAME] = (len(code), None, code.splitlines(True), _FILENAME)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    cases = _PAYLOAD["cases"]
+
+    module = types.ModuleType("solution")
+    module.__file__ = _FILENAME
+    module.__builtins__ = builtins
+    sys.modules["solution"] = module
+    try:
+        code_obj = compile(code, _FILENAME, "exec")
+    except SyntaxError as e:
+        failure = _failed("".join(traceback.format_exception_only(type(e), e)))
+    else:
+        failure, _ = _run(lambda: exec(code_obj, module.__dict__), _PAYLOAD["import_timeout"])
+        if failure["exit_code"] == 0:
+            failure = None
+        elif failure["timed_out"]:
+            failure["stderr"] = "Importing main.py took too long\n"
+
+    results = []
+    for case in cases:
+        results.append(dict(failure) if failure is not None else _call(module, case))
+
+    sys.__stdout__.write(_MARKER + json.dumps(results) + "\n")
+    sys.__stdout__.flush()
+
+
+_main()
+'''
+
+
+def build_call_harness(
+    code: str,
+    cases: List[Dict[str, Any]],
+    import_timeout: float,
+    max_output: Optional[int] = None
+) -> str:
+    """
+    Return a Python program that imports `code` once and makes one call per
+    case. Each case is a dict with 'function' (name), 'args' (JSON text) and
+    'timeout' (seconds); importing the code may take up to `import_timeout`
+    seconds, and each call keeps at most `max_output` bytes per stream.
+    """
+    payload = json.dumps({
+        'code': code,
+        'cases': cases,
+        'import_timeout': import_timeout,
+        'max_output': max_output
+    }).encode('utf-8')
+    return (
+        _CALL_HARNESS_TEMPLATE
+        .replace('__PAYLOAD__', base64.b64encode(payload).decode('ascii'))
+        .replace('__MARKER__', repr(RESULTS_MARKER))
+    )
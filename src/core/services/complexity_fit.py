@@ -0,0 +1,103 @@
+"""
+Fitting measured runtimes to a time-complexity class.
+
+For every class f(n) the runtimes are fitted to t = a + b * f(n) with b >= 0;
+the constant a absorbs interpreter start-up and I/O that does not grow with
+n. Residuals are weighted by 1/t, so each is a share of its runtime: timing
+noise grows with the runtime, and unweighted the largest sizes alone would
+decide the fit.
+
+The measured class is the simplest one that no slower class beats by a clear
+margin (a relative error FAIL_MARGIN times smaller), or that fits within
+FIT_TOLERANCE anyway. n and n log n fit noisy timings almost equally well,
+and the student gets the benefit of the doubt: a solution fails only when a
+slower class explains its timings clearly better.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from core.entities.test_case import Testcase
+
+COMPLEXITY_CLASSES = Testcase.valid_complexity_classes
+
+# Runtimes that vary less than this across all sizes (in ms, or as a share
+# of the fastest run) count as constant
+NOISE_FLOOR_MS = 2.0
+NOISE_FLOOR_SHARE = 0.1
+
+# A slower class is measured only if its relative error is this many times
+# smaller than that of every simpler class
+FAIL_MARGIN = 2.0
+# A class whose fit is off by at most this share of the runtimes, root mean
+# square, explains them as well as timing noise allows
+FIT_TOLERANCE = 0.05
+# Runtimes are weighted as at least this long, so 0 ms runs stay finite
+MIN_WEIGHTED_MS = 1.0
+
+_GROWTH = {
+    '1': lambda n: 1.0,
+    'log n': lambda n: math.log2(n),
+    'n': lambda n: float(n),
+    'n log n': lambda n: n * math.log2(n),
+    'n^2': lambda n: float(n) ** 2,
+    'n^3': lambda n: float(n) ** 3,
+}
+
+
+@dataclass(frozen=True)
+class ComplexityFit:
+    best: str
+    r_squared: Dict[str, float]  # per class, how much of the variation its fit explains
+
+    def within(self, max_class: str) -> bool:
+        """Whether the measured class is no worse than `max_class`."""
+        return complexity_rank(self.best) <= complexity_rank(max_class)
+
+
+def complexity_rank(name: str) -> int:
+    return COMPLEXITY_CLASSES.index(name)
+
+
+def _weighted_fit(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float]:
+    """
+    Least-squares line y = a + b x (b >= 0) weighted by 1/y^2. Returns the
+    weighted sum of squared residuals and of squared deviations from the
+    weighted mean.
+    """
+    weights = [1.0 / max(y, MIN_WEIGHTED_MS) ** 2 for y in ys]
+    total_weight = sum(weights)
+    mean_x = sum(w * x for w, x in zip(weights, xs)) / total_weight
+    mean_y = sum(w * y for w, y in zip(weights, ys)) / total_weight
+    var_x = sum(w * (x - mean_x) ** 2 for w, x in zip(weights, xs))
+    slope = sum(w * (x - mean_x) * (y - mean_y) for w, x, y in zip(weights, xs, ys)) / var_x if var_x else 0.0
+    slope = max(slope, 0.0)
+    intercept = mean_y - slope * mean_x
+    residual = sum(w * (y - intercept - slope * x) ** 2 for w, x, y in zip(weights, xs, ys))
+    total = sum(w * (y - mean_y) ** 2 for w, y in zip(weights, ys))
+    return residual, total
+
+
+def fit_complexity(sizes: List[int], times_ms: List[float]) -> ComplexityFit:
+    """The complexity class that best explains runtimes `times_ms` measured at input sizes `sizes`."""
+    if len(sizes) != len(times_ms) or len(sizes) < 2:
+        raise ValueError("Need a runtime for each of at least two input sizes")
+
+    fits = {
+        name: _weighted_fit([_GROWTH[name](n) for n in sizes], times_ms)
+        for name in COMPLEXITY_CLASSES
+    }
+    # Root mean square of the residuals as shares of the runtimes
+    errors = {name: math.sqrt(residual / len(sizes)) for name, (residual, _) in fits.items()}
+    r_squared = {
+        name: round(1 - residual / total, 4) if total else 1.0
+        for name, (residual, total) in fits.items()
+    }
+
+    if max(times_ms) - min(times_ms) <= max(NOISE_FLOOR_MS, NOISE_FLOOR_SHARE * min(times_ms)):
+        return ComplexityFit('1', r_squared)
+    for i, name in enumerate(COMPLEXITY_CLASSES[:-1]):
+        slower = min(errors[other] for other in COMPLEXITY_CLASSES[i + 1:])
+        if errors[name] <= max(FAIL_MARGIN * slower, FIT_TOLERANCE):
+            return ComplexityFit(name, r_squared)
+    return ComplexityFit(COMPLEXITY_CLASSES[-1], r_squared)
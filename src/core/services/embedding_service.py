@@ -1,9 +1,15 @@
+import logging
 import pickle
 from datetime import datetime
 from typing import Optional, List
 
+import numpy as np
+
 from core.exceptions.validation_error import ValidationError
 from core.entities.embedding import Embedding
+from core.services.similarity_engine import EmbeddingMatrix
+
+logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
@@ -23,6 +29,42 @@ class EmbeddingService:
             raise ValidationError(f"Failed to deserialize embedding: {e}")
         return vec
     
+    def get_assignment_embeddings(
+        self,
+        assignment_id: int,
+        dimensions: int,
+        exclude_submission_id: Optional[int] = None
+    ) -> EmbeddingMatrix:
+        """
+        The embeddings of an assignment's submissions, fetched in one query
+        and decoded into one contiguous array. Embeddings that are not
+        vectors of `dimensions` values (another model's) are skipped.
+        """
+        embeddings = [
+            emb for emb in self.embedding_repo.find_by_assignment(assignment_id)
+            if emb.vector_ref and emb.get_submission_id() != exclude_submission_id
+        ]
+        vectors = np.empty((len(embeddings), dimensions), dtype=np.float64)
+        submission_ids = []
+        for emb in embeddings:
+            try:
+                vec = pickle.loads(emb.vector_ref)
+            except Exception as e:
+                raise ValidationError(f"Failed to deserialize embedding: {e}")
+            try:
+                vec = np.asarray(vec, dtype=np.float64)
+            except (TypeError, ValueError):
+                vec = None
+            if vec is None or vec.shape != (dimensions,):
+                logger.warning(
+                    f"Skipping submission {emb.get_submission_id()}: embedding is not "
+                    f"a vector of {dimensions} values"
+                )
+                continue
+            vectors[len(submission_ids)] = vec
+            submission_ids.append(emb.get_submission_id())
+        return EmbeddingMatrix(submission_ids, vectors[:len(submission_ids)])
+
     def generate_and_store_embedding(self, submission_id: int, code_text: str) -> List[float]:
         if not self.embedding_client:
             raise ValidationError("Embedding client not configured")
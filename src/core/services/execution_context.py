@@ -0,0 +1,55 @@
+"""
+Per-execution limits for the sandbox.
+
+SandboxService is a process-wide singleton shared by request threads and
+grading threads, so limits are never stored on it. Each execution gets its
+own frozen ExecutionContext that is passed down to the executors.
+"""
+from dataclasses import dataclass
+from numbers import Real
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ExecutionContext:
+    language: str
+    timeout: float  # seconds
+    memory_limit_mb: int
+    max_output_bytes: Optional[int] = None  # per stream; None = unbounded
+
+    @property
+    def timeout_ms(self) -> int:
+        return round(self.timeout * 1000)
+
+    @property
+    def memory_limit_bytes(self) -> int:
+        return self.memory_limit_mb * 1024 * 1024
+
+    def describe_timeout(self) -> str:
+        return f"Execution timed out after {self.timeout:g} seconds"
+
+    def describe_output_limit(self) -> str:
+        return f"Output limit exceeded ({self.max_output_bytes} bytes per stream)"
+
+    @classmethod
+    def for_test_case(
+        cls,
+        test_case,
+        language: str,
+        default_timeout: float,
+        default_memory_limit_mb: int,
+        max_output_bytes: Optional[int] = None
+    ):
+        """Limits from the test case's timeout_ms / memory_limit_mb columns, else the defaults."""
+        timeout_ms = getattr(test_case, 'timeout_ms', None)
+        memory_limit_mb = getattr(test_case, 'memory_limit_mb', None)
+        return cls(
+            language=language,
+            timeout=timeout_ms / 1000 if _positive(timeout_ms) else default_timeout,
+            memory_limit_mb=int(memory_limit_mb) if _positive(memory_limit_mb) else default_memory_limit_mb,
+            max_output_bytes=max_output_bytes
+        )
+
+
+def _positive(value) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool) and value > 0
@@ -0,0 +1,216 @@
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from core.entities.result import Result
+from core.entities.sandbox_job import SandboxJob
+from core.exceptions.validation_error import ValidationError
+from core.services.sandbox_service import case_content_hash, expected_preview, summarize_results
+from config.settings import GRADER_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def local_worker_id() -> str:
+    """Names this process among graders that may share the queue from several hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class GradingService:
+    """
+    FR-05: Automated grading.
+    Runs queued sandbox jobs outside the web request: loads the submission,
+    runs its test cases through the sandbox and records the outcome. Jobs
+    carrying a test run instead are editor "Run tests" requests.
+    """
+
+    def __init__(
+        self,
+        sandbox_service,
+        sandbox_job_repo,
+        submission_repo,
+        test_case_repo,
+        result_repo=None,
+        test_run_service=None,
+        worker_id: str = None
+    ):
+        self.sandbox_service = sandbox_service
+        self.sandbox_job_repo = sandbox_job_repo
+        self.submission_repo = submission_repo
+        self.test_case_repo = test_case_repo
+        self.result_repo = result_repo
+        self.test_run_service = test_run_service
+        self.worker_id = worker_id or local_worker_id()
+
+    def claim_job(self, job: SandboxJob) -> Optional[SandboxJob]:
+        """
+        Lease a queued job to this grader so no other picks it up. None if
+        it is no longer queued: another grader claimed or it was cancelled.
+        """
+        return self.sandbox_job_repo.claim(job.get_id(), self.worker_id, GRADER_LEASE_SECONDS)
+
+    def _reusable_results(self, submission, test_cases, hashes) -> Dict[int, Dict[str, Any]]:
+        """
+        {test case index: stored result} for test cases whose content is
+        unchanged since the submission was last graded.
+        """
+        if not self.result_repo:
+            return {}
+        stored = {
+            r.get_test_case_id(): r
+            for r in self.result_repo.find_by_submission(submission.get_id())
+            if r.test_case_hash
+        }
+        reusable = {}
+        for i, (tc, content_hash) in enumerate(zip(test_cases, hashes)):
+            previous = stored.get(tc.get_id())
+            if previous and previous.test_case_hash == content_hash:
+                reusable[i] = _stored_result_view(tc, previous)
+        return reusable
+
+    def grade_submission(self, submission) -> Dict[str, Any]:
+        """
+        Run the test cases for a submission and persist score and results.
+        On a regrade only test cases that are new or whose content changed are
+        executed; the rest keep their stored result and the score is
+        recomputed over both.
+        """
+        test_cases = self.test_case_repo.list_by_assignment(submission.get_assignment_id())
+        hashes = [case_content_hash(tc) for tc in test_cases]
+        reusable = self._reusable_results(submission, test_cases, hashes)
+        stale = [i for i in range(len(test_cases)) if i not in reusable]
+
+        submission.status = "running"
+        self.submission_repo.update(submission)
+
+        if not reusable:
+            results = self.sandbox_service.run_all_tests(
+                submission.content or "",
+                test_cases,
+                submission.language
+            )
+        else:
+            outcomes = dict(reusable)
+            if stale:
+                executed = self.sandbox_service.run_all_tests(
+                    submission.content or "",
+                    [test_cases[i] for i in stale],
+                    submission.language
+                )
+                outcomes.update(zip(stale, executed.get('results', [])))
+            results = summarize_results(test_cases, [outcomes[i] for i in range(len(test_cases))])
+            logger.info(
+                f"Submission {submission.get_id()}: reused {len(reusable)} stored results, "
+                f"ran {len(stale)} test cases"
+            )
+        results['rerun_count'] = len(stale)
+
+        submission.status = "graded"
+        submission.score = results.get('score', 0.0)
+        submission.grade_at = datetime.now()
+        self.submission_repo.update(submission)
+
+        if self.result_repo:
+            # A regrade replaces the previous run's results
+            self.result_repo.delete_by_submission(submission.get_id())
+            for i, res in zip(range(len(test_cases)), results.get('results', [])):
+                # Timeouts and sandbox errors may not happen again, so those
+                # results carry no hash and are always re-run
+                deterministic = not (res.get('timed_out') or res.get('transient'))
+                self.result_repo.save_result(Result(
+                    id=None,
+                    submission_id=submission.get_id(),
+                    test_case_id=res.get('test_case_id'),
+                    passed=res.get('passed'),
+                    stdout=res.get('stdout'),
+                    stderr=res.get('stderr'),
+                    runtime_ms=res.get('runtime_ms'),
+                    memory_kb=res.get('memory_kb'),
+                    exit_code=res.get('exit_code'),
+                    error_message="Output truncated" if res.get('output_truncated') else None,
+                    created_at=datetime.now(),
+                    test_case_hash=hashes[i] if deterministic else None,
+                    measurements=res.get('measurements')
+                ))
+
+        return results
+
+    def process_job(self, job_id: int) -> Optional[SandboxJob]:
+        """
+        Grade the submission behind a claimed job and record how the job ended:
+        completed, timeout (any test case hit its limit) or failed.
+        """
+        job = self.sandbox_job_repo.get_by_id(job_id)
+        if not job:
+            raise ValidationError("Sandbox job not found")
+
+        if job.status == 'cancelled':
+            return job
+        if job.status == 'queued':
+            claimed = self.claim_job(job)
+            if claimed is None:
+                return self.sandbox_job_repo.get_by_id(job_id)
+            job = claimed
+
+        if job.test_run_id is not None:
+            return self._process_test_run(job)
+
+        submission = self.submission_repo.get_by_id(job.get_submission_id())
+        if not submission:
+            job.mark_failed("Submission not found")
+            return self.sandbox_job_repo.update(job)
+
+        try:
+            results = self.grade_submission(submission)
+        except Exception as e:
+            logger.error(f"Grading job {job_id} failed: {e}")
+            submission.status = "error"
+            self.submission_repo.update(submission)
+            job.mark_failed(str(e))
+            return self.sandbox_job_repo.update(job)
+
+        if any(r.get('timed_out') for r in results.get('results', [])):
+            job.mark_timeout()
+        else:
+            job.mark_completed(exit_code=0)
+        return self.sandbox_job_repo.update(job)
+
+    def _process_test_run(self, job: SandboxJob) -> SandboxJob:
+        if not self.test_run_service:
+            job.mark_failed("Test runs are not enabled on this grader")
+            return self.sandbox_job_repo.update(job)
+        try:
+            run = self.test_run_service.execute(job.test_run_id)
+        except Exception as e:
+            logger.error(f"Test run job {job.get_id()} failed: {e}")
+            job.mark_failed(str(e))
+            return self.sandbox_job_repo.update(job)
+
+        if run.status == 'failed':
+            job.mark_failed(run.error_message)
+        else:
+            job.mark_completed(exit_code=0)
+        return self.sandbox_job_repo.update(job)
+
+
+def _stored_result_view(test_case, result: Result) -> Dict[str, Any]:
+    """A stored result in the shape run_all_tests reports results in."""
+    actual_output = (result.stdout or '').strip()
+    return {
+        'test_case_id': result.get_test_case_id(),
+        'test_name': test_case.name,
+        'passed': result.passed,
+        'actual_output': actual_output,
+        'expected_output': expected_preview(test_case),
+        'stdout': result.stdout,
+        'stderr': result.stderr,
+        'exit_code': result.exit_code,
+        'runtime_ms': result.runtime_ms,
+        'memory_kb': result.memory_kb,
+        'timed_out': False,
+        'output_truncated': result.error_message == "Output truncated",
+        'measurements': result.measurements,
+        'reused': True
+    }
@@ -0,0 +1,420 @@
+"""
+Comparison of a program's output with a test case's expected output.
+
+Outputs are compared line by line as they are read, stopping at the first
+mismatch, and the result says where the two first differ. Either side may be
+a string or a text file object, and the expected side may also be UTF-8 bytes
+or a memory-mapped payload file; these are walked in place rather than split,
+so a multi-megabyte expected output is never copied as a whole.
+
+Modes (stored per test case in test_cases.compare_mode):
+    exact       identical, ignoring whitespace around the whole output
+    whitespace  same sequence of whitespace-separated tokens
+    lines       each line identical once trimmed; trailing blank lines ignored
+    float       like whitespace, numbers equal within a tolerance
+    unordered   same trimmed non-blank lines, in any order
+    regex       each expected line is a pattern the output line must fully match
+
+Return values of function-call test cases are compared structurally instead
+(compare_values): as decoded JSON, where 'float' allows the tolerance on
+every number and 'unordered' ignores the order of the top-level list.
+"""
+import json
+import math
+import mmap
+import re
+from collections import Counter
+from dataclasses import dataclass
+from itertools import zip_longest
+from numbers import Real
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from core.entities.test_case import Testcase
+
+COMPARE_MODES = Testcase.valid_compare_modes
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+# Longest excerpt of a differing line kept for feedback
+SNIPPET_CHARS = 80
+
+# Characters compared at a time when both outputs are strings
+CHUNK_CHARS = 64 * 1024
+
+_TOKEN = re.compile(r'\S+')
+
+_BYTES = (bytes, bytearray, mmap.mmap)
+
+Line = Tuple[int, str]  # (1-based line number, text without the newline)
+
+
+@dataclass(frozen=True)
+class Comparison:
+    passed: bool
+    line: Optional[int] = None  # 1-based line of the output where it first differs
+    column: Optional[int] = None  # 1-based column within that line
+    expected: Optional[str] = None  # excerpt of what was expected there; None = nothing more
+    actual: Optional[str] = None  # excerpt of what the output had there; None = output ended
+    path: Optional[str] = None  # where a return value differs, e.g. "[2]['name']"; '' = the whole value
+
+    def describe(self) -> str:
+        if self.passed:
+            return "Output matches"
+        if self.path is not None:
+            where = f"Return value{self.path}"
+            if self.actual is None:
+                return f"{where}: expected {self.expected} but it is missing"
+            if self.expected is None:
+                return f"{where}: unexpected {self.actual}"
+            return f"{where}: expected {self.expected} but got {self.actual}"
+        if self.actual is None:
+            return f"Line {self.line}: expected {self.expected!r} but the output ended"
+        if self.expected is None:
+            return f"Line {self.line}: unexpected extra output {self.actual!r}"
+        return f"Line {self.line}, column {self.column}: expected {self.expected!r} but got {self.actual!r}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'line': self.line,
+            'column': self.column,
+            'expected': self.expected,
+            'actual': self.actual,
+            'path': self.path,
+            'message': self.describe()
+        }
+
+
+MATCH = Comparison(passed=True)
+
+
+def comparison_settings(test_case) -> Tuple[str, Optional[float]]:
+    """(mode, tolerance) from the test case's compare_mode / compare_tolerance, else exact matching."""
+    mode = getattr(test_case, 'compare_mode', None)
+    tolerance = getattr(test_case, 'compare_tolerance', None)
+    return (
+        mode if mode in COMPARE_MODES else 'exact',
+        float(tolerance) if isinstance(tolerance, Real) and tolerance >= 0 else None
+    )
+
+
+def compare_output(actual, expected, mode: str = 'exact', tolerance: Optional[float] = None) -> Comparison:
+    """Compare `actual` with `expected` (strings, text files or UTF-8 bytes) under `mode`."""
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Invalid compare mode: {mode}. Allowed: {COMPARE_MODES}")
+
+    if isinstance(actual, str) and isinstance(expected, str):
+        if mode != 'regex' and actual == expected:
+            return MATCH
+        if mode == 'exact':
+            return _compare_exact_text(actual, expected)
+    if isinstance(actual, str) and isinstance(expected, _BYTES) and mode == 'exact':
+        return _compare_exact_text(actual.encode('utf-8'), expected)
+
+    actual_lines = iter_lines(actual)
+    expected_lines = iter_lines(expected)
+
+    if mode == 'exact':
+        return _compare_lines(_stripped(actual_lines), _stripped(expected_lines), _first_difference)
+    if mode == 'lines':
+        return _compare_lines(_trimmed(actual_lines), _trimmed(expected_lines), _first_difference)
+    if mode == 'regex':
+        return _compare_lines(_trimmed(actual_lines), _trimmed(expected_lines), _pattern_mismatch)
+    if mode == 'unordered':
+        return _compare_unordered(_trimmed(actual_lines), _trimmed(expected_lines))
+
+    if mode == 'float':
+        tol = DEFAULT_FLOAT_TOLERANCE if tolerance is None else tolerance
+        same = lambda a, e: a == e or _numbers_close(a, e, tol)
+    else:
+        same = str.__eq__
+    return _compare_tokens(_tokens(actual_lines), _tokens(expected_lines), same)
+
+
+def compare_values(actual: Any, expected: Any, mode: str = 'exact', tolerance: Optional[float] = None) -> Comparison:
+    """
+    Structural comparison of two values decoded from JSON. Numbers are equal
+    by value (2 == 2.0, but True is not 1), lists element by element, objects
+    key by key; the result's path says where they first differ.
+    """
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Invalid compare mode: {mode}. Allowed: {COMPARE_MODES}")
+    tol = (DEFAULT_FLOAT_TOLERANCE if tolerance is None else tolerance) if mode == 'float' else None
+    if mode == 'unordered' and isinstance(actual, list) and isinstance(expected, list):
+        actual, expected = sorted(actual, key=_canonical), sorted(expected, key=_canonical)
+    return _compare_value(actual, expected, '', tol)
+
+
+# Stands in for the element or key one side does not have
+_MISSING = object()
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def _value_difference(path: str, actual: Any, expected: Any) -> Comparison:
+    return Comparison(
+        False,
+        path=path,
+        expected=None if expected is _MISSING else _snippet(_canonical(expected)),
+        actual=None if actual is _MISSING else _snippet(_canonical(actual))
+    )
+
+
+def _compare_value(actual: Any, expected: Any, path: str, tolerance: Optional[float]) -> Comparison:
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        same = actual is expected
+    elif isinstance(expected, Real) and isinstance(actual, Real):
+        same = actual == expected or (
+            tolerance is not None and math.isclose(actual, expected, rel_tol=tolerance, abs_tol=tolerance)
+        )
+    elif isinstance(expected, list) and isinstance(actual, list):
+        children = (
+            (f"{path}[{index}]", got, want)
+            for index, (got, want) in enumerate(zip_longest(actual, expected, fillvalue=_MISSING))
+        )
+        return _compare_children(children, tolerance)
+    elif isinstance(expected, dict) and isinstance(actual, dict):
+        keys = list(expected) + [key for key in actual if key not in expected]
+        children = ((f"{path}[{key!r}]", actual.get(key, _MISSING), expected.get(key, _MISSING)) for key in keys)
+        return _compare_children(children, tolerance)
+    else:
+        same = type(actual) is type(expected) and actual == expected
+    return MATCH if same else _value_difference(path, actual, expected)
+
+
+def _compare_children(children, tolerance: Optional[float]) -> Comparison:
+    for path, got, want in children:
+        if got is _MISSING or want is _MISSING:
+            return _value_difference(path, got, want)
+        comparison = _compare_value(got, want, path, tolerance)
+        if not comparison.passed:
+            return comparison
+    return MATCH
+
+
+def iter_lines(text) -> Iterator[Line]:
+    """
+    Numbered lines of a string, text file or UTF-8 bytes, as
+    str.split('\\n') would give them but without materialising the list.
+    """
+    if text is None:
+        text = ''
+    if isinstance(text, (str, *_BYTES)):
+        newline = '\n' if isinstance(text, str) else b'\n'
+        number, start = 1, 0
+        while True:
+            end = text.find(newline, start)
+            if end < 0:
+                yield number, _decoded(text[start:])
+                return
+            yield number, _decoded(text[start:end])
+            number, start = number + 1, end + 1
+
+    number, line = 0, ''
+    for number, line in enumerate(text, 1):
+        yield number, line[:-1] if line.endswith('\n') else line
+    if not line or line.endswith('\n'):
+        yield number + 1, ''
+
+
+def _decoded(text) -> str:
+    return text if isinstance(text, str) else bytes(text).decode('utf-8', errors='replace')
+
+
+def _blank(text: str) -> bool:
+    return not text or text.isspace()
+
+
+def _stripped(lines: Iterable[Line]) -> Iterator[Line]:
+    """The lines of the whole text with surrounding whitespace stripped, as text.strip() would leave it."""
+    lines = iter(lines)
+    held = None
+    for number, text in lines:
+        if not _blank(text):
+            held = (number, text.lstrip())
+            break
+    if held is None:
+        return
+
+    blanks = []
+    for number, text in lines:
+        if _blank(text):
+            blanks.append((number, text))
+            continue
+        yield held
+        yield from blanks
+        blanks = []
+        held = (number, text)
+    yield held[0], held[1].rstrip()
+
+
+def _trimmed(lines: Iterable[Line]) -> Iterator[Line]:
+    """Each line trimmed, without the trailing blank lines."""
+    blanks = []
+    for number, text in lines:
+        if _blank(text):
+            blanks.append((number, ''))
+            continue
+        yield from blanks
+        blanks = []
+        yield number, text.strip()
+
+
+def _tokens(lines: Iterable[Line]) -> Iterator[Tuple[int, int, str]]:
+    """(line, column, token) for every whitespace-separated token."""
+    for number, text in lines:
+        for match in _TOKEN.finditer(text):
+            yield number, match.start() + 1, match.group()
+
+
+def _first_difference(actual: str, expected: str) -> Optional[int]:
+    """1-based column where two lines first differ, or None if they are equal."""
+    if actual == expected:
+        return None
+    for column, (a, e) in enumerate(zip(actual, expected), 1):
+        if a != e:
+            return column
+    return min(len(actual), len(expected)) + 1
+
+
+def _pattern_mismatch(actual: str, pattern: str) -> Optional[int]:
+    try:
+        return None if re.fullmatch(pattern, actual) else 1
+    except re.error:
+        return 1
+
+
+def _numbers_close(actual: str, expected: str, tolerance: float) -> bool:
+    try:
+        a, e = float(actual), float(expected)
+    except ValueError:
+        return False
+    return math.isclose(a, e, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def _snippet(text: Optional[str], column: int = 1) -> Optional[str]:
+    """Up to SNIPPET_CHARS of `text`, starting a little before `column`."""
+    if text is None or len(text) <= SNIPPET_CHARS:
+        return text
+    start = max(0, min(column - 1 - SNIPPET_CHARS // 4, len(text) - SNIPPET_CHARS))
+    return text[start:start + SNIPPET_CHARS]
+
+
+def _strip_bounds(text) -> Tuple[int, int]:
+    """
+    [start, end) of text.strip() within text, without copying it. For bytes
+    only ASCII whitespace counts, which is all a test's output is padded with.
+    """
+    start, end = 0, len(text)
+    while start < end and text[start:start + 1].isspace():
+        start += 1
+    while end > start and text[end - 1:end].isspace():
+        end -= 1
+    return start, end
+
+
+def _line_at(text, start: int, end: int):
+    """The line of text[:end] that starts at `start`."""
+    stop = text.find('\n' if isinstance(text, str) else b'\n', start, end)
+    return text[start:stop if stop >= 0 else end]
+
+
+def _compare_exact_text(actual, expected) -> Comparison:
+    """
+    Exact mode for two strings, or two UTF-8 byte sequences: the stripped
+    texts are compared a chunk at a time in place, and only the lines around
+    the first difference are copied (and decoded). Gives the same Comparison
+    as the line-by-line path.
+    """
+    newline = '\n' if isinstance(actual, str) else b'\n'
+    a0, a1 = _strip_bounds(actual)
+    e0, e1 = _strip_bounds(expected)
+    if a0 == a1 or e0 == e1:
+        # An output that is all whitespace has no lines at all
+        if a0 == a1 and e0 == e1:
+            return MATCH
+        if a0 == a1:
+            return Comparison(False, 1, 1, _snippet(_decoded(_line_at(expected, e0, e1))), None)
+        line = actual.count(newline, 0, a0) + 1
+        return Comparison(False, line, 1, None, _snippet(_decoded(_line_at(actual, a0, a1))))
+    length = min(a1 - a0, e1 - e0)
+
+    offset = length
+    for chunk in range(0, length, CHUNK_CHARS):
+        size = min(CHUNK_CHARS, length - chunk)
+        got = actual[a0 + chunk:a0 + chunk + size]
+        want = expected[e0 + chunk:e0 + chunk + size]
+        if got != want:
+            offset = chunk + _first_difference(got, want) - 1
+            break
+    else:
+        if a1 - a0 == e1 - e0:
+            return MATCH
+
+    # Everything before `offset` is identical, so the differing line starts
+    # at the same distance into both stripped texts
+    line_start = max(a0, actual.rfind(newline, a0, a0 + offset) + 1) - a0
+    line = actual.count(newline, 0, a0 + line_start) + 1
+    got = _line_at(actual, a0 + line_start, a1)
+    want = _line_at(expected, e0 + line_start, e1)
+    next_start = line_start + len(got) + 1
+    got, want = _decoded(got), _decoded(want)
+    column = _first_difference(got, want)
+    if column is not None:
+        return Comparison(False, line, column, _snippet(want, column), _snippet(got, column))
+
+    # The line matches but one output ends with it
+    if a0 + next_start > a1:
+        return Comparison(False, line + 1, 1, _snippet(_decoded(_line_at(expected, e0 + next_start, e1))), None)
+    return Comparison(False, line + 1, 1, None, _snippet(_decoded(_line_at(actual, a0 + next_start, a1))))
+
+
+def _compare_lines(
+    actual: Iterator[Line],
+    expected: Iterator[Line],
+    difference: Callable[[str, str], Optional[int]]
+) -> Comparison:
+    last_line = 0
+    for got, want in zip_longest(actual, expected):
+        if got is None:
+            return Comparison(False, last_line + 1, 1, _snippet(want[1]), None)
+        last_line = got[0]
+        if want is None:
+            return Comparison(False, got[0], 1, None, _snippet(got[1]))
+        column = difference(got[1], want[1])
+        if column is not None:
+            return Comparison(False, got[0], column, _snippet(want[1], column), _snippet(got[1], column))
+    return MATCH
+
+
+def _compare_tokens(actual, expected, same: Callable[[str, str], bool]) -> Comparison:
+    last_line = 0
+    for got, want in zip_longest(actual, expected):
+        if got is None:
+            return Comparison(False, last_line + 1, 1, _snippet(want[2]), None)
+        last_line = got[0]
+        if want is None:
+            return Comparison(False, got[0], got[1], None, _snippet(got[2]))
+        if not same(got[2], want[2]):
+            return Comparison(False, got[0], got[1], _snippet(want[2]), _snippet(got[2]))
+    return MATCH
+
+
+def _compare_unordered(actual: Iterator[Line], expected: Iterator[Line]) -> Comparison:
+    """
+    Multiset comparison of non-blank lines. Memory grows with the number of
+    distinct expected lines, since any of them may come last.
+    """
+    remaining = Counter(text for _, text in expected if text)
+    last_line = 0
+    for number, text in actual:
+        last_line = number
+        if not text:
+            continue
+        if not remaining[text]:
+            return Comparison(False, number, 1, None, _snippet(text))
+        remaining[text] -= 1
+    missing = next((text for text, count in remaining.items() if count > 0), None)
+    if missing is not None:
+        return Comparison(False, last_line + 1, 1, _snippet(missing), None)
+    return MATCH
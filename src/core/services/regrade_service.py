@@ -0,0 +1,132 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from core.entities.regrade_batch import RegradeBatch
+from core.entities.sandbox_job import SandboxJob
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from core.services.sandbox_service import seconds_between
+
+
+class RegradeService:
+    """
+    Bulk regrades. An assignment or course regrade queues one regrade-lane
+    sandbox job per latest submission in a single transaction; the grading
+    worker pool works through them, and progress is read back from the jobs.
+    """
+
+    def __init__(
+        self,
+        sandbox_service,
+        regrade_batch_repo,
+        submission_repo,
+        assignment_repo,
+        course_repo
+    ):
+        self.sandbox_service = sandbox_service
+        self.regrade_batch_repo = regrade_batch_repo
+        self.submission_repo = submission_repo
+        self.assignment_repo = assignment_repo
+        self.course_repo = course_repo
+
+    def _verify_can_regrade(self, user, course_id):
+        course = self.course_repo.get_by_id(course_id)
+        if not course:
+            raise ValidationError("Course not found")
+        if user.role == 'admin':
+            return course
+        if user.role != 'instructor' or course.get_instructor_id() != user.get_id():
+            raise AuthError("You do not own this course")
+        return course
+
+    def _course_of_batch(self, batch: RegradeBatch):
+        if batch.scope == 'course':
+            return batch.scope_id
+        assignment = self.assignment_repo.get_by_id(batch.scope_id)
+        return assignment.get_course_id() if assignment else None
+
+    def _start(self, user, scope: str, scope_id: int) -> RegradeBatch:
+        batch = RegradeBatch(id=None, scope=scope, scope_id=scope_id, requested_by=user.get_id())
+        return self.regrade_batch_repo.create(
+            batch, self.sandbox_service.timeout, self.sandbox_service.memory_limit_mb
+        )
+
+    def regrade_assignment(self, user, assignment_id: int) -> RegradeBatch:
+        assignment = self.assignment_repo.get_by_id(assignment_id)
+        if not assignment:
+            raise ValidationError("Assignment not found")
+        self._verify_can_regrade(user, assignment.get_course_id())
+        return self._start(user, 'assignment', assignment_id)
+
+    def regrade_course(self, user, course_id: int) -> RegradeBatch:
+        self._verify_can_regrade(user, course_id)
+        return self._start(user, 'course', course_id)
+
+    def regrade_submission(self, user, submission) -> SandboxJob:
+        """Queue a single submission on the regrade lane."""
+        assignment = self.assignment_repo.get_by_id(submission.get_assignment_id())
+        if not assignment:
+            raise ValidationError("Assignment not found")
+        self._verify_can_regrade(user, assignment.get_course_id())
+
+        submission.status = "queued"
+        self.submission_repo.update(submission)
+        return self.sandbox_service.create_job(
+            submission.get_id(), lane='regrade', student_id=submission.get_student_id()
+        )
+
+    def get_batch(self, user, batch_id: int) -> RegradeBatch:
+        batch = self.regrade_batch_repo.get_by_id(batch_id)
+        if not batch:
+            raise ValidationError("Regrade not found")
+        course_id = self._course_of_batch(batch)
+        if course_id is None:
+            raise ValidationError("Assignment not found")
+        self._verify_can_regrade(user, course_id)
+        return batch
+
+    def get_progress(self, user, batch_id: int) -> Dict[str, Any]:
+        """
+        done / failed / remaining counts and an ETA from the batch's throughput
+        so far. A batch with nothing left to run is marked completed.
+        """
+        batch = self.get_batch(user, batch_id)
+        counts = self.regrade_batch_repo.count_jobs(batch_id)
+        done = counts.get('completed', 0) + counts.get('timeout', 0)
+        failed = counts.get('failed', 0)
+        queued = counts.get('queued', 0)
+        running = counts.get('running', 0)
+        remaining = queued + running
+
+        if batch.status == 'running' and remaining == 0:
+            batch.mark_completed()
+            batch = self.regrade_batch_repo.update(batch)
+
+        eta_s = None
+        throughput = None
+        finished = done + failed
+        elapsed = seconds_between(self.regrade_batch_repo.first_started_at(batch_id), datetime.utcnow())
+        if finished and elapsed:
+            throughput = finished / elapsed
+            if remaining and batch.status == 'running':
+                eta_s = round(remaining / throughput, 1)
+
+        return {
+            'batch': batch.to_dict(),
+            'total': batch.total,
+            'done': done,
+            'failed': failed,
+            'cancelled': counts.get('cancelled', 0),
+            'queued': queued,
+            'running': running,
+            'percent': round(finished / batch.total * 100, 1) if batch.total else 100.0,
+            'per_minute': round(throughput * 60, 1) if throughput else None,
+            'eta_s': eta_s
+        }
+
+    def cancel(self, user, batch_id: int) -> Dict[str, Any]:
+        """Drop the batch's queued jobs; jobs already running finish."""
+        batch = self.get_batch(user, batch_id)
+        if not batch.is_finished():
+            self.regrade_batch_repo.cancel(batch_id)
+        return self.get_progress(user, batch_id)
@@ -0,0 +1,234 @@
+"""
+Batched test harness for Python submissions.
+
+Builds a single program that carries the student code and every test case's
+stdin, runs each case in a fresh __main__ namespace with its own time limit
+and prints the per-case outcomes as JSON after a marker line. One sandbox
+execution (one process / one Piston round trip) then grades the whole
+submission. Per-case runtime_ms is CPU time; memory_kb is the harness
+process's peak RSS so far, an upper bound for the case. A case that writes
+more than `max_output` bytes to stdout or stderr is stopped and flagged
+output_truncated. Each case's stdin is on file descriptor 0 for the length of
+the case, so `open(0)` and `os.read(0, ...)` read it as in a plain run.
+"""
+import base64
+import json
+from typing import List, Dict, Any, Optional
+
+RESULTS_MARKER = "\x00ACCL-HARNESS-RESULTS\x00"
+
+_HARNESS_TEMPLATE = r'''
+import base64, builtins, io, json, linecache, os, signal, sys, tempfile, time, traceback
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_PAYLOAD = json.loads(base64.b64decode(b"__PAYLOAD__").decode("utf-8"))
+_MARKER = __MARKER__
+_FILENAME = "main.py"
+_MAX_OUTPUT = _PAYLOAD["max_output"]
+
+
+class _CaseTimeout(BaseException):
+    pass
+
+
+class _OutputLimit(BaseException):
+    pass
+
+
+class _CappedBuffer(io.BytesIO):
+    """Keeps up to _MAX_OUTPUT bytes; writing past that stops the case."""
+
+    def write(self, data):
+        if _MAX_OUTPUT is not None:
+            room = _MAX_OUTPUT - self.getbuffer().nbytes
+            if len(data) > room:
+                super().write(bytes(data[:max(room, 0)]))
+                raise _OutputLimit()
+        return super().write(data)
+
+
+def _on_alarm(signum, frame):
+    raise _CaseTimeout()
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _stdin_fd(data):
+    """A new descriptor that reads `data` from its start."""
+    r, w = os.pipe()
+    written = 0
+    try:
+        os.set_blocking(w, False)
+        if data:
+            written = os.write(w, data)
+    except BlockingIOError:
+        pass
+    finally:
+        os.close(w)
+    if written == len(data):
+        return r
+    # Too large for the pipe buffer: a temporary file needs no writer
+    os.close(r)
+    with tempfile.TemporaryFile() as f:
+        f.write(data)
+        f.flush()
+        fd = os.dup(f.fileno())
+    os.lseek(fd, 0, os.SEEK_SET)
+    return fd
+
+
+def _redirect_stdin(data):
+    """Put `data` on fd 0; returns the descriptor to restore it from (None if 0 was closed)."""
+    try:
+        saved = os.dup(0)
+    except OSError:
+        saved = None
+    source = _stdin_fd(data)
+    os.dup2(source, 0)
+    os.close(source)
+    return saved
+
+
+def _restore_stdin(saved):
+    # The case may have closed fd 0 (with open(0): ...); dup2 reopens it
+    if saved is None:
+        try:
+            os.close(0)
+        except OSError:
+            pass
+    else:
+        os.dup2(saved, 0)
+        os.close(saved)
+
+
+def _exit_status(exc):
+    if exc.code is None:
+        return 0, ""
+    if isinstance(exc.code, int):
+        return exc.code & 0xFF, ""
+    return 1, str(exc.code) + "\n"
+
+
+def _run_case(code_obj, stdin, timeout):
+    real = (sys.stdin, sys.stdout, sys.stderr)
+    saved_modules = set(sys.modules)
+    recursion_limit = sys.getrecursionlimit()
+    out = io.TextIOWrapper(_CappedBuffer(), encoding="utf-8", errors="replace")
+    err = io.TextIOWrapper(_CappedBuffer(), encoding="utf-8", errors="replace")
+    saved_stdin = _redirect_stdin(stdin.encode("utf-8"))
+    sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+    sys.stdout, sys.stderr = out, err
+
+    namespace = {"__name__": "__main__", "__file__": _FILENAME, "__builtins__": builtins}
+    exit_code, timed_out, truncated, extra = 0, False, False, ""
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        exec(code_obj, namespace)
+    except _CaseTimeout:
+        timed_out, exit_code = True, -1
+    except _OutputLimit:
+        truncated, exit_code = True, -signal.SIGKILL
+    except SystemExit as e:
+        exit_code, extra = _exit_status(e)
+    except BaseException as e:
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        try:
+            traceback.print_exception(type(e), e, tb)
+        except _OutputLimit:
+            truncated = True
+        exit_code = 1
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    wall_ms = int((time.perf_counter() - start) * 1000)
+    cpu_ms = round((time.process_time() - cpu_start) * 1000)
+
+    for stream in (out, err):
+        try:
+            stream.flush()
+        except _OutputLimit:
+            truncated = True
+        except Exception:
+            pass
+    sys.stdin, sys.stdout, sys.stderr = real
+    _restore_stdin(saved_stdin)
+    # Modules the case imported are dropped so the next case re-imports them
+    for name in set(sys.modules) - saved_modules:
+        del sys.modules[name]
+    sys.setrecursionlimit(recursion_limit)
+
+    return {
+        "stdout": out.buffer.getvalue().decode("utf-8", errors="replace"),
+        "stderr": err.buffer.getvalue().decode("utf-8", errors="replace") + extra,
+        "exit_code": exit_code,
+        "runtime_ms": cpu_ms,
+        "wall_ms": wall_ms,
+        "memory_kb": _peak_rss_kb(),
+        "timed_out": timed_out,
+        "output_truncated": truncated,
+    }
+
+
+def _main():
+    code = _PAYLOAD["code"]
+    linecache.cache[_FILENAME] = (len(code), None, code.splitlines(True), _FILENAME)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        code_obj = compile(code, _FILENAME, "exec")
+        compile_error = None
+    except SyntaxError as e:
+        code_obj = None
+        compile_error = "".join(traceback.format_exception_only(type(e), e))
+
+    results = []
+    for case in _PAYLOAD["cases"]:
+        if compile_error is not None:
+            results.append({"stdout": "", "stderr": compile_error, "exit_code": 1,
+                            "runtime_ms": 0, "wall_ms": 0, "memory_kb": None,
+                            "timed_out": False, "output_truncated": False})
+        else:
+            results.append(_run_case(code_obj, case["stdin"], case["timeout"]))
+
+    sys.__stdout__.write(_MARKER + json.dumps(results) + "\n")
+    sys.__stdout__.flush()
+
+
+_main()
+'''
+
+
+def build_harness(code: str, cases: List[Dict[str, Any]], max_output: Optional[int] = None) -> str:
+    """
+    Return a Python program that runs `code` once per case.
+    Each case is a dict with 'stdin' (str) and 'timeout' (seconds); each
+    case keeps at most `max_output` bytes per stream (None = unbounded).
+    """
+    payload = json.dumps({'code': code, 'cases': cases, 'max_output': max_output}).encode('utf-8')
+    return (
+        _HARNESS_TEMPLATE
+        .replace('__PAYLOAD__', base64.b64encode(payload).decode('ascii'))
+        .replace('__MARKER__', repr(RESULTS_MARKER))
+    )
+
+
+def parse_harness_output(stdout: str, expected_cases: int) -> Optional[List[Dict[str, Any]]]:
+    """Extract per-case results from harness stdout; None if the run was incomplete."""
+    _, sep, tail = stdout.rpartition(RESULTS_MARKER)
+    if not sep:
+        return None
+    try:
+        results = json.loads(tail.strip())
+    except ValueError:
+        return None
+    if not isinstance(results, list) or len(results) != expected_cases:
+        return None
+    return results
@@ -0,0 +1,316 @@
+"""
+Local process execution under resource limits.
+
+Student programs run with rlimits on address space, CPU seconds, open files
+and process count, and are reaped with os.wait4 so the child's own CPU time
+and peak RSS are reported instead of wall-clock time around the call.
+Platforms without `resource`/`os.wait4` (Windows) get plain execution with
+wall-clock timing and no memory figure.
+
+The program is started through a small launcher interpreter rather than
+forked from the web/grader process: Linux counts the RSS a process had
+before exec in its ru_maxrss, so a child forked from a 200 MB worker would
+report at least 200 MB. The launcher also applies the rlimits, which keeps
+preexec_fn (unsafe in threaded processes) out of the picture.
+
+Stdin is either text, written through a pipe, or a payload file that the
+child gets as its fd 0, so a large input never passes through this process.
+
+Output is read incrementally and each stream is capped: a program that
+writes more than `max_output` bytes to stdout or stderr is killed and the
+result is flagged `output_truncated`, so a print loop cannot grow the
+grading worker's memory until the timeout fires.
+"""
+import math
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from core.entities.payload_file import PayloadFile
+from core.services.execution_context import ExecutionContext
+
+RLIMITS_SUPPORTED = resource is not None and hasattr(os, 'wait4')
+
+READ_CHUNK = 65536
+
+# A truncated stream keeps this many bytes from its start and its end
+OUTPUT_EXCERPT_CHARS = 8192
+
+# Runs as `python -I -S -c _LAUNCHER <NAME=soft:hard,...> <report-fd> <cmd...>`
+# and reports "<exit code> <cpu seconds> <max rss>"; stdlib builtins only, so
+# it starts in ~15ms
+_LAUNCHER = r'''
+import os, resource, sys
+
+limits, report_fd, cmd = sys.argv[1], int(sys.argv[2]), sys.argv[3:]
+pid = os.fork()
+if pid == 0:
+    os.close(report_fd)
+    for item in filter(None, limits.split(",")):
+        name, _, values = item.partition("=")
+        soft, hard = map(int, values.split(":"))
+        which = getattr(resource, name, None)
+        if which is None:
+            continue
+        current_hard = resource.getrlimit(which)[1]
+        if current_hard != resource.RLIM_INFINITY:
+            hard = min(hard, current_hard)
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(which, (soft, hard))
+        except (ValueError, OSError):
+            pass
+    try:
+        os.execvp(cmd[0], cmd)
+    except OSError as e:
+        os.write(2, ("%s: %s\n" % (cmd[0], e.strerror)).encode())
+    os._exit(127)
+
+_, status, usage = os.wait4(pid, 0)
+report = "%d %f %d" % (os.waitstatus_to_exitcode(status), usage.ru_utime + usage.ru_stime, usage.ru_maxrss)
+os.write(report_fd, report.encode())
+'''
+
+
+def build_rlimits(
+    context: ExecutionContext,
+    max_open_files: int,
+    max_processes: int,
+    limit_address_space: bool = True
+) -> Dict[str, Tuple[int, int]]:
+    """
+    rlimits for one execution as {name: (soft, hard)}. The CPU limit is a
+    backstop one second past the wall-clock timeout; a program that hits it
+    gets SIGXCPU, then SIGKILL at the hard limit. Runtimes that reserve far
+    more address space than they use (the JVM) must bound their heap
+    themselves and pass limit_address_space=False.
+    """
+    cpu_seconds = math.ceil(context.timeout) + 1
+    limits = {
+        'RLIMIT_CPU': (cpu_seconds, cpu_seconds + 1),
+        'RLIMIT_NOFILE': (max_open_files, max_open_files),
+    }
+    if limit_address_space:
+        limits['RLIMIT_AS'] = (context.memory_limit_bytes, context.memory_limit_bytes)
+    if max_processes:
+        # Counts every process of the user account, not just this program's
+        limits['RLIMIT_NPROC'] = (max_processes, max_processes)
+    return limits
+
+
+def _format_limits(limits) -> str:
+    return ','.join(f"{name}={soft}:{hard}" for name, (soft, hard) in (limits or {}).items())
+
+
+def _max_rss_kb(max_rss) -> int:
+    # bytes on macOS, kilobytes elsewhere
+    return int(max_rss // 1024 if sys.platform == 'darwin' else max_rss)
+
+
+def clip_output(text: str, excerpt: int = OUTPUT_EXCERPT_CHARS) -> str:
+    """Keep the head and tail of a truncated stream, with a marker between them."""
+    if len(text) <= 2 * excerpt:
+        return text
+    omitted = len(text) - 2 * excerpt
+    return f"{text[:excerpt]}\n... [output truncated, {omitted} characters omitted] ...\n{text[-excerpt:]}"
+
+
+def _stdin_file(stdin):
+    return stdin.open() if isinstance(stdin, PayloadFile) else None
+
+
+def _stdin_bytes(stdin) -> bytes:
+    return stdin.encode() if isinstance(stdin, str) and stdin else b''
+
+
+def run_process(
+    cmd: List[str],
+    stdin: Union[str, PayloadFile],
+    context: ExecutionContext,
+    cwd: str,
+    env: Dict[str, str],
+    limits: Optional[Dict[str, Tuple[int, int]]] = None,
+    max_output: Optional[int] = None
+) -> Dict[str, object]:
+    """
+    Run `cmd` with a wall-clock timeout from `context`. Returns stdout,
+    stderr, exit_code, timed_out, output_truncated, wall_ms, and cpu_ms /
+    memory_kb when the platform can measure them (None otherwise).
+    Each stream keeps at most `max_output` bytes (None = unbounded).
+    """
+    if not RLIMITS_SUPPORTED:
+        return _run_unlimited(cmd, stdin, context, cwd, env, max_output)
+
+    report_r, report_w = os.pipe()
+    stdin_file = _stdin_file(stdin)
+    start = time.monotonic()
+    try:
+        process = subprocess.Popen(
+            [sys.executable, '-I', '-S', '-c', _LAUNCHER, _format_limits(limits), str(report_w), *cmd],
+            stdin=stdin_file or subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            pass_fds=(report_w,),
+            # Own process group, so a timeout kills the program with its launcher
+            start_new_session=True
+        )
+    finally:
+        os.close(report_w)
+        if stdin_file:
+            stdin_file.close()  # the child holds its own copy
+
+    try:
+        stdout, stderr, timed_out, truncated = _communicate(
+            process, _stdin_bytes(stdin), start + context.timeout, max_output
+        )
+        process.wait()
+        with os.fdopen(report_r, 'rb', closefd=False) as report_file:
+            report = report_file.read()
+    finally:
+        os.close(report_r)
+    wall_ms = int((time.monotonic() - start) * 1000)
+
+    try:
+        exit_code, cpu_seconds, max_rss = report.split()
+        usage = {'exit_code': int(exit_code), 'cpu': float(cpu_seconds), 'maxrss': int(max_rss)}
+    except ValueError:
+        usage = None  # launcher killed (timeout) before reporting
+
+    exit_code = usage['exit_code'] if usage else process.returncode
+    # SIGXCPU means the CPU rlimit backstop fired: report it as a timeout too
+    timed_out = timed_out or exit_code == -signal.SIGXCPU
+
+    return {
+        'stdout': stdout.decode('utf-8', errors='replace'),
+        'stderr': stderr.decode('utf-8', errors='replace'),
+        'exit_code': -1 if timed_out else exit_code,
+        'timed_out': timed_out,
+        'output_truncated': truncated,
+        'wall_ms': wall_ms,
+        'cpu_ms': round(usage['cpu'] * 1000) if usage else None,
+        'memory_kb': _max_rss_kb(usage['maxrss']) if usage else None
+    }
+
+
+def _communicate(process, stdin_data: bytes, deadline: float, max_output: Optional[int] = None):
+    """
+    Feed stdin and drain stdout/stderr until EOF. The child is killed at the
+    deadline or once either stream passes `max_output` bytes.
+    """
+    chunks = {process.stdout.fileno(): [], process.stderr.fileno(): []}
+    sizes = dict.fromkeys(chunks, 0)
+    sel = selectors.DefaultSelector()
+    for fd in chunks:
+        sel.register(fd, selectors.EVENT_READ)
+    stdin_fd = process.stdin.fileno() if process.stdin else None
+    if stdin_data:
+        os.set_blocking(stdin_fd, False)
+        sel.register(stdin_fd, selectors.EVENT_WRITE)
+    elif process.stdin:
+        process.stdin.close()
+
+    offset = 0
+    timed_out = truncated = False
+    try:
+        while sel.get_map() and not truncated:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                _kill_group(process)
+                break
+            for key, _ in sel.select(remaining):
+                fd = key.fd
+                if fd == stdin_fd:
+                    try:
+                        offset += os.write(fd, stdin_data[offset:offset + READ_CHUNK])
+                    except BlockingIOError:
+                        continue
+                    except BrokenPipeError:
+                        offset = len(stdin_data)
+                    if offset >= len(stdin_data):
+                        sel.unregister(fd)
+                        process.stdin.close()
+                else:
+                    data = os.read(fd, READ_CHUNK)
+                    if not data:
+                        sel.unregister(fd)
+                        continue
+                    if max_output is not None and sizes[fd] + len(data) > max_output:
+                        data = data[:max_output - sizes[fd]]
+                        truncated = True
+                    chunks[fd].append(data)
+                    sizes[fd] += len(data)
+                    if truncated:
+                        _kill_group(process)
+                        break
+    finally:
+        sel.close()
+        for stream in (process.stdin, process.stdout, process.stderr):
+            try:
+                if stream:
+                    stream.close()
+            except OSError:
+                pass
+
+    stdout_fd, stderr_fd = list(chunks)
+    return b''.join(chunks[stdout_fd]), b''.join(chunks[stderr_fd]), timed_out, truncated
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+
+def _run_unlimited(cmd, stdin, context, cwd, env, max_output=None):
+    start = time.monotonic()
+    stdin_file = _stdin_file(stdin)
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=stdin_file or subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env
+        )
+    finally:
+        if stdin_file:
+            stdin_file.close()
+    try:
+        stdout, stderr = process.communicate(
+            input=_stdin_bytes(stdin) or None,
+            timeout=context.timeout
+        )
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, stderr = process.communicate()
+        timed_out = True
+    # No selectors on Windows pipes: the cap is applied after the fact
+    truncated = max_output is not None and max(len(stdout), len(stderr)) > max_output
+    if truncated:
+        stdout, stderr = stdout[:max_output], stderr[:max_output]
+
+    return {
+        'stdout': stdout.decode('utf-8', errors='replace'),
+        'stderr': stderr.decode('utf-8', errors='replace'),
+        'exit_code': -1 if timed_out else process.returncode,
+        'timed_out': timed_out,
+        'output_truncated': truncated,
+        'wall_ms': int((time.monotonic() - start) * 1000),
+        'cpu_ms': None,
+        'memory_kb': None
+    }
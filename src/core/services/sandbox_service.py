@@ -1,21 +1,38 @@
-import subprocess
 import tempfile
 import os
 import sys
+import hashlib
+import json
 import logging
+import traceback
 import requests
+import threading
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Tuple, Union
 
+from core.entities.payload_file import PayloadFile
 from core.entities.sandbox_job import SandboxJob
-from config.settings import SANDBOX_TIMEOUT, SANDBOX_MEMORY_LIMIT_MB, SANDBOX_PATH
+from core.exceptions.sandbox_busy_error import SandboxBusyError
+from core.services.sandbox_harness import build_harness, parse_harness_output
+from core.services.call_harness import build_call_harness
+from core.services.complexity_fit import fit_complexity
+from core.services.execution_context import ExecutionContext
+from core.services.output_comparator import compare_output, compare_values, comparison_settings
+from core.services.sandbox_process import run_process, build_rlimits, clip_output
+from config.settings import (
+    SANDBOX_TIMEOUT, SANDBOX_MEMORY_LIMIT_MB, SANDBOX_PATH, SANDBOX_PARALLELISM, SANDBOX_BATCH_MODE,
+    SANDBOX_MAX_OPEN_FILES, SANDBOX_MAX_PROCESSES, SANDBOX_MAX_OUTPUT_KB, PISTON_API_URL,
+    GENERATOR_OUTPUT_MAX_MB, SANDBOX_SHED_PRACTICE_QUEUE_DEPTH, SANDBOX_BUSY_RETRY_AFTER
+)
 
 logger = logging.getLogger(__name__)
 
-# Piston API - Free public code execution API
-PISTON_API_URL = os.getenv("PISTON_API_URL", "https://emkc.org/api/v2/piston")
-
-# Language mapping for Piston API
+# Language mapping for Piston API; versions are fallbacks for when the
+# client could not discover the installed runtimes
 PISTON_LANGUAGES = {
     'python': {'language': 'python', 'version': '3.10'},
     'javascript': {'language': 'javascript', 'version': '18.15.0'},
@@ -24,6 +41,162 @@ PISTON_LANGUAGES = {
     'c': {'language': 'c', 'version': '10.2.0'}
 }
 
+# Bump when the shape of cached execution results changes
+RESULT_CACHE_VERSION = 3
+
+# Longest expected output copied into a result for display
+EXPECTED_PREVIEW_CHARS = 64 * 1024
+
+# Seconds a submission queue depth read for load shedding is reused
+QUEUE_DEPTH_TTL = 2.0
+
+# Execution result standing in for a run that never happened
+_FAILED_RUN = {
+    'success': False,
+    'stdout': '',
+    'stderr': '',
+    'exit_code': 1,
+    'runtime_ms': 0,
+    'timed_out': False
+}
+
+
+def canonicalize_code(code: str) -> str:
+    """Normalize line endings and drop trailing whitespace, per line and at the end."""
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).rstrip('\n')
+
+
+def python_syntax_error(code: str) -> Optional[str]:
+    """
+    Compiler message for code that cannot compile, formatted as `python main.py`
+    prints it, or None if it compiles. Only SyntaxError (with IndentationError
+    and TabError) counts; anything else is left for the real run to report.
+    """
+    try:
+        compile(code, 'main.py', 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return ''.join(traceback.format_exception_only(type(e), e))
+    except (ValueError, MemoryError, RecursionError):
+        pass
+    return None
+
+
+def payload_source(test_case, field: str):
+    """
+    A test case's 'stdin' or 'expected_out' as stored: its PayloadFile when
+    the payload is file-backed (so it is not read into memory), else the text.
+    """
+    payload = getattr(test_case, f'{field}_file', None)
+    if isinstance(payload, PayloadFile):
+        return payload
+    return getattr(test_case, field, None) or ''
+
+
+def _payload_material(test_case, field: str):
+    """What a payload contributes to a hash: its digest when file-backed, else the text."""
+    source = payload_source(test_case, field)
+    return ['sha256', source.digest] if isinstance(source, PayloadFile) else source
+
+
+def is_complexity_case(test_case) -> bool:
+    return getattr(test_case, 'kind', None) == 'complexity'
+
+
+def is_function_case(test_case) -> bool:
+    return getattr(test_case, 'kind', None) == 'function'
+
+
+def is_generated_case(test_case) -> bool:
+    return getattr(test_case, 'kind', None) == 'generated'
+
+
+def generated_dataset_key(generator: str, generator_stdin: str, reference_solution: Optional[str]) -> str:
+    """Hash of everything that determines a generated input and its expected output."""
+    material = json.dumps([
+        canonicalize_code(generator),
+        generator_stdin,
+        canonicalize_code(reference_solution) if reference_solution is not None else None
+    ])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def result_cache_key(code: str, test_case, context: ExecutionContext) -> str:
+    """Hash of everything that determines a test case's execution outcome."""
+    material = [
+        RESULT_CACHE_VERSION,
+        canonicalize_code(code),
+        context.language,
+        _payload_material(test_case, 'stdin'),
+        _payload_material(test_case, 'expected_out'),
+        context.timeout,
+        context.memory_limit_mb,
+        context.max_output_bytes
+    ]
+    if is_function_case(test_case):
+        material += ['function', test_case.function_name]
+    material = json.dumps(material)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def case_content_hash(test_case) -> str:
+    """
+    Hash of a test case's content: what it feeds the program, what it
+    expects, how output is compared and the limits it runs under. Points are
+    left out since they only weigh the outcome, so re-weighting a case does
+    not make its results stale.
+    """
+    if is_generated_case(test_case):
+        # The recipe rather than its output, which may not be generated yet
+        payloads = [[
+            'generated', test_case.generator, test_case.generator_size,
+            test_case.generator_seed, test_case.reference_solution
+        ], None]
+    else:
+        payloads = [_payload_material(test_case, 'stdin'), _payload_material(test_case, 'expected_out')]
+    material = [
+        *payloads,
+        getattr(test_case, 'timeout_ms', None),
+        getattr(test_case, 'memory_limit_mb', None),
+        *comparison_settings(test_case)
+    ]
+    if is_complexity_case(test_case):
+        material += [
+            'complexity', test_case.generator, test_case.complexity_sizes,
+            test_case.complexity_repeats, test_case.complexity_max_class
+        ]
+    elif is_function_case(test_case):
+        material += ['function', test_case.function_name]
+    material = json.dumps(material)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def summarize_results(test_cases: List, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score per-test-case results (in test case order) by points, or by count when no case has points."""
+    passed_count = 0
+    total_points = 0
+    earned_points = 0
+    
+    for tc, result in zip(test_cases, results):
+        if result['passed']:
+            passed_count += 1
+            earned_points += tc.points if hasattr(tc, 'points') else 0
+        
+        total_points += tc.points if hasattr(tc, 'points') else 0
+    
+    score = (earned_points / total_points * 100) if total_points > 0 else (
+        (passed_count / len(test_cases) * 100) if test_cases else 0
+    )
+    
+    return {
+        'results': list(results),
+        'passed_count': passed_count,
+        'total_count': len(test_cases),
+        'score': round(score, 2),
+        'earned_points': earned_points,
+        'total_points': total_points
+    }
+
 
 class SandboxService:
     
@@ -35,7 +208,17 @@ class SandboxService:
         groq_client=None,
         timeout: int = None,
         memory_limit_mb: int = None,
-        use_external_api: bool = True
+        use_external_api: bool = True,
+        parallelism: int = None,
+        zygote_pool=None,
+        batch_mode: bool = None,
+        piston_client=None,
+        result_cache=None,
+        max_output_bytes: int = None,
+        artifact_cache=None,
+        dataset_cache=None,
+        admission=None,
+        shed_practice_queue_depth: int = None
     ):
         self.sandbox_job_repo = sandbox_job_repo
         self.submission_repo = submission_repo
@@ -43,17 +226,72 @@ class SandboxService:
         self.groq_client = groq_client  # For AI feedback on errors
         self.timeout = timeout or SANDBOX_TIMEOUT
         self.memory_limit_mb = memory_limit_mb or SANDBOX_MEMORY_LIMIT_MB
+        # Per stream; a program writing more is killed and flagged truncated
+        self.max_output_bytes = max_output_bytes or SANDBOX_MAX_OUTPUT_KB * 1024
         self.use_external_api = use_external_api
+        # Max test cases of one submission run concurrently (1 = sequential)
+        self.parallelism = max(1, parallelism or SANDBOX_PARALLELISM)
+        # Warm interpreter pool for local Python runs (None = new process per run)
+        self.zygote_pool = zygote_pool
+        # Run all Python test cases of a submission in one harness execution
+        self.batch_mode = SANDBOX_BATCH_MODE if batch_mode is None else batch_mode
+        # Pooled Piston transport (None = one-off requests.post per execution)
+        self.piston_client = piston_client
+        # Content-addressed store of execution outcomes (None = always execute)
+        self.result_cache = result_cache
+        # Compiles C / C++ / Java once per source for local runs (None = Python only)
+        self.artifact_cache = artifact_cache
+        # Generated inputs and reference outputs (None = generated for every run)
+        self.dataset_cache = dataset_cache
+        self._dataset_locks: Dict[str, threading.Lock] = {}
+        self._dataset_locks_guard = threading.Lock()
+        # Slots for code run inside web requests (None = unlimited)
+        self.admission = admission
+        # Practice runs are refused while this many submissions are queued (0 = never)
+        self.shed_practice_queue_depth = (
+            SANDBOX_SHED_PRACTICE_QUEUE_DEPTH if shed_practice_queue_depth is None else shed_practice_queue_depth
+        )
+        self._queue_depth = (0, None)  # (depth, time.monotonic() when read)
         
         # Ensure sandbox directory exists (for fallback)
         os.makedirs(SANDBOX_PATH, exist_ok=True)
     
+    def make_context(
+        self,
+        language: str = 'python',
+        timeout: float = None,
+        memory_limit_mb: int = None,
+        max_output_bytes: int = None
+    ) -> ExecutionContext:
+        """Limits for one execution; unset values fall back to the service defaults."""
+        return ExecutionContext(
+            language=language,
+            timeout=timeout or self.timeout,
+            memory_limit_mb=memory_limit_mb or self.memory_limit_mb,
+            max_output_bytes=max_output_bytes or self.max_output_bytes
+        )
+    
+    def _test_case_context(self, test_case, language: str) -> ExecutionContext:
+        return ExecutionContext.for_test_case(
+            test_case, language, self.timeout, self.memory_limit_mb, self.max_output_bytes
+        )
+    
+    def _generator_context(self, test_case) -> ExecutionContext:
+        """A test case's limits for its generator and reference solution, with room for a large input."""
+        context = self._test_case_context(test_case, 'python')
+        return self.make_context(
+            'python', context.timeout, context.memory_limit_mb,
+            max_output_bytes=GENERATOR_OUTPUT_MAX_MB * 1024 * 1024
+        )
+    
     def _execute_via_piston(
         self,
         code: str,
-        language: str = 'python',
-        stdin: str = ''
+        stdin: Union[str, PayloadFile],
+        context: ExecutionContext
     ) -> Dict[str, Any]:
+        language = context.language
+        timeout = context.timeout
         if language not in PISTON_LANGUAGES:
             return {
                 'success': False,
@@ -65,23 +303,30 @@ class SandboxService:
             }
         
         lang_config = PISTON_LANGUAGES[language]
+        version = None
+        if self.piston_client:
+            version = self.piston_client.get_version(lang_config['language'])
         
         payload = {
             'language': lang_config['language'],
-            'version': lang_config['version'],
+            'version': version or lang_config['version'],
             'files': [{'content': code}],
-            'stdin': stdin,
-            'run_timeout': self.timeout * 1000  # ms
+            'stdin': stdin.read() if isinstance(stdin, PayloadFile) else stdin,
+            'run_timeout': context.timeout_ms,
+            'run_memory_limit': context.memory_limit_bytes
         }
         
         start_time = datetime.utcnow()
         
         try:
-            response = requests.post(
-                f"{PISTON_API_URL}/execute",
-                json=payload,
-                timeout=self.timeout + 5  # Extra time for API overhead
-            )
+            if self.piston_client:
+                response = self.piston_client.execute(payload, timeout=timeout + 5)
+            else:
+                response = requests.post(
+                    f"{PISTON_API_URL}/execute",
+                    json=payload,
+                    timeout=timeout + 5  # Extra time for API overhead
+                )
             
             end_time = datetime.utcnow()
             runtime_ms = int((end_time - start_time).total_seconds() * 1000)
@@ -93,7 +338,8 @@ class SandboxService:
                     'stderr': f'API error: {response.status_code}',
                     'exit_code': 1,
                     'runtime_ms': runtime_ms,
-                    'timed_out': False
+                    'timed_out': False,
+                    'transient': True  # not the code's fault, never cached
                 }
             
             result = response.json()
@@ -106,22 +352,37 @@ class SandboxService:
             
             timed_out = signal == 'SIGKILL' or 'timed out' in stderr.lower()
             
+            # The API returns complete streams; cap them like local runs so
+            # oversized output never reaches the results table
+            truncated = self._exceeds_output_limit(stdout, context) or self._exceeds_output_limit(stderr, context)
+            if truncated:
+                stdout, stderr = self._clip_streams(stdout, stderr, context)
+            
+            # Piston 3.2+ reports the program's own usage; older versions only
+            # leave the HTTP round trip, which includes network latency
+            cpu_ms = run_result.get('cpu_time')
+            wall_ms = run_result.get('wall_time')
+            memory = run_result.get('memory')
+            
             return {
-                'success': exit_code == 0 and not timed_out,
+                'success': exit_code == 0 and not timed_out and not truncated,
                 'stdout': stdout,
                 'stderr': stderr,
                 'exit_code': exit_code,
-                'runtime_ms': runtime_ms,
-                'timed_out': timed_out
+                'runtime_ms': cpu_ms if cpu_ms is not None else (wall_ms if wall_ms is not None else runtime_ms),
+                'wall_ms': wall_ms if wall_ms is not None else runtime_ms,
+                'memory_kb': memory // 1024 if memory is not None else None,
+                'timed_out': timed_out,
+                'output_truncated': truncated
             }
             
         except requests.exceptions.Timeout:
             return {
                 'success': False,
                 'stdout': '',
-                'stderr': f'Request timed out after {self.timeout}s',
+                'stderr': f'Request timed out after {timeout:g}s',
                 'exit_code': -1,
-                'runtime_ms': self.timeout * 1000,
+                'runtime_ms': context.timeout_ms,
                 'timed_out': True
             }
         except requests.exceptions.RequestException as e:
@@ -131,10 +392,10 @@ class SandboxService:
     def _execute_via_subprocess(
         self,
         code: str,
-        language: str = 'python',
-        stdin: str = ''
+        stdin: Union[str, PayloadFile],
+        context: ExecutionContext
     ) -> Dict[str, Any]:
-        if language != 'python':
+        if context.language != 'python':
             return {
                 'success': False,
                 'stdout': '',
@@ -144,8 +405,6 @@ class SandboxService:
                 'timed_out': False
             }
         
-        start_time = datetime.utcnow()
-        
         # Create temporary file for code
         with tempfile.NamedTemporaryFile(
             mode='w',
@@ -157,44 +416,16 @@ class SandboxService:
             code_file = f.name
         
         try:
-            cmd = [sys.executable, code_file]
-            
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            raw = run_process(
+                [sys.executable, code_file],
+                stdin,
+                context,
                 cwd=SANDBOX_PATH,
-                env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+                env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+                limits=self._rlimits(context),
+                max_output=context.max_output_bytes
             )
-            
-            try:
-                stdout, stderr = process.communicate(
-                    input=stdin.encode() if stdin else None,
-                    timeout=self.timeout
-                )
-                timed_out = False
-            except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
-                timed_out = True
-            
-            end_time = datetime.utcnow()
-            runtime_ms = int((end_time - start_time).total_seconds() * 1000)
-            
-            result = {
-                'success': process.returncode == 0 and not timed_out,
-                'stdout': stdout.decode('utf-8', errors='replace'),
-                'stderr': stderr.decode('utf-8', errors='replace'),
-                'exit_code': process.returncode if not timed_out else -1,
-                'runtime_ms': runtime_ms,
-                'timed_out': timed_out
-            }
-            
-            if timed_out:
-                result['stderr'] = f"Execution timed out after {self.timeout} seconds"
-            
-            return result
+            return self._finish_local_result(raw, context)
             
         except Exception as e:
             logger.error(f"Subprocess execution error: {e}")
@@ -212,25 +443,150 @@ class SandboxService:
             except Exception:
                 pass
     
+    def _execute_via_zygote(
+        self,
+        code: str,
+        stdin: Union[str, PayloadFile],
+        context: ExecutionContext
+    ) -> Dict[str, Any]:
+        try:
+            raw = self.zygote_pool.execute(
+                code, stdin or '', context.timeout,
+                limits=self._rlimits(context), max_output=context.max_output_bytes
+            )
+        except Exception as e:
+            logger.warning(f"Zygote execution error: {e}, falling back to subprocess")
+            return self._execute_via_subprocess(code, stdin, context)
+        return self._finish_local_result(raw, context)
+    
+    def _execute_compiled(
+        self,
+        code: str,
+        stdin: Union[str, PayloadFile],
+        context: ExecutionContext
+    ) -> Dict[str, Any]:
+        """
+        Run C / C++ / Java locally. The source is compiled on the first test
+        case and the cached artifact reused by the rest; compile_ms is kept
+        separate from runtime_ms.
+        """
+        try:
+            artifact = self.artifact_cache.get(context.language, code)
+            if artifact.error is not None:
+                return {
+                    'success': False,
+                    'stdout': '',
+                    'stderr': artifact.error,
+                    'exit_code': 1,
+                    'runtime_ms': 0,
+                    'compile_ms': artifact.compile_ms,
+                    'timed_out': False,
+                    'transient': artifact.transient
+                }
+            raw = run_process(
+                artifact.command(context),
+                stdin,
+                context,
+                cwd=SANDBOX_PATH,
+                env=os.environ.copy(),
+                # The JVM bounds its own heap (-Xmx)
+                limits=self._rlimits(context, limit_address_space=context.language != 'java'),
+                max_output=context.max_output_bytes
+            )
+        except Exception as e:
+            logger.error(f"Compiled execution error: {e}")
+            return {
+                'success': False,
+                'stdout': '',
+                'stderr': str(e),
+                'exit_code': 1,
+                'runtime_ms': 0,
+                'timed_out': False,
+                'transient': True
+            }
+        result = self._finish_local_result(raw, context)
+        result['compile_ms'] = artifact.compile_ms
+        return result
+    
+    def _rlimits(self, context: ExecutionContext, limit_address_space: bool = True):
+        return build_rlimits(
+            context, SANDBOX_MAX_OPEN_FILES, SANDBOX_MAX_PROCESSES, limit_address_space=limit_address_space
+        )
+    
+    @staticmethod
+    def _exceeds_output_limit(text: str, context: ExecutionContext) -> bool:
+        return context.max_output_bytes is not None and len(text.encode('utf-8')) > context.max_output_bytes
+    
+    @staticmethod
+    def _clip_streams(stdout: str, stderr: str, context: ExecutionContext):
+        """Head and tail of each stream of a truncated run, with the reason in stderr."""
+        reason = context.describe_output_limit()
+        stderr = clip_output(stderr)
+        return clip_output(stdout), f"{stderr}\n{reason}" if stderr else reason
+    
+    def _finish_local_result(self, raw: Dict[str, Any], context: ExecutionContext) -> Dict[str, Any]:
+        """
+        Standard result from a local run. runtime_ms is the child's CPU time
+        when the platform reports it, wall-clock time otherwise. A run killed
+        for writing too much keeps the head and tail of each stream.
+        """
+        timed_out = raw['timed_out']
+        truncated = raw.get('output_truncated', False)
+        cpu_ms = raw.get('cpu_ms')
+        stdout, stderr = raw['stdout'], raw['stderr']
+        if timed_out:
+            stderr = context.describe_timeout()
+        elif truncated:
+            stdout, stderr = self._clip_streams(stdout, stderr, context)
+        return {
+            'success': raw['exit_code'] == 0 and not timed_out and not truncated,
+            'stdout': stdout,
+            'stderr': stderr,
+            'exit_code': raw['exit_code'],
+            'runtime_ms': cpu_ms if cpu_ms is not None else raw['wall_ms'],
+            'wall_ms': raw['wall_ms'],
+            'memory_kb': raw.get('memory_kb'),
+            'timed_out': timed_out,
+            'output_truncated': truncated
+        }
+    
     def execute_code(
         self,
         code: str,
         language: str = 'python',
-        stdin: str = '',
+        stdin: Union[str, PayloadFile] = '',
         timeout: int = None,
         memory_limit_mb: int = None
     ) -> Dict[str, Any]:
-        if timeout:
-            self.timeout = timeout
-        
+        return self.execute_in_context(
+            code, stdin, self.make_context(language, timeout, memory_limit_mb)
+        )
+    
+    def execute_in_context(
+        self,
+        code: str,
+        stdin: Union[str, PayloadFile],
+        context: ExecutionContext
+    ) -> Dict[str, Any]:
+        """
+        Run code with the limits in `context`. Limits are never stored on the
+        service, so concurrent calls from many threads cannot see each other's.
+        """
+        # Compiled languages with a local compiler run from the artifact cache:
+        # one compile per source instead of one per test case on Piston
+        if self.artifact_cache and self.artifact_cache.supports(context.language):
+            return self._execute_compiled(code, stdin, context)
+
         # Try external API first
         if self.use_external_api:
-            result = self._execute_via_piston(code, language, stdin)
+            result = self._execute_via_piston(code, stdin, context)
             if result is not None:
                 return result
         
-        # Fallback to subprocess
-        return self._execute_via_subprocess(code, language, stdin)
+        # Fallback to local execution
+        if self.zygote_pool and context.language == 'python':
+            return self._execute_via_zygote(code, stdin, context)
+        return self._execute_via_subprocess(code, stdin, context)
     
     def run_test_case(
         self,
@@ -238,71 +594,457 @@ class SandboxService:
         test_case,
         language: str = 'python'
     ) -> Dict[str, Any]:
-        result = self.execute_code(
-            code=code,
-            language=language,
-            stdin=test_case.stdin or '',
-            timeout=test_case.timeout_seconds if hasattr(test_case, 'timeout_seconds') else self.timeout
-        )
-        
-        actual_output = result['stdout'].strip()
-        expected_output = (test_case.expected_out or '').strip()
-        
-        passed = (
-            result['success'] and 
-            not result['timed_out'] and 
-            actual_output == expected_output
+        error = self._prepare_dataset(test_case)
+        if error is not None:
+            return self._dataset_error_result(test_case, error)
+        cached = self._get_cached(code, test_case, language)
+        if cached is not None:
+            return cached
+        return self._run_and_cache(code, test_case, language)
+    
+    def _run_and_cache(self, code: str, test_case, language: str) -> Dict[str, Any]:
+        if is_complexity_case(test_case):
+            return self._run_complexity(code, test_case, language)
+        if is_function_case(test_case):
+            return self._run_calls(code, [test_case], language)[0]
+        result = self.execute_in_context(
+            code, payload_source(test_case, 'stdin'), self._test_case_context(test_case, language)
         )
+        self._store_cached(code, test_case, language, result)
+        return self._evaluate_test_case(test_case, result)
+    
+    def _cache_key(self, code: str, test_case, language: str) -> str:
+        return result_cache_key(code, test_case, self._test_case_context(test_case, language))
+    
+    def _get_cached(self, code: str, test_case, language: str) -> Optional[Dict[str, Any]]:
+        """Evaluated result from a cached execution outcome, or None on a miss."""
+        # Timings are measured afresh on every run
+        if not self.result_cache or is_complexity_case(test_case):
+            return None
+        result = self.result_cache.get(self._cache_key(code, test_case, language))
+        if result is None:
+            return None
+        return self._evaluate_test_case(test_case, result)
+    
+    def _store_cached(self, code: str, test_case, language: str, result: Dict[str, Any]):
+        # Timeouts depend on machine load and transient errors on the API, so
+        # only deterministic outcomes are worth remembering
+        if not self.result_cache or result['timed_out'] or result.get('transient'):
+            return
+        test_case_id = test_case.get_id() if hasattr(test_case, 'get_id') else getattr(test_case, 'id', None)
+        self.result_cache.put(self._cache_key(code, test_case, language), test_case_id, result)
+    
+    def _evaluate_test_case(self, test_case, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Compare an execution result with the test case's expected output."""
+        if is_function_case(test_case):
+            return self._evaluate_call(test_case, result)
+        comparison = None
+        if result['success'] and not result['timed_out']:
+            mode, tolerance = comparison_settings(test_case)
+            expected = payload_source(test_case, 'expected_out')
+            if isinstance(expected, PayloadFile):
+                with expected.mapped() as mapping:
+                    comparison = compare_output(result['stdout'], mapping, mode, tolerance)
+            else:
+                comparison = compare_output(result['stdout'], expected, mode, tolerance)
+        passed = comparison is not None and comparison.passed
         
         return {
             'test_case_id': test_case.get_id() if hasattr(test_case, 'get_id') else getattr(test_case, 'id', None),
             'test_name': test_case.name,
             'passed': passed,
-            'actual_output': actual_output,
-            'expected_output': expected_output,
+            'actual_output': result['stdout'].strip(),
+            'expected_output': expected_preview(test_case),
+            'first_diff': comparison.to_dict() if comparison and not comparison.passed else None,
             'stdout': result['stdout'],
             'stderr': result['stderr'],
             'exit_code': result['exit_code'],
             'runtime_ms': result['runtime_ms'],
-            'timed_out': result['timed_out']
+            'wall_ms': result.get('wall_ms'),
+            'memory_kb': result.get('memory_kb'),
+            'compile_ms': result.get('compile_ms'),
+            'timed_out': result['timed_out'],
+            'output_truncated': result.get('output_truncated', False),
+            'transient': result.get('transient', False)
+        }
+    
+    def _evaluate_call(self, test_case, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare a function call's return value with the test case's expected
+        one, structurally. The return value (as JSON) stands in for stdout,
+        and anything the call printed is kept with its stderr.
+        """
+        comparison, stderr = None, result['stderr']
+        returned = result.get('return_value')
+        if result['success'] and not result['timed_out'] and returned is not None:
+            mode, tolerance = comparison_settings(test_case)
+            try:
+                expected = json.loads(test_case.expected_out)
+            except (TypeError, ValueError):
+                stderr = "Expected return value is not valid JSON"
+            else:
+                comparison = compare_values(json.loads(returned), expected, mode, tolerance)
+        if result['stdout']:
+            stderr = f"{stderr}\nPrinted:\n{result['stdout']}" if stderr else f"Printed:\n{result['stdout']}"
+        
+        return {
+            'test_case_id': test_case.get_id() if hasattr(test_case, 'get_id') else getattr(test_case, 'id', None),
+            'test_name': test_case.name,
+            'passed': comparison is not None and comparison.passed,
+            'actual_output': returned or '',
+            'expected_output': expected_preview(test_case),
+            'first_diff': comparison.to_dict() if comparison and not comparison.passed else None,
+            'stdout': returned or '',
+            'stderr': stderr,
+            'exit_code': result['exit_code'],
+            'runtime_ms': result['runtime_ms'],
+            'wall_ms': result.get('wall_ms'),
+            'memory_kb': result.get('memory_kb'),
+            'compile_ms': result.get('compile_ms'),
+            'timed_out': result['timed_out'],
+            'output_truncated': result.get('output_truncated', False),
+            'transient': result.get('transient', False)
+        }
+    
+    def _run_calls(self, code: str, test_cases: List, language: str) -> List[Dict[str, Any]]:
+        """
+        Run function-call test cases: one harness execution imports the code
+        once and makes every call, each under its own test case's time limit.
+        If the harness dies before reporting (a crash or the memory limit),
+        each case is re-run in a harness of its own, so only the case that
+        caused it fails.
+        """
+        if language != 'python':
+            return [
+                self._evaluate_test_case(tc, {
+                    'success': False,
+                    'stdout': '',
+                    'stderr': 'Function test cases run Python submissions only',
+                    'exit_code': 1,
+                    'runtime_ms': 0,
+                    'timed_out': False
+                })
+                for tc in test_cases
+            ]
+        
+        contexts = [self._test_case_context(tc, 'python') for tc in test_cases]
+        cases = [
+            {'function': tc.function_name, 'args': tc.stdin or '', 'timeout': context.timeout}
+            for tc, context in zip(test_cases, contexts)
+        ]
+        import_timeout = max(context.timeout for context in contexts)
+        # Per-call limits are enforced inside the harness; this is the
+        # backstop. Each call reports up to three capped texts (stdout,
+        # stderr and its return value), which JSON escaping can double.
+        batch_context = self.make_context(
+            'python',
+            timeout=import_timeout + sum(context.timeout for context in contexts) + 1,
+            memory_limit_mb=max(context.memory_limit_mb for context in contexts),
+            max_output_bytes=self.max_output_bytes * (6 * len(cases) + 1)
+        )
+        batch = self.execute_in_context(
+            build_call_harness(code, cases, import_timeout, max_output=self.max_output_bytes), '', batch_context
+        )
+        
+        outcomes = parse_harness_output(batch['stdout'], len(cases))
+        if outcomes is None:
+            if len(test_cases) > 1:
+                logger.warning("Function call harness incomplete, running test cases individually")
+                return [self._run_calls(code, [tc], language)[0] for tc in test_cases]
+            # The one call took the harness down with it
+            batch.update(
+                stdout='', return_value=None,
+                stderr=batch['stderr'] or "The program exited before the function returned"
+            )
+            outcomes = [batch]
+        
+        results = []
+        for tc, context, outcome in zip(test_cases, contexts, outcomes):
+            truncated = outcome.get('output_truncated', False)
+            outcome['success'] = outcome['exit_code'] == 0 and not outcome['timed_out'] and not truncated
+            if outcome['timed_out']:
+                outcome['stderr'], outcome['stdout'] = context.describe_timeout(), ''
+            elif truncated:
+                outcome['stdout'], outcome['stderr'] = self._clip_streams(
+                    outcome['stdout'], outcome['stderr'], context
+                )
+            self._store_cached(code, tc, 'python', outcome)
+            results.append(self._evaluate_test_case(tc, outcome))
+        return results
+    
+    def _run_complexity(self, code: str, test_case, language: str) -> Dict[str, Any]:
+        """
+        Time the code on generated inputs of each of the test case's sizes and
+        fit how its CPU time grows. Each input is generated once and run
+        complexity_repeats times, keeping the fastest run: the one least
+        disturbed by other load on the machine. The case passes when the
+        fitted class is no worse than complexity_max_class.
+        """
+        context = self._test_case_context(test_case, language)
+        generator_context = self._generator_context(test_case)
+        sizes, times = [], []
+        for n in test_case.complexity_sizes:
+            stdin, _, error = self._generated_dataset(test_case.generator, f"{n}\n", None, generator_context)
+            if error is not None:
+                return self._complexity_result(
+                    test_case, sizes, times, _FAILED_RUN, f"n={n}: {error}"
+                )
+            fastest = None
+            for _ in range(test_case.complexity_repeats):
+                run = self.execute_in_context(code, stdin, context)
+                if not run['success']:
+                    return self._complexity_result(test_case, sizes, times, run, f"n={n}: {run['stderr']}")
+                if fastest is None or run['runtime_ms'] < fastest['runtime_ms']:
+                    fastest = run
+            sizes.append(n)
+            times.append(fastest['runtime_ms'])
+        return self._complexity_result(test_case, sizes, times, fastest)
+    
+    def _generated_dataset(
+        self,
+        generator: str,
+        generator_stdin: str,
+        reference_solution: Optional[str],
+        context: ExecutionContext
+    ) -> Tuple[Union[str, PayloadFile, None], Union[str, PayloadFile, None], Optional[str]]:
+        """
+        (input, expected output, error) from running `generator` on
+        `generator_stdin` and `reference_solution` (if any) on what it printed.
+        With a dataset cache each distinct recipe is run once, ever, and every
+        later submission and regrade gets the stored files.
+        """
+        key = generated_dataset_key(generator, generator_stdin, reference_solution)
+        with self._dataset_locks_guard:
+            lock = self._dataset_locks.setdefault(key, threading.Lock())
+        # Concurrent runs needing the same dataset wait for one generation
+        with lock:
+            if self.dataset_cache:
+                cached = self.dataset_cache.get(key)
+                if cached is not None:
+                    return cached[0], cached[1], None
+            
+            generated = self.execute_in_context(generator, generator_stdin, context)
+            if not generated['success']:
+                return None, None, f"Input generator failed: {generated['stderr']}"
+            expected = ''
+            if reference_solution is not None:
+                reference = self.execute_in_context(reference_solution, generated['stdout'], context)
+                if not reference['success']:
+                    return None, None, f"Reference solution failed: {reference['stderr']}"
+                expected = reference['stdout']
+            
+            if self.dataset_cache:
+                stdin_file, expected_file = self.dataset_cache.put(key, generated['stdout'], expected)
+                return stdin_file, expected_file, None
+            return generated['stdout'], expected, None
+    
+    def _prepare_dataset(self, test_case) -> Optional[str]:
+        """
+        Give a generated test case its input and expected output, generating
+        them if no earlier run did. Returns an error message if that failed.
+        """
+        if not is_generated_case(test_case):
+            return None
+        stdin, expected, error = self._generated_dataset(
+            test_case.generator,
+            f"{test_case.generator_size} {test_case.generator_seed}\n",
+            test_case.reference_solution,
+            self._generator_context(test_case)
+        )
+        if error is not None:
+            return error
+        if isinstance(stdin, PayloadFile):
+            test_case.stdin_file, test_case.expected_out_file = stdin, expected
+        else:
+            test_case.stdin, test_case.expected_out = stdin, expected
+        return None
+    
+    def _dataset_error_result(self, test_case, message: str) -> Dict[str, Any]:
+        """
+        The failing result of a test case whose input could not be generated.
+        Marked transient, so it is neither cached nor kept on a regrade.
+        """
+        return self._evaluate_test_case(test_case, {**_FAILED_RUN, 'stderr': message, 'transient': True})
+    
+    def _complexity_result(
+        self,
+        test_case,
+        sizes: List[int],
+        times: List[float],
+        run: Dict[str, Any],
+        error: str = None
+    ) -> Dict[str, Any]:
+        """A complexity measurement in the shape of _evaluate_test_case's results."""
+        fit = fit_complexity(sizes, times) if error is None else None
+        measurements = {
+            'sizes': sizes,
+            'cpu_ms': times,
+            'max_class': test_case.complexity_max_class,
+            'best_fit': fit.best if fit else None,
+            'r_squared': fit.r_squared if fit else None
+        }
+        summary = f"Measured growth: O({fit.best})" if fit else "Not measured"
+        return {
+            'test_case_id': test_case.get_id() if hasattr(test_case, 'get_id') else getattr(test_case, 'id', None),
+            'test_name': test_case.name,
+            'passed': fit is not None and fit.within(test_case.complexity_max_class),
+            'actual_output': summary,
+            'expected_output': expected_preview(test_case),
+            'first_diff': None,
+            'stdout': summary,
+            'stderr': error or '',
+            'exit_code': run['exit_code'],
+            'runtime_ms': run['runtime_ms'],
+            'wall_ms': run.get('wall_ms'),
+            'memory_kb': run.get('memory_kb'),
+            'compile_ms': run.get('compile_ms'),
+            'timed_out': run['timed_out'],
+            'output_truncated': run.get('output_truncated', False),
+            'transient': run.get('transient', False),
+            'measurements': measurements
         }
     
+    def _syntax_error_result(self, test_case, message: str) -> Dict[str, Any]:
+        """The failing result every test case would get from running uncompilable code."""
+        return self._evaluate_test_case(test_case, {
+            'success': False,
+            'stdout': '',
+            'stderr': message,
+            'exit_code': 1,
+            'runtime_ms': 0,
+            'wall_ms': 0,
+            'memory_kb': None,
+            'timed_out': False
+        })
+    
+    def _run_batched(self, code: str, test_cases: List) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run every test case in a single harness execution (one process or one
+        Piston call). Returns None if the harness did not report all cases, so
+        the caller can fall back to one execution per test case.
+        """
+        contexts = [self._test_case_context(tc, 'python') for tc in test_cases]
+        cases = [
+            {'stdin': tc.stdin or '', 'timeout': context.timeout}
+            for tc, context in zip(test_cases, contexts)
+        ]
+        # Per-case limits are enforced inside the harness; this is the backstop.
+        # JSON escaping can double a case's captured output in the report.
+        batch_context = self.make_context(
+            'python',
+            timeout=sum(context.timeout for context in contexts) + 1,
+            memory_limit_mb=max(context.memory_limit_mb for context in contexts),
+            max_output_bytes=self.max_output_bytes * (2 * len(cases) + 1)
+        )
+        batch = self.execute_in_context(
+            build_harness(code, cases, max_output=self.max_output_bytes), '', batch_context
+        )
+        
+        outcomes = parse_harness_output(batch['stdout'], len(cases))
+        if outcomes is None:
+            logger.warning("Batched test run incomplete, running test cases individually")
+            return None
+        
+        results = []
+        for tc, context, outcome in zip(test_cases, contexts, outcomes):
+            truncated = outcome.get('output_truncated', False)
+            outcome['success'] = outcome['exit_code'] == 0 and not outcome['timed_out'] and not truncated
+            if outcome['timed_out']:
+                outcome['stderr'] = context.describe_timeout()
+            elif truncated:
+                outcome['stdout'], outcome['stderr'] = self._clip_streams(
+                    outcome['stdout'], outcome['stderr'], context
+                )
+            self._store_cached(code, tc, 'python', outcome)
+            results.append(self._evaluate_test_case(tc, outcome))
+        return results
+    
     def run_all_tests(
         self,
         code: str,
         test_cases: List,
-        language: str = 'python'
+        language: str = 'python',
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Run code against all test cases.
+        Up to `parallelism` test cases run at once, so wall-clock time tracks
+        the slowest test rather than the sum; results keep test case order.
+        Test cases with a cached outcome for this code are not executed, and
+        Python code that does not compile is not executed at all, and
+        function-call test cases are all made in one process.
+        `on_result(index, result)` is called on the calling thread as each
+        test case finishes, in completion order.
         """
-        results = []
-        passed_count = 0
-        total_points = 0
-        earned_points = 0
+        def report(index, result):
+            if on_result is not None:
+                on_result(index, result)
         
-        for tc in test_cases:
-            result = self.run_test_case(code, tc, language)
-            results.append(result)
-            
-            if result['passed']:
-                passed_count += 1
-                earned_points += tc.points if hasattr(tc, 'points') else 0
-            
-            total_points += tc.points if hasattr(tc, 'points') else 0
+        syntax_error = python_syntax_error(code) if language == 'python' else None
+        if syntax_error is not None:
+            outcomes = [self._syntax_error_result(tc, syntax_error) for tc in test_cases]
+        else:
+            outcomes = []
+            for tc in test_cases:
+                error = self._prepare_dataset(tc)
+                if error is not None:
+                    outcomes.append(self._dataset_error_result(tc, error))
+                else:
+                    outcomes.append(self._get_cached(code, tc, language))
+        pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        pending_cases = [test_cases[i] for i in pending]
+        for i, outcome in enumerate(outcomes):
+            if outcome is not None:
+                report(i, outcome)
         
-        score = (earned_points / total_points * 100) if total_points > 0 else (
-            (passed_count / len(test_cases) * 100) if test_cases else 0
-        )
+        executed = [None] * len(pending_cases)
+        # Function calls all share one warm interpreter
+        calls = [n for n, tc in enumerate(pending_cases) if is_function_case(tc)]
+        if calls:
+            call_results = self._run_calls(code, [pending_cases[n] for n in calls], language)
+            for n, result in zip(calls, call_results):
+                executed[n] = result
+                report(pending[n], result)
+        rest = [n for n in range(len(pending_cases)) if executed[n] is None]
+        rest_cases = [pending_cases[n] for n in rest]
         
-        return {
-            'results': results,
-            'passed_count': passed_count,
-            'total_count': len(test_cases),
-            'score': round(score, 2),
-            'earned_points': earned_points,
-            'total_points': total_points
-        }
+        batched = None
+        # File-backed stdin is streamed to each run, never embedded in a
+        # harness, and complexity cases need a process per timed run
+        if (
+            self.batch_mode and language == 'python' and len(rest_cases) > 1
+            and not any(
+                isinstance(payload_source(tc, 'stdin'), PayloadFile) or is_complexity_case(tc)
+                for tc in rest_cases
+            )
+        ):
+            batched = self._run_batched(code, rest_cases)
+            if batched is not None:
+                for n, result in zip(rest, batched):
+                    executed[n] = result
+                    report(pending[n], result)
+        
+        if batched is None and rest:
+            workers = min(self.parallelism, len(rest))
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        pool.submit(self._run_and_cache, code, pending_cases[n], language): n
+                        for n in rest
+                    }
+                    for future in as_completed(futures):
+                        n = futures[future]
+                        executed[n] = future.result()
+                        report(pending[n], executed[n])
+            else:
+                for n in rest:
+                    executed[n] = self._run_and_cache(code, pending_cases[n], language)
+                    report(pending[n], executed[n])
+        
+        for i, result in zip(pending, executed):
+            outcomes[i] = result
+        
+        return summarize_results(test_cases, outcomes)
     
     def get_ai_feedback(self, code: str, error_message: str) -> Optional[str]:
         """Get AI-powered feedback on code errors using Groq."""
@@ -319,17 +1061,89 @@ class SandboxService:
             logger.warning(f"AI feedback unavailable: {e}")
             return None
     
-    def create_job(self, submission_id: int) -> SandboxJob:
-        """Create a new sandbox job for a submission."""
+    def create_job(self, submission_id: int, lane: str = 'submission', student_id: int = None) -> SandboxJob:
+        """
+        Queue a sandbox job for a submission. `lane` sets its priority
+        (interactive > submission > regrade); `student_id` is who it is
+        scheduled fairly against, looked up from the submission if omitted.
+        """
+        if student_id is None:
+            submission = self.submission_repo.get_by_id(submission_id)
+            student_id = submission.get_student_id() if submission else None
         job = SandboxJob(
             id=None,
             submission_id=submission_id,
             status='queued',
             timeout_seconds=self.timeout,
-            memory_limit_mb=self.memory_limit_mb
+            memory_limit_mb=self.memory_limit_mb,
+            lane=lane,
+            student_id=student_id
         )
         return self.sandbox_job_repo.create(job)
     
+    def _submission_queue_depth(self) -> int:
+        """Queued final submissions, read at most every QUEUE_DEPTH_TTL seconds per process."""
+        depth, read_at = self._queue_depth
+        now = time.monotonic()
+        if read_at is None or now - read_at >= QUEUE_DEPTH_TTL:
+            try:
+                depth = self.sandbox_job_repo.count_queued_by_lane().get('submission', (0, None))[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read the grading queue depth: {e}")
+            self._queue_depth = (depth, now)
+        return depth
+    
+    def check_practice_load(self):
+        """
+        Raise SandboxBusyError while final submissions are backed up, so
+        practice runs give way to grading near a deadline.
+        """
+        if self.shed_practice_queue_depth and self._submission_queue_depth() >= self.shed_practice_queue_depth:
+            raise SandboxBusyError(
+                "Submissions are being graded; practice runs are paused for a moment",
+                SANDBOX_BUSY_RETRY_AFTER
+            )
+    
+    def admit(self, user_id=None, practice: bool = True):
+        """
+        Context manager to hold around code run inside a web request: a
+        sandbox slot shared by the host's web workers, and for practice
+        runs a check that grading is not backed up. Raises SandboxBusyError
+        when the request should be retried later.
+        """
+        if practice:
+            self.check_practice_load()
+        if self.admission is None:
+            return nullcontext()
+        return self.admission.admit(user_id)
+    
+    def queue_stats(self, window: int = 500) -> Dict[str, Dict[str, Any]]:
+        """
+        Per lane: queued depth, age of the oldest queued job, and p50 / p95
+        seconds between enqueue and start over the last `window` started jobs.
+        """
+        now = datetime.utcnow()
+        queued = self.sandbox_job_repo.count_queued_by_lane()
+        waits = {lane: [] for lane in SandboxJob.valid_lanes}
+        for lane, created_at, started_at in self.sandbox_job_repo.get_recent_waits(window):
+            wait = seconds_between(created_at, started_at)
+            if lane in waits and wait is not None:
+                waits[lane].append(wait)
+        
+        stats = {}
+        for lane in SandboxJob.valid_lanes:
+            depth, oldest = queued.get(lane, (0, None))
+            oldest_wait = seconds_between(oldest, now)
+            samples = sorted(waits[lane])
+            stats[lane] = {
+                'queued': depth,
+                'oldest_wait_s': round(oldest_wait, 3) if oldest_wait is not None else None,
+                'started': len(samples),
+                'wait_p50_s': _percentile(samples, 50),
+                'wait_p95_s': _percentile(samples, 95)
+            }
+        return stats
+    
     def get_job(self, job_id: int) -> SandboxJob:
         """Get a sandbox job by ID."""
         return self.sandbox_job_repo.get_by_id(job_id)
@@ -337,3 +1151,33 @@ class SandboxService:
     def get_jobs_for_submission(self, submission_id: int) -> List[SandboxJob]:
         """Get all sandbox jobs for a submission."""
         return self.sandbox_job_repo.get_by_submission(submission_id)
+
+
+def expected_preview(test_case) -> str:
+    """The start of the test case's expected output, for display."""
+    if is_complexity_case(test_case):
+        return f"O({test_case.complexity_max_class}) or better"
+    expected = payload_source(test_case, 'expected_out')
+    if isinstance(expected, PayloadFile):
+        return expected.head(EXPECTED_PREVIEW_CHARS).strip()
+    if len(expected) > EXPECTED_PREVIEW_CHARS:
+        return expected[:EXPECTED_PREVIEW_CHARS].strip()
+    return expected.strip()
+
+
+def seconds_between(start, end) -> Optional[float]:
+    """Seconds from start to end; either may be a datetime or an ISO string."""
+    try:
+        start = datetime.fromisoformat(start) if isinstance(start, str) else start
+        end = datetime.fromisoformat(end) if isinstance(end, str) else end
+        return max(0.0, (end - start).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list, None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return round(sorted_values[int(rank) - 1], 3)
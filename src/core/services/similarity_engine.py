@@ -0,0 +1,78 @@
+"""
+Cosine similarity of one embedding against many, with NumPy.
+
+The embeddings of an assignment are stacked into one float32 matrix whose
+rows are scaled to unit length, so scoring a submission against all of them
+is a single matrix-vector product with its own normalized embedding. A row
+or query of all zeros scores 0, as in SimilarityService's pure-Python helper.
+
+float32 is accurate to about 1e-7, which is enough to rank submissions but
+could put a score on the other side of a threshold than the double-precision
+helper did. Scores within RESCORE_MARGIN of the threshold are therefore
+computed again in double precision from the original vectors, so the same
+pairs are flagged.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Scores closer than this to the threshold are recomputed in double precision
+RESCORE_MARGIN = 1e-4
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    """Rows of `vectors` scaled to unit length; all-zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _exact_cosine(a: np.ndarray, b: np.ndarray) -> float:
+    norm_a = float(a @ a)
+    norm_b = float(b @ b)
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return float(a @ b) / ((norm_a ** 0.5) * (norm_b ** 0.5))
+
+
+class EmbeddingMatrix:
+    """The embeddings of several submissions, ready to be scored against one."""
+
+    def __init__(self, submission_ids: Sequence[int], vectors):
+        """
+        `vectors` is a 2-D array (or a list of equal-length vectors), one row
+        per id in `submission_ids`. It is kept to rescore borderline rows, so
+        it must not be changed afterwards.
+        """
+        self.submission_ids = list(submission_ids)
+        self._vectors = vectors
+        matrix = np.array(vectors, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = matrix.reshape(len(self.submission_ids), 0)
+        if matrix.ndim != 2 or len(matrix) != len(self.submission_ids):
+            raise ValueError("Expected one embedding of the same dimension per submission")
+        self.matrix = _normalized(matrix)
+
+    def __len__(self) -> int:
+        return len(self.submission_ids)
+
+    @property
+    def dimensions(self) -> int:
+        return self.matrix.shape[1]
+
+    def scores(self, query, threshold: Optional[float] = None) -> np.ndarray:
+        """
+        Cosine similarity of `query` to every row, as float64. With a
+        threshold, rows scoring near it are computed exactly.
+        """
+        query = np.asarray(query, dtype=np.float64)
+        if not self.submission_ids:
+            return np.zeros(0)
+        if query.shape != (self.dimensions,):
+            raise ValueError(
+                f"Embedding has {query.size} dimensions, expected {self.dimensions}"
+            )
+        scores = (self.matrix @ _normalized(query[np.newaxis, :].astype(np.float32))[0]).astype(np.float64)
+        if threshold is not None:
+            for i in np.flatnonzero(np.abs(scores - threshold) < RESCORE_MARGIN):
+                scores[i] = _exact_cosine(query, np.asarray(self._vectors[i], dtype=np.float64))
+        return scores
@@ -66,29 +66,27 @@ class SimilarityService:
         if vec_a is None:
             raise ValidationError("Embedding for submission not found")
 
-        # 3) find other submissions in same assignment
-        others = self.submission_repo.list_by_assignment(assignment_id)
+        # 3) score against every other submission of the assignment: one
+        # query for their embeddings, one matrix-vector product for the scores
+        try:
+            others = self.embedding_service.get_assignment_embeddings(
+                assignment_id, len(vec_a), exclude_submission_id=submission_id
+            )
+            other_ids = others.submission_ids
+            scores = others.scores(vec_a, threshold=threshold)
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error computing similarity: {e}")
+            other_ids, scores = [], []
+
         comparisons = []
         highest_score = 0.0
         highest_pair = None
         flag_needed = False
 
-        for other in others:
-            other_id = other.get_id()
-            if other_id == submission_id:
-                continue
-
-            # Get embedding via EmbeddingService
-            vec_b = self.embedding_service.get_embedding_vector(other_id)
-            if vec_b is None:
-                continue
-
-            # Compute cosine similarity using helper
-            try:
-                score = self._compute_cosine_similarity(vec_a, vec_b)
-            except Exception as e:
-                logger.error(f"Error computing similarity: {e}")
-                continue
+        for other_id, score in zip(other_ids, scores):
+            score = float(score)
 
             # create Comparison model and persist
             comp_model = SimilarityComparison(
@@ -3,7 +3,6 @@ from core.exceptions.auth_error import AuthError
 from core.exceptions.validation_error import ValidationError
 from core.entities.enrollment import Enrollment
 from core.entities.submission import Submission
-from core.entities.result import Result
 
 class StudentService:
     def __init__(self, student_repo, course_repo, enrollment_repo, assignment_repo, submission_repo, sandbox_service=None, test_case_repo=None, result_repo=None):
@@ -109,46 +108,15 @@ class StudentService:
             return None
 
         # FR-05: Automated Grading Trigger
-        if hasattr(self, 'sandbox_service') and self.sandbox_service:
+        # Grading runs in the background worker pool (scripts/run_graders.py);
+        # the request only enqueues a sandbox job.
+        if self.sandbox_service and self.test_case_repo:
             try:
-                # We need test cases to grade
-                if hasattr(self, 'test_case_repo'):
-                    test_cases = self.test_case_repo.list_by_assignment(assignment_id)
-                    if test_cases:
-                        # Update status to running
-                        created.status = "running"
-                        self.submission_repo.update(created)
-
-                        # Run tests
-                        results = self.sandbox_service.run_all_tests(
-                            submission_text,
-                            test_cases,
-                            created.language
-                        )
-
-                        # Update submission with results
-                        created.status = "graded"
-                        created.score = results.get('score', 0.0)
-                        created.grade_at = datetime.now()
-                        self.submission_repo.update(created)
-
-                        # Save individual results via result_repo if available
-                        if hasattr(self, 'result_repo') and self.result_repo:
-                            for res in results.get('results', []):
-                                r_entity = Result(
-                                    id=None,
-                                    submission_id=created.get_id(),
-                                    test_case_id=res.get('test_case_id'),
-                                    passed=res.get('passed'),
-                                    stdout=res.get('stdout'),
-                                    stderr=res.get('stderr'),
-                                    runtime_ms=res.get('runtime_ms'),
-                                    memory_kb=0, # Not currently tracked in results dict
-                                    exit_code=res.get('exit_code'),
-                                    error_message=None,
-                                    created_at=datetime.now()
-                                )
-                                self.result_repo.save_result(r_entity)
+                test_cases = self.test_case_repo.list_by_assignment(assignment_id)
+                if test_cases:
+                    created.status = "queued"
+                    self.submission_repo.update(created)
+                    self.sandbox_service.create_job(created.get_id())
             except Exception as e:
                 created.status = "error"
                 self.submission_repo.update(created)
@@ -0,0 +1,187 @@
+"""
+Reading test cases from a zip archive for bulk import.
+
+The archive holds NAME.in / NAME.out pairs (e.g. 01.in, 01.out) anywhere in
+its tree, and optionally a metadata.json:
+
+    {
+        "defaults": {"points": 5, "is_visible": false},
+        "cases": {"03": {"name": "Large input", "points": 20, "timeout_ms": 4000}}
+    }
+
+For function-call cases the defaults set "kind": "function" and a
+"function_name"; each .in then holds the JSON arguments and each .out the
+JSON return value.
+
+Every problem in the archive is collected before anything is returned, so an
+instructor sees all of them at once and nothing is imported from a bad file.
+"""
+import json
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from config.settings import TEST_CASE_IMPORT_MAX_CASES, TEST_CASE_IMPORT_MAX_MB
+from core.exceptions.validation_error import ValidationError
+
+METADATA_FILE = "metadata.json"
+
+# Test case fields metadata.json may set, with the types they accept
+METADATA_FIELDS = {
+    "name": str,
+    "description": str,
+    "points": int,
+    "is_visible": bool,
+    "timeout_ms": int,
+    "memory_limit_mb": int,
+    "compare_mode": str,
+    "compare_tolerance": (int, float),
+    "kind": str,
+    "function_name": str,
+}
+
+# How many problems are listed in the error before the rest are counted
+MAX_REPORTED_ERRORS = 10
+
+
+@dataclass
+class ArchiveCase:
+    key: str  # file name without .in / .out
+    stdin: str
+    expected_out: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _natural_key(name: str):
+    """Sort 2 before 10, so unpadded numbering keeps its order."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def _skipped(name: str) -> bool:
+    """Directories and files an archiver adds on its own (__MACOSX, .DS_Store)."""
+    parts = name.split("/")
+    return name.endswith("/") or "__MACOSX" in parts or any(part.startswith(".") for part in parts)
+
+
+def _decode(data: bytes, name: str, errors: List[str]) -> str:
+    try:
+        # Files written on Windows would otherwise never match Linux output
+        return data.decode("utf-8").replace("\r\n", "\n")
+    except UnicodeDecodeError:
+        errors.append(f"{name} is not UTF-8 text")
+        return ""
+
+
+def _check_metadata(key: str, values, errors: List[str]) -> Dict[str, Any]:
+    if not isinstance(values, dict):
+        errors.append(f"{METADATA_FILE}: '{key}' must be an object")
+        return {}
+    checked = {}
+    for name, value in values.items():
+        expected_type = METADATA_FIELDS.get(name)
+        if expected_type is None:
+            errors.append(f"{METADATA_FILE}: '{key}' has unknown field '{name}'")
+        elif isinstance(value, bool) and expected_type is not bool or not isinstance(value, expected_type):
+            errors.append(f"{METADATA_FILE}: '{key}.{name}' has the wrong type")
+        else:
+            checked[name] = value
+    return checked
+
+
+def _read_metadata(data: bytes, errors: List[str]):
+    try:
+        metadata = json.loads(_decode(data, METADATA_FILE, errors) or "{}")
+    except json.JSONDecodeError as e:
+        errors.append(f"{METADATA_FILE} is not valid JSON: {e}")
+        return {}, {}
+    if not isinstance(metadata, dict) or set(metadata) - {"defaults", "cases"}:
+        errors.append(f"{METADATA_FILE} must be an object with 'defaults' and/or 'cases'")
+        return {}, {}
+    cases = metadata.get("cases", {})
+    if not isinstance(cases, dict):
+        errors.append(f"{METADATA_FILE}: 'cases' must map file names to objects")
+        cases = {}
+    return (
+        _check_metadata("defaults", metadata.get("defaults", {}), errors),
+        {key: _check_metadata(key, values, errors) for key, values in cases.items()}
+    )
+
+
+def _raise(errors: List[str]):
+    message = "; ".join(errors[:MAX_REPORTED_ERRORS])
+    if len(errors) > MAX_REPORTED_ERRORS:
+        message += f"; and {len(errors) - MAX_REPORTED_ERRORS} more"
+    raise ValidationError(f"Invalid test case archive: {message}")
+
+
+def read_test_case_archive(
+    archive,
+    max_bytes: int = TEST_CASE_IMPORT_MAX_MB * 1024 * 1024,
+    max_cases: int = TEST_CASE_IMPORT_MAX_CASES
+) -> List[ArchiveCase]:
+    """
+    The cases in a zip archive (a path or binary file object), in natural
+    order of their names, with metadata.json defaults applied. Raises
+    ValidationError listing every problem found.
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except (zipfile.BadZipFile, OSError):
+        raise ValidationError("Invalid test case archive: not a zip file")
+
+    with zf:
+        members, errors = {}, []
+        for info in zf.infolist():
+            if _skipped(info.filename):
+                continue
+            base = os.path.basename(info.filename)
+            stem, ext = os.path.splitext(base)
+            if base != METADATA_FILE and ext not in (".in", ".out"):
+                errors.append(f"{info.filename}: expected NAME.in, NAME.out or {METADATA_FILE}")
+                continue
+            if base in members:
+                errors.append(f"{base} appears more than once")
+                continue
+            members[base] = info
+
+        # Sizes come from the zip directory, so an oversized archive is
+        # refused before anything is decompressed
+        total = sum(info.file_size for info in members.values())
+        if total > max_bytes:
+            errors.append(f"archive expands to {total // (1024 * 1024)} MB (limit {max_bytes // (1024 * 1024)} MB)")
+            _raise(errors)
+
+        keys = sorted(
+            {os.path.splitext(base)[0] for base in members if base != METADATA_FILE},
+            key=_natural_key
+        )
+        if not keys and not errors:
+            errors.append("no NAME.in / NAME.out files found")
+        if len(keys) > max_cases:
+            errors.append(f"{len(keys)} test cases (limit {max_cases})")
+            _raise(errors)
+
+        defaults, case_metadata = {}, {}
+        if METADATA_FILE in members:
+            defaults, case_metadata = _read_metadata(zf.read(members[METADATA_FILE]), errors)
+        for key in sorted(set(case_metadata) - set(keys), key=_natural_key):
+            errors.append(f"{METADATA_FILE} describes '{key}', which has no files")
+
+        cases = []
+        for key in keys:
+            missing = [f"{key}{ext}" for ext in (".in", ".out") if f"{key}{ext}" not in members]
+            if missing:
+                errors.append(f"{' and '.join(missing)} missing")
+                continue
+            cases.append(ArchiveCase(
+                key=key,
+                stdin=_decode(zf.read(members[f"{key}.in"]), f"{key}.in", errors),
+                expected_out=_decode(zf.read(members[f"{key}.out"]), f"{key}.out", errors),
+                metadata={**defaults, **case_metadata.get(key, {})}
+            ))
+
+    if errors:
+        _raise(errors)
+    return cases
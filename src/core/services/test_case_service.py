@@ -1,7 +1,35 @@
+import json
+import re
 from datetime import datetime
 from core.entities.test_case import Testcase
 from core.exceptions.validation_error import ValidationError
 from core.exceptions.auth_error import AuthError
+from core.services.sandbox_service import python_syntax_error
+from core.services.test_case_archive import read_test_case_archive
+
+# Upper bound on timed runs per size of a complexity test case
+MAX_COMPLEXITY_REPEATS = 10
+
+COMPLEXITY_FIELDS = {"kind", "generator", "complexity_sizes", "complexity_repeats", "complexity_max_class"}
+
+FUNCTION_FIELDS = {"kind", "function_name", "stdin", "expected_out", "compare_mode"}
+
+GENERATED_FIELDS = {"kind", "generator", "generator_size", "generator_seed", "reference_solution", "compare_mode"}
+
+# Compare modes that mean something for a returned value
+FUNCTION_COMPARE_MODES = ("exact", "float", "unordered")
+
+
+def _parse_sizes(sizes):
+    """Input sizes from a list or a comma / space separated string."""
+    if not sizes:
+        return []
+    if isinstance(sizes, str):
+        sizes = re.split(r"[,\s]+", sizes.strip())
+    try:
+        return [int(n) for n in sizes]
+    except (TypeError, ValueError):
+        raise ValidationError("Input sizes must be whole numbers")
 
 
 class TestCaseService:
@@ -24,6 +52,79 @@ class TestCaseService:
         if course.get_instructor_id() != instructor_id:
             raise AuthError("You do not own this course")
 
+    def _validate_comparison(self, testcase):
+        if testcase.compare_mode not in Testcase.valid_compare_modes:
+            raise ValidationError(f"Invalid compare mode: {testcase.compare_mode}")
+        if testcase.compare_tolerance is not None and testcase.compare_tolerance < 0:
+            raise ValidationError("Tolerance cannot be negative")
+        if testcase.compare_mode == "regex":
+            for number, pattern in enumerate((testcase.expected_out or "").split("\n"), 1):
+                try:
+                    re.compile(pattern.strip())
+                except re.error as e:
+                    raise ValidationError(f"Invalid pattern on line {number}: {e}")
+
+    def _validate_kind(self, testcase):
+        if testcase.kind not in Testcase.valid_kinds:
+            raise ValidationError(f"Invalid test case kind: {testcase.kind}")
+        if testcase.kind == "function":
+            self._validate_function_case(testcase)
+        if testcase.kind == "generated":
+            self._validate_generated_case(testcase)
+        if testcase.kind != "complexity":
+            return
+        if not (testcase.generator or "").strip():
+            raise ValidationError("A complexity test case needs an input generator")
+        error = python_syntax_error(testcase.generator)
+        if error:
+            raise ValidationError(f"Input generator does not compile: {error.strip()}")
+        sizes = testcase.complexity_sizes
+        if len(set(sizes)) < 3 or min(sizes) < 1:
+            raise ValidationError("Give at least three distinct positive input sizes")
+        if not 1 <= (testcase.complexity_repeats or 0) <= MAX_COMPLEXITY_REPEATS:
+            raise ValidationError(f"Repetitions must be between 1 and {MAX_COMPLEXITY_REPEATS}")
+        if testcase.complexity_max_class not in Testcase.valid_complexity_classes:
+            raise ValidationError(f"Invalid complexity class: {testcase.complexity_max_class}")
+
+    def _validate_function_case(self, testcase):
+        if not (testcase.function_name or "").isidentifier():
+            raise ValidationError("Give the name of the function to call, e.g. solve")
+        if testcase.compare_mode not in FUNCTION_COMPARE_MODES:
+            raise ValidationError(
+                f"Return values are compared with one of: {', '.join(FUNCTION_COMPARE_MODES)}"
+            )
+        try:
+            arguments = json.loads(testcase.stdin or "[]")
+        except ValueError as e:
+            raise ValidationError(f"Arguments are not valid JSON: {e}")
+        if isinstance(arguments, dict):
+            if set(arguments) - {"args", "kwargs"} or not isinstance(arguments.get("args", []), list) \
+                    or not isinstance(arguments.get("kwargs", {}), dict):
+                raise ValidationError('Arguments must be a JSON array, or {"args": [...], "kwargs": {...}}')
+        elif not isinstance(arguments, list):
+            raise ValidationError('Arguments must be a JSON array, or {"args": [...], "kwargs": {...}}')
+        try:
+            json.loads(testcase.expected_out)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(f"Expected return value is not valid JSON: {e}")
+
+    def _validate_generated_case(self, testcase):
+        if not (testcase.generator or "").strip():
+            raise ValidationError("A generated test case needs an input generator")
+        if not (testcase.reference_solution or "").strip():
+            raise ValidationError("A generated test case needs a reference solution")
+        for label, code in (("Input generator", testcase.generator),
+                            ("Reference solution", testcase.reference_solution)):
+            error = python_syntax_error(code)
+            if error:
+                raise ValidationError(f"{label} does not compile: {error.strip()}")
+        if not isinstance(testcase.generator_size, int) or testcase.generator_size < 1:
+            raise ValidationError("The input size must be a positive whole number")
+        if not isinstance(testcase.generator_seed, int):
+            raise ValidationError("The seed must be a whole number")
+        if testcase.compare_mode == "regex":
+            raise ValidationError("A reference solution's output cannot be compared as patterns")
+
     def create_test_case(
         self,
         instructor,
@@ -36,7 +137,18 @@ class TestCaseService:
         timeout_ms=None,
         memory_limit_mb=None,
         is_visible=False,
-        sort_order=0
+        sort_order=0,
+        compare_mode="exact",
+        compare_tolerance=None,
+        kind="io",
+        generator=None,
+        complexity_sizes=None,
+        complexity_repeats=None,
+        complexity_max_class=None,
+        function_name=None,
+        generator_size=None,
+        generator_seed=None,
+        reference_solution=None
     ):
         if instructor.role != "instructor":
             raise AuthError("Only instructors can create test cases")
@@ -51,6 +163,12 @@ class TestCaseService:
 
         if points <= 0:
             raise ValidationError("Points must be greater than zero")
+        if kind == "complexity":
+            # Inputs come from the generator and only timing is checked
+            stdin, expected_out = None, ""
+        elif kind == "generated":
+            # Generated, with the reference solution's output, when first run
+            stdin, expected_out = None, ""
 
         testcase = Testcase(
             id=None,
@@ -64,11 +182,97 @@ class TestCaseService:
             points=points,
             is_visible=is_visible,
             sort_order=sort_order,
-            created_at=datetime.now()
+            created_at=datetime.now(),
+            compare_mode=compare_mode,
+            compare_tolerance=compare_tolerance,
+            kind=kind,
+            generator=generator,
+            complexity_sizes=_parse_sizes(complexity_sizes),
+            complexity_repeats=complexity_repeats,
+            complexity_max_class=complexity_max_class,
+            function_name=function_name,
+            generator_size=generator_size,
+            generator_seed=generator_seed,
+            reference_solution=reference_solution
         )
+        self._validate_comparison(testcase)
+        self._validate_kind(testcase)
 
         return self.testcase_repo.create(testcase)
 
+    def import_test_cases(
+        self,
+        instructor,
+        assignment_id,
+        archive,
+        points=1,
+        is_visible=False,
+        compare_mode="exact",
+        compare_tolerance=None
+    ):
+        """
+        Create a test case for every NAME.in / NAME.out pair in a zip archive.
+        The arguments are defaults that the archive's metadata.json may
+        override. Everything is validated before anything is written, then
+        the cases are inserted in one transaction. Returns the count.
+        """
+        if instructor.role != "instructor":
+            raise AuthError("Only instructors can create test cases")
+
+        assignment = self.assignment_repo.get_by_id(assignment_id)
+        if not assignment:
+            raise ValidationError("Assignment not found")
+
+        self._verify_instructor_owns_assignment(
+            instructor.get_id(), assignment
+        )
+
+        defaults = {
+            "points": points,
+            "is_visible": is_visible,
+            "compare_mode": compare_mode,
+            "compare_tolerance": compare_tolerance
+        }
+        existing = self.testcase_repo.list_by_assignment(assignment_id)
+        first_order = max((tc.sort_order or 0 for tc in existing), default=0) + 1
+        created_at = datetime.now()
+
+        testcases, errors = [], []
+        for offset, case in enumerate(read_test_case_archive(archive)):
+            settings = {**defaults, **case.metadata}
+            testcase = Testcase(
+                id=None,
+                assignment_id=assignment_id,
+                name=settings.get("name") or f"Test {case.key}",
+                stdin=case.stdin,
+                descripion=settings.get("description"),
+                expected_out=case.expected_out,
+                timeout_ms=settings.get("timeout_ms"),
+                memory_limit_mb=settings.get("memory_limit_mb"),
+                points=settings["points"],
+                is_visible=settings["is_visible"],
+                sort_order=first_order + offset,
+                created_at=created_at,
+                compare_mode=settings["compare_mode"],
+                compare_tolerance=settings["compare_tolerance"],
+                kind=settings.get("kind", "io"),
+                function_name=settings.get("function_name")
+            )
+            try:
+                if testcase.points <= 0:
+                    raise ValidationError("Points must be greater than zero")
+                self._validate_comparison(testcase)
+                self._validate_kind(testcase)
+            except ValidationError as e:
+                errors.append(f"{case.key}: {e.message}")
+                continue
+            testcases.append(testcase)
+
+        if errors:
+            raise ValidationError("; ".join(errors))
+
+        return self.testcase_repo.create_many(testcases)
+
     def update_test_case(self, instructor, testcase_id, **fields):
         testcase = self.testcase_repo.get_by_id(testcase_id)
         if not testcase:
@@ -88,13 +292,23 @@ class TestCaseService:
         for field in [
             "name", "stdin", "descripion", "expected_out",
             "timeout_ms", "memory_limit_mb",
-            "points", "is_visible", "sort_order"
+            "points", "is_visible", "sort_order",
+            "compare_mode", "compare_tolerance",
+            "kind", "generator", "complexity_repeats", "complexity_max_class",
+            "function_name", "generator_size", "generator_seed", "reference_solution"
         ]:
             if field in fields:
                 setattr(testcase, field, fields[field])
+        if "complexity_sizes" in fields:
+            testcase.complexity_sizes = _parse_sizes(fields["complexity_sizes"])
 
         if testcase.points <= 0:
             raise ValidationError("Points must be greater than zero")
+        if {"expected_out", "compare_mode", "compare_tolerance"} & fields.keys():
+            self._validate_comparison(testcase)
+        if COMPLEXITY_FIELDS & fields.keys() or testcase.kind == "function" and FUNCTION_FIELDS & fields.keys() \
+                or testcase.kind == "generated" and GENERATED_FIELDS & fields.keys():
+            self._validate_kind(testcase)
 
         return self.testcase_repo.update(testcase)
 
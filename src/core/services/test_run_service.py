@@ -0,0 +1,196 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.entities.sandbox_job import SandboxJob
+from core.entities.test_run import TestRun
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from config.settings import TEST_RUN_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def format_test_result(tc_result: Dict[str, Any]) -> Dict[str, Any]:
+    """One test case outcome as the editor displays it."""
+    return {
+        'name': tc_result['test_name'],
+        'passed': tc_result['passed'],
+        'output': tc_result['stdout'],
+        'expected': tc_result['expected_output'],
+        'actual': tc_result['actual_output'],
+        'first_diff': tc_result.get('first_diff'),
+        'measurements': tc_result.get('measurements'),
+        'runtime_ms': tc_result['runtime_ms'],
+        'timed_out': tc_result['timed_out']
+    }
+
+
+def run_code_tests(
+    sandbox_service,
+    code: str,
+    language: str,
+    test_cases: List,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    The editor's "Run tests": every test case, or a plain run reported as a
+    syntax check when the assignment has none, plus AI feedback on the first
+    failure. `on_result(index, view)` receives each case as it finishes.
+    """
+    test_results = []
+    passed_count = 0
+    ai_feedback = None
+
+    if not test_cases:
+        # Dry run - just check if code runs without error
+        result = sandbox_service.execute_code(code, language)
+
+        test_results.append({
+            'name': 'Syntax Check',
+            'passed': result['success'],
+            'output': result['stdout'] if result['success'] else result['stderr'],
+            'runtime_ms': result['runtime_ms']
+        })
+        if on_result is not None:
+            on_result(0, test_results[0])
+
+        if result['success']:
+            passed_count = 1
+        elif sandbox_service.groq_client:
+            # Get AI feedback on error
+            ai_feedback = sandbox_service.get_ai_feedback(code, result['stderr'])
+    else:
+        report = None
+        if on_result is not None:
+            report = lambda index, tc_result: on_result(index, format_test_result(tc_result))
+        results = sandbox_service.run_all_tests(code, test_cases, language, on_result=report)
+
+        for tc_result in results['results']:
+            test_results.append(format_test_result(tc_result))
+            if tc_result['passed']:
+                passed_count += 1
+
+        # Get AI feedback if there were failures
+        if passed_count < len(test_cases) and sandbox_service.groq_client:
+            failed_result = next((r for r in results['results'] if not r['passed']), None)
+            if failed_result and failed_result.get('stderr'):
+                ai_feedback = sandbox_service.get_ai_feedback(code, failed_result['stderr'])
+
+    score = 0
+    if test_cases:
+        score = (passed_count / len(test_cases)) * 100
+    elif passed_count > 0:
+        score = 100
+
+    return {
+        'test_results': test_results,
+        'score': round(score, 2),
+        'passed_count': passed_count,
+        'total_count': len(test_cases) if test_cases else 1,
+        'ai_feedback': ai_feedback
+    }
+
+
+class TestRunService:
+    """
+    Asynchronous "Run tests" from the editor. The web tier records the run and
+    queues an interactive-lane sandbox job; a grader executes it and stores
+    each test case as it finishes, which the browser picks up by polling.
+    """
+
+    def __init__(
+        self,
+        sandbox_service,
+        test_run_repo,
+        sandbox_job_repo,
+        test_case_repo,
+        poll_interval: float = None
+    ):
+        self.sandbox_service = sandbox_service
+        self.test_run_repo = test_run_repo
+        self.sandbox_job_repo = sandbox_job_repo
+        self.test_case_repo = test_case_repo
+        self.poll_interval = poll_interval or TEST_RUN_POLL_INTERVAL
+
+    def _test_cases(self, run: TestRun) -> List:
+        test_cases = self.test_case_repo.list_by_assignment(run.get_assignment_id())
+        if run.visible_only:
+            return [tc for tc in test_cases if tc.is_visible]
+        return test_cases
+
+    def start(self, user, assignment_id: int, code: str, language: str = 'python') -> Tuple[TestRun, SandboxJob]:
+        """Record a test run and queue it on the interactive lane."""
+        run = TestRun(
+            id=None,
+            user_id=user.get_id(),
+            assignment_id=assignment_id,
+            code=code,
+            language=language,
+            visible_only=user.role == 'student'
+        )
+        run.total_count = len(self._test_cases(run)) or 1
+        run = self.test_run_repo.create(run)
+
+        job = self.sandbox_job_repo.create(SandboxJob(
+            id=None,
+            submission_id=None,
+            status='queued',
+            timeout_seconds=self.sandbox_service.timeout,
+            memory_limit_mb=self.sandbox_service.memory_limit_mb,
+            lane='interactive',
+            student_id=user.get_id(),
+            test_run_id=run.get_id()
+        ))
+        return run, job
+
+    def get_run(self, user, run_id: int) -> TestRun:
+        """A test run, visible only to the user who started it."""
+        run = self.test_run_repo.get_by_id(run_id)
+        if not run:
+            raise ValidationError("Test run not found")
+        if run.get_user_id() != user.get_id():
+            raise AuthError("You do not own this test run")
+        return run
+
+    def execute(self, run_id: int) -> TestRun:
+        """Grader side: run the tests, storing each result as it finishes."""
+        run = self.test_run_repo.get_by_id(run_id)
+        if not run:
+            raise ValidationError("Test run not found")
+
+        run.mark_running()
+        run = self.test_run_repo.update(run)
+
+        try:
+            summary = run_code_tests(
+                self.sandbox_service,
+                run.code,
+                run.language,
+                self._test_cases(run),
+                on_result=lambda index, view: self.test_run_repo.add_result(run_id, index, view)
+            )
+        except Exception as e:
+            logger.error(f"Test run {run_id} failed: {e}")
+            run.mark_failed(str(e))
+            return self.test_run_repo.update(run)
+
+        run.mark_completed(
+            summary['passed_count'], summary['total_count'], summary['score'], summary['ai_feedback']
+        )
+        return self.test_run_repo.update(run)
+
+    def wait_for_results(self, run_id: int, after: int = 0, timeout: float = 0) -> Tuple[TestRun, List]:
+        """
+        Long poll: the run and its results recorded after cursor `after`,
+        returned as soon as there are any, the run has finished, or `timeout`
+        seconds have passed.
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            # Status first: a finished run's results are all stored by then
+            run = self.test_run_repo.get_by_id(run_id)
+            results = self.test_run_repo.get_results(run_id, after)
+            if results or run is None or run.is_finished() or time.monotonic() >= deadline:
+                return run, results
+            time.sleep(self.poll_interval)
@@ -6,4 +6,6 @@ CREATE TABLE IF NOT EXISTS embeddings (
     dimension INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (submission_id) REFERENCES submissions(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+CREATE INDEX IF NOT EXISTS idx_embeddings_submission ON embeddings(submission_id);
@@ -9,6 +9,8 @@ CREATE TABLE IF NOT EXISTS results (
     memory_kb INTEGER,
     exit_code INTEGER,
     error_message TEXT,
+    test_case_hash TEXT,
+    measurements TEXT, -- JSON; complexity test cases only
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (submission_id) REFERENCES submissions(id) ON DELETE CASCADE,
     FOREIGN KEY (test_case_id) REFERENCES test_cases(id) ON DELETE CASCADE
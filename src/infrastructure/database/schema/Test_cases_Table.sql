@@ -10,6 +10,28 @@ CREATE TABLE IF NOT EXISTS test_cases (
     points INTEGER DEFAULT 0,
     is_visible INTEGER DEFAULT 1 CHECK(is_visible IN (0,1)),
     sort_order INTEGER DEFAULT 0,
+    compare_mode TEXT NOT NULL DEFAULT 'exact'
+        CHECK(compare_mode IN ('exact', 'whitespace', 'lines', 'float', 'unordered', 'regex')),
+    compare_tolerance REAL,
+    -- SHA-256 of a payload kept as a file instead of in stdin / expected_out
+    stdin_blob TEXT,
+    expected_blob TEXT,
+    kind TEXT NOT NULL DEFAULT 'io' CHECK(kind IN ('io', 'complexity', 'function', 'generated')),
+    -- Complexity and generated cases: Python script printing an input of the
+    -- size (and, for generated cases, from the seed) it reads from stdin
+    generator TEXT,
+    -- Complexity cases: comma-separated sizes, runs per size and the slowest passing class
+    complexity_sizes TEXT,
+    complexity_repeats INTEGER,
+    complexity_max_class TEXT
+        CHECK(complexity_max_class IN ('1', 'log n', 'n', 'n log n', 'n^2', 'n^3')),
+    -- Function cases: the function called with the JSON arguments in stdin
+    function_name TEXT,
+    -- Generated cases: the generator's size and seed, and the Python program
+    -- whose output on the generated input is the expected output
+    generator_size INTEGER,
+    generator_seed INTEGER,
+    reference_solution TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (assignment_id) REFERENCES assignments(id) ON DELETE CASCADE
 );
\ No newline at end of file
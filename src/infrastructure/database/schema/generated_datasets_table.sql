@@ -0,0 +1,13 @@
+CREATE TABLE IF NOT EXISTS generated_datasets (
+    -- SHA-256 of the generator, seed, size and reference solution
+    dataset_key TEXT PRIMARY KEY,
+    -- SHA-256 of the generated input and of the reference output; the
+    -- content lives in files named by these under GENERATED_DATASET_PATH
+    stdin_digest TEXT NOT NULL,
+    expected_digest TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_generated_datasets_last_used ON generated_datasets(last_used_at);
@@ -0,0 +1,15 @@
+-- Bulk regrades of an assignment or a whole course; progress is read from
+-- the sandbox_jobs that carry the batch id
+CREATE TABLE IF NOT EXISTS regrade_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL CHECK(scope IN ('assignment', 'course')),
+    scope_id INTEGER NOT NULL,
+    requested_by INTEGER,
+    status TEXT NOT NULL DEFAULT 'running' CHECK(status IN ('running', 'completed', 'cancelled')),
+    total INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT,
+    FOREIGN KEY (requested_by) REFERENCES users(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_regrade_batches_scope ON regrade_batches(scope, scope_id, created_at);
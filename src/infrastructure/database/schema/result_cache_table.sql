@@ -0,0 +1,24 @@
+CREATE TABLE IF NOT EXISTS result_cache (
+    cache_key TEXT PRIMARY KEY,
+    test_case_id INTEGER,
+    result TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache(last_used_at);
+CREATE INDEX IF NOT EXISTS idx_result_cache_test_case ON result_cache(test_case_id);
+
+-- Editing or deleting a test case drops the outcomes recorded for it
+CREATE TRIGGER IF NOT EXISTS trg_result_cache_test_case_update
+AFTER UPDATE ON test_cases
+BEGIN
+    DELETE FROM result_cache WHERE test_case_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_result_cache_test_case_delete
+AFTER DELETE ON test_cases
+BEGIN
+    DELETE FROM result_cache WHERE test_case_id = OLD.id;
+END;
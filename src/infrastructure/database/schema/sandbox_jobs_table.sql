@@ -1,7 +1,8 @@
 CREATE TABLE IF NOT EXISTS sandbox_jobs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    submission_id INTEGER NOT NULL,
-    status TEXT DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'completed', 'failed', 'timeout')),
+    -- Exactly one of submission_id / test_run_id is set
+    submission_id INTEGER,
+    status TEXT DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'completed', 'failed', 'timeout', 'cancelled')),
     started_at TEXT,
     completed_at TEXT,
     timeout_seconds INTEGER DEFAULT 5,
@@ -9,8 +10,24 @@ CREATE TABLE IF NOT EXISTS sandbox_jobs (
     exit_code INTEGER,
     error_message TEXT,
     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (submission_id) REFERENCES submissions(id)
+    -- Scheduling: lanes are served in priority order, students round-robin within a lane
+    lane TEXT NOT NULL DEFAULT 'submission' CHECK(lane IN ('interactive', 'submission', 'regrade')),
+    student_id INTEGER,
+    test_run_id INTEGER,
+    batch_id INTEGER,
+    -- Leasing: the grader holding a running job, when its claim lapses unless
+    -- renewed (epoch seconds), and how many times the job has been claimed
+    worker_id TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (submission_id) REFERENCES submissions(id),
+    FOREIGN KEY (test_run_id) REFERENCES test_runs(id) ON DELETE CASCADE,
+    FOREIGN KEY (batch_id) REFERENCES regrade_batches(id)
 );
 
 CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_submission ON sandbox_jobs(submission_id);
 CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_status ON sandbox_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_queue ON sandbox_jobs(status, lane, created_at);
+CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_started ON sandbox_jobs(started_at);
+CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_batch ON sandbox_jobs(batch_id, status);
+CREATE INDEX IF NOT EXISTS idx_sandbox_jobs_lease ON sandbox_jobs(status, lease_expires_at);
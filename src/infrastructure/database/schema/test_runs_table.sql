@@ -0,0 +1,31 @@
+-- "Run tests" from the editor, executed by the graders on the interactive lane
+CREATE TABLE IF NOT EXISTS test_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    assignment_id INTEGER NOT NULL,
+    language TEXT NOT NULL DEFAULT 'python',
+    code TEXT NOT NULL,
+    visible_only INTEGER NOT NULL DEFAULT 1 CHECK(visible_only IN (0,1)),
+    status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'completed', 'failed')),
+    total_count INTEGER,
+    passed_count INTEGER NOT NULL DEFAULT 0,
+    score REAL,
+    ai_feedback TEXT,
+    error_message TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    completed_at TEXT,
+    FOREIGN KEY (user_id) REFERENCES users(id),
+    FOREIGN KEY (assignment_id) REFERENCES assignments(id) ON DELETE CASCADE
+);
+
+-- One row per finished test case, in completion order; pollers page by id
+CREATE TABLE IF NOT EXISTS test_run_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    test_run_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    FOREIGN KEY (test_run_id) REFERENCES test_runs(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_test_runs_user ON test_runs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_test_run_results_run ON test_run_results(test_run_id, id);
@@ -63,6 +63,13 @@ class Database:
         except SQLAlchemyError as e:
             self._handle_error(e)
 
+    def executemany(self, query: str, params_list: list):
+        """Run `query` once per params dict, like sqlite3's Connection.executemany."""
+        try:
+            return self.session.execute(text(query), list(params_list))
+        except SQLAlchemyError as e:
+            self._handle_error(e)
+
     def _handle_error(self, e):
         """Unwrap SQLAlchemyError to raise the underlying DBAPI error if it's sqlite3.Error"""
         if hasattr(e, 'orig') and isinstance(e.orig, sqlite3.Error):
@@ -1,4 +1,6 @@
 import sqlite3
+from typing import Iterable, List
+
 from core.entities.embedding import Embedding
 
 class EmbeddingRepository:
@@ -73,4 +75,56 @@ class EmbeddingRepository:
             model_version=row.model_version,
             dimensions=row.dimension,
             created_at=row.created_at
-        )
\ No newline at end of file
+        )
+
+    def find_by_submissions(self, submission_ids: Iterable[int]) -> List[Embedding]:
+        """
+        Embeddings of several submissions in one query, ordered by submission.
+        Like find_by_submission, a submission with several embeddings gives
+        its first one.
+        """
+        ids = list(dict.fromkeys(submission_ids))
+        if not ids:
+            return []
+        placeholders = ", ".join(f":id{i}" for i in range(len(ids)))
+        query = f"""
+            SELECT
+                e.id, e.submission_id, e.vector_ref, e.model_version, e.dimension, e.created_at
+            FROM embeddings e
+            WHERE e.id IN (
+                SELECT MIN(id) FROM embeddings
+                WHERE submission_id IN ({placeholders})
+                GROUP BY submission_id
+            )
+            ORDER BY e.submission_id
+        """
+        rows = self.db.execute(query, {f"id{i}": sid for i, sid in enumerate(ids)}).fetchall()
+        return [self._to_embedding(row) for row in rows]
+
+    def find_by_assignment(self, assignment_id: int) -> List[Embedding]:
+        """Embeddings of every submission to an assignment in one query, ordered by submission."""
+        query = """
+            SELECT
+                e.id, e.submission_id, e.vector_ref, e.model_version, e.dimension, e.created_at
+            FROM embeddings e
+            WHERE e.id IN (
+                SELECT MIN(em.id) FROM embeddings em
+                JOIN submissions s ON s.id = em.submission_id
+                WHERE s.assignment_id = :assignment_id
+                GROUP BY em.submission_id
+            )
+            ORDER BY e.submission_id
+        """
+        rows = self.db.execute(query, {"assignment_id": assignment_id}).fetchall()
+        return [self._to_embedding(row) for row in rows]
+
+    @staticmethod
+    def _to_embedding(row) -> Embedding:
+        return Embedding(
+            id=row.id,
+            submission_id=row.submission_id,
+            vector_ref=row.vector_ref,
+            model_version=row.model_version,
+            dimensions=row.dimension,
+            created_at=row.created_at
+        )
@@ -0,0 +1,123 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from config.settings import GENERATED_DATASET_MAX_ENTRIES, GENERATED_DATASET_MAX_MB, GENERATED_DATASET_PATH
+from core.entities.payload_file import PayloadFile
+from infrastructure.sandbox.payload_store import PayloadStore
+
+logger = logging.getLogger(__name__)
+
+
+class GeneratedDatasetRepository:
+    """
+    Inputs and expected outputs of generated test cases (generated_datasets
+    table), keyed by a hash of what produced them. The content is kept as
+    content-addressed files, so identical datasets share storage and are
+    streamed to runs like any large payload. Least recently used datasets
+    are evicted beyond max_entries / max_bytes, with their files once no
+    other dataset refers to them. Errors are logged, never raised: a lost
+    dataset is simply generated again.
+    """
+
+    def __init__(self, db, payload_store: PayloadStore = None, max_entries: int = None, max_bytes: int = None):
+        self.db = db
+        self.payload_store = payload_store or PayloadStore(root=GENERATED_DATASET_PATH)
+        self.max_entries = max_entries or GENERATED_DATASET_MAX_ENTRIES
+        self.max_bytes = max_bytes or GENERATED_DATASET_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+
+    def get(self, dataset_key: str) -> Optional[Tuple[PayloadFile, PayloadFile]]:
+        """(input, expected output) of a dataset, or None if it was never generated or is gone."""
+        with self._lock:
+            try:
+                row = self.db.execute(
+                    "SELECT stdin_digest, expected_digest FROM generated_datasets WHERE dataset_key = :key",
+                    {"key": dataset_key}
+                ).fetchone()
+                if not row:
+                    return None
+                if not (self.payload_store.exists(row.stdin_digest) and self.payload_store.exists(row.expected_digest)):
+                    self.db.execute("DELETE FROM generated_datasets WHERE dataset_key = :key", {"key": dataset_key})
+                    self.db.commit()
+                    return None
+                self.db.execute(
+                    "UPDATE generated_datasets SET last_used_at = :now WHERE dataset_key = :key",
+                    {"now": time.time(), "key": dataset_key}
+                )
+                self.db.commit()
+                return self.payload_store.get(row.stdin_digest), self.payload_store.get(row.expected_digest)
+            except sqlite3.Error as e:
+                logger.warning(f"Generated dataset read failed: {e}")
+                self._rollback()
+                return None
+
+    def put(self, dataset_key: str, stdin: str, expected_out: str) -> Tuple[PayloadFile, PayloadFile]:
+        """Store a dataset and return its files; they are usable even if recording it fails."""
+        stdin_file = self.payload_store.put(stdin)
+        expected_file = self.payload_store.put(expected_out)
+        now = time.time()
+        with self._lock:
+            try:
+                self.db.execute("""
+                    INSERT OR REPLACE INTO generated_datasets
+                    (dataset_key, stdin_digest, expected_digest, size_bytes, created_at, last_used_at)
+                    VALUES (:key, :stdin, :expected, :size, :now, :now)
+                """, {
+                    "key": dataset_key,
+                    "stdin": stdin_file.digest,
+                    "expected": expected_file.digest,
+                    "size": stdin_file.size_bytes + expected_file.size_bytes,
+                    "now": now
+                })
+                # Datasets are few and large, so every insert checks the limits
+                self._evict(keep={stdin_file.digest, expected_file.digest})
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Generated dataset write failed: {e}")
+                self._rollback()
+        return stdin_file, expected_file
+
+    def evict(self):
+        with self._lock:
+            try:
+                self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Generated dataset eviction failed: {e}")
+                self._rollback()
+
+    def _evict(self, keep=frozenset()):
+        """Drop the least recently used datasets beyond the limits, and files no dataset uses."""
+        evicted = self.db.execute("""
+            SELECT dataset_key, stdin_digest, expected_digest FROM (
+                SELECT dataset_key, stdin_digest, expected_digest,
+                       ROW_NUMBER() OVER (ORDER BY last_used_at DESC) AS position,
+                       SUM(size_bytes) OVER (ORDER BY last_used_at DESC
+                                             ROWS UNBOUNDED PRECEDING) AS running_bytes
+                FROM generated_datasets
+            )
+            WHERE position > :max_entries OR running_bytes > :max_bytes
+        """, {"max_entries": self.max_entries, "max_bytes": self.max_bytes}).fetchall()
+        if not evicted:
+            return
+        self.db.executemany(
+            "DELETE FROM generated_datasets WHERE dataset_key = :key",
+            [{"key": row.dataset_key} for row in evicted]
+        )
+        digests = {row.stdin_digest for row in evicted} | {row.expected_digest for row in evicted}
+        for digest in digests - set(keep):
+            still_used = self.db.execute(
+                "SELECT 1 FROM generated_datasets WHERE stdin_digest = :d OR expected_digest = :d LIMIT 1",
+                {"d": digest}
+            ).fetchone()
+            if not still_used:
+                self.payload_store.remove(digest)
+
+    def _rollback(self):
+        try:
+            self.db.rollback()
+        except Exception:
+            pass
@@ -0,0 +1,161 @@
+import sqlite3
+from datetime import datetime
+from core.entities.regrade_batch import RegradeBatch
+
+BATCH_COLUMNS = "id, scope, scope_id, requested_by, status, total, created_at, finished_at"
+
+# Submissions a batch covers, by scope
+SCOPE_FILTERS = {
+    'assignment': "assignment_id = :scope_id",
+    'course': "assignment_id IN (SELECT id FROM assignments WHERE course_id = :scope_id)",
+}
+
+
+def _timestamp(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class RegradeBatchRepository:
+    def __init__(self, db):
+        self.db = db
+
+    def _row_to_entity(self, row):
+        if not row:
+            return None
+        return RegradeBatch(
+            id=row[0],
+            scope=row[1],
+            scope_id=row[2],
+            requested_by=row[3],
+            status=row[4],
+            total=row[5],
+            created_at=row[6],
+            finished_at=row[7]
+        )
+
+    def create(self, batch: RegradeBatch, timeout_seconds: int, memory_limit_mb: int) -> RegradeBatch:
+        """
+        Record the batch and queue a regrade-lane job for the latest submission
+        of every student in its scope, all in one transaction. Submissions that
+        already have a queued or running job are left to that job.
+        """
+        created_at = _timestamp(batch.created_at)
+        try:
+            self.db.execute("""
+                INSERT INTO regrade_batches (scope, scope_id, requested_by, status, total, created_at)
+                VALUES (:scope, :scope_id, :by, :status, 0, :cat)
+            """, {
+                "scope": batch.scope,
+                "scope_id": batch.scope_id,
+                "by": batch.requested_by,
+                "status": batch.status,
+                "cat": created_at
+            })
+            batch_id = self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+            self.db.execute(f"""
+                INSERT INTO sandbox_jobs
+                (submission_id, status, timeout_seconds, memory_limit_mb, created_at, lane, student_id, batch_id)
+                SELECT id, 'queued', :tout, :mem, :cat, 'regrade', student_id, :bid
+                FROM (
+                    SELECT id, student_id,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY assignment_id, student_id ORDER BY version DESC, id DESC
+                           ) AS newest
+                    FROM submissions
+                    WHERE {SCOPE_FILTERS[batch.scope]}
+                ) latest
+                WHERE newest = 1 AND NOT EXISTS (
+                    SELECT 1 FROM sandbox_jobs j
+                    WHERE j.submission_id = latest.id AND j.status IN ('queued', 'running')
+                )
+                ORDER BY id
+            """, {
+                "tout": timeout_seconds,
+                "mem": memory_limit_mb,
+                "cat": created_at,
+                "bid": batch_id,
+                "scope_id": batch.scope_id
+            })
+            self.db.execute("""
+                UPDATE submissions SET status = 'queued'
+                WHERE id IN (SELECT submission_id FROM sandbox_jobs WHERE batch_id = :bid)
+            """, {"bid": batch_id})
+            self.db.execute("""
+                UPDATE regrade_batches
+                SET total = (SELECT COUNT(*) FROM sandbox_jobs WHERE batch_id = :bid)
+                WHERE id = :bid
+            """, {"bid": batch_id})
+            self.db.commit()
+            return self.get_by_id(batch_id)
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def get_by_id(self, batch_id: int) -> RegradeBatch:
+        result = self.db.execute(f"SELECT {BATCH_COLUMNS} FROM regrade_batches WHERE id = :id", {"id": batch_id})
+        return self._row_to_entity(result.fetchone())
+
+    def get_latest(self, scope: str, scope_id: int) -> RegradeBatch:
+        result = self.db.execute(f"""
+            SELECT {BATCH_COLUMNS} FROM regrade_batches
+            WHERE scope = :scope AND scope_id = :scope_id
+            ORDER BY id DESC LIMIT 1
+        """, {"scope": scope, "scope_id": scope_id})
+        return self._row_to_entity(result.fetchone())
+
+    def update(self, batch: RegradeBatch) -> RegradeBatch:
+        try:
+            self.db.execute("""
+                UPDATE regrade_batches SET status = :status, finished_at = :fin WHERE id = :id
+            """, {"status": batch.status, "fin": _timestamp(batch.finished_at), "id": batch.get_id()})
+            self.db.commit()
+            return self.get_by_id(batch.get_id())
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def count_jobs(self, batch_id: int) -> dict:
+        """{job status: count} for the batch."""
+        result = self.db.execute("""
+            SELECT status, COUNT(*) FROM sandbox_jobs WHERE batch_id = :bid GROUP BY status
+        """, {"bid": batch_id})
+        return {row[0]: row[1] for row in result.fetchall()}
+
+    def first_started_at(self, batch_id: int):
+        result = self.db.execute("""
+            SELECT MIN(started_at) FROM sandbox_jobs WHERE batch_id = :bid
+        """, {"bid": batch_id})
+        return result.fetchone()[0]
+
+    def cancel(self, batch_id: int) -> int:
+        """
+        Cancel the batch's queued jobs (running ones finish) and put their
+        submissions back to how they were. Returns the number cancelled.
+        """
+        now = datetime.utcnow().isoformat()
+        try:
+            self.db.execute("""
+                UPDATE sandbox_jobs
+                SET status = 'cancelled', completed_at = :now, error_message = 'Regrade cancelled'
+                WHERE batch_id = :bid AND status = 'queued'
+            """, {"bid": batch_id, "now": now})
+            cancelled = self.db.execute("""
+                SELECT COUNT(*) FROM sandbox_jobs WHERE batch_id = :bid AND status = 'cancelled'
+            """, {"bid": batch_id}).fetchone()[0]
+            self.db.execute("""
+                UPDATE submissions
+                SET status = CASE WHEN grade_at IS NOT NULL THEN 'graded' ELSE 'pending' END
+                WHERE status = 'queued' AND id IN (
+                    SELECT submission_id FROM sandbox_jobs WHERE batch_id = :bid AND status = 'cancelled'
+                )
+            """, {"bid": batch_id})
+            self.db.execute("""
+                UPDATE regrade_batches SET status = 'cancelled', finished_at = :now
+                WHERE id = :bid AND status = 'running'
+            """, {"bid": batch_id, "now": now})
+            self.db.commit()
+            return cancelled
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
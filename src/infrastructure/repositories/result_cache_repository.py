@@ -0,0 +1,102 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config.settings import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# Eviction scans the whole table, so it runs once per this many inserts
+EVICT_EVERY = 64
+
+
+class ResultCacheRepository:
+    """
+    Content-addressed store of sandbox execution outcomes (result_cache table).
+    Lives in the application database, so it survives restarts and is shared
+    by every web and grader process. Least recently used entries are evicted
+    beyond max_entries / max_bytes. Cache errors are logged, never raised.
+    """
+
+    def __init__(self, db, max_entries: int = None, max_bytes: int = None):
+        self.db = db
+        self.max_entries = max_entries or RESULT_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or RESULT_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def get(self, cache_key: str):
+        with self._lock:
+            try:
+                row = self.db.execute(
+                    "SELECT result FROM result_cache WHERE cache_key = :key",
+                    {"key": cache_key}
+                ).fetchone()
+                if not row:
+                    return None
+                self.db.execute(
+                    "UPDATE result_cache SET last_used_at = :now WHERE cache_key = :key",
+                    {"now": time.time(), "key": cache_key}
+                )
+                self.db.commit()
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Result cache read failed: {e}")
+                self._rollback()
+                return None
+
+    def put(self, cache_key: str, test_case_id, result: dict):
+        payload = json.dumps(result)
+        now = time.time()
+        with self._lock:
+            try:
+                self.db.execute("""
+                    INSERT OR REPLACE INTO result_cache
+                    (cache_key, test_case_id, result, size_bytes, created_at, last_used_at)
+                    VALUES (:key, :tcid, :result, :size, :now, :now)
+                """, {
+                    "key": cache_key,
+                    "tcid": test_case_id,
+                    "result": payload,
+                    "size": len(payload),
+                    "now": now
+                })
+                self._puts += 1
+                if self._puts % EVICT_EVERY == 0:
+                    self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache write failed: {e}")
+                self._rollback()
+
+    def evict(self):
+        with self._lock:
+            try:
+                self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache eviction failed: {e}")
+                self._rollback()
+
+    def _evict(self):
+        """Drop the least recently used entries beyond the count and size limits."""
+        self.db.execute("""
+            DELETE FROM result_cache WHERE cache_key IN (
+                SELECT cache_key FROM (
+                    SELECT cache_key,
+                           ROW_NUMBER() OVER (ORDER BY last_used_at DESC) AS position,
+                           SUM(size_bytes) OVER (ORDER BY last_used_at DESC
+                                                 ROWS UNBOUNDED PRECEDING) AS running_bytes
+                    FROM result_cache
+                )
+                WHERE position > :max_entries OR running_bytes > :max_bytes
+            )
+        """, {"max_entries": self.max_entries, "max_bytes": self.max_bytes})
+
+    def _rollback(self):
+        try:
+            self.db.rollback()
+        except Exception:
+            pass
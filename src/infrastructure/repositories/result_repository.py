@@ -1,3 +1,4 @@
+import json
 import sqlite3
 from core.entities.result import Result
 
@@ -11,7 +12,8 @@ class ResultRepository:
         query = """
             SELECT 
                 r.id, r.submission_id, r.test_case_id, r.passed, r.stdout,
-                r.stderr, r.runtime_ms, r.memory_kb, r.exit_code, r.error_message, r.created_at
+                r.stderr, r.runtime_ms, r.memory_kb, r.exit_code, r.error_message, r.created_at,
+                r.test_case_hash, r.measurements
             FROM results r
             WHERE r.id = :id
         """
@@ -30,7 +32,9 @@ class ResultRepository:
             memory_kb=row.memory_kb,
             exit_code=row.exit_code,
             error_message=row.error_message,
-            created_at=row.created_at
+            created_at=row.created_at,
+            test_case_hash=row.test_case_hash,
+            measurements=json.loads(row.measurements) if row.measurements else None
         )
     
     def save_result(self, result: Result):
@@ -39,11 +43,13 @@ class ResultRepository:
             query = """
                 INSERT INTO results (
                     submission_id, test_case_id, passed, stdout,
-                    stderr, runtime_ms, memory_kb, exit_code, error_message
+                    stderr, runtime_ms, memory_kb, exit_code, error_message,
+                    test_case_hash, measurements
                 )
                 VALUES (
                     :submission_id, :test_case_id, :passed, :stdout,
-                    :stderr, :runtime_ms, :memory_kb, :exit_code, :error_message
+                    :stderr, :runtime_ms, :memory_kb, :exit_code, :error_message,
+                    :test_case_hash, :measurements
                 )
             """
             self.db.execute(query, {
@@ -55,7 +61,9 @@ class ResultRepository:
                 "runtime_ms": result.runtime_ms,
                 "memory_kb": result.memory_kb,
                 "exit_code": result.exit_code,
-                "error_message": result.error_message
+                "error_message": result.error_message,
+                "test_case_hash": result.test_case_hash,
+                "measurements": json.dumps(result.measurements) if result.measurements else None
             })
             new_id = self.db.execute("SELECT last_insert_rowid() as id").fetchone()[0]
             self.db.commit()
@@ -65,11 +73,23 @@ class ResultRepository:
             print("Error saving result:", e)
             return None
 
+    def delete_by_submission(self, submission_id: int):
+        try:
+            self.db.execute("DELETE FROM results WHERE submission_id = :submission_id",
+                            {"submission_id": submission_id})
+            self.db.commit()
+            return True
+        except sqlite3.Error as e:
+            self.db.rollback()
+            print("Error deleting results:", e)
+            return False
+
     def find_by_submission(self, submissionId: int):
         query = """
             SELECT 
                 r.id, r.submission_id, r.test_case_id, r.passed, r.stdout,
-                r.stderr, r.runtime_ms, r.memory_kb, r.exit_code, r.error_message, r.created_at
+                r.stderr, r.runtime_ms, r.memory_kb, r.exit_code, r.error_message, r.created_at,
+                r.test_case_hash, r.measurements
             FROM results r
             WHERE r.submission_id = :submission_id
         """
@@ -87,6 +107,8 @@ class ResultRepository:
                 memory_kb=row.memory_kb,
                 exit_code=row.exit_code,
                 error_message=row.error_message,
-                created_at=row.created_at
+                created_at=row.created_at,
+                test_case_hash=row.test_case_hash,
+                measurements=json.loads(row.measurements) if row.measurements else None
             ))
         return results
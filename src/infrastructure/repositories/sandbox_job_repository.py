@@ -1,7 +1,45 @@
 import sqlite3
+import time
 from datetime import datetime
 from core.entities.sandbox_job import SandboxJob
 
+JOB_COLUMNS = """
+    id, submission_id, status, started_at, completed_at, timeout_seconds,
+    memory_limit_mb, exit_code, error_message, created_at, lane, student_id,
+    test_run_id, batch_id, worker_id, lease_expires_at, attempts
+"""
+
+LANE_ORDER = "CASE lane WHEN 'interactive' THEN 0 WHEN 'submission' THEN 1 ELSE 2 END"
+
+
+def _queue_query(lanes=None) -> str:
+    """
+    Queued jobs (of `lanes`, default all) in scheduling order: interactive,
+    then submission, then regrade. Within a lane each student's oldest job
+    comes first, so students take turns instead of queueing behind one another.
+    """
+    lane_filter = ""
+    if lanes is not None:
+        lane_filter = "AND j.lane IN (" + ", ".join(f":lane{i}" for i in range(len(lanes))) + ")"
+    return f"""
+        SELECT {JOB_COLUMNS} FROM (
+            SELECT j.*,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY j.lane, COALESCE(j.student_id, s.student_id)
+                       ORDER BY j.created_at, j.id
+                   ) AS turn
+            FROM sandbox_jobs j
+            LEFT JOIN submissions s ON s.id = j.submission_id
+            WHERE j.status = 'queued' {lane_filter}
+        )
+        ORDER BY {LANE_ORDER}, turn, created_at, id
+        LIMIT :limit
+    """
+
+
+def _lane_params(lanes) -> dict:
+    return {f"lane{i}": lane for i, lane in enumerate(lanes or ())}
+
 
 class SandboxJobRepository:
     def __init__(self, db):
@@ -20,7 +58,14 @@ class SandboxJobRepository:
             memory_limit_mb=row[6],
             exit_code=row[7],
             error_message=row[8],
-            created_at=row[9]
+            created_at=row[9],
+            lane=row[10],
+            student_id=row[11],
+            test_run_id=row[12],
+            batch_id=row[13],
+            worker_id=row[14],
+            lease_expires_at=row[15],
+            attempts=row[16]
         )
     
     def create(self, job: SandboxJob) -> SandboxJob:
@@ -28,8 +73,8 @@ class SandboxJobRepository:
             self.db.execute("""
                 INSERT INTO sandbox_jobs 
                 (submission_id, status, started_at, completed_at, timeout_seconds, 
-                 memory_limit_mb, exit_code, error_message, created_at)
-                VALUES (:sid, :status, :start, :comp, :tout, :mem, :exit, :err, :cat)
+                 memory_limit_mb, exit_code, error_message, created_at, lane, student_id, test_run_id, batch_id)
+                VALUES (:sid, :status, :start, :comp, :tout, :mem, :exit, :err, :cat, :lane, :student, :run, :batch)
             """, {
                 "sid": job.get_submission_id(),
                 "status": job.status,
@@ -39,7 +84,11 @@ class SandboxJobRepository:
                 "mem": job.memory_limit_mb,
                 "exit": job.exit_code,
                 "err": job.error_message,
-                "cat": job.created_at.isoformat() if isinstance(job.created_at, datetime) else job.created_at
+                "cat": job.created_at.isoformat() if isinstance(job.created_at, datetime) else job.created_at,
+                "lane": job.lane,
+                "student": job.student_id,
+                "run": job.test_run_id,
+                "batch": job.batch_id
             })
             self.db.commit()
             new_id = self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
@@ -49,22 +98,139 @@ class SandboxJobRepository:
             raise e
     
     def get_by_id(self, job_id: int) -> SandboxJob:
-        result = self.db.execute("SELECT * FROM sandbox_jobs WHERE id = :id", {"id": job_id})
+        result = self.db.execute(f"SELECT {JOB_COLUMNS} FROM sandbox_jobs WHERE id = :id", {"id": job_id})
         return self._row_to_entity(result.fetchone())
     
     def get_by_submission(self, submission_id: int) -> list:
         result = self.db.execute(
-            "SELECT * FROM sandbox_jobs WHERE submission_id = :sid ORDER BY created_at DESC",
+            f"SELECT {JOB_COLUMNS} FROM sandbox_jobs WHERE submission_id = :sid ORDER BY created_at DESC",
             {"sid": submission_id}
         )
         return [self._row_to_entity(row) for row in result.fetchall()]
     
     def get_pending_jobs(self, limit: int = 10) -> list:
-        result = self.db.execute(
-            "SELECT * FROM sandbox_jobs WHERE status = 'queued' ORDER BY created_at LIMIT :limit",
-            {"limit": limit}
-        )
+        """Next queued jobs in scheduling order (see _queue_query), without claiming them."""
+        result = self.db.execute(_queue_query(), {"limit": limit})
         return [self._row_to_entity(row) for row in result.fetchall()]
+
+    def claim_jobs(self, worker_id: str, limit: int, lease_seconds: float, lanes=None) -> list:
+        """
+        Atomically move up to `limit` queued jobs (of `lanes`, default all)
+        to 'running' under `worker_id`, leased for `lease_seconds`, and return
+        them lane by lane. One UPDATE ... RETURNING under a write lock
+        taken up front, so concurrent graders, in other processes or on other
+        hosts sharing the database, never claim the same job, and a job
+        cancelled meanwhile is not claimed.
+        """
+        if limit <= 0:
+            return []
+        try:
+            self._begin_immediate()
+            rows = self.db.execute(f"""
+                UPDATE sandbox_jobs
+                SET status = 'running', started_at = :now, worker_id = :worker,
+                    lease_expires_at = :until, attempts = attempts + 1
+                WHERE id IN (SELECT id FROM ({_queue_query(lanes)})) AND status = 'queued'
+                RETURNING {JOB_COLUMNS}
+            """, {
+                "now": datetime.utcnow().isoformat(),
+                "worker": worker_id,
+                "until": time.time() + lease_seconds,
+                "limit": limit,
+                **_lane_params(lanes)
+            }).fetchall()
+            self.db.commit()
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+        # RETURNING comes back in no particular order
+        rank = {lane: i for i, lane in enumerate(SandboxJob.valid_lanes)}
+        jobs = [self._row_to_entity(row) for row in rows]
+        return sorted(jobs, key=lambda job: (rank[job.lane], str(job.created_at), job.get_id()))
+
+    def claim(self, job_id: int, worker_id: str, lease_seconds: float):
+        """Claim one queued job as claim_jobs does; None if it is no longer queued."""
+        try:
+            self._begin_immediate()
+            row = self.db.execute(f"""
+                UPDATE sandbox_jobs
+                SET status = 'running', started_at = :now, worker_id = :worker,
+                    lease_expires_at = :until, attempts = attempts + 1
+                WHERE id = :id AND status = 'queued'
+                RETURNING {JOB_COLUMNS}
+            """, {
+                "now": datetime.utcnow().isoformat(),
+                "worker": worker_id,
+                "until": time.time() + lease_seconds,
+                "id": job_id
+            }).fetchone()
+            self.db.commit()
+            return self._row_to_entity(row)
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def renew_leases(self, worker_id: str, lease_seconds: float) -> int:
+        """Heartbeat: extend the leases of every job `worker_id` is running. Returns the count."""
+        try:
+            renewed = self.db.execute("""
+                UPDATE sandbox_jobs SET lease_expires_at = :until
+                WHERE worker_id = :worker AND status = 'running'
+            """, {"worker": worker_id, "until": time.time() + lease_seconds}).rowcount
+            self.db.commit()
+            return renewed
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def requeue_expired(self, max_attempts: int):
+        """
+        Put running jobs whose lease lapsed back in the queue, or fail them if
+        they were already claimed `max_attempts` times. Jobs running without
+        a lease (claimed before leasing existed) count as lapsed. Returns
+        (requeued, failed).
+        """
+        params = {"now": time.time(), "max": max_attempts, "done": datetime.utcnow().isoformat()}
+        try:
+            failed = self.db.execute("""
+                UPDATE sandbox_jobs
+                SET status = 'failed', completed_at = :done, lease_expires_at = NULL,
+                    error_message = 'Grader stopped responding (' || attempts || ' attempts)'
+                WHERE status = 'running' AND COALESCE(lease_expires_at, 0) < :now
+                  AND attempts >= :max
+            """, params).rowcount
+            requeued = self.db.execute("""
+                UPDATE sandbox_jobs
+                SET status = 'queued', started_at = NULL, worker_id = NULL, lease_expires_at = NULL
+                WHERE status = 'running' AND COALESCE(lease_expires_at, 0) < :now
+            """, params).rowcount
+            self.db.commit()
+            return requeued, failed
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def _begin_immediate(self):
+        """Take the write lock before reading, so a claim sees the latest queue."""
+        if isinstance(self.db, sqlite3.Connection) and not self.db.in_transaction:
+            self.db.execute("BEGIN IMMEDIATE")
+
+    def count_queued_by_lane(self) -> dict:
+        """{lane: (queued jobs, created_at of the oldest)}"""
+        result = self.db.execute("""
+            SELECT lane, COUNT(*), MIN(created_at) FROM sandbox_jobs
+            WHERE status = 'queued' GROUP BY lane
+        """)
+        return {row[0]: (row[1], row[2]) for row in result.fetchall()}
+
+    def get_recent_waits(self, limit: int = 500) -> list:
+        """(lane, created_at, started_at) of the most recently started jobs."""
+        result = self.db.execute("""
+            SELECT lane, created_at, started_at FROM sandbox_jobs
+            WHERE started_at IS NOT NULL
+            ORDER BY started_at DESC LIMIT :limit
+        """, {"limit": limit})
+        return [(row[0], row[1], row[2]) for row in result.fetchall()]
     
     def update(self, job: SandboxJob) -> SandboxJob:
         try:
@@ -72,14 +238,17 @@ class SandboxJobRepository:
                 UPDATE sandbox_jobs 
                 SET status = :status, started_at = :start, completed_at = :comp, 
                     exit_code = :exit, error_message = :err
-                WHERE id = :id
+                WHERE id = :id AND attempts = :attempts
             """, {
                 "status": job.status,
                 "start": job.started_at.isoformat() if isinstance(job.started_at, datetime) else job.started_at,
                 "comp": job.completed_at.isoformat() if isinstance(job.completed_at, datetime) else job.completed_at,
                 "exit": job.exit_code,
                 "err": job.error_message,
-                "id": job.get_id()
+                "id": job.get_id(),
+                # A grader whose lease lapsed and whose job was claimed again
+                # no longer owns it: its update matches nothing
+                "attempts": job.attempts
             })
             self.db.commit()
             return self.get_by_id(job.get_id())
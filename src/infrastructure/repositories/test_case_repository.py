@@ -1,16 +1,72 @@
 import sqlite3
+from core.entities.payload_file import PayloadFile
 from core.entities.test_case import Testcase
 
 class TestCaseRepository:
-    def __init__(self, db):
+    def __init__(self, db, payload_store=None):
         self.db = db
+        # Large stdin / expected_out go to files (None = everything inline)
+        self.payload_store = payload_store
+
+    def _payload_file(self, digest):
+        return self.payload_store.get(digest) if self.payload_store else None
+
+    def _payload_columns(self, testcase):
+        """
+        stdin / expected_out column values: the text when it is small enough
+        to keep inline, else a placeholder and the digest of its payload file.
+        """
+        if testcase.kind == "generated":
+            # Produced at grading time and kept in the generated dataset cache
+            return {"stdin": None, "stdin_blob": None, "expected_out": "", "expected_blob": None}
+        values = {}
+        for column, blob_column, empty, source in (
+            ("stdin", "stdin_blob", None, testcase.stdin_source()),
+            ("expected_out", "expected_blob", "", testcase.expected_out_source())
+        ):
+            if not isinstance(source, PayloadFile) and self.payload_store and self.payload_store.should_store(source):
+                source = self.payload_store.put(source)
+            if isinstance(source, PayloadFile):
+                values[column], values[blob_column] = empty, source.digest
+            else:
+                values[column], values[blob_column] = source, None
+        return values
+
+    @staticmethod
+    def _kind_columns(testcase):
+        """Columns only some kinds of test case use; NULL for the others."""
+        columns = {
+            "kind": testcase.kind, "generator": None, "complexity_sizes": None,
+            "complexity_repeats": None, "complexity_max_class": None, "function_name": None,
+            "generator_size": None, "generator_seed": None, "reference_solution": None
+        }
+        if testcase.kind == "complexity":
+            columns.update({
+                "generator": testcase.generator,
+                "complexity_sizes": ",".join(str(n) for n in testcase.complexity_sizes),
+                "complexity_repeats": testcase.complexity_repeats,
+                "complexity_max_class": testcase.complexity_max_class
+            })
+        elif testcase.kind == "function":
+            columns["function_name"] = testcase.function_name
+        elif testcase.kind == "generated":
+            columns.update({
+                "generator": testcase.generator,
+                "generator_size": testcase.generator_size,
+                "generator_seed": testcase.generator_seed,
+                "reference_solution": testcase.reference_solution
+            })
+        return columns
 
     def get_by_id(self, id: int):
         query = """
             SELECT 
                 id, assignment_id, name, stdin, descripion,
                 expected_out, timeout_ms, memory_limit_mb,
-                points, is_visible, sort_order, created_at
+                points, is_visible, sort_order, created_at,
+                compare_mode, compare_tolerance, stdin_blob, expected_blob,
+                kind, generator, complexity_sizes, complexity_repeats, complexity_max_class,
+                function_name, generator_size, generator_seed, reference_solution
             FROM test_cases
             WHERE id = :id
         """
@@ -30,7 +86,20 @@ class TestCaseRepository:
             points=row.points,
             is_visible=row.is_visible,
             sort_order=row.sort_order,
-            created_at=row.created_at
+            created_at=row.created_at,
+            compare_mode=row.compare_mode,
+            compare_tolerance=row.compare_tolerance,
+            stdin_file=self._payload_file(row.stdin_blob),
+            expected_out_file=self._payload_file(row.expected_blob),
+            kind=row.kind,
+            generator=row.generator,
+            complexity_sizes=_parse_sizes(row.complexity_sizes),
+            complexity_repeats=row.complexity_repeats,
+            complexity_max_class=row.complexity_max_class,
+            function_name=row.function_name,
+            generator_size=row.generator_size,
+            generator_seed=row.generator_seed,
+            reference_solution=row.reference_solution
         )
 
     def create(self, testcase: Testcase):
@@ -39,26 +108,34 @@ class TestCaseRepository:
                 INSERT INTO test_cases (
                     assignment_id, name, stdin, descripion,
                     expected_out, timeout_ms, memory_limit_mb,
-                    points, is_visible, sort_order, created_at
+                    points, is_visible, sort_order, created_at,
+                    compare_mode, compare_tolerance, stdin_blob, expected_blob,
+                    kind, generator, complexity_sizes, complexity_repeats, complexity_max_class,
+                    function_name, generator_size, generator_seed, reference_solution
                 )
                 VALUES (
                     :assignment_id, :name, :stdin, :descripion,
                     :expected_out, :timeout_ms, :memory_limit_mb,
-                    :points, :is_visible, :sort_order, :created_at
+                    :points, :is_visible, :sort_order, :created_at,
+                    :compare_mode, :compare_tolerance, :stdin_blob, :expected_blob,
+                    :kind, :generator, :complexity_sizes, :complexity_repeats, :complexity_max_class,
+                    :function_name, :generator_size, :generator_seed, :reference_solution
                 )
             """
             self.db.execute(query, {
                 "assignment_id": testcase.get_assignment_id(),
                 "name": testcase.name,
-                "stdin": testcase.stdin,
+                **self._payload_columns(testcase),
                 "descripion": testcase.descripion,
-                "expected_out": testcase.expected_out,
                 "timeout_ms": testcase.timeout_ms,
                 "memory_limit_mb": testcase.memory_limit_mb,
                 "points": testcase.points,
                 "is_visible": int(testcase.is_visible),
                 "sort_order": testcase.sort_order,
-                "created_at": testcase.created_at
+                "created_at": testcase.created_at,
+                "compare_mode": testcase.compare_mode,
+                "compare_tolerance": testcase.compare_tolerance,
+                **self._kind_columns(testcase)
             })
             new_id = self.db.execute("SELECT last_insert_rowid() AS id").fetchone()[0]
             self.db.commit()
@@ -67,6 +144,56 @@ class TestCaseRepository:
             self.db.rollback()
             return None
 
+    def create_many(self, testcases):
+        """
+        Insert all of `testcases` with one executemany in a single
+        transaction: either every row is added or none is. Returns the count.
+        """
+        if not testcases:
+            return 0
+        try:
+            query = """
+                INSERT INTO test_cases (
+                    assignment_id, name, stdin, descripion,
+                    expected_out, timeout_ms, memory_limit_mb,
+                    points, is_visible, sort_order, created_at,
+                    compare_mode, compare_tolerance, stdin_blob, expected_blob,
+                    kind, generator, complexity_sizes, complexity_repeats, complexity_max_class,
+                    function_name, generator_size, generator_seed, reference_solution
+                )
+                VALUES (
+                    :assignment_id, :name, :stdin, :descripion,
+                    :expected_out, :timeout_ms, :memory_limit_mb,
+                    :points, :is_visible, :sort_order, :created_at,
+                    :compare_mode, :compare_tolerance, :stdin_blob, :expected_blob,
+                    :kind, :generator, :complexity_sizes, :complexity_repeats, :complexity_max_class,
+                    :function_name, :generator_size, :generator_seed, :reference_solution
+                )
+            """
+            self.db.executemany(query, [
+                {
+                    "assignment_id": testcase.get_assignment_id(),
+                    "name": testcase.name,
+                    **self._payload_columns(testcase),
+                    "descripion": testcase.descripion,
+                    "timeout_ms": testcase.timeout_ms,
+                    "memory_limit_mb": testcase.memory_limit_mb,
+                    "points": testcase.points,
+                    "is_visible": int(testcase.is_visible),
+                    "sort_order": testcase.sort_order,
+                    "created_at": testcase.created_at,
+                    "compare_mode": testcase.compare_mode,
+                    "compare_tolerance": testcase.compare_tolerance,
+                    **self._kind_columns(testcase)
+                }
+                for testcase in testcases
+            ])
+            self.db.commit()
+            return len(testcases)
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
     def update(self, testcase: Testcase):
         try:
             query = """
@@ -80,20 +207,35 @@ class TestCaseRepository:
                     memory_limit_mb = :memory_limit_mb,
                     points = :points,
                     is_visible = :is_visible,
-                    sort_order = :sort_order
+                    sort_order = :sort_order,
+                    compare_mode = :compare_mode,
+                    compare_tolerance = :compare_tolerance,
+                    stdin_blob = :stdin_blob,
+                    expected_blob = :expected_blob,
+                    kind = :kind,
+                    generator = :generator,
+                    complexity_sizes = :complexity_sizes,
+                    complexity_repeats = :complexity_repeats,
+                    complexity_max_class = :complexity_max_class,
+                    function_name = :function_name,
+                    generator_size = :generator_size,
+                    generator_seed = :generator_seed,
+                    reference_solution = :reference_solution
                 WHERE id = :id
             """
             self.db.execute(query, {
                 "id": testcase.get_id(),
                 "name": testcase.name,
-                "stdin": testcase.stdin,
+                **self._payload_columns(testcase),
                 "descripion": testcase.descripion,
-                "expected_out": testcase.expected_out,
                 "timeout_ms": testcase.timeout_ms,
                 "memory_limit_mb": testcase.memory_limit_mb,
                 "points": testcase.points,
                 "is_visible": int(testcase.is_visible),
-                "sort_order": testcase.sort_order
+                "sort_order": testcase.sort_order,
+                "compare_mode": testcase.compare_mode,
+                "compare_tolerance": testcase.compare_tolerance,
+                **self._kind_columns(testcase)
             })
             self.db.commit()
             return self.get_by_id(testcase.get_id())
@@ -132,7 +274,24 @@ class TestCaseRepository:
                 points=row.points,
                 is_visible=row.is_visible,
                 sort_order=row.sort_order,
-                created_at=row.created_at
+                created_at=row.created_at,
+                compare_mode=row.compare_mode,
+                compare_tolerance=row.compare_tolerance,
+                stdin_file=self._payload_file(row.stdin_blob),
+                expected_out_file=self._payload_file(row.expected_blob),
+                kind=row.kind,
+                generator=row.generator,
+                complexity_sizes=_parse_sizes(row.complexity_sizes),
+                complexity_repeats=row.complexity_repeats,
+                complexity_max_class=row.complexity_max_class,
+                function_name=row.function_name,
+                generator_size=row.generator_size,
+                generator_seed=row.generator_seed,
+                reference_solution=row.reference_solution
             )
             for row in rows
         ]
+
+
+def _parse_sizes(text):
+    return [int(n) for n in text.split(",")] if text else []
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+from datetime import datetime
+from core.entities.test_run import TestRun
+
+RUN_COLUMNS = """
+    id, user_id, assignment_id, code, language, visible_only, status, total_count,
+    passed_count, score, ai_feedback, error_message, created_at, completed_at
+"""
+
+
+def _timestamp(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class TestRunRepository:
+    def __init__(self, db):
+        self.db = db
+
+    def _row_to_entity(self, row):
+        if not row:
+            return None
+        return TestRun(
+            id=row[0],
+            user_id=row[1],
+            assignment_id=row[2],
+            code=row[3],
+            language=row[4],
+            visible_only=row[5],
+            status=row[6],
+            total_count=row[7],
+            passed_count=row[8],
+            score=row[9],
+            ai_feedback=row[10],
+            error_message=row[11],
+            created_at=row[12],
+            completed_at=row[13]
+        )
+
+    def create(self, run: TestRun) -> TestRun:
+        try:
+            self.db.execute("""
+                INSERT INTO test_runs
+                (user_id, assignment_id, code, language, visible_only, status, total_count, created_at)
+                VALUES (:uid, :aid, :code, :lang, :visible, :status, :total, :cat)
+            """, {
+                "uid": run.get_user_id(),
+                "aid": run.get_assignment_id(),
+                "code": run.code,
+                "lang": run.language,
+                "visible": int(run.visible_only),
+                "status": run.status,
+                "total": run.total_count,
+                "cat": _timestamp(run.created_at)
+            })
+            self.db.commit()
+            new_id = self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return self.get_by_id(new_id)
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def get_by_id(self, run_id: int) -> TestRun:
+        result = self.db.execute(f"SELECT {RUN_COLUMNS} FROM test_runs WHERE id = :id", {"id": run_id})
+        return self._row_to_entity(result.fetchone())
+
+    def update(self, run: TestRun) -> TestRun:
+        try:
+            self.db.execute("""
+                UPDATE test_runs
+                SET status = :status, total_count = :total, passed_count = :passed, score = :score,
+                    ai_feedback = :feedback, error_message = :err, completed_at = :comp
+                WHERE id = :id
+            """, {
+                "status": run.status,
+                "total": run.total_count,
+                "passed": run.passed_count,
+                "score": run.score,
+                "feedback": run.ai_feedback,
+                "err": run.error_message,
+                "comp": _timestamp(run.completed_at),
+                "id": run.get_id()
+            })
+            self.db.commit()
+            return self.get_by_id(run.get_id())
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def add_result(self, run_id: int, position: int, result: dict) -> int:
+        """Record one finished test case; returns its cursor for pollers."""
+        try:
+            self.db.execute("""
+                INSERT INTO test_run_results (test_run_id, position, result)
+                VALUES (:rid, :pos, :result)
+            """, {"rid": run_id, "pos": position, "result": json.dumps(result)})
+            self.db.commit()
+            return self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise e
+
+    def get_results(self, run_id: int, after: int = 0) -> list:
+        """(cursor, position, result) of the cases recorded after `after`, oldest first."""
+        result = self.db.execute("""
+            SELECT id, position, result FROM test_run_results
+            WHERE test_run_id = :rid AND id > :after
+            ORDER BY id
+        """, {"rid": run_id, "after": after or 0})
+        return [(row[0], row[1], json.loads(row[2])) for row in result.fetchall()]
@@ -0,0 +1,113 @@
+"""
+Admission control for code run inside web requests.
+
+Every gunicorn worker is its own process, so the slots are lock files under
+one directory rather than an in-process semaphore: holding a slot means
+holding an exclusive flock on one of `slot-0 .. slot-<max_concurrent - 1>`.
+The kernel drops a dead worker's locks, so a crash never leaks a slot.
+
+A request first takes one of its user's `user-<id>-<n>` slots (never
+waited for: a student already running their limit gets an answer at once),
+then a global slot. If none is free it takes a `wait-<n>` ticket, which
+bounds how many requests wait, and polls for a slot until max_wait_seconds
+pass. No ticket, or no slot in time, raises SandboxBusyError.
+"""
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from config.settings import (
+    SANDBOX_ADMISSION_PATH, SANDBOX_MAX_CONCURRENT, SANDBOX_MAX_PER_USER,
+    SANDBOX_MAX_WAITING, SANDBOX_MAX_WAIT_SECONDS, SANDBOX_BUSY_RETRY_AFTER
+)
+from core.exceptions.sandbox_busy_error import SandboxBusyError
+
+# Seconds between tries for a slot while waiting
+POLL_INTERVAL = 0.05
+
+
+class SandboxAdmission:
+
+    def __init__(
+        self,
+        root: str = None,
+        max_concurrent: int = None,
+        per_user: int = None,
+        max_waiting: int = None,
+        max_wait_seconds: float = None,
+        retry_after: int = None
+    ):
+        self.root = os.path.abspath(root or SANDBOX_ADMISSION_PATH)
+        self.max_concurrent = max(1, max_concurrent or SANDBOX_MAX_CONCURRENT)
+        self.per_user = SANDBOX_MAX_PER_USER if per_user is None else per_user
+        self.max_waiting = SANDBOX_MAX_WAITING if max_waiting is None else max_waiting
+        self.max_wait_seconds = SANDBOX_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        self.retry_after = retry_after or SANDBOX_BUSY_RETRY_AFTER
+        os.makedirs(self.root, exist_ok=True)
+
+    def _try_lock(self, prefix: str, count: int) -> Optional[int]:
+        """An fd holding the lock on a free one of `count` slot files, or None."""
+        for i in range(count):
+            fd = os.open(os.path.join(self.root, f"{prefix}-{i}"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def _release(fd: int):
+        # Closing the only descriptor of the open file drops its lock
+        os.close(fd)
+
+    def _busy(self, message: str) -> SandboxBusyError:
+        return SandboxBusyError(message, self.retry_after)
+
+    @contextmanager
+    def admit(self, user_id=None):
+        """Hold a slot for the duration of the block; raises SandboxBusyError if none is had."""
+        held: List[int] = []
+        try:
+            if user_id is not None and self.per_user > 0:
+                fd = self._try_lock(f"user-{user_id}", self.per_user)
+                if fd is None:
+                    raise self._busy("Wait for your run in progress to finish")
+                held.append(fd)
+
+            slot = self._try_lock("slot", self.max_concurrent)
+            if slot is None:
+                ticket = self._try_lock("wait", self.max_waiting)
+                if ticket is None:
+                    raise self._busy("The sandbox is busy")
+                try:
+                    deadline = time.monotonic() + self.max_wait_seconds
+                    while slot is None and time.monotonic() < deadline:
+                        time.sleep(POLL_INTERVAL)
+                        slot = self._try_lock("slot", self.max_concurrent)
+                finally:
+                    # Waiting is over either way: let the next request queue
+                    self._release(ticket)
+                if slot is None:
+                    raise self._busy("The sandbox is busy")
+            held.append(slot)
+            yield
+        finally:
+            for fd in reversed(held):
+                self._release(fd)
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_sandbox_admission() -> SandboxAdmission:
+    """Process-wide admission control; the slots themselves are shared by all processes."""
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            _admission = SandboxAdmission()
+        return _admission
@@ -0,0 +1,240 @@
+"""
+Compiled artifacts for local C, C++ and Java execution.
+
+A source file is compiled once into a directory named after the sha256 of
+the language, compiler command and source, and every test case then runs
+the cached binary (or classes). Directories are built under a temporary
+name and renamed into place, so concurrent graders never see half-written
+artifacts; within one process a (striped) lock per key keeps parallel test cases of
+the same submission from compiling it more than once. Using an artifact
+touches its mtime, and the least recently used ones are deleted once the
+cache grows past its size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+from core.services.execution_context import ExecutionContext
+from core.services.sandbox_process import build_rlimits, run_process
+from config.settings import (
+    SANDBOX_ARTIFACT_PATH, SANDBOX_ARTIFACT_CACHE_MB, SANDBOX_COMPILE_TIMEOUT, SANDBOX_COMPILE_MEMORY_MB
+)
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "artifact.json"
+# Compiler diagnostics kept per artifact
+MAX_COMPILER_OUTPUT = 64 * 1024
+# Builds are serialized per key through a fixed set of striped locks
+BUILD_LOCK_STRIPES = 64
+
+COMPILERS = {
+    'c': {
+        'source': 'main.c',
+        'compile': ['gcc', '-O2', '-std=gnu11', '-pipe', '-o', 'main', 'main.c', '-lm'],
+    },
+    'cpp': {
+        'source': 'main.cpp',
+        'compile': ['g++', '-O2', '-std=gnu++17', '-pipe', '-o', 'main', 'main.cpp'],
+    },
+    'java': {
+        'source': '{main_class}.java',
+        'compile': ['javac', '-encoding', 'UTF-8', '-nowarn', '{main_class}.java'],
+    },
+}
+
+_JAVA_PUBLIC_CLASS = re.compile(r'public\s+(?:final\s+|abstract\s+)*class\s+([A-Za-z_$][\w$]*)')
+
+
+@dataclass(frozen=True)
+class Artifact:
+    language: str
+    path: str
+    compile_ms: int
+    error: Optional[str] = None  # compiler output when the build failed
+    main_class: Optional[str] = None
+    transient: bool = False  # compile timed out: not cached, may succeed later
+
+    def command(self, context: ExecutionContext) -> List[str]:
+        if self.language == 'java':
+            # The JVM reserves far more address space than it uses, so the
+            # memory limit is its heap size rather than RLIMIT_AS
+            return [
+                'java', f'-Xmx{context.memory_limit_mb}m', '-Xss64m', '-XX:+UseSerialGC',
+                '-cp', self.path, self.main_class
+            ]
+        return [os.path.join(self.path, 'main')]
+
+
+def java_main_class(code: str) -> str:
+    """javac requires the public class to live in a file of the same name."""
+    match = _JAVA_PUBLIC_CLASS.search(code)
+    return match.group(1) if match else 'Main'
+
+
+class ArtifactCache:
+
+    def __init__(self, root: str = None, max_bytes: int = None, compile_timeout: float = None):
+        self.root = os.path.abspath(root or SANDBOX_ARTIFACT_PATH)
+        self.max_bytes = max_bytes or SANDBOX_ARTIFACT_CACHE_MB * 1024 * 1024
+        self.compile_timeout = compile_timeout or SANDBOX_COMPILE_TIMEOUT
+        self._build_locks = [threading.Lock() for _ in range(BUILD_LOCK_STRIPES)]
+        self._evict_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def supports(self, language: str) -> bool:
+        """Whether the language is compiled locally and its compiler is installed."""
+        spec = COMPILERS.get(language)
+        return spec is not None and shutil.which(spec['compile'][0]) is not None
+
+    def _compile_command(self, language: str, code: str):
+        main_class = java_main_class(code) if language == 'java' else None
+        spec = COMPILERS[language]
+        source = spec['source'].format(main_class=main_class)
+        command = [arg.format(main_class=main_class) for arg in spec['compile']]
+        return source, command, main_class
+
+    def key(self, language: str, code: str) -> str:
+        _, command, _ = self._compile_command(language, code)
+        material = json.dumps([language, command, code])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, language: str, code: str) -> Artifact:
+        """The compiled artifact for `code`, building it on a miss."""
+        key = self.key(language, code)
+        with self._build_locks[int(key[:8], 16) % BUILD_LOCK_STRIPES]:
+            artifact = self._load(key)
+            if artifact is None:
+                artifact = self._build(key, language, code)
+        return artifact
+
+    def _load(self, key: str) -> Optional[Artifact]:
+        path = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(path)  # least recently used eviction goes by mtime
+        except (OSError, ValueError):
+            return None
+        return Artifact(
+            language=meta['language'],
+            path=path,
+            compile_ms=meta['compile_ms'],
+            error=meta.get('error'),
+            main_class=meta.get('main_class')
+        )
+
+    def _build(self, key: str, language: str, code: str) -> Artifact:
+        source, command, main_class = self._compile_command(language, code)
+        build_dir = os.path.join(self.root, f".build-{key}-{uuid.uuid4().hex}")
+        os.makedirs(build_dir)
+        try:
+            with open(os.path.join(build_dir, source), 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            context = ExecutionContext(
+                language=language,
+                timeout=self.compile_timeout,
+                memory_limit_mb=SANDBOX_COMPILE_MEMORY_MB,
+                max_output_bytes=MAX_COMPILER_OUTPUT
+            )
+            raw = run_process(
+                command, '', context,
+                cwd=build_dir,
+                env=os.environ.copy(),
+                limits=build_rlimits(context, max_open_files=256, max_processes=0,
+                                     limit_address_space=language != 'java'),
+                max_output=MAX_COMPILER_OUTPUT
+            )
+            compile_ms = raw['wall_ms']
+            if raw['timed_out']:
+                return Artifact(
+                    language=language,
+                    path=build_dir,
+                    compile_ms=compile_ms,
+                    error=f"Compilation timed out after {self.compile_timeout:g} seconds",
+                    transient=True
+                )
+
+            error = None
+            if raw['exit_code'] != 0:
+                error = (raw['stderr'] + raw['stdout']).strip() or f"Compilation failed (exit code {raw['exit_code']})"
+            meta = {'language': language, 'compile_ms': compile_ms, 'error': error, 'main_class': main_class}
+            # Written last: a directory without it is an unfinished build
+            with open(os.path.join(build_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+            path = os.path.join(self.root, key)
+            try:
+                os.rename(build_dir, path)
+            except OSError:
+                # Another process finished the same build first
+                existing = self._load(key)
+                if existing is not None:
+                    return existing
+                raise
+        finally:
+            if os.path.isdir(build_dir):
+                shutil.rmtree(build_dir, ignore_errors=True)
+
+        self.evict()
+        return Artifact(language=language, path=path, compile_ms=compile_ms, error=error, main_class=main_class)
+
+    def evict(self):
+        """Delete the least recently used artifacts past max_bytes."""
+        if not self._evict_lock.acquire(blocking=False):
+            return  # another thread is already evicting
+        try:
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, _tree_size(entry.path), entry.path))
+                except OSError:
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+        finally:
+            self._evict_lock.release()
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """
+    Process-wide cache, so all services of a process share its build locks.
+    Forked workers get their own instead of locks copied mid-build.
+    """
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = ArtifactCache()
+            _cache_pid = os.getpid()
+        return _cache
@@ -0,0 +1,62 @@
+"""
+Content-addressed files for large test case payloads.
+
+A stdin or expected output over the inline limit is written once to
+<root>/<digest[:2]>/<digest>, named by the SHA-256 of its UTF-8 bytes, and
+the test_cases row keeps only the digest. Identical payloads share a file,
+and a file is never rewritten, so readers need no locking.
+"""
+import hashlib
+import os
+import uuid
+from typing import Optional
+
+from config.settings import TEST_CASE_PAYLOAD_PATH, TEST_CASE_INLINE_MAX_KB
+from core.entities.payload_file import PayloadFile
+
+
+class PayloadStore:
+
+    def __init__(self, root: str = None, inline_max_bytes: int = None):
+        self.root = os.path.abspath(root or TEST_CASE_PAYLOAD_PATH)
+        self.inline_max_bytes = TEST_CASE_INLINE_MAX_KB * 1024 if inline_max_bytes is None else inline_max_bytes
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def should_store(self, text: Optional[str]) -> bool:
+        """Whether `text` is too large to keep inline."""
+        if not text or len(text) * 4 <= self.inline_max_bytes:
+            return False
+        return len(text) > self.inline_max_bytes or len(text.encode('utf-8')) > self.inline_max_bytes
+
+    def put(self, text: str) -> PayloadFile:
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return PayloadFile(digest, path, len(data))
+
+    def get(self, digest: Optional[str]) -> Optional[PayloadFile]:
+        """The payload for a stored digest; None for an inline (NULL) column."""
+        if not digest:
+            return None
+        return PayloadFile(digest, self.path(digest))
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def remove(self, digest: str):
+        """
+        Delete a payload nothing refers to any more. A reader that already
+        opened it keeps its content.
+        """
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
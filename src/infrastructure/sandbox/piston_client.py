@@ -0,0 +1,130 @@
+"""
+HTTP transport for the Piston code execution API.
+
+One PistonClient per process keeps a pooled requests.Session, caps the number
+of in-flight executions, retries 5xx responses and connection errors with
+exponential backoff, and discovers the installed runtimes (GET /runtimes) once
+instead of relying on hard-coded versions.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import (
+    PISTON_API_URL, PISTON_MAX_CONCURRENCY, PISTON_MAX_RETRIES, PISTON_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds before retrying runtime discovery after a failure
+RUNTIME_RETRY_SECONDS = 60
+
+
+class PistonClient:
+
+    def __init__(
+        self,
+        base_url: str = None,
+        max_concurrency: int = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+        session: requests.Session = None
+    ):
+        self.base_url = (base_url or PISTON_API_URL).rstrip('/')
+        self.max_concurrency = max(1, max_concurrency or PISTON_MAX_CONCURRENCY)
+        self.max_retries = PISTON_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = PISTON_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        self._runtimes = None
+        self._runtimes_checked_at = 0.0
+        self._runtimes_lock = threading.Lock()
+
+    def _sleep_before_retry(self, attempt: int):
+        delay = self.retry_backoff * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, delay / 2))
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request, retrying 5xx responses and connection errors."""
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            try:
+                with self._slots:
+                    response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code < 500 or attempt >= self.max_retries:
+                    return response
+                logger.info(f"Piston {path} returned {response.status_code}, retrying")
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    # --------------------------------------------------
+    # RUNTIMES
+    # --------------------------------------------------
+    def refresh_runtimes(self) -> Optional[Dict[str, str]]:
+        """Fetch installed runtimes as {language or alias: version}."""
+        try:
+            response = self._request('GET', '/runtimes', timeout=10)
+            response.raise_for_status()
+            runtimes = {}
+            for runtime in response.json():
+                for name in [runtime['language']] + list(runtime.get('aliases', [])):
+                    runtimes.setdefault(name, runtime['version'])
+            self._runtimes = runtimes
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Piston runtime discovery failed: {e}")
+        self._runtimes_checked_at = time.monotonic()
+        return self._runtimes
+
+    def get_runtimes(self) -> Optional[Dict[str, str]]:
+        """Cached runtimes; discovered on first use. None while discovery fails."""
+        if self._runtimes is not None:
+            return self._runtimes
+        with self._runtimes_lock:
+            stale = time.monotonic() - self._runtimes_checked_at > RUNTIME_RETRY_SECONDS
+            if self._runtimes is None and (stale or not self._runtimes_checked_at):
+                self.refresh_runtimes()
+        return self._runtimes
+
+    def get_version(self, language: str) -> Optional[str]:
+        runtimes = self.get_runtimes()
+        return runtimes.get(language) if runtimes else None
+
+    # --------------------------------------------------
+    # EXECUTE
+    # --------------------------------------------------
+    def execute(self, payload: Dict[str, Any], timeout: float) -> requests.Response:
+        return self._request('POST', '/execute', json=payload, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_piston_client() -> PistonClient:
+    """Process-wide client; forked workers build their own connection pool."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = PistonClient()
+            _client_pid = os.getpid()
+        return _client
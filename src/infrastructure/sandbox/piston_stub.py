@@ -0,0 +1,192 @@
+"""
+Minimal Piston-compatible server for offline development and benchmarking.
+
+Implements GET /runtimes and POST /execute with Piston's request and response
+shapes. Python runs in a local subprocess; other languages answer with the
+same "not installed" 400 error Piston uses. Not a sandbox - never expose it.
+
+Run with:  python -m infrastructure.sandbox.piston_stub --port 2000
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PYTHON_VERSION = "{}.{}.{}".format(*sys.version_info[:3])
+
+RUNTIMES = [
+    {"language": "python", "version": PYTHON_VERSION, "aliases": ["py", "python3"], "runtime": "python"},
+]
+
+
+class PistonStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, echo: bool = False):
+        super().__init__(address, PistonStubHandler)
+        # Extra seconds added to every /execute, to mimic a remote instance
+        self.latency = latency
+        # Skip execution and return stdin as stdout (measures transport only)
+        self.echo = echo
+        # Answer this many upcoming requests with 503 (retry testing)
+        self.fail_next = 0
+        self.request_count = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def enter(self) -> bool:
+        """Count a request; False if it should be failed with 503."""
+        with self._lock:
+            self.request_count += 1
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return False
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+class PistonStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; without this, keep-alive
+        # connections stall on Nagle + delayed ACK like no real server does
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, respond):
+        if not self.server.enter():
+            self._send_json(503, {"message": "Service unavailable"})
+            return
+        try:
+            respond()
+        finally:
+            self.server.leave()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/runtimes"):
+            self._handle(lambda: self._send_json(200, RUNTIMES))
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/execute"):
+            self._send_json(404, {"message": "Not found"})
+            return
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json(400, {"message": "Invalid JSON"})
+            return
+        self._handle(lambda: self._execute(request))
+
+    def _execute(self, request):
+        language = request.get("language")
+        runtime = next(
+            (r for r in RUNTIMES if language == r["language"] or language in r["aliases"]), None
+        )
+        if runtime is None:
+            self._send_json(400, {"message": f"{language}-{request.get('version')} runtime is unknown"})
+            return
+
+        files = request.get("files") or [{}]
+        code = files[0].get("content", "")
+        timeout = (request.get("run_timeout") or 3000) / 1000
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        stdin = request.get("stdin") or ""
+        if self.server.echo:
+            run = {"stdout": stdin, "stderr": "", "code": 0, "signal": None, "output": stdin}
+        else:
+            run = _run_python(code, stdin, timeout)
+        self._send_json(200, {"language": runtime["language"], "version": runtime["version"], "run": run})
+
+
+def _run_python(code: str, stdin: str, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "main.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        try:
+            proc = subprocess.run(
+                [sys.executable, path], input=stdin, capture_output=True,
+                text=True, timeout=timeout, cwd=workdir
+            )
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+            stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else (e.stderr or "")
+            return {"stdout": stdout, "stderr": stderr, "code": None,
+                    "signal": "SIGKILL", "output": stdout + stderr}
+
+    exit_code, signal_name = proc.returncode, None
+    if exit_code < 0:
+        exit_code, signal_name = None, signal.Signals(-exit_code).name
+    return {"stdout": proc.stdout, "stderr": proc.stderr, "code": exit_code,
+            "signal": signal_name, "output": proc.stdout + proc.stderr}
+
+
+def start_stub_server(
+    host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, echo: bool = False
+) -> PistonStubServer:
+    """Start the stub on a background thread. Call .shutdown() when done."""
+    server = PistonStubServer((host, port), latency=latency, echo=echo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Piston-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every /execute (simulates a remote API)")
+    parser.add_argument("--echo", action="store_true",
+                        help="don't run code, echo stdin back (transport benchmarks)")
+    args = parser.parse_args(argv)
+
+    server = PistonStubServer((args.host, args.port), latency=args.latency, echo=args.echo)
+    print(f"Piston stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
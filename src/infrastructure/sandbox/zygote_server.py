@@ -0,0 +1,239 @@
+"""
+Zygote process for local Python execution.
+
+Started once by ZygotePool with the standard library already imported. It
+reads one JSON request per line on stdin, forks a fresh child for the student
+code and writes one JSON response per line on stdout. The child gets its own
+stdin/stdout/stderr pipes (stdin is the file at `stdin_path` when given), an
+empty __main__ namespace and the same exit code semantics as `python main.py`. A child writing more than `max_output` bytes
+to either stream is killed and its response flagged output_truncated.
+
+This file is executed as a script and must only depend on the standard library.
+"""
+import builtins
+import gc
+import json
+import linecache
+import os
+import resource
+import selectors
+import signal
+import sys
+import time
+import traceback
+import types
+
+# Warm the modules student programs typically use so children start instantly
+import bisect, collections, copy, datetime, decimal, fractions, functools  # noqa: E401,F401
+import heapq, io, itertools, math, operator, random, re, statistics, string  # noqa: E401,F401
+import typing  # noqa: F401
+
+CHILD_FILENAME = "main.py"
+READ_CHUNK = 65536
+# Seconds between checks on a child that closed its output but has not exited
+WAIT_POLL_INTERVAL = 0.01
+
+
+def _exit_status(exc: SystemExit) -> int:
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_child(code: str):
+    """Runs inside the forked child; never returns."""
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+    sys.argv = [CHILD_FILENAME]
+    sys.path[0] = os.getcwd()
+
+    main = types.ModuleType("__main__")
+    main.__file__ = CHILD_FILENAME
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+    linecache.cache[CHILD_FILENAME] = (len(code), None, code.splitlines(True), CHILD_FILENAME)
+
+    status = 0
+    try:
+        exec(compile(code, CHILD_FILENAME, "exec"), main.__dict__)
+    except SystemExit as e:
+        status = _exit_status(e)
+    except BaseException as e:
+        # Skip this frame so the traceback looks like a plain script run
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        traceback.print_exception(type(e), e, tb)
+        status = 1
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except Exception:
+        pass
+    os._exit(status)
+
+
+def _apply_limits(limits: dict):
+    """Lower rlimits in the child; `limits` maps RLIMIT_* names to [soft, hard]."""
+    for name, (soft, hard) in limits.items():
+        which = getattr(resource, name, None)
+        if which is None:
+            continue
+        _, current_hard = resource.getrlimit(which)
+        if current_hard != resource.RLIM_INFINITY:
+            hard = min(hard, current_hard)
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(which, (soft, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _reap(pid: int, deadline: float):
+    """
+    Wait for the child, killing it if it is still running at `deadline`
+    (it may close stdout and stderr long before exiting). Returns
+    (status, rusage, killed).
+    """
+    while True:
+        waited, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            return status, rusage, False
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage, True
+        time.sleep(WAIT_POLL_INTERVAL)
+
+
+def execute(code: str, stdin: str, timeout: float, limits: dict = None, max_output: int = None,
+            stdin_path: str = None) -> dict:
+    stdin_data = stdin.encode() if stdin else b""
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        os.dup2(in_r, 0)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        for fd in (in_r, in_w, out_r, out_w, err_r, err_w):
+            os.close(fd)
+        if stdin_path:
+            try:
+                payload = os.open(stdin_path, os.O_RDONLY)
+                os.dup2(payload, 0)
+                os.close(payload)
+            except OSError as e:
+                os.write(2, f"cannot open stdin: {e}\n".encode())
+                os._exit(1)
+        if limits:
+            _apply_limits(limits)
+        _run_child(code)
+
+    os.close(in_r)
+    os.close(out_w)
+    os.close(err_w)
+
+    chunks = {out_r: [], err_r: []}
+    sizes = {out_r: 0, err_r: 0}
+    sel = selectors.DefaultSelector()
+    sel.register(out_r, selectors.EVENT_READ)
+    sel.register(err_r, selectors.EVENT_READ)
+    if stdin_data:
+        os.set_blocking(in_w, False)
+        sel.register(in_w, selectors.EVENT_WRITE)
+    else:
+        os.close(in_w)
+
+    offset = 0
+    timed_out = truncated = False
+    deadline = start + timeout
+    while sel.get_map() and not truncated:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        for key, _ in sel.select(remaining):
+            fd = key.fd
+            if fd == in_w:
+                try:
+                    offset += os.write(fd, stdin_data[offset:offset + READ_CHUNK])
+                except BrokenPipeError:
+                    offset = len(stdin_data)
+                if offset >= len(stdin_data):
+                    sel.unregister(fd)
+                    os.close(fd)
+            else:
+                data = os.read(fd, READ_CHUNK)
+                if not data:
+                    sel.unregister(fd)
+                    os.close(fd)
+                    continue
+                if max_output is not None and sizes[fd] + len(data) > max_output:
+                    data = data[:max_output - sizes[fd]]
+                    truncated = True
+                chunks[fd].append(data)
+                sizes[fd] += len(data)
+                if truncated:
+                    os.kill(pid, signal.SIGKILL)
+                    break
+
+    for key in list(sel.get_map().values()):
+        sel.unregister(key.fd)
+        os.close(key.fd)
+    sel.close()
+
+    if timed_out or truncated:
+        # Already killed
+        _, status, rusage = os.wait4(pid, 0)
+    else:
+        status, rusage, timed_out = _reap(pid, deadline)
+    wall_ms = int((time.monotonic() - start) * 1000)
+    exit_code = os.waitstatus_to_exitcode(status)
+    # SIGXCPU: the CPU rlimit backstop fired
+    timed_out = timed_out or exit_code == -signal.SIGXCPU
+    max_rss = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+
+    return {
+        "stdout": b"".join(chunks[out_r]).decode("utf-8", errors="replace"),
+        "stderr": b"".join(chunks[err_r]).decode("utf-8", errors="replace"),
+        "exit_code": -1 if timed_out else exit_code,
+        "wall_ms": wall_ms,
+        "cpu_ms": round((rusage.ru_utime + rusage.ru_stime) * 1000),
+        "memory_kb": max_rss,
+        "timed_out": timed_out,
+        "output_truncated": truncated,
+    }
+
+
+def serve():
+    requests = sys.stdin.buffer
+    responses = sys.stdout.buffer
+    while True:
+        line = requests.readline()
+        if not line:
+            break
+        try:
+            req = json.loads(line)
+            resp = execute(req["code"], req.get("stdin") or "", float(req["timeout"]), req.get("limits"),
+                           req.get("max_output"), req.get("stdin_path"))
+        except Exception as e:
+            resp = {"error": f"{type(e).__name__}: {e}"}
+        responses.write(json.dumps(resp).encode() + b"\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    # Keep warmed objects out of the collector so forked children don't
+    # copy-on-write every page the first time gc walks the heap
+    gc.freeze()
+    serve()
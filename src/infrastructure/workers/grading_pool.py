@@ -0,0 +1,278 @@
+"""
+Background grading worker pool (FR-05).
+
+A single dispatcher claims queued sandbox jobs and hands them to a pool of
+grader processes. Each grader opens its own database connection, so the web
+tier only has to enqueue jobs and the number of graders is independent of the
+number of gunicorn workers. Jobs come off the queue by lane (interactive,
+submission, regrade) with students taking turns inside a lane, and a few
+graders are held back for interactive jobs: the editor's "Run tests".
+
+Several pools, on one host or on several sharing the database file, can
+serve one queue. A pool claims jobs atomically under its worker id and
+leases them; while they run it renews the leases every heartbeat, and it
+queues again any job whose lease lapsed because its pool died.
+
+Run with:  python -m infrastructure.workers.grading_pool --workers 4
+"""
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from config.settings import (
+    GRADER_WORKERS, GRADER_POLL_INTERVAL, GRADER_INTERACTIVE_RESERVE, LOG_LEVEL, RESULT_CACHE_ENABLED,
+    GRADER_LEASE_SECONDS, GRADER_HEARTBEAT_INTERVAL, GRADER_MAX_ATTEMPTS, SANDBOX_USE_PISTON
+)
+
+INTERACTIVE_LANES = ('interactive',)
+BULK_LANES = ('submission', 'regrade')
+
+logger = logging.getLogger(__name__)
+
+# Per-process grading service, built once by the pool initializer
+_worker_grading_service = None
+
+
+def build_grading_service(db_connection, zygote_pool=None, piston_client=None, artifact_cache=None, groq_client=None,
+                          connect=None):
+    """
+    Wire repositories and services for grading on a given connection.
+    `connect` opens a new connection (DatabaseManager's by default) for
+    each cache: caches write from grading threads and must not commit
+    other repositories' pending work.
+    """
+    from infrastructure.repositories.sandbox_job_repository import SandboxJobRepository
+    from infrastructure.repositories.submission_repository import SubmissionRepository
+    from infrastructure.repositories.test_case_repository import TestCaseRepository
+    from infrastructure.repositories.result_repository import ResultRepository
+    from infrastructure.repositories.result_cache_repository import ResultCacheRepository
+    from infrastructure.repositories.generated_dataset_repository import GeneratedDatasetRepository
+    from infrastructure.repositories.test_run_repository import TestRunRepository
+    from infrastructure.sandbox.payload_store import PayloadStore
+    from core.services.sandbox_service import SandboxService
+    from core.services.grading_service import GradingService
+    from core.services.test_run_service import TestRunService
+
+    if connect is None:
+        from infrastructure.database.connection import DatabaseManager
+        connect = DatabaseManager.get_instance().get_connection
+
+    sandbox_job_repo = SandboxJobRepository(db_connection)
+    submission_repo = SubmissionRepository(db_connection)
+    test_case_repo = TestCaseRepository(db_connection, payload_store=PayloadStore())
+    sandbox_service = SandboxService(
+        sandbox_job_repo=sandbox_job_repo,
+        submission_repo=submission_repo,
+        groq_client=groq_client,
+        zygote_pool=zygote_pool,
+        use_external_api=SANDBOX_USE_PISTON,
+        piston_client=piston_client,
+        result_cache=ResultCacheRepository(connect()) if RESULT_CACHE_ENABLED else None,
+        artifact_cache=artifact_cache,
+        dataset_cache=GeneratedDatasetRepository(connect())
+    )
+    return GradingService(
+        sandbox_service=sandbox_service,
+        sandbox_job_repo=sandbox_job_repo,
+        submission_repo=submission_repo,
+        test_case_repo=test_case_repo,
+        result_repo=ResultRepository(db_connection),
+        test_run_service=TestRunService(
+            sandbox_service=sandbox_service,
+            test_run_repo=TestRunRepository(db_connection),
+            sandbox_job_repo=sandbox_job_repo,
+            test_case_repo=test_case_repo
+        )
+    )
+
+
+def _init_worker():
+    """Process pool initializer: give each grader its own connection."""
+    from infrastructure.database.connection import DatabaseManager
+    from infrastructure.sandbox.zygote import get_zygote_pool
+    from infrastructure.sandbox.piston_client import get_piston_client
+    from infrastructure.sandbox.artifact_cache import get_artifact_cache
+    global _worker_grading_service
+    _worker_grading_service = build_grading_service(
+        DatabaseManager.get_instance().get_connection(),
+        zygote_pool=get_zygote_pool(),
+        piston_client=get_piston_client(),
+        artifact_cache=get_artifact_cache(),
+        groq_client=_groq_client()
+    )
+
+
+def _groq_client():
+    """AI feedback for test runs, if Groq is installed and configured."""
+    from infrastructure.ai.groq_client import GroqClient
+    try:
+        return GroqClient()
+    except (ImportError, ValueError) as e:
+        logger.info(f"Test runs without AI feedback: {e}")
+        return None
+
+
+def _run_job(job_id):
+    job = _worker_grading_service.process_job(job_id)
+    return job.status if job else None
+
+
+class GradingWorkerPool:
+    """Dispatches queued sandbox jobs to a bounded pool of grader processes."""
+
+    def __init__(
+        self,
+        grading_service,
+        num_workers: int = None,
+        poll_interval: float = None,
+        executor_factory=None,
+        interactive_reserve: int = None,
+        lease_seconds: float = None,
+        heartbeat_interval: float = None,
+        max_attempts: int = None
+    ):
+        self.grading_service = grading_service
+        self.sandbox_job_repo = grading_service.sandbox_job_repo
+        self.worker_id = grading_service.worker_id
+        self.lease_seconds = lease_seconds or GRADER_LEASE_SECONDS
+        self.heartbeat_interval = heartbeat_interval or GRADER_HEARTBEAT_INTERVAL
+        self.max_attempts = max_attempts or GRADER_MAX_ATTEMPTS
+        self._last_heartbeat = None
+        self.num_workers = max(1, num_workers or GRADER_WORKERS)
+        self.poll_interval = poll_interval if poll_interval is not None else GRADER_POLL_INTERVAL
+        reserve = GRADER_INTERACTIVE_RESERVE if interactive_reserve is None else interactive_reserve
+        # Graders that submission / regrade jobs may occupy
+        self.bulk_capacity = self.num_workers - min(max(0, reserve), self.num_workers - 1)
+        self._executor_factory = executor_factory or (
+            lambda n: ProcessPoolExecutor(max_workers=n, initializer=_init_worker)
+        )
+        self._executor = self._executor_factory(self.num_workers)
+        self._in_flight = {}
+        self._bulk = set()  # in-flight futures of non-interactive jobs
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _fail_job(self, job_id, message):
+        job = self.sandbox_job_repo.get_by_id(job_id)
+        if job and not job.is_finished():
+            job.mark_failed(message)
+            self.sandbox_job_repo.update(job)
+
+    def _reap(self):
+        """Collect finished futures and record jobs whose grader crashed."""
+        broken = False
+        for future in [f for f in self._in_flight if f.done()]:
+            job_id = self._in_flight.pop(future)
+            self._bulk.discard(future)
+            exc = future.exception()
+            if exc is None:
+                continue
+            logger.error(f"Grader crashed on job {job_id}: {exc}")
+            self._fail_job(job_id, f"Grader crashed: {exc}")
+            broken = broken or isinstance(exc, BrokenProcessPool)
+
+        if broken:
+            # A dead worker poisons the whole executor; start a fresh one
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            for job_id in self._in_flight.values():
+                self._fail_job(job_id, "Grader pool restarted")
+            self._in_flight.clear()
+            self._bulk.clear()
+            self._executor = self._executor_factory(self.num_workers)
+
+    def _heartbeat(self):
+        """
+        Every heartbeat_interval: renew the leases of this pool's running
+        jobs, and queue again (or fail) jobs whose grader stopped renewing.
+        """
+        now = time.monotonic()
+        if self._last_heartbeat is not None and now - self._last_heartbeat < self.heartbeat_interval:
+            return
+        self._last_heartbeat = now
+        if self._in_flight:
+            self.sandbox_job_repo.renew_leases(self.worker_id, self.lease_seconds)
+        requeued, failed = self.sandbox_job_repo.requeue_expired(self.max_attempts)
+        if requeued or failed:
+            logger.warning(f"Leases lapsed: requeued {requeued} jobs, failed {failed}")
+
+    def dispatch_once(self) -> int:
+        """Claim as many queued jobs as there are idle graders. Returns the count."""
+        self._reap()
+        self._heartbeat()
+        free = self.num_workers - len(self._in_flight)
+        if free <= 0:
+            return 0
+
+        jobs = self.sandbox_job_repo.claim_jobs(
+            self.worker_id, free, self.lease_seconds, lanes=INTERACTIVE_LANES
+        )
+        bulk_free = min(free - len(jobs), self.bulk_capacity - len(self._bulk))
+        if bulk_free > 0:
+            jobs += self.sandbox_job_repo.claim_jobs(
+                self.worker_id, bulk_free, self.lease_seconds, lanes=BULK_LANES
+            )
+        for job in jobs:
+            future = self._executor.submit(_run_job, job.get_id())
+            self._in_flight[future] = job.get_id()
+            if job.lane != 'interactive':
+                self._bulk.add(future)
+        return len(jobs)
+
+    def run_forever(self, stop_event: threading.Event = None):
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Grading pool started with {self.num_workers} workers")
+        while not stop_event.is_set():
+            self.dispatch_once()
+            if self._in_flight:
+                # Wake up as soon as a grader frees up
+                wait(list(self._in_flight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            else:
+                stop_event.wait(self.poll_interval)
+
+    def drain(self):
+        """Wait for in-flight jobs to finish and record their outcome."""
+        while self._in_flight:
+            wait(list(self._in_flight), timeout=self.heartbeat_interval)
+            self._reap()
+            self._heartbeat()
+
+    def shutdown(self):
+        self.drain()
+        self._executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ACCL background grading workers")
+    parser.add_argument("--workers", type=int, default=GRADER_WORKERS,
+                        help="number of grader processes (default: GRADER_WORKERS)")
+    parser.add_argument("--poll-interval", type=float, default=GRADER_POLL_INTERVAL,
+                        help="seconds between queue polls when idle")
+    parser.add_argument("--once", action="store_true",
+                        help="grade the currently queued jobs and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL)
+
+    from infrastructure.database.connection import DatabaseManager
+    dispatcher = build_grading_service(DatabaseManager.get_instance().get_connection())
+    pool = GradingWorkerPool(dispatcher, num_workers=args.workers, poll_interval=args.poll_interval)
+
+    try:
+        if args.once:
+            while pool.dispatch_once():
+                pool.drain()
+        else:
+            pool.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping grading pool")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,8 @@ from infrastructure.repositories.peer_review_repository import PeerReviewReposit
 from infrastructure.repositories.admin_repository import AdminRepository
 from infrastructure.repositories.result_repository import ResultRepository
 from infrastructure.repositories.sandbox_job_repository import SandboxJobRepository
+from infrastructure.repositories.test_run_repository import TestRunRepository
+from infrastructure.repositories.regrade_batch_repository import RegradeBatchRepository
 from infrastructure.repositories.remediation_repository import RemediationRepository
 from infrastructure.repositories.file_repository import FileRepository
 from infrastructure.repositories.audit_log_repository import AuditLogRepository
@@ -34,7 +36,15 @@ from infrastructure.repositories.draft_repository import DraftRepository
 
 from infrastructure.repositories.settings_repository import SettingsRepository
 from infrastructure.repositories.hint_repository import HintRepository
+from infrastructure.repositories.result_cache_repository import ResultCacheRepository
+from infrastructure.repositories.generated_dataset_repository import GeneratedDatasetRepository
 from infrastructure.ai.groq_client import GroqClient
+from infrastructure.sandbox.zygote import get_zygote_pool
+from infrastructure.sandbox.piston_client import get_piston_client
+from infrastructure.sandbox.artifact_cache import get_artifact_cache
+from infrastructure.sandbox.payload_store import PayloadStore
+from infrastructure.sandbox.admission import get_sandbox_admission
+from config.settings import RESULT_CACHE_ENABLED, SANDBOX_ADMISSION_ENABLED, SANDBOX_USE_PISTON
 
 
 from core.services.auth_service import AuthService
@@ -46,6 +56,8 @@ from core.services.notification_service import NotificationService
 from core.services.peer_review_service import PeerReviewService
 from core.services.admin_service import AdminService
 from core.services.sandbox_service import SandboxService
+from core.services.test_run_service import TestRunService
+from core.services.regrade_service import RegradeService
 from core.services.remediation_service import RemediationService
 from core.services.file_service import FileService
 from core.services.audit_log_service import AuditLogService
@@ -184,18 +196,24 @@ def create_app(test_config=None):
     course_repo = CourseRepository(db_connection)
     enrollment_repo = EnrollmentRepository(db_connection)
     flag_repo = SimilarityFlagRepository(db_connection)
-    test_case_repo = TestCaseRepository(db_connection)
+    test_case_repo = TestCaseRepository(db_connection, payload_store=PayloadStore())
     notification_repo = NotificationRepository(db_connection)
     peer_review_repo = PeerReviewRepository(db_connection)
     admin_repo = AdminRepository(db_connection)
     result_repo = ResultRepository(db_connection)
     sandbox_job_repo = SandboxJobRepository(db_connection)
+    test_run_repo = TestRunRepository(db_connection)
+    regrade_batch_repo = RegradeBatchRepository(db_connection)
     remediation_repo = RemediationRepository(db_connection)
     file_repo = FileRepository(db_connection)
     audit_repo = AuditLogRepository(db_connection)
     draft_repo = DraftRepository(db_connection)
     hint_repo= HintRepository(db_connection)
     settings_repo = SettingsRepository(db_connection)
+    # Own connection: cache writes happen from grading threads and must not
+    # commit other repositories' pending work
+    result_cache_repo = ResultCacheRepository(db_manager.get_connection()) if RESULT_CACHE_ENABLED else None
+    generated_dataset_repo = GeneratedDatasetRepository(db_manager.get_connection())
 
 
     # 2. Initialize Services with Dependencies
@@ -204,7 +222,14 @@ def create_app(test_config=None):
     sandbox_service = SandboxService(
         sandbox_job_repo=sandbox_job_repo,
         submission_repo=submission_repo,
-        groq_client=groq_client
+        groq_client=groq_client,
+        zygote_pool=get_zygote_pool(),
+        use_external_api=SANDBOX_USE_PISTON,
+        piston_client=get_piston_client(),
+        result_cache=result_cache_repo,
+        artifact_cache=get_artifact_cache(),
+        dataset_cache=generated_dataset_repo,
+        admission=get_sandbox_admission() if SANDBOX_ADMISSION_ENABLED else None
     )
     student_service = StudentService(
         student_repo=student_repo,
@@ -278,7 +303,27 @@ def create_app(test_config=None):
     sandbox_service = SandboxService(
         sandbox_job_repo=sandbox_job_repo,
         submission_repo=submission_repo,
-        groq_client=groq_client
+        groq_client=groq_client,
+        zygote_pool=get_zygote_pool(),
+        use_external_api=SANDBOX_USE_PISTON,
+        piston_client=get_piston_client(),
+        result_cache=result_cache_repo,
+        artifact_cache=get_artifact_cache(),
+        dataset_cache=generated_dataset_repo,
+        admission=get_sandbox_admission() if SANDBOX_ADMISSION_ENABLED else None
+    )
+    test_run_service = TestRunService(
+        sandbox_service=sandbox_service,
+        test_run_repo=test_run_repo,
+        sandbox_job_repo=sandbox_job_repo,
+        test_case_repo=test_case_repo
+    )
+    regrade_service = RegradeService(
+        sandbox_service=sandbox_service,
+        regrade_batch_repo=regrade_batch_repo,
+        submission_repo=submission_repo,
+        assignment_repo=assignment_repo,
+        course_repo=course_repo
     )
     # 3. Store Services in App Context
     app.extensions['services'] = {
@@ -291,6 +336,8 @@ def create_app(test_config=None):
         'admin_service': admin_service,
         'peer_review_service': peer_review_service,
         'sandbox_service': sandbox_service,
+        'test_run_service': test_run_service,
+        'regrade_service': regrade_service,
         'remediation_service': remediation_service,
         'hint_service': hint_service,
         'draft_service': draft_service,
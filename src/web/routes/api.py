@@ -1,11 +1,23 @@
 import sqlite3
 import os
-from flask import Blueprint, jsonify, request, session
-from web.utils import login_required, get_service
+import json
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context, url_for
+from web.utils import login_required, instructor_required, get_service
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from core.exceptions.sandbox_busy_error import SandboxBusyError
+from core.services.test_run_service import run_code_tests
+from config.settings import TEST_RUN_LONG_POLL_SECONDS
 
 api_bp = Blueprint('api', __name__)
 
 
+def _busy_response(error: SandboxBusyError):
+    """429 telling the client when to try again."""
+    response = jsonify({'success': False, 'error': error.message, 'retry_after': error.retry_after})
+    return response, 429, {'Retry-After': str(error.retry_after)}
+
+
 @api_bp.route('/api/test-code', methods=['POST'])
 @login_required
 def test_code():
@@ -31,70 +43,135 @@ def test_code():
     except (sqlite3.Error, Exception) as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
-    test_results = []
-    passed_count = 0
-    ai_feedback = None
-
-    if not test_cases:
-        # Dry run - just check if code runs without error
-        result = sandbox_service.execute_code(code, language)
-        
-        test_results.append({
-            'name': 'Syntax Check',
-            'passed': result['success'],
-            'output': result['stdout'] if result['success'] else result['stderr'],
-            'runtime_ms': result['runtime_ms']
-        })
-        
-        if result['success']:
-            passed_count = 1
-        elif sandbox_service.groq_client:
-            # Get AI feedback on error
-            ai_feedback = sandbox_service.get_ai_feedback(code, result['stderr'])
-    else:
-        # Run all test cases using sandbox
-        results = sandbox_service.run_all_tests(code, test_cases, language)
-        
-        for tc_result in results['results']:
-            test_results.append({
-                'name': tc_result['test_name'],
-                'passed': tc_result['passed'],
-                'output': tc_result['stdout'],
-                'expected': tc_result['expected_output'],
-                'actual': tc_result['actual_output'],
-                'runtime_ms': tc_result['runtime_ms'],
-                'timed_out': tc_result['timed_out']
-            })
-            
-            if tc_result['passed']:
-                passed_count += 1
-        
-        # Get AI feedback if there were failures
-        if passed_count < len(test_cases) and sandbox_service.groq_client:
-            failed_result = next((r for r in results['results'] if not r['passed']), None)
-            if failed_result and failed_result.get('stderr'):
-                ai_feedback = sandbox_service.get_ai_feedback(code, failed_result['stderr'])
-
-    score = 0
-    if test_cases:
-        score = (passed_count / len(test_cases)) * 100
-    elif passed_count > 0:
-        score = 100
-
-    response = {
-        'success': True,
-        'test_results': test_results,
-        'score': round(score, 2),
-        'passed_count': passed_count,
-        'total_count': len(test_cases) if test_cases else 1
-    }
-    
+    try:
+        with sandbox_service.admit(user_id):
+            results = run_code_tests(sandbox_service, code, language, test_cases)
+    except SandboxBusyError as e:
+        return _busy_response(e)
+    ai_feedback = results.pop('ai_feedback')
+
+    response = {'success': True, **results}
     if ai_feedback:
         response['ai_feedback'] = ai_feedback
     
     return jsonify(response)
 
 
+@api_bp.route('/api/test-runs', methods=['POST'])
+@login_required
+def start_test_run():
+    """
+    Asynchronous /api/test-code: queue the run and return at once. Per-test
+    results are then fetched from results_url (long poll) or events_url (SSE).
+    """
+    data = request.get_json()
+    assignment_id = data.get('assignment_id')
+
+    user_repo = get_service('user_repo')
+    assignment_repo = get_service('assignment_repo')
+    test_run_service = get_service('test_run_service')
+
+    current_user = user_repo.get_by_id(session.get('user_id'))
+    if not assignment_repo.get_by_id(assignment_id):
+        return jsonify({'success': False, 'error': 'Assignment not found'}), 404
+
+    try:
+        # Runs on the graders, so only the deadline load shedding applies
+        get_service('sandbox_service').check_practice_load()
+        run, job = test_run_service.start(
+            current_user, assignment_id, data.get('code', ''), data.get('language', 'python')
+        )
+    except SandboxBusyError as e:
+        return _busy_response(e)
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'run': run.to_dict(),
+        'job_id': job.get_id(),
+        'results_url': url_for('api.get_test_run', run_id=run.get_id()),
+        'events_url': url_for('api.stream_test_run', run_id=run.get_id())
+    }), 202
+
+
+def _load_test_run(run_id):
+    """The current user's test run, or an error response."""
+    current_user = get_service('user_repo').get_by_id(session.get('user_id'))
+    try:
+        return get_service('test_run_service').get_run(current_user, run_id), None
+    except ValidationError as e:
+        return None, (jsonify({'success': False, 'error': str(e)}), 404)
+    except AuthError as e:
+        return None, (jsonify({'success': False, 'error': str(e)}), 403)
+
+
+def _result_payload(cursor, index, view):
+    return {'cursor': cursor, 'index': index, **view}
+
+
+@api_bp.route('/api/test-runs/<int:run_id>')
+@login_required
+def get_test_run(run_id):
+    """
+    Long poll for a test run. Returns the results recorded after cursor
+    `after` as soon as there are any or the run ends, waiting at most `wait`
+    seconds (capped at TEST_RUN_LONG_POLL_SECONDS; 0 returns immediately).
+    """
+    _, error = _load_test_run(run_id)
+    if error:
+        return error
+
+    after = request.args.get('after', 0, type=int)
+    wait = request.args.get('wait', TEST_RUN_LONG_POLL_SECONDS, type=float)
+    wait = min(max(wait, 0.0), TEST_RUN_LONG_POLL_SECONDS)
+
+    run, results = get_service('test_run_service').wait_for_results(run_id, after, wait)
+    return jsonify({
+        'success': True,
+        'run': run.to_dict(),
+        'results': [_result_payload(*result) for result in results],
+        'cursor': results[-1][0] if results else after
+    })
+
+
+@api_bp.route('/api/test-runs/<int:run_id>/events')
+@login_required
+def stream_test_run(run_id):
+    """
+    Server-Sent Events for a test run: a `result` event per finished test
+    case (its id is the cursor, so reconnects resume via Last-Event-ID) and a
+    final `done` event with the summary. Holds a web worker for the whole
+    run, so prefer the long poll on sync gunicorn workers.
+    """
+    _, error = _load_test_run(run_id)
+    if error:
+        return error
+
+    test_run_service = get_service('test_run_service')
+    after = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', 0, type=int)
+
+    def events():
+        cursor = after
+        while True:
+            run, results = test_run_service.wait_for_results(run_id, cursor, TEST_RUN_LONG_POLL_SECONDS)
+            for result in results:
+                cursor = result[0]
+                yield f"id: {cursor}\nevent: result\ndata: {json.dumps(_result_payload(*result))}\n\n"
+            if run is None or run.is_finished():
+                summary = run.to_dict() if run else {'status': 'failed'}
+                yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+                return
+            if not results:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @api_bp.route('/api/assignment/<assignment_id>/test-cases')
 @login_required
 def get_test_cases(assignment_id):
@@ -170,6 +247,76 @@ def get_supported_languages():
     })
 
 
+@api_bp.route('/api/queue-stats')
+@instructor_required
+def get_queue_stats():
+    """Grading queue depth and wait times per lane (interactive, submission, regrade)."""
+    sandbox_service = get_service('sandbox_service')
+    try:
+        return jsonify({'success': True, 'lanes': sandbox_service.queue_stats()})
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _regrade_started(start, scope_id):
+    current_user = get_service('user_repo').get_by_id(session.get('user_id'))
+    try:
+        batch = start(current_user, scope_id)
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except AuthError as e:
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'batch': batch.to_dict(),
+        'progress_url': url_for('api.get_regrade', batch_id=batch.get_id()),
+        'cancel_url': url_for('api.cancel_regrade', batch_id=batch.get_id())
+    }), 202
+
+
+@api_bp.route('/api/assignments/<int:assignment_id>/regrade', methods=['POST'])
+@instructor_required
+def regrade_assignment(assignment_id):
+    """Regrade the latest submission of every student on the assignment."""
+    return _regrade_started(get_service('regrade_service').regrade_assignment, assignment_id)
+
+
+@api_bp.route('/api/courses/<int:course_id>/regrade', methods=['POST'])
+@instructor_required
+def regrade_course(course_id):
+    """Regrade the latest submissions of every assignment in the course."""
+    return _regrade_started(get_service('regrade_service').regrade_course, course_id)
+
+
+def _regrade_progress(action, batch_id):
+    current_user = get_service('user_repo').get_by_id(session.get('user_id'))
+    try:
+        return jsonify({'success': True, **action(current_user, batch_id)})
+    except ValidationError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except AuthError as e:
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/api/regrades/<int:batch_id>')
+@instructor_required
+def get_regrade(batch_id):
+    """Regrade progress: done / failed / remaining jobs and an ETA."""
+    return _regrade_progress(get_service('regrade_service').get_progress, batch_id)
+
+
+@api_bp.route('/api/regrades/<int:batch_id>/cancel', methods=['POST'])
+@instructor_required
+def cancel_regrade(batch_id):
+    """Cancel the jobs of a regrade that have not started yet."""
+    return _regrade_progress(get_service('regrade_service').cancel, batch_id)
+
+
 @api_bp.route('/api/drafts', methods=['GET'])
 @login_required
 def get_draft():
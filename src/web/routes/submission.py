@@ -51,7 +51,7 @@ def view_submission(submission_id):
 @login_required
 @instructor_required
 def regrade_submission(submission_id):
-    sandbox_service = get_service('sandbox_service')
+    regrade_service = get_service('regrade_service')
     submission_repo = get_service('submission_repo')
     try:
         submission = submission_repo.get_by_id(submission_id)
@@ -59,8 +59,8 @@ def regrade_submission(submission_id):
             flash('Submission not found', 'error')
             return redirect(request.referrer or url_for('instructor.dashboard'))
 
-        # Re-run tests (service handles enqueuing or immediate run)
-        sandbox_service.regrade_submission(submission)
+        # Queued on the regrade lane; the grading workers re-run the tests
+        regrade_service.regrade_submission(get_current_user(), submission)
         flash('Regrade requested', 'success')
     except (sqlite3.Error, Exception) as e:
         flash(str(e), 'error')
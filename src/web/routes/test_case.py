@@ -7,6 +7,30 @@ from core.exceptions.auth_error import AuthError
 test_case_bp = Blueprint('test_case', __name__, url_prefix='/test-cases')
 
 
+def _kind_fields():
+    """Kind and its settings from the create / edit form."""
+    kind = request.form.get('kind', 'io')
+    if kind == 'function':
+        return {'kind': kind, 'function_name': (request.form.get('function_name') or '').strip()}
+    if kind == 'generated':
+        return {
+            'kind': kind,
+            'generator': request.form.get('generator'),
+            'generator_size': request.form.get('generator_size', type=int),
+            'generator_seed': request.form.get('generator_seed', type=int, default=0),
+            'reference_solution': request.form.get('reference_solution')
+        }
+    if kind != 'complexity':
+        return {'kind': kind}
+    return {
+        'kind': kind,
+        'generator': request.form.get('generator'),
+        'complexity_sizes': request.form.get('complexity_sizes', ''),
+        'complexity_repeats': request.form.get('complexity_repeats', type=int, default=3),
+        'complexity_max_class': request.form.get('complexity_max_class')
+    }
+
+
 @test_case_bp.route('/create/<int:assignment_id>', methods=['GET', 'POST'])
 @login_required
 @instructor_required
@@ -22,7 +46,10 @@ def create_test_case(assignment_id):
                 stdin=request.form.get('stdin'),
                 expected_out=request.form.get('expected_out'),
                 points=request.form.get('points', type=int, default=0),
-                is_visible=bool(request.form.get('is_visible'))
+                is_visible=bool(request.form.get('is_visible')),
+                compare_mode=request.form.get('compare_mode', 'exact'),
+                compare_tolerance=request.form.get('compare_tolerance', type=float),
+                **_kind_fields()
             )
             flash('Test case created', 'success')
             return redirect(request.referrer or url_for('assignment.view_submissions', assignment_id=assignment_id))
@@ -32,6 +59,33 @@ def create_test_case(assignment_id):
     return render_template('test_case/create.html', assignment_id=assignment_id)
 
 
+@test_case_bp.route('/import/<int:assignment_id>', methods=['GET', 'POST'])
+@login_required
+@instructor_required
+def import_test_cases(assignment_id):
+    if request.method == 'POST':
+        archive = request.files.get('archive')
+        if not archive or not archive.filename:
+            flash('No archive provided', 'error')
+            return render_template('test_case/import.html', assignment_id=assignment_id)
+        try:
+            count = get_service('test_case_service').import_test_cases(
+                instructor=get_current_user(),
+                assignment_id=assignment_id,
+                archive=archive.stream,
+                points=request.form.get('points', type=int, default=1),
+                is_visible=bool(request.form.get('is_visible')),
+                compare_mode=request.form.get('compare_mode', 'exact'),
+                compare_tolerance=request.form.get('compare_tolerance', type=float)
+            )
+            flash(f'Imported {count} test cases', 'success')
+            return redirect(url_for('assignment.view_submissions', assignment_id=assignment_id))
+        except (ValidationError, AuthError, sqlite3.Error) as e:
+            flash(str(e), 'error')
+
+    return render_template('test_case/import.html', assignment_id=assignment_id)
+
+
 @test_case_bp.route('/<int:testcase_id>/edit', methods=['GET', 'POST'])
 @login_required
 @instructor_required
@@ -47,7 +101,10 @@ def edit_test_case(testcase_id):
                 stdin=request.form.get('stdin'),
                 expected_out=request.form.get('expected_out'),
                 points=request.form.get('points', type=int, default=0),
-                is_visible=bool(request.form.get('is_visible'))
+                is_visible=bool(request.form.get('is_visible')),
+                compare_mode=request.form.get('compare_mode', 'exact'),
+                compare_tolerance=request.form.get('compare_tolerance', type=float),
+                **_kind_fields()
             )
             flash('Test case updated', 'success')
             return redirect(request.referrer or url_for('instructor.dashboard'))
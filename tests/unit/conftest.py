@@ -33,6 +33,11 @@ from infrastructure.repositories.audit_log_repository import AuditLogRepository
 from infrastructure.repositories.remediation_repository import RemediationRepository
 from infrastructure.repositories.sandbox_job_repository import SandboxJobRepository
 from infrastructure.repositories.draft_repository import DraftRepository
+from infrastructure.repositories.result_cache_repository import ResultCacheRepository
+from infrastructure.repositories.generated_dataset_repository import GeneratedDatasetRepository
+from infrastructure.sandbox.payload_store import PayloadStore
+from infrastructure.repositories.test_run_repository import TestRunRepository
+from infrastructure.repositories.regrade_batch_repository import RegradeBatchRepository
 
 from core.entities.user import User
 from core.entities.student import Student
@@ -117,7 +122,9 @@ def clean_db(db_connection):
         'similarity_flags', 'results', 'hints', 'embeddings',
         'files', 'test_cases', 'submissions', 'enrollments',
         'assignments', 'courses', 'notifications', 'admins',
-        'instructors', 'students', 'users', 'drafts'
+        'instructors', 'students', 'users', 'drafts', 'result_cache',
+        'sandbox_jobs', 'test_run_results', 'test_runs', 'regrade_batches',
+        'generated_datasets'
     ]
     
     db_connection.execute("PRAGMA foreign_keys = OFF")
@@ -129,6 +136,17 @@ def clean_db(db_connection):
     return db_connection
 
 
+@pytest.fixture
+def sqlite_connection(clean_db, test_db_path):
+    """A raw sqlite3 connection to the test database, as DatabaseManager.get_connection() gives production"""
+    from infrastructure.database.connection import CustomRow
+    conn = sqlite3.connect(test_db_path, check_same_thread=False)
+    conn.row_factory = lambda cursor, row: CustomRow(cursor, row)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    yield conn
+    conn.close()
+
+
 # Repository fixtures
 @pytest.fixture
 def user_repo(clean_db):
@@ -235,6 +253,26 @@ def draft_repo(clean_db):
     return DraftRepository(clean_db)
 
 
+@pytest.fixture
+def result_cache_repo(clean_db):
+    return ResultCacheRepository(clean_db)
+
+
+@pytest.fixture
+def generated_dataset_repo(clean_db, tmp_path):
+    return GeneratedDatasetRepository(clean_db, payload_store=PayloadStore(root=str(tmp_path)))
+
+
+@pytest.fixture
+def test_run_repo(clean_db):
+    return TestRunRepository(clean_db)
+
+
+@pytest.fixture
+def regrade_batch_repo(clean_db):
+    return RegradeBatchRepository(clean_db)
+
+
 # Sample data fixtures
 @pytest.fixture
 def sample_user(user_repo):
@@ -0,0 +1,114 @@
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+from core.exceptions.sandbox_busy_error import SandboxBusyError
+from infrastructure.sandbox.admission import SandboxAdmission
+
+
+def _admission(tmp_path, **limits):
+    settings = {'max_concurrent': 1, 'per_user': 0, 'max_waiting': 0, 'max_wait_seconds': 0.2, 'retry_after': 3}
+    return SandboxAdmission(root=str(tmp_path), **{**settings, **limits})
+
+
+@pytest.mark.unit
+class TestSandboxAdmission:
+
+    def test_refuses_beyond_capacity(self, tmp_path):
+        admission = _admission(tmp_path)
+
+        with admission.admit():
+            with pytest.raises(SandboxBusyError) as busy:
+                with admission.admit():
+                    pass
+        assert busy.value.retry_after == 3
+
+        with admission.admit():
+            pass
+
+    def test_per_user_limit(self, tmp_path):
+        admission = _admission(tmp_path, max_concurrent=3, per_user=1)
+
+        with admission.admit(user_id=1), admission.admit(user_id=2):
+            with pytest.raises(SandboxBusyError, match="your run in progress"):
+                with admission.admit(user_id=1):
+                    pass
+
+    def test_waits_for_a_slot(self, tmp_path):
+        admission = _admission(tmp_path, max_waiting=1, max_wait_seconds=5)
+        held = threading.Event()
+
+        def occupy():
+            with admission.admit():
+                held.set()
+                time.sleep(0.2)
+
+        thread = threading.Thread(target=occupy)
+        thread.start()
+        held.wait()
+        start = time.monotonic()
+        with admission.admit():
+            waited = time.monotonic() - start
+        thread.join()
+
+        assert 0.05 < waited < 2
+
+    def test_wait_is_bounded_in_time_and_length(self, tmp_path):
+        admission = _admission(tmp_path, max_waiting=1, max_wait_seconds=0.3)
+        outcome = {}
+
+        def wait_in_line():
+            start = time.monotonic()
+            try:
+                with admission.admit():
+                    pass
+            except SandboxBusyError:
+                outcome['waited'] = time.monotonic() - start
+
+        with admission.admit():
+            waiter = threading.Thread(target=wait_in_line)
+            waiter.start()
+            time.sleep(0.1)
+            # The only place in line is taken: refused without waiting
+            start = time.monotonic()
+            with pytest.raises(SandboxBusyError):
+                with admission.admit():
+                    pass
+            assert time.monotonic() - start < 0.1
+            waiter.join()
+
+        assert outcome['waited'] >= 0.3
+
+    def test_slot_is_released_when_the_run_fails(self, tmp_path):
+        admission = _admission(tmp_path)
+
+        with pytest.raises(RuntimeError):
+            with admission.admit():
+                raise RuntimeError("crash")
+
+        with admission.admit():
+            pass
+
+    def test_slots_are_shared_between_processes(self, tmp_path):
+        admission = _admission(tmp_path)
+        holder = subprocess.Popen([
+            sys.executable, "-c",
+            "import fcntl, os, sys, time\n"
+            f"fd = os.open({str(tmp_path / 'slot-0')!r}, os.O_RDWR | os.O_CREAT)\n"
+            "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+            "print('held', flush=True)\n"
+            "sys.stdin.read()\n"
+        ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == "held"
+            with pytest.raises(SandboxBusyError):
+                with admission.admit():
+                    pass
+        finally:
+            holder.stdin.close()
+            holder.wait()
+
+        with admission.admit():
+            pass
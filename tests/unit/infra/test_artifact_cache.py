@@ -0,0 +1,160 @@
+import os
+import shutil
+import pytest
+from unittest.mock import Mock
+
+from core.services.sandbox_service import SandboxService
+from infrastructure.sandbox.artifact_cache import ArtifactCache, java_main_class
+
+needs_gcc = pytest.mark.skipif(shutil.which('gcc') is None, reason="gcc not installed")
+
+ADD_C = '#include <stdio.h>\nint main(){int a,b;scanf("%d %d",&a,&b);printf("%d\\n",a+b);return 0;}'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(root=str(tmp_path / "artifacts"))
+
+
+def _make_test_case(stdin, expected):
+    tc = Mock()
+    tc.name = stdin
+    tc.stdin = stdin
+    tc.expected_out = expected
+    tc.timeout_ms = 5000
+    tc.memory_limit_mb = 256
+    tc.points = 1
+    return tc
+
+
+@pytest.mark.unit
+class TestJavaMainClass:
+
+    def test_public_class_names_the_file(self):
+        assert java_main_class('import java.util.*;\npublic final class Solution {}') == 'Solution'
+
+    def test_defaults_to_main(self):
+        assert java_main_class('class Helper {}') == 'Main'
+
+
+@needs_gcc
+@pytest.mark.unit
+class TestArtifactCache:
+
+    def test_compiles_once_per_source(self, cache):
+        first = cache.get('c', ADD_C)
+        second = cache.get('c', ADD_C)
+
+        assert first.error is None
+        assert second.path == first.path
+        assert os.path.isfile(os.path.join(first.path, 'main'))
+        assert len(os.listdir(cache.root)) == 1
+
+    def test_key_depends_on_source_and_language(self, cache):
+        assert cache.key('c', ADD_C) == cache.key('c', ADD_C)
+        assert cache.key('c', ADD_C) != cache.key('c', ADD_C + '\n')
+        assert cache.key('c', ADD_C) != cache.key('cpp', ADD_C)
+
+    def test_compile_errors_are_cached(self, cache):
+        artifact = cache.get('c', 'int main(){ return x; }')
+
+        assert 'error' in artifact.error
+        assert "'x' undeclared" in artifact.error.replace('‘', "'").replace('’', "'")
+        assert cache.get('c', 'int main(){ return x; }').error == artifact.error
+
+    def test_survives_a_new_instance(self, cache):
+        path = cache.get('c', ADD_C).path
+        assert ArtifactCache(root=cache.root).get('c', ADD_C).path == path
+
+    def test_least_recently_used_evicted(self, cache):
+        sources = [ADD_C.replace('a+b', f'a+b+{i}') for i in range(3)]
+        paths = [cache.get('c', source).path for source in sources]
+        os.utime(paths[0], (1, 1))
+        os.utime(paths[1], (2, 2))
+        os.utime(paths[2], (3, 3))
+        cache.get('c', sources[0])  # used again: now the most recent
+
+        cache.max_bytes = 1
+        cache.evict()
+        assert os.listdir(cache.root) == []
+
+        cache.max_bytes = 10 * 1024 * 1024
+        paths = [cache.get('c', source).path for source in sources]
+        size = sum(os.path.getsize(os.path.join(p, 'main')) for p in paths)
+        os.utime(paths[1], (1, 1))
+        cache.max_bytes = size  # room for about two of the three
+        cache.evict()
+
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[0]) and os.path.exists(paths[2])
+
+
+@needs_gcc
+@pytest.mark.unit
+class TestCompiledExecution:
+
+    @pytest.fixture
+    def service(self, cache):
+        return SandboxService(
+            sandbox_job_repo=Mock(),
+            submission_repo=Mock(),
+            use_external_api=False,
+            parallelism=4,
+            artifact_cache=cache
+        )
+
+    def test_runs_c_and_reports_compile_time_separately(self, service):
+        result = service.execute_code(ADD_C, language='c', stdin='2 3')
+
+        assert result['success'] is True
+        assert result['stdout'] == '5\n'
+        assert result['compile_ms'] > 0
+        assert result['runtime_ms'] < result['compile_ms']
+
+    def test_one_compile_for_all_test_cases(self, service, cache):
+        cases = [_make_test_case(f"{i} {i}", str(2 * i)) for i in range(6)]
+        build = Mock(wraps=cache._build)
+        cache._build = build
+
+        result = service.run_all_tests(ADD_C, cases, language='c')
+
+        assert result['passed_count'] == 6
+        assert build.call_count == 1
+        assert len({r['compile_ms'] for r in result['results']}) == 1
+
+    def test_compile_error_fails_every_test_case(self, service):
+        cases = [_make_test_case("1 1", "2"), _make_test_case("2 2", "4")]
+
+        results = service.run_all_tests('int main() { return }', cases, language='c')['results']
+
+        assert all(not r['passed'] and 'error' in r['stderr'] for r in results)
+
+    def test_cpp_memory_limit_enforced(self, service):
+        code = '#include <vector>\nint main(){ std::vector<char> v(512u << 20, 1); return v[7]; }'
+
+        result = service.execute_code(code, language='cpp', memory_limit_mb=128)
+
+        assert result['success'] is False
+        assert 'bad_alloc' in result['stderr']
+
+    def test_timeout(self, service):
+        result = service.execute_code('int main(){ for(;;); }', language='c', timeout=1)
+
+        assert result['timed_out'] is True
+        assert 'timed out' in result['stderr']
+
+    def test_runs_locally_before_piston(self, cache):
+        piston_client = Mock()
+        service = SandboxService(
+            sandbox_job_repo=Mock(),
+            submission_repo=Mock(),
+            use_external_api=True,
+            piston_client=piston_client,
+            artifact_cache=cache
+        )
+
+        result = service.execute_code(ADD_C, language='c', stdin='2 3')
+
+        assert result['stdout'] == '5\n'
+        assert 'compile_ms' in result
+        piston_client.execute.assert_not_called()
@@ -0,0 +1,185 @@
+import pytest
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import Mock
+
+from core.entities.sandbox_job import SandboxJob
+from infrastructure.repositories.generated_dataset_repository import GeneratedDatasetRepository
+from infrastructure.workers import grading_pool
+from infrastructure.workers.grading_pool import GradingWorkerPool
+
+
+class InMemoryJobRepo:
+    """Minimal stand-in for SandboxJobRepository."""
+
+    def __init__(self, count):
+        self.jobs = {
+            i: SandboxJob(id=i, submission_id=100 + i, status='queued')
+            for i in range(1, count + 1)
+        }
+
+    def get_by_id(self, job_id):
+        return self.jobs.get(job_id)
+
+    def get_pending_jobs(self, limit=10):
+        return [j for j in self.jobs.values() if j.status == 'queued'][:limit]
+
+    def claim_jobs(self, worker_id, limit, lease_seconds, lanes=None):
+        claimed = [j for j in self.get_pending_jobs(limit=len(self.jobs))
+                   if lanes is None or j.lane in lanes][:limit]
+        for job in claimed:
+            job.mark_running()
+            job.worker_id = worker_id
+            job.attempts += 1
+        return claimed
+
+    def renew_leases(self, worker_id, lease_seconds):
+        return sum(1 for j in self.jobs.values() if j.worker_id == worker_id and j.status == 'running')
+
+    def requeue_expired(self, max_attempts):
+        return 0, 0
+
+    def update(self, job):
+        self.jobs[job.get_id()] = job
+        return job
+
+
+@pytest.fixture
+def job_repo():
+    return InMemoryJobRepo(5)
+
+
+@pytest.fixture
+def grading_service(job_repo, monkeypatch):
+    service = Mock()
+    service.sandbox_job_repo = job_repo
+    service.worker_id = "host:1"
+
+    def process(job_id):
+        job = job_repo.get_by_id(job_id)
+        job.mark_completed()
+        return job
+
+    service.process_job.side_effect = process
+    # Threads share the module global that each grader process would build
+    monkeypatch.setattr(grading_pool, '_worker_grading_service', service)
+    return service
+
+
+def make_pool(grading_service, workers, interactive_reserve=0):
+    return GradingWorkerPool(
+        grading_service,
+        num_workers=workers,
+        poll_interval=0.01,
+        executor_factory=lambda n: ThreadPoolExecutor(max_workers=n),
+        interactive_reserve=interactive_reserve
+    )
+
+
+@pytest.mark.unit
+class TestGradingWorkerPool:
+
+    def test_dispatch_claims_at_most_one_job_per_worker(self, grading_service, job_repo):
+        pool = make_pool(grading_service, workers=2)
+
+        assert pool.dispatch_once() == 2
+        assert sum(j.status != 'queued' for j in job_repo.jobs.values()) == 2
+        pool.shutdown()
+
+    def test_drains_whole_queue(self, grading_service, job_repo):
+        pool = make_pool(grading_service, workers=3)
+
+        while pool.dispatch_once():
+            pool.drain()
+        pool.shutdown()
+
+        assert all(j.status == 'completed' for j in job_repo.jobs.values())
+        assert grading_service.process_job.call_count == 5
+
+    def test_crashed_grader_marks_job_failed(self, grading_service, job_repo):
+        grading_service.process_job.side_effect = RuntimeError("segfault")
+        pool = make_pool(grading_service, workers=1)
+
+        pool.dispatch_once()
+        pool.drain()
+        pool.shutdown()
+
+        assert job_repo.get_by_id(1).status == 'failed'
+        assert 'segfault' in job_repo.get_by_id(1).error_message
+
+
+@pytest.mark.unit
+class TestInteractiveReserve:
+
+    def test_bulk_jobs_leave_reserved_graders_idle(self, grading_service, job_repo):
+        pool = make_pool(grading_service, workers=3, interactive_reserve=1)
+        pool._executor = Mock(submit=Mock(side_effect=lambda *args: Future()))  # graders stay busy
+
+        assert pool.dispatch_once() == 2
+        assert pool.dispatch_once() == 0
+
+        job_repo.jobs[9] = SandboxJob(id=9, submission_id=109, status='queued', lane='interactive')
+        assert pool.dispatch_once() == 1
+        assert job_repo.jobs[9].status == 'running'
+
+    def test_reserve_never_takes_the_only_grader(self, grading_service):
+        pool = make_pool(grading_service, workers=1, interactive_reserve=2)
+        assert pool.bulk_capacity == 1
+        pool.shutdown()
+
+
+@pytest.mark.unit
+class TestLeases:
+
+    def test_heartbeat_renews_leases_and_requeues_lapsed_jobs(self, grading_service, job_repo):
+        job_repo.renew_leases = Mock(return_value=1)
+        job_repo.requeue_expired = Mock(return_value=(2, 0))
+        pool = make_pool(grading_service, workers=1)
+        pool._executor = Mock(submit=Mock(side_effect=lambda *args: Future()))
+        pool.heartbeat_interval = 3600
+
+        pool.dispatch_once()
+        pool.dispatch_once()
+
+        # Once per interval, not per poll; nothing was in flight the first time
+        job_repo.requeue_expired.assert_called_once_with(pool.max_attempts)
+        job_repo.renew_leases.assert_not_called()
+
+        pool._last_heartbeat -= 3600
+        pool.dispatch_once()
+        job_repo.renew_leases.assert_called_once_with("host:1", pool.lease_seconds)
+
+    def test_claims_under_the_pool_worker_id(self, grading_service, job_repo):
+        pool = make_pool(grading_service, workers=2)
+
+        pool.dispatch_once()
+        pool.shutdown()
+
+        assert {j.worker_id for j in job_repo.jobs.values() if j.attempts} == {"host:1"}
+
+
+class TestBuildGradingService:
+
+    def test_result_cache_has_its_own_connection(self, monkeypatch):
+        monkeypatch.setattr(grading_pool, "RESULT_CACHE_ENABLED", True)
+        db, cache_db = Mock(), Mock()
+
+        service = grading_pool.build_grading_service(db, connect=lambda: cache_db)
+
+        assert service.sandbox_service.result_cache.db is cache_db
+
+    def test_caches_generated_datasets(self):
+        db, dataset_db = Mock(), Mock()
+
+        service = grading_pool.build_grading_service(db, connect=lambda: dataset_db)
+
+        dataset_cache = service.sandbox_service.dataset_cache
+        assert isinstance(dataset_cache, GeneratedDatasetRepository)
+        assert dataset_cache.db is dataset_db
+
+    @pytest.mark.parametrize("use_piston", [True, False])
+    def test_follows_piston_setting(self, monkeypatch, use_piston):
+        monkeypatch.setattr(grading_pool, "SANDBOX_USE_PISTON", use_piston)
+
+        service = grading_pool.build_grading_service(Mock(), connect=Mock)
+
+        assert service.sandbox_service.use_external_api is use_piston
@@ -0,0 +1,54 @@
+import os
+import pytest
+
+from infrastructure.sandbox.payload_store import PayloadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PayloadStore(root=str(tmp_path / "payloads"), inline_max_bytes=16)
+
+
+@pytest.mark.unit
+class TestPayloadStore:
+
+    def test_only_large_payloads_are_stored(self, store):
+        assert not store.should_store(None)
+        assert not store.should_store("x" * 16)
+        assert store.should_store("x" * 17)
+        assert store.should_store("é" * 9)  # 18 bytes in UTF-8
+
+    def test_put_is_content_addressed(self, store):
+        first = store.put("1 2 3\n" * 10)
+        second = store.put("1 2 3\n" * 10)
+
+        assert first == second
+        assert first.path == store.path(first.digest)
+        assert os.path.basename(os.path.dirname(first.path)) == first.digest[:2]
+        assert first.size_bytes == 60
+        assert not [name for name in os.listdir(os.path.dirname(first.path)) if name.endswith('.tmp')]
+
+    def test_get_reads_back(self, store):
+        text = "línea\r\n" * 20
+        digest = store.put(text).digest
+
+        payload = store.get(digest)
+
+        assert payload.read() == text
+        assert payload.head(6) == "línea\r"
+        with payload.mapped() as mapping:
+            assert mapping[:6] == "línea".encode('utf-8')[:6]
+        assert store.get(None) is None
+
+    def test_empty_payload_maps_to_empty_bytes(self, store):
+        empty = store.put("")
+        with empty.mapped() as mapping:
+            assert mapping == b''
+
+    def test_remove_deletes_file(self, store):
+        payload = store.put("x" * 40)
+
+        store.remove(payload.digest)
+        store.remove(payload.digest)
+
+        assert not store.exists(payload.digest)
@@ -0,0 +1,112 @@
+import threading
+import pytest
+import requests
+from unittest.mock import Mock
+
+from core.services.sandbox_service import SandboxService
+from infrastructure.sandbox.piston_client import PistonClient
+from infrastructure.sandbox.piston_stub import start_stub_server, PYTHON_VERSION
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = start_stub_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def echo_stub():
+    server = start_stub_server(echo=True, latency=0.05)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub):
+    stub.fail_next = 0
+    client = PistonClient(base_url=stub.url, max_concurrency=4, max_retries=2, retry_backoff=0.01)
+    yield client
+    client.close()
+
+
+@pytest.mark.unit
+class TestPistonClient:
+
+    def test_runtime_discovery_is_cached(self, client, stub):
+        before = stub.request_count
+        assert client.get_version('python') == PYTHON_VERSION
+        assert client.get_version('py') == PYTHON_VERSION
+        assert client.get_version('cobol') is None
+        assert stub.request_count == before + 1
+
+    def test_discovery_failure_returns_none(self):
+        client = PistonClient(base_url="http://127.0.0.1:9", max_retries=0)
+        assert client.get_runtimes() is None
+        assert client.get_version('python') is None
+
+    def test_retries_on_503(self, client, stub):
+        stub.fail_next = 2
+        payload = {'language': 'python', 'version': '*', 'files': [{'content': 'print(1)'}]}
+
+        response = client.execute(payload, timeout=10)
+
+        assert response.status_code == 200
+        assert response.json()['run']['stdout'] == '1\n'
+
+    def test_gives_up_after_max_retries(self, client, stub):
+        stub.fail_next = 5
+        response = client.execute({'language': 'python', 'files': [{'content': ''}]}, timeout=10)
+        assert response.status_code == 503
+        stub.fail_next = 0
+
+    def test_connection_error_raised_after_retries(self):
+        client = PistonClient(base_url="http://127.0.0.1:9", max_retries=1, retry_backoff=0.01)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.execute({}, timeout=1)
+
+    def test_concurrency_is_bounded(self, echo_stub):
+        client = PistonClient(base_url=echo_stub.url, max_concurrency=3)
+        payload = {'language': 'python', 'files': [{'content': ''}], 'stdin': 'x'}
+        threads = [threading.Thread(target=client.execute, args=(payload, 10)) for _ in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert echo_stub.max_in_flight == 3
+        client.close()
+
+
+@pytest.mark.unit
+class TestSandboxServiceWithPistonClient:
+
+    def test_execute_code_uses_client_and_discovered_version(self, client):
+        service = SandboxService(
+            sandbox_job_repo=Mock(),
+            submission_repo=Mock(),
+            piston_client=client
+        )
+        client.execute = Mock(wraps=client.execute)
+
+        result = service.execute_code('print(input()[::-1])', stdin='abc')
+
+        assert result['success'] is True
+        assert result['stdout'] == 'cba\n'
+        payload = client.execute.call_args[0][0]
+        assert payload['version'] == PYTHON_VERSION
+
+    def test_falls_back_to_pinned_version_without_runtimes(self):
+        client = Mock()
+        client.get_version.return_value = None
+        client.execute.return_value = Mock(
+            status_code=200, json=lambda: {'run': {'stdout': 'ok\n', 'stderr': '', 'code': 0}}
+        )
+        service = SandboxService(sandbox_job_repo=Mock(), submission_repo=Mock(), piston_client=client)
+
+        result = service.execute_code('print("ok")')
+
+        assert result['stdout'] == 'ok\n'
+        assert client.execute.call_args[0][0]['version'] == '3.10'
@@ -0,0 +1,144 @@
+import os
+import time
+
+import pytest
+from unittest.mock import Mock
+
+from core.services.sandbox_service import SandboxService
+from infrastructure.sandbox.payload_store import PayloadStore
+from infrastructure.sandbox.zygote import ZygotePool, ZygoteError
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="zygote executor needs os.fork")
+
+
+@pytest.fixture(scope="module")
+def zygote_pool():
+    pool = ZygotePool(size=2)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def sandbox_service(zygote_pool):
+    service = SandboxService(
+        sandbox_job_repo=Mock(),
+        submission_repo=Mock(),
+        timeout=5,
+        use_external_api=False,
+        zygote_pool=zygote_pool
+    )
+    # A zygote failure must fail these tests, not pass through the fallback
+    service._execute_via_subprocess = Mock(side_effect=AssertionError("fell back to subprocess"))
+    return service
+
+
+@pytest.mark.unit
+class TestZygoteExecution:
+
+    def test_stdout_and_stdin(self, sandbox_service):
+        result = sandbox_service.execute_code('x = input(); print(f"Got: {x}")', stdin='abc')
+
+        assert result['success'] is True
+        assert result['stdout'] == 'Got: abc\n'
+        assert result['exit_code'] == 0
+        assert result['timed_out'] is False
+
+    def test_syntax_error_matches_script_run(self, sandbox_service):
+        result = sandbox_service.execute_code('print("Hello')
+
+        assert result['success'] is False
+        assert result['exit_code'] == 1
+        assert 'SyntaxError' in result['stderr']
+
+    def test_traceback_and_exit_codes(self, sandbox_service):
+        crash = sandbox_service.execute_code('1/0')
+        assert crash['exit_code'] == 1
+        assert 'ZeroDivisionError' in crash['stderr']
+        assert 'zygote' not in crash['stderr']
+
+        assert sandbox_service.execute_code('import sys; sys.exit(3)')['exit_code'] == 3
+        assert sandbox_service.execute_code('import sys; sys.exit()')['exit_code'] == 0
+
+    def test_timeout(self, sandbox_service):
+        result = sandbox_service.execute_code('while True: pass', timeout=1)
+
+        assert result['timed_out'] is True
+        assert result['success'] is False
+        assert result['exit_code'] == -1
+        assert 'timed out after 1 seconds' in result['stderr']
+
+    def test_timeout_after_closing_output(self, sandbox_service):
+        code = 'import os, time\nos.close(1)\nos.close(2)\ntime.sleep(30)'
+
+        start = time.monotonic()
+        result = sandbox_service.execute_code(code, timeout=1)
+
+        assert time.monotonic() - start < 10
+        assert result['timed_out'] is True
+        assert result['exit_code'] == -1
+
+    def test_pool_times_out_child_that_closed_its_output(self, zygote_pool):
+        code = 'import os, time\nos.close(1)\nos.close(2)\ntime.sleep(30)'
+
+        raw = zygote_pool.execute(code, '', 1)
+
+        assert raw['timed_out'] is True
+        assert raw['exit_code'] == -1
+        assert raw['wall_ms'] < 10000
+
+    def test_reports_cpu_time_and_peak_memory(self, sandbox_service):
+        small = sandbox_service.execute_code('print(1)')
+        large = sandbox_service.execute_code('x = b"x" * (64 * 1024 * 1024)')
+
+        assert large['memory_kb'] - small['memory_kb'] > 60 * 1024
+        assert 0 <= small['runtime_ms'] <= small['wall_ms'] + 5
+
+    def test_memory_limit_enforced(self, sandbox_service):
+        result = sandbox_service.execute_code('x = bytearray(512 * 1024 * 1024)', memory_limit_mb=128)
+
+        assert result['exit_code'] == 1
+        assert 'MemoryError' in result['stderr']
+
+    def test_output_cap_kills_print_loop(self, sandbox_service):
+        sandbox_service.max_output_bytes = 50_000
+        result = sandbox_service.execute_code('while True: print("spam")')
+
+        assert result['output_truncated'] is True
+        assert result['timed_out'] is False
+        assert result['stdout'].startswith('spam\n')
+        assert 'Output limit exceeded' in result['stderr']
+
+    def test_children_do_not_share_state(self, sandbox_service):
+        sandbox_service.execute_code('import math; math.pi = 3')
+        result = sandbox_service.execute_code('import math; print(math.pi > 3, "x" in globals())')
+
+        assert result['stdout'] == 'True False\n'
+
+    def test_large_stdin(self, sandbox_service):
+        result = sandbox_service.execute_code('print(len(input()))', stdin='x' * 500000)
+        assert result['stdout'] == '500000\n'
+
+    def test_stdin_from_payload_file(self, sandbox_service, tmp_path):
+        payload = PayloadStore(root=str(tmp_path)).put('y' * 500000 + '\n')
+        result = sandbox_service.execute_code('print(len(input()))', stdin=payload)
+        assert result['stdout'] == '500000\n'
+
+    def test_dead_zygote_is_restarted(self, zygote_pool, sandbox_service):
+        for zygote in zygote_pool._all:
+            zygote.process.kill()
+            zygote.process.wait()
+
+        result = sandbox_service.execute_code('print("back")')
+        assert result['stdout'] == 'back\n'
+
+    def test_falls_back_to_subprocess_on_zygote_error(self):
+        pool = Mock()
+        pool.execute.side_effect = ZygoteError("gone")
+        service = SandboxService(
+            sandbox_job_repo=Mock(), submission_repo=Mock(),
+            use_external_api=False, zygote_pool=pool
+        )
+
+        result = service.execute_code('print("hi")')
+        assert result['success'] is True
+        assert result['stdout'].strip() == 'hi'
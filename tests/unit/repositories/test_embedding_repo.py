@@ -76,3 +76,29 @@ class TestEmbeddingRepo:
         embedding = Embedding(None, sample_submission.get_id(), "ref", "v", 768, None)
         assert embedding_repo.save_embedding(embedding) is None
         mock_db.rollback.assert_called_once()
+
+    def test_find_by_submissions(self, sample_submission, embedding_repo):
+        """Bulk lookup returns one embedding per submission that has one"""
+        first = embedding_repo.save_embedding(
+            Embedding(None, sample_submission.get_id(), "ref-a", "v", 768, None)
+        )
+        embedding_repo.save_embedding(
+            Embedding(None, sample_submission.get_id(), "ref-b", "v", 768, None)
+        )
+
+        found = embedding_repo.find_by_submissions([sample_submission.get_id(), 9999])
+
+        assert [e.get_id() for e in found] == [first.get_id()]
+        assert found[0].vector_ref == "ref-a"
+        assert embedding_repo.find_by_submissions([]) == []
+
+    def test_find_by_assignment(self, sample_submission, embedding_repo):
+        """Bulk lookup of every embedding of an assignment"""
+        embedding_repo.save_embedding(
+            Embedding(None, sample_submission.get_id(), "ref", "v", 768, None)
+        )
+
+        found = embedding_repo.find_by_assignment(sample_submission.get_assignment_id())
+
+        assert [e.get_submission_id() for e in found] == [sample_submission.get_id()]
+        assert embedding_repo.find_by_assignment(9999) == []
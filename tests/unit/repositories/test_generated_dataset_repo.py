@@ -0,0 +1,70 @@
+import os
+import pytest
+
+from infrastructure.repositories.generated_dataset_repository import GeneratedDatasetRepository
+from infrastructure.sandbox.payload_store import PayloadStore
+
+
+def _count(db):
+    return db.execute("SELECT COUNT(*) FROM generated_datasets").fetchone()[0]
+
+
+@pytest.mark.repo
+@pytest.mark.unit
+class TestGeneratedDatasetRepo:
+
+    def test_put_and_get(self, generated_dataset_repo):
+        stored = generated_dataset_repo.put("k1", "3\n1 2 3\n", "6\n")
+
+        stdin, expected = generated_dataset_repo.get("k1")
+
+        assert (stdin.read(), expected.read()) == ("3\n1 2 3\n", "6\n")
+        assert (stdin.digest, expected.digest) == (stored[0].digest, stored[1].digest)
+
+    def test_get_miss(self, generated_dataset_repo):
+        assert generated_dataset_repo.get("missing") is None
+
+    def test_missing_file_is_a_miss(self, generated_dataset_repo, clean_db):
+        stdin, _ = generated_dataset_repo.put("k1", "input\n", "output\n")
+        os.unlink(stdin.path)
+
+        assert generated_dataset_repo.get("k1") is None
+        assert _count(clean_db) == 0
+
+    def test_evicts_least_recently_used_with_files(self, clean_db, tmp_path):
+        store = PayloadStore(root=str(tmp_path))
+        repo = GeneratedDatasetRepository(clean_db, payload_store=store, max_entries=2)
+        first = repo.put("k1", "in 1\n", "shared\n")
+        second = repo.put("k2", "in 2\n", "shared\n")
+        repo.get("k1")
+
+        repo.put("k3", "in 3\n", "out 3\n")
+
+        assert repo.get("k2") is None
+        assert repo.get("k1") is not None
+        assert not store.exists(second[0].digest)
+        assert _count(clean_db) == 2
+        # k2's expected output is still k1's
+        assert store.exists(first[1].digest)
+
+    def test_evicts_beyond_byte_limit(self, clean_db, tmp_path):
+        store = PayloadStore(root=str(tmp_path))
+        repo = GeneratedDatasetRepository(clean_db, payload_store=store, max_bytes=30)
+        old_stdin, _ = repo.put("k1", "a" * 10, "b" * 10)
+
+        repo.put("k2", "c" * 10, "d" * 10)
+
+        assert repo.get("k1") is None
+        assert not store.exists(old_stdin.digest)
+        assert repo.get("k2") is not None
+
+    def test_evicts_on_sqlite3_connection(self, sqlite_connection, tmp_path):
+        store = PayloadStore(root=str(tmp_path))
+        repo = GeneratedDatasetRepository(sqlite_connection, payload_store=store, max_entries=1)
+        repo.put("k1", "in 1\n", "out 1\n")
+
+        repo.put("k2", "in 2\n", "out 2\n")
+
+        assert repo.get("k1") is None
+        assert repo.get("k2") is not None
+        assert _count(sqlite_connection) == 1
@@ -0,0 +1,124 @@
+import pytest
+from core.entities.regrade_batch import RegradeBatch
+from core.entities.sandbox_job import SandboxJob
+from core.entities.student import Student
+from core.entities.submission import Submission
+from core.entities.user import User
+
+
+@pytest.fixture
+def make_student(user_repo, student_repo):
+    def make(n):
+        user = user_repo.create(User(
+            id=None, name=f"Student {n}", email=f"s{n}@student.com",
+            password="hashed_pass", role="student", is_active=True
+        ))
+        return student_repo.save_student(Student(
+            id=user.get_id(), name=user.name, email=user.email, password=user.get_password_hash(),
+            created_at=user.created_at, updated_at=user.updated_at,
+            student_number=f"S{n}", program="CS", year_level=1
+        ))
+    return make
+
+
+@pytest.fixture
+def submit(submission_repo):
+    def make(student, assignment, version, status="graded", grade_at="2024-01-10 10:00:00"):
+        return submission_repo.create(Submission(
+            id=None, assignment_id=assignment.get_id(), student_id=student.get_id(),
+            version=version, language="python", status=status, score=50.0, is_late=False,
+            created_at=None, updated_at=None, grade_at=grade_at
+        ))
+    return make
+
+
+def _batch(scope, scope_id):
+    return RegradeBatch(id=None, scope=scope, scope_id=scope_id, requested_by=None)
+
+
+@pytest.mark.repo
+@pytest.mark.unit
+class TestRegradeBatchRepo:
+    """Test suite for RegradeBatchRepository"""
+
+    def test_queues_latest_submission_per_student(
+        self, regrade_batch_repo, sandbox_job_repo, submission_repo, sample_assignment, make_student, submit
+    ):
+        alice, bob = make_student(1), make_student(2)
+        submit(alice, sample_assignment, 1)
+        alice_latest = submit(alice, sample_assignment, 2)
+        bob_latest = submit(bob, sample_assignment, 1)
+
+        batch = regrade_batch_repo.create(_batch('assignment', sample_assignment.get_id()), 5, 256)
+
+        assert batch.total == 2
+        assert batch.status == 'running'
+        jobs = sandbox_job_repo.get_pending_jobs(limit=10)
+        assert sorted(j.get_submission_id() for j in jobs) == sorted([alice_latest.get_id(), bob_latest.get_id()])
+        assert all(j.lane == 'regrade' and j.batch_id == batch.get_id() for j in jobs)
+        assert submission_repo.get_by_id(alice_latest.get_id()).status == 'queued'
+        assert regrade_batch_repo.count_jobs(batch.get_id()) == {'queued': 2}
+
+    def test_skips_submissions_already_queued(
+        self, regrade_batch_repo, sandbox_job_repo, sample_assignment, make_student, submit
+    ):
+        alice, bob = make_student(1), make_student(2)
+        pending = submit(alice, sample_assignment, 1)
+        submit(bob, sample_assignment, 1)
+        sandbox_job_repo.create(SandboxJob(id=None, submission_id=pending.get_id(), status='queued'))
+
+        batch = regrade_batch_repo.create(_batch('assignment', sample_assignment.get_id()), 5, 256)
+
+        assert batch.total == 1
+
+    def test_course_scope_covers_every_assignment(
+        self, regrade_batch_repo, assignment_repo, sample_course, sample_assignment, make_student, submit
+    ):
+        from core.entities.assignment import Assignment
+        second = assignment_repo.create(Assignment(
+            id=None, course_id=sample_course.get_id(), title="Homework 2", description="",
+            release_date="2024-01-01", due_date="2024-02-01", max_points=100, is_published=True,
+            allow_late_submissions=False, late_submission_penalty=0, created_at=None, updated_at=None
+        ))
+        alice = make_student(1)
+        submit(alice, sample_assignment, 1)
+        submit(alice, second, 1)
+
+        batch = regrade_batch_repo.create(_batch('course', sample_course.get_id()), 5, 256)
+
+        assert batch.total == 2
+
+    def test_cancel_drops_queued_jobs_only(
+        self, regrade_batch_repo, sandbox_job_repo, submission_repo, sample_assignment, make_student, submit
+    ):
+        graded = submit(make_student(1), sample_assignment, 1)
+        never_graded = submit(make_student(2), sample_assignment, 1, status="pending", grade_at=None)
+        running = submit(make_student(3), sample_assignment, 1)
+        batch = regrade_batch_repo.create(_batch('assignment', sample_assignment.get_id()), 5, 256)
+        job = next(j for j in sandbox_job_repo.get_by_submission(running.get_id()))
+        job.mark_running()
+        sandbox_job_repo.update(job)
+
+        cancelled = regrade_batch_repo.cancel(batch.get_id())
+
+        assert cancelled == 2
+        assert regrade_batch_repo.count_jobs(batch.get_id()) == {'cancelled': 2, 'running': 1}
+        assert submission_repo.get_by_id(graded.get_id()).status == 'graded'
+        assert submission_repo.get_by_id(never_graded.get_id()).status == 'pending'
+        assert submission_repo.get_by_id(running.get_id()).status == 'queued'
+        assert regrade_batch_repo.get_by_id(batch.get_id()).status == 'cancelled'
+        assert sandbox_job_repo.get_pending_jobs() == []
+
+    def test_first_started_and_latest(self, regrade_batch_repo, sandbox_job_repo, sample_assignment, make_student, submit):
+        submit(make_student(1), sample_assignment, 1)
+        first = regrade_batch_repo.create(_batch('assignment', sample_assignment.get_id()), 5, 256)
+        assert regrade_batch_repo.first_started_at(first.get_id()) is None
+
+        job = sandbox_job_repo.get_pending_jobs()[0]
+        job.mark_running()
+        sandbox_job_repo.update(job)
+        assert regrade_batch_repo.first_started_at(first.get_id()) is not None
+
+        second = regrade_batch_repo.create(_batch('assignment', sample_assignment.get_id()), 5, 256)
+        assert second.total == 0  # the only submission is still being regraded
+        assert regrade_batch_repo.get_latest('assignment', sample_assignment.get_id()).get_id() == second.get_id()
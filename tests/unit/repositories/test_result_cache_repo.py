@@ -0,0 +1,108 @@
+import pytest
+from core.entities.test_case import Testcase
+from infrastructure.repositories.result_cache_repository import ResultCacheRepository
+
+
+def _result(stdout="ok\n"):
+    return {'success': True, 'stdout': stdout, 'stderr': '', 'exit_code': 0,
+            'runtime_ms': 12, 'timed_out': False}
+
+
+def _count(db):
+    return db.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+@pytest.fixture
+def sample_testcase(sample_assignment, testcase_repo):
+    return testcase_repo.create(Testcase(
+        id=None,
+        assignment_id=sample_assignment.get_id(),
+        name="Sum",
+        stdin="1 2\n",
+        descripion=None,
+        expected_out="3\n",
+        timeout_ms=5000,
+        memory_limit_mb=256,
+        points=10,
+        is_visible=True,
+        sort_order=1,
+        created_at=None
+    ))
+
+
+@pytest.mark.repo
+@pytest.mark.unit
+class TestResultCacheRepo:
+
+    def test_put_and_get(self, result_cache_repo):
+        result_cache_repo.put("k1", None, _result())
+        assert result_cache_repo.get("k1") == _result()
+
+    def test_get_miss(self, result_cache_repo):
+        assert result_cache_repo.get("missing") is None
+
+    def test_put_replaces_existing_entry(self, result_cache_repo, clean_db):
+        result_cache_repo.put("k1", None, _result("a\n"))
+        result_cache_repo.put("k1", None, _result("b\n"))
+        assert result_cache_repo.get("k1")['stdout'] == "b\n"
+        assert _count(clean_db) == 1
+
+    def test_evicts_least_recently_used(self, clean_db):
+        repo = ResultCacheRepository(clean_db, max_entries=2)
+        repo.put("old", None, _result())
+        repo.put("mid", None, _result())
+        clean_db.execute("UPDATE result_cache SET last_used_at = 1 WHERE cache_key = 'old'")
+        clean_db.execute("UPDATE result_cache SET last_used_at = 2 WHERE cache_key = 'mid'")
+        clean_db.commit()
+        repo.get("old")  # touching it makes "mid" the LRU entry
+        repo.put("new", None, _result())
+
+        repo.evict()
+
+        assert repo.get("mid") is None
+        assert repo.get("old") is not None
+        assert repo.get("new") is not None
+
+    def test_evicts_by_total_size(self, clean_db):
+        repo = ResultCacheRepository(clean_db, max_bytes=300)
+        for i in range(5):
+            repo.put(f"k{i}", None, _result("x" * 50))
+            clean_db.execute(
+                "UPDATE result_cache SET last_used_at = :t WHERE cache_key = :k", {"t": i, "k": f"k{i}"}
+            )
+            clean_db.commit()
+
+        repo.evict()
+
+        assert _count(clean_db) == 2
+        assert repo.get("k4") is not None
+
+    def test_editing_test_case_invalidates_entries(self, result_cache_repo, testcase_repo, sample_testcase):
+        result_cache_repo.put("k1", sample_testcase.get_id(), _result())
+        result_cache_repo.put("k2", None, _result())
+
+        sample_testcase.expected_out = "4\n"
+        testcase_repo.update(sample_testcase)
+
+        assert result_cache_repo.get("k1") is None
+        assert result_cache_repo.get("k2") is not None
+
+    def test_deleting_test_case_invalidates_entries(self, result_cache_repo, testcase_repo, sample_testcase):
+        result_cache_repo.put("k1", sample_testcase.get_id(), _result())
+
+        testcase_repo.delete(sample_testcase.get_id())
+
+        assert result_cache_repo.get("k1") is None
+
+    def test_errors_are_swallowed(self):
+        class BrokenDb:
+            def execute(self, *args, **kwargs):
+                import sqlite3
+                raise sqlite3.OperationalError("no such table: result_cache")
+
+            def rollback(self):
+                pass
+
+        repo = ResultCacheRepository(BrokenDb())
+        repo.put("k", None, _result())
+        assert repo.get("k") is None
@@ -130,6 +130,34 @@ class TestResultRepo:
         results = result_repo.find_by_submission(sample_submission.get_id())
         assert len(results) >= 3
 
+    def test_test_case_hash_round_trips(self, sample_submission, sample_assignment, testcase_repo, result_repo):
+        saved_testcase = testcase_repo.create(Testcase(
+            id=None, assignment_id=sample_assignment.get_id(), name="Test", stdin="input",
+            descripion="", expected_out="output", timeout_ms=5000, memory_limit_mb=256,
+            points=10, is_visible=True, sort_order=1, created_at=None
+        ))
+        result_repo.save_result(Result(
+            None, sample_submission.get_id(), saved_testcase.get_id(), True, "output", "", 1, 1, 0, None, None,
+            test_case_hash="abc123"
+        ))
+
+        stored = result_repo.find_by_submission(sample_submission.get_id())
+
+        assert [r.test_case_hash for r in stored] == ["abc123"]
+
+    def test_measurements_round_trip(self, sample_submission, sample_assignment, testcase_repo, result_repo):
+        saved_testcase = testcase_repo.create(Testcase(
+            None, sample_assignment.get_id(), "Growth", None, "", "", 5000, 256, 10, True, 1, None
+        ))
+        measurements = {'sizes': [100, 200], 'cpu_ms': [12, 30], 'best_fit': 'n^2', 'max_class': 'n'}
+        saved = result_repo.save_result(Result(
+            None, sample_submission.get_id(), saved_testcase.get_id(), False, "", "", 30, 1, 0, None, None,
+            measurements=measurements
+        ))
+
+        assert saved.measurements == measurements
+        assert result_repo.find_by_submission(sample_submission.get_id())[0].measurements == measurements
+
     def test_save_result_error(self, result_repo, sample_submission):
         """Line 64-66: save_result handles sqlite3.Error"""
         mock_db = Mock()
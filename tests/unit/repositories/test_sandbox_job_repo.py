@@ -1,8 +1,11 @@
 import pytest
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 from datetime import datetime
 from core.entities.sandbox_job import SandboxJob
+from infrastructure.repositories.sandbox_job_repository import SandboxJobRepository
 
 
 @pytest.mark.repo
@@ -60,6 +63,57 @@ class TestSandboxJobRepo:
         assert len(pending) >= 1
         assert any(p.status == "queued" for p in pending)
 
+    def test_pending_jobs_by_lane_then_round_robin(self, sandbox_job_repo, sample_submission):
+        """Lanes in priority order; within a lane students alternate"""
+        def enqueue(lane, student_id, minute):
+            return sandbox_job_repo.create(SandboxJob(
+                id=None,
+                submission_id=sample_submission.get_id(),
+                status="queued",
+                created_at=datetime(2026, 1, 1, 12, minute),
+                lane=lane,
+                student_id=student_id
+            )).get_id()
+
+        spam = [enqueue("submission", 1, m) for m in range(4)]
+        other = enqueue("submission", 2, 10)
+        regrade = enqueue("regrade", 3, 0)
+        interactive = enqueue("interactive", 1, 30)
+
+        order = [j.get_id() for j in sandbox_job_repo.get_pending_jobs(limit=10)]
+
+        assert order == [interactive, spam[0], other, spam[1], spam[2], spam[3], regrade]
+        assert sandbox_job_repo.get_by_id(interactive).lane == "interactive"
+        assert sandbox_job_repo.get_by_id(interactive).student_id == 1
+
+    def test_student_falls_back_to_submission_owner(self, sandbox_job_repo, sample_submission):
+        job = SandboxJob(None, sample_submission.get_id(), "queued")
+        saved = sandbox_job_repo.create(job)
+        assert saved.student_id is None
+        assert [j.get_id() for j in sandbox_job_repo.get_pending_jobs()] == [saved.get_id()]
+
+    def test_queue_stats_queries(self, sandbox_job_repo, sample_submission):
+        for lane in ("interactive", "regrade", "regrade"):
+            sandbox_job_repo.create(SandboxJob(
+                None, sample_submission.get_id(), "queued",
+                created_at=datetime(2026, 1, 1, 12, 0), lane=lane
+            ))
+        started = sandbox_job_repo.create(SandboxJob(
+            None, sample_submission.get_id(), "queued", created_at=datetime(2026, 1, 1, 11, 0)
+        ))
+        started.mark_running()
+        sandbox_job_repo.update(started)
+
+        queued = sandbox_job_repo.count_queued_by_lane()
+        assert queued["interactive"][0] == 1
+        assert queued["regrade"] == (2, "2026-01-01T12:00:00")
+        assert "submission" not in queued
+
+        waits = sandbox_job_repo.get_recent_waits()
+        assert len(waits) == 1
+        assert waits[0][0] == "submission"
+        assert waits[0][1] == "2026-01-01T11:00:00"
+
     def test_update_job(self, sandbox_job_repo, sample_submission):
         """Test updating sandbox job status and timestamps"""
         job = SandboxJob(
@@ -101,3 +155,105 @@ class TestSandboxJobRepo:
         with pytest.raises(sqlite3.Error):
             sandbox_job_repo.update(job)
         mock_db.rollback.assert_called_once()
+
+
+def _queue(repo, submission, count, lane='submission'):
+    return [
+        repo.create(SandboxJob(None, submission.get_id(), 'queued', lane=lane)).get_id()
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.repo
+@pytest.mark.unit
+class TestSandboxJobLeasing:
+
+    def test_claim_jobs_leases_queued_jobs(self, sandbox_job_repo, sample_submission):
+        bulk = _queue(sandbox_job_repo, sample_submission, 2)
+        interactive = _queue(sandbox_job_repo, sample_submission, 1, lane='interactive')
+
+        claimed = sandbox_job_repo.claim_jobs("host:1", 2, 60)
+
+        assert [j.get_id() for j in claimed] == [interactive[0], bulk[0]]
+        job = sandbox_job_repo.get_by_id(bulk[0])
+        assert (job.status, job.worker_id, job.attempts) == ("running", "host:1", 1)
+        assert job.started_at is not None
+        assert job.lease_expires_at > time.time() + 50
+        assert [j.get_id() for j in sandbox_job_repo.claim_jobs("host:2", 5, 60)] == [bulk[1]]
+        assert sandbox_job_repo.claim_jobs("host:2", 5, 60) == []
+
+    def test_claim_jobs_by_lane(self, sandbox_job_repo, sample_submission):
+        _queue(sandbox_job_repo, sample_submission, 2)
+
+        assert sandbox_job_repo.claim_jobs("host:1", 5, 60, lanes=("interactive",)) == []
+        assert len(sandbox_job_repo.claim_jobs("host:1", 5, 60, lanes=("submission", "regrade"))) == 2
+
+    def test_claim_skips_cancelled_job(self, sandbox_job_repo, sample_submission, clean_db):
+        job_id = _queue(sandbox_job_repo, sample_submission, 1)[0]
+        clean_db.execute("UPDATE sandbox_jobs SET status = 'cancelled' WHERE id = :id", {"id": job_id})
+        clean_db.commit()
+
+        assert sandbox_job_repo.claim(job_id, "host:1", 60) is None
+        assert sandbox_job_repo.claim_jobs("host:1", 5, 60) == []
+        assert sandbox_job_repo.get_by_id(job_id).status == "cancelled"
+
+    def test_heartbeat_renews_only_own_leases(self, sandbox_job_repo, sample_submission):
+        mine, theirs = _queue(sandbox_job_repo, sample_submission, 2)
+        sandbox_job_repo.claim(mine, "host:1", 1)
+        sandbox_job_repo.claim(theirs, "host:2", 1)
+
+        assert sandbox_job_repo.renew_leases("host:1", 60) == 1
+        assert sandbox_job_repo.get_by_id(mine).lease_expires_at > time.time() + 50
+        assert sandbox_job_repo.get_by_id(theirs).lease_expires_at < time.time() + 2
+
+    def test_lapsed_leases_are_requeued_then_failed(self, sandbox_job_repo, sample_submission):
+        job_id = _queue(sandbox_job_repo, sample_submission, 1)[0]
+
+        sandbox_job_repo.claim(job_id, "host:1", -1)
+        assert sandbox_job_repo.requeue_expired(max_attempts=2) == (1, 0)
+        job = sandbox_job_repo.get_by_id(job_id)
+        assert (job.status, job.worker_id, job.started_at, job.attempts) == ("queued", None, None, 1)
+
+        sandbox_job_repo.claim(job_id, "host:2", -1)
+        assert sandbox_job_repo.requeue_expired(max_attempts=2) == (0, 1)
+        job = sandbox_job_repo.get_by_id(job_id)
+        assert job.status == "failed"
+        assert job.error_message == "Grader stopped responding (2 attempts)"
+
+    def test_live_lease_is_not_requeued(self, sandbox_job_repo, sample_submission):
+        job_id = _queue(sandbox_job_repo, sample_submission, 1)[0]
+        sandbox_job_repo.claim(job_id, "host:1", 60)
+
+        assert sandbox_job_repo.requeue_expired(max_attempts=3) == (0, 0)
+
+    def test_update_from_lost_lease_is_ignored(self, sandbox_job_repo, sample_submission):
+        job_id = _queue(sandbox_job_repo, sample_submission, 1)[0]
+        stale = sandbox_job_repo.claim(job_id, "host:1", -1)
+        sandbox_job_repo.requeue_expired(max_attempts=3)
+        sandbox_job_repo.claim(job_id, "host:2", 60)
+
+        stale.mark_completed()
+        current = sandbox_job_repo.update(stale)
+
+        assert (current.status, current.worker_id, current.attempts) == ("running", "host:2", 2)
+
+    def test_concurrent_claims_never_overlap(self, sandbox_job_repo, sample_submission, test_db_path):
+        queued = _queue(sandbox_job_repo, sample_submission, 40)
+
+        def grader(name):
+            conn = sqlite3.connect(test_db_path, timeout=30, check_same_thread=False)
+            repo = SandboxJobRepository(conn)
+            claimed = []
+            try:
+                while True:
+                    jobs = repo.claim_jobs(name, 3, 60)
+                    if not jobs:
+                        return claimed
+                    claimed += [j.get_id() for j in jobs]
+            finally:
+                conn.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            claims = list(pool.map(grader, ["a", "b", "c", "d"]))
+
+        assert sorted(sum(claims, [])) == sorted(queued)
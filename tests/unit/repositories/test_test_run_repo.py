@@ -0,0 +1,69 @@
+import pytest
+from core.entities.sandbox_job import SandboxJob
+from core.entities.test_run import TestRun
+
+
+def _new_run(student, assignment, **kwargs):
+    return TestRun(
+        id=None,
+        user_id=student.get_id(),
+        assignment_id=assignment.get_id(),
+        code='print(input())',
+        **kwargs
+    )
+
+
+@pytest.mark.repo
+@pytest.mark.unit
+class TestTestRunRepo:
+    """Test suite for TestRunRepository"""
+
+    def test_create_and_get(self, test_run_repo, sample_student, sample_assignment):
+        saved = test_run_repo.create(_new_run(sample_student, sample_assignment, language='python', total_count=3))
+
+        fetched = test_run_repo.get_by_id(saved.get_id())
+        assert fetched.status == 'queued'
+        assert fetched.code == 'print(input())'
+        assert fetched.visible_only is True
+        assert fetched.total_count == 3
+        assert fetched.get_user_id() == sample_student.get_id()
+
+    def test_get_by_id_not_found(self, test_run_repo):
+        assert test_run_repo.get_by_id(9999) is None
+
+    def test_update_summary(self, test_run_repo, sample_student, sample_assignment):
+        run = test_run_repo.create(_new_run(sample_student, sample_assignment))
+        run.mark_completed(passed_count=2, total_count=3, score=66.67, ai_feedback='check line 2')
+
+        updated = test_run_repo.update(run)
+
+        assert updated.status == 'completed'
+        assert (updated.passed_count, updated.total_count, updated.score) == (2, 3, 66.67)
+        assert updated.ai_feedback == 'check line 2'
+        assert updated.completed_at is not None
+
+    def test_results_page_by_cursor(self, test_run_repo, sample_student, sample_assignment):
+        run = test_run_repo.create(_new_run(sample_student, sample_assignment))
+        first = test_run_repo.add_result(run.get_id(), 2, {'name': 'C', 'passed': True})
+        second = test_run_repo.add_result(run.get_id(), 0, {'name': 'A', 'passed': False})
+
+        assert test_run_repo.get_results(run.get_id()) == [
+            (first, 2, {'name': 'C', 'passed': True}),
+            (second, 0, {'name': 'A', 'passed': False})
+        ]
+        assert test_run_repo.get_results(run.get_id(), after=first) == [(second, 0, {'name': 'A', 'passed': False})]
+        assert test_run_repo.get_results(run.get_id(), after=second) == []
+
+    def test_interactive_job_without_submission(
+        self, test_run_repo, sandbox_job_repo, sample_student, sample_assignment, sample_submission
+    ):
+        run = test_run_repo.create(_new_run(sample_student, sample_assignment))
+        sandbox_job_repo.create(SandboxJob(id=None, submission_id=sample_submission.get_id(), status='queued'))
+        job = sandbox_job_repo.create(SandboxJob(
+            id=None, submission_id=None, status='queued', lane='interactive',
+            student_id=sample_student.get_id(), test_run_id=run.get_id()
+        ))
+
+        assert job.get_submission_id() is None
+        assert job.test_run_id == run.get_id()
+        assert sandbox_job_repo.get_pending_jobs()[0].get_id() == job.get_id()
@@ -2,6 +2,8 @@ import pytest
 import sqlite3
 from unittest.mock import Mock
 from core.entities.test_case import Testcase
+from infrastructure.repositories.test_case_repository import TestCaseRepository as Testcase_repo
+from infrastructure.sandbox.payload_store import PayloadStore
 
 
 @pytest.mark.repo
@@ -84,6 +86,97 @@ class TestTestcaseRepo:
         assert updated.name == "Updated Test Case"
         assert updated.points == 20
     
+    def test_compare_settings_round_trip(self, sample_assignment, testcase_repo):
+        saved = testcase_repo.create(Testcase(
+            id=None, assignment_id=sample_assignment.get_id(), name="Float", stdin="", descripion="",
+            expected_out="0.5", timeout_ms=5000, memory_limit_mb=256, points=10, is_visible=True,
+            sort_order=1, created_at=None, compare_mode="float", compare_tolerance=0.01
+        ))
+        assert (saved.compare_mode, saved.compare_tolerance) == ("float", 0.01)
+
+        saved.compare_mode = "unordered"
+        testcase_repo.update(saved)
+
+        listed = testcase_repo.list_by_assignment(sample_assignment.get_id())
+        assert [tc.compare_mode for tc in listed] == ["unordered"]
+
+    def test_compare_mode_defaults_to_exact(self, sample_assignment, testcase_repo):
+        saved = testcase_repo.create(Testcase(
+            None, sample_assignment.get_id(), "T", "", "", "out", 5000, 256, 10, True, 1, None
+        ))
+        assert (saved.compare_mode, saved.compare_tolerance) == ("exact", None)
+
+    def test_large_payloads_are_stored_as_files(self, sample_assignment, clean_db, tmp_path):
+        repo = Testcase_repo(clean_db, payload_store=PayloadStore(root=str(tmp_path), inline_max_bytes=64))
+        big_in, big_out = "1 2\n" * 100, "3\n" * 100
+
+        saved = repo.create(Testcase(
+            None, sample_assignment.get_id(), "Big", big_in, "", big_out, 5000, 256, 10, True, 1, None
+        ))
+        row = clean_db.execute(
+            "SELECT stdin, expected_out, stdin_blob, expected_blob FROM test_cases WHERE id = :id",
+            {"id": saved.get_id()}
+        ).fetchone()
+
+        assert row[0] is None and row[1] == ''
+        assert row[2] and row[3]
+        loaded = repo.get_by_id(saved.get_id())
+        assert loaded.stdin_file.digest == row[2]
+        assert loaded.stdin == big_in
+        assert loaded.expected_out == big_out
+
+        loaded.expected_out = "small"
+        repo.update(loaded)
+        reloaded = repo.list_by_assignment(sample_assignment.get_id())[0]
+        assert reloaded.expected_out_file is None
+        assert reloaded.expected_out == "small"
+        assert reloaded.stdin == big_in
+
+    def test_complexity_settings_round_trip(self, sample_assignment, testcase_repo):
+        saved = testcase_repo.create(Testcase(
+            None, sample_assignment.get_id(), "Growth", None, "", "", 5000, 256, 10, True, 1, None,
+            kind="complexity", generator="print(int(input()))", complexity_sizes=[100, 200, 400],
+            complexity_repeats=2, complexity_max_class="n log n"
+        ))
+
+        assert saved.kind == "complexity"
+        assert saved.complexity_sizes == [100, 200, 400]
+        assert (saved.complexity_repeats, saved.complexity_max_class) == (2, "n log n")
+
+        saved.kind = "io"
+        testcase_repo.update(saved)
+        reloaded = testcase_repo.get_by_id(saved.get_id())
+        assert (reloaded.kind, reloaded.generator, reloaded.complexity_sizes) == ("io", None, [])
+
+    def test_function_name_round_trip(self, sample_assignment, testcase_repo):
+        saved = testcase_repo.create(Testcase(
+            None, sample_assignment.get_id(), "Call", "[[2, 1]]", "", "[1, 2]", 5000, 256, 10, True, 1, None,
+            kind="function", function_name="sort_list"
+        ))
+
+        assert (saved.kind, saved.function_name, saved.stdin) == ("function", "sort_list", "[[2, 1]]")
+
+        saved.kind = "io"
+        testcase_repo.update(saved)
+        assert testcase_repo.get_by_id(saved.get_id()).function_name is None
+
+    def test_generated_recipe_round_trip(self, sample_assignment, testcase_repo):
+        saved = testcase_repo.create(Testcase(
+            None, sample_assignment.get_id(), "Big", None, "", "", 5000, 256, 10, True, 1, None,
+            kind="generated", generator="print(input())", generator_size=100000, generator_seed=7,
+            reference_solution="print(input())"
+        ))
+
+        reloaded = testcase_repo.get_by_id(saved.get_id())
+        assert (reloaded.kind, reloaded.generator_size, reloaded.generator_seed) == ("generated", 100000, 7)
+        assert reloaded.reference_solution == "print(input())"
+        assert (reloaded.stdin, reloaded.expected_out) == (None, "")
+
+        reloaded.kind = "io"
+        testcase_repo.update(reloaded)
+        reloaded = testcase_repo.get_by_id(saved.get_id())
+        assert (reloaded.generator_size, reloaded.reference_solution) == (None, None)
+
     def test_delete_testcase(self, sample_assignment, testcase_repo):
         """Test deleting test case"""
         testcase = Testcase(
@@ -108,6 +201,42 @@ class TestTestcaseRepo:
         retrieved = testcase_repo.get_by_id(saved.get_id())
         assert retrieved is None
 
+    def test_create_many(self, sample_assignment, testcase_repo):
+        cases = [
+            Testcase(None, sample_assignment.get_id(), f"T{i}", str(i), None, str(2 * i), 5000, 256, 1, False, i, None)
+            for i in range(200)
+        ]
+
+        assert testcase_repo.create_many(cases) == 200
+
+        listed = testcase_repo.list_by_assignment(sample_assignment.get_id())
+        assert [(tc.name, tc.stdin, tc.expected_out) for tc in listed[:2]] == [("T0", "0", "0"), ("T1", "1", "2")]
+        assert len(listed) == 200
+        assert testcase_repo.create_many([]) == 0
+
+    def test_create_many_on_sqlite3_connection(self, sample_assignment, sqlite_connection, tmp_path):
+        """Production repositories get a raw sqlite3 connection, not the test wrapper"""
+        repo = Testcase_repo(sqlite_connection, payload_store=PayloadStore(root=str(tmp_path)))
+        cases = [
+            Testcase(None, sample_assignment.get_id(), f"T{i}", str(i), None, str(2 * i), 5000, 256, 1, False, i, None)
+            for i in range(3)
+        ]
+
+        assert repo.create_many(cases) == 3
+
+        listed = repo.list_by_assignment(sample_assignment.get_id())
+        assert [(tc.name, tc.expected_out) for tc in listed] == [("T0", "0"), ("T1", "2"), ("T2", "4")]
+
+    def test_create_many_is_all_or_nothing(self, sample_assignment, testcase_repo):
+        good = Testcase(None, sample_assignment.get_id(), "ok", "", None, "x", 5000, 256, 1, False, 1, None)
+        bad = good.clone()
+        bad.compare_mode = "fuzzy"  # rejected by the CHECK constraint
+
+        with pytest.raises(sqlite3.Error):
+            testcase_repo.create_many([good, bad])
+
+        assert testcase_repo.list_by_assignment(sample_assignment.get_id()) == []
+
     def test_create_error(self, testcase_repo, sample_assignment):
         """Line 66-68: create handles sqlite3.Error"""
         mock_db = Mock()
@@ -0,0 +1,81 @@
+import math
+import random
+import pytest
+
+from core.services.complexity_fit import COMPLEXITY_CLASSES, complexity_rank, fit_complexity
+
+SIZES = [1000, 2000, 4000, 8000, 16000]
+
+
+LARGE_SIZES = [50_000, 100_000, 200_000, 400_000, 800_000]
+
+
+def timings(growth, scale, noise=0.03, seed=0, sizes=SIZES):
+    """Start-up cost plus `growth` scaled to reach `scale` ms at the largest size, with noise."""
+    rng = random.Random(seed)
+    top = growth(sizes[-1])
+    return [25 + scale * growth(n) / top * (1 + rng.uniform(-noise, noise)) for n in sizes]
+
+
+def noisy_timings(growth, scale, noise, seed):
+    """Whole runtimes off by up to `noise` either way, as on a busy grader."""
+    rng = random.Random(seed)
+    top = growth(LARGE_SIZES[-1])
+    return [(25 + scale * growth(n) / top) * (1 + rng.uniform(-noise, noise)) for n in LARGE_SIZES]
+
+
+@pytest.mark.unit
+class TestFitComplexity:
+
+    @pytest.mark.parametrize("growth, accepted", [
+        (lambda n: math.log2(n), {'log n'}),
+        (lambda n: n, {'n', 'n log n'}),  # barely distinguishable over a few doublings
+        (lambda n: n * math.log2(n), {'n', 'n log n'}),
+        (lambda n: n * n, {'n^2'}),
+        (lambda n: n ** 3, {'n^3'}),
+    ])
+    def test_recognises_growth(self, growth, accepted):
+        for seed in range(20):
+            assert fit_complexity(SIZES, timings(growth, 400, seed=seed)).best in accepted
+
+    def test_flat_timings_are_constant(self):
+        fit = fit_complexity(SIZES, [30, 31, 30, 29, 31])
+        assert fit.best == '1'
+
+    def test_r_squared_reported_for_every_class(self):
+        fit = fit_complexity(SIZES, timings(lambda n: n * n, 400))
+        assert set(fit.r_squared) == set(COMPLEXITY_CLASSES)
+        assert fit.r_squared['n^2'] > 0.99
+
+    def test_within_threshold(self):
+        fit = fit_complexity(SIZES, timings(lambda n: n * n, 400))
+        assert not fit.within('n log n')
+        assert fit.within('n^2') and fit.within('n^3')
+        assert complexity_rank('1') < complexity_rank('n log n') < complexity_rank('n^3')
+
+    def test_needs_a_time_per_size(self):
+        with pytest.raises(ValueError):
+            fit_complexity([10], [1.0])
+        with pytest.raises(ValueError):
+            fit_complexity([10, 20], [1.0])
+
+    @pytest.mark.parametrize("growth", [
+        lambda n: n,
+        lambda n: n * math.log2(n),
+    ])
+    def test_noise_never_fails_a_fast_solution(self, growth):
+        for seed in range(200):
+            fit = fit_complexity(LARGE_SIZES, noisy_timings(growth, 2000, 0.15, seed))
+            assert fit.within('n log n'), (seed, fit)
+
+    def test_noise_does_not_hide_quadratic_growth(self):
+        fits = [fit_complexity(LARGE_SIZES, noisy_timings(lambda n: n * n, 2000, 0.1, seed)) for seed in range(200)]
+
+        assert sum(not fit.within('n log n') for fit in fits) >= 190
+
+    def test_large_sizes_do_not_dominate(self):
+        # Linear, with the largest size 10% slow: unweighted, n^2 fitted best
+        times = [25 + 2000 * n / LARGE_SIZES[-1] for n in LARGE_SIZES]
+        times[-1] *= 1.1
+
+        assert fit_complexity(LARGE_SIZES, times).best == 'n'
@@ -132,3 +132,46 @@ class TestEmbeddingService:
         with patch("pickle.loads", side_effect=Exception("Pickle error")):
             with pytest.raises(ValidationError, match="Failed to deserialize embedding"):
                 embedding_service.get_embedding_vector(1)
+
+    def test_get_assignment_embeddings(self, embedding_service, mock_embedding_repo):
+        """All vectors come from one bulk query, decoded into one array"""
+        import pickle
+        from core.entities.embedding import Embedding
+        mock_embedding_repo.find_by_assignment.return_value = [
+            Embedding(1, 1, pickle.dumps([1.0, 0.0]), "m", 2, None),
+            Embedding(2, 2, pickle.dumps([0.0, 2.0]), "m", 2, None),
+            Embedding(3, 3, pickle.dumps([3.0, 4.0]), "m", 2, None),
+        ]
+
+        result = embedding_service.get_assignment_embeddings(5, 2, exclude_submission_id=1)
+
+        mock_embedding_repo.find_by_assignment.assert_called_once_with(5)
+        mock_embedding_repo.find_by_submission.assert_not_called()
+        assert result.submission_ids == [2, 3]
+        assert list(result.scores([0.0, 1.0])) == [pytest.approx(1.0), pytest.approx(0.8)]
+
+    def test_get_assignment_embeddings_skips_other_dimensions(self, embedding_service, mock_embedding_repo):
+        """Embeddings of another dimension, or not vectors at all, are skipped"""
+        import pickle
+        from core.entities.embedding import Embedding
+        mock_embedding_repo.find_by_assignment.return_value = [
+            Embedding(1, 2, pickle.dumps([1.0, 0.0]), "m", 2, None),
+            Embedding(2, 3, pickle.dumps([0.0, 1.0, 0.0]), "m", 3, None),
+            Embedding(3, 4, pickle.dumps(5.0), "m", None, None),
+            Embedding(4, 5, pickle.dumps([0.0, 1.0]), "m", 2, None),
+        ]
+
+        result = embedding_service.get_assignment_embeddings(5, 2)
+
+        assert result.submission_ids == [2, 5]
+        assert result.matrix.shape == (2, 2)
+
+    def test_get_assignment_embeddings_deserialization_error(self, embedding_service, mock_embedding_repo):
+        """A corrupt embedding raises ValidationError, as for a single one"""
+        emb = Mock()
+        emb.vector_ref = b"invalid pickle data"
+        emb.get_submission_id.return_value = 2
+        mock_embedding_repo.find_by_assignment.return_value = [emb]
+
+        with pytest.raises(ValidationError, match="Failed to deserialize embedding"):
+            embedding_service.get_assignment_embeddings(5, 2)
@@ -0,0 +1,43 @@
+import dataclasses
+import pytest
+from unittest.mock import Mock
+
+from core.entities.test_case import Testcase
+from core.services.execution_context import ExecutionContext
+
+
+def _testcase(timeout_ms=2500, memory_limit_mb=64):
+    return Testcase(
+        id=1, assignment_id=1, name="T", stdin="", descripion=None, expected_out="",
+        timeout_ms=timeout_ms, memory_limit_mb=memory_limit_mb, points=1,
+        is_visible=True, sort_order=0, created_at=None
+    )
+
+
+@pytest.mark.unit
+class TestExecutionContext:
+
+    def test_is_immutable(self):
+        context = ExecutionContext('python', 5, 256)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            context.timeout = 10
+
+    def test_for_test_case_uses_columns(self):
+        context = ExecutionContext.for_test_case(_testcase(), 'python', 5, 256)
+
+        assert context.timeout == 2.5
+        assert context.timeout_ms == 2500
+        assert context.memory_limit_mb == 64
+        assert context.memory_limit_bytes == 64 * 1024 * 1024
+
+    def test_for_test_case_falls_back_to_defaults(self):
+        context = ExecutionContext.for_test_case(_testcase(None, None), 'java', 5, 256)
+        assert (context.language, context.timeout, context.memory_limit_mb) == ('java', 5, 256)
+
+    def test_ignores_non_numeric_limits(self):
+        context = ExecutionContext.for_test_case(Mock(), 'python', 3, 128)
+        assert (context.timeout, context.memory_limit_mb) == (3, 128)
+
+    def test_describe_timeout(self):
+        assert ExecutionContext('python', 5, 256).describe_timeout() == "Execution timed out after 5 seconds"
+        assert ExecutionContext('python', 0.5, 256).describe_timeout() == "Execution timed out after 0.5 seconds"
@@ -0,0 +1,274 @@
+import pytest
+from unittest.mock import Mock
+
+from core.services.grading_service import GradingService
+from core.services.sandbox_service import case_content_hash
+from core.entities.result import Result
+from core.entities.sandbox_job import SandboxJob
+from core.entities.test_case import Testcase
+from core.exceptions.validation_error import ValidationError
+
+
+@pytest.fixture
+def mock_sandbox_job_repo():
+    repo = Mock()
+    repo.update.side_effect = lambda job: job
+    return repo
+
+
+@pytest.fixture
+def mock_submission():
+    submission = Mock()
+    submission.get_id.return_value = 100
+    submission.get_assignment_id.return_value = 5
+    submission.content = 'print("hi")'
+    submission.language = 'python'
+    return submission
+
+
+def _case(id, expected_out, points=10):
+    return Testcase(id, 5, f"case {id}", "", None, expected_out, 5000, 256, points, True, id, None)
+
+
+def _stored(test_case, passed, content_hash=None):
+    return Result(
+        id=None, submission_id=100, test_case_id=test_case.get_id(), passed=passed,
+        stdout=test_case.expected_out if passed else "", stderr="", runtime_ms=5, memory_kb=None,
+        exit_code=0, error_message=None, created_at=None,
+        test_case_hash=content_hash or case_content_hash(test_case)
+    )
+
+
+@pytest.fixture
+def grading_service(mock_sandbox_job_repo, mock_submission):
+    sandbox = Mock()
+    sandbox.run_all_tests.return_value = {
+        'score': 50.0,
+        'results': [
+            {'test_case_id': 1, 'passed': True, 'stdout': 'hi\n', 'stderr': '',
+             'runtime_ms': 10, 'memory_kb': 9000, 'exit_code': 0, 'timed_out': False},
+            {'test_case_id': 2, 'passed': False, 'stdout': '', 'stderr': '',
+             'runtime_ms': 10, 'exit_code': 0, 'timed_out': False},
+        ]
+    }
+    submission_repo = Mock()
+    submission_repo.get_by_id.return_value = mock_submission
+    test_case_repo = Mock()
+    test_case_repo.list_by_assignment.return_value = [_case(1, "hi"), _case(2, "bye")]
+    result_repo = Mock()
+    result_repo.find_by_submission.return_value = []
+    return GradingService(
+        sandbox_service=sandbox,
+        sandbox_job_repo=mock_sandbox_job_repo,
+        submission_repo=submission_repo,
+        test_case_repo=test_case_repo,
+        result_repo=result_repo
+    )
+
+
+@pytest.mark.unit
+class TestGradingService:
+
+    def test_claim_job_leases_to_this_grader(self, grading_service, mock_sandbox_job_repo):
+        job = SandboxJob(id=1, submission_id=100, status='queued')
+        mock_sandbox_job_repo.claim.return_value = SandboxJob(id=1, submission_id=100, status='running')
+
+        claimed = grading_service.claim_job(job)
+
+        assert claimed.status == 'running'
+        assert mock_sandbox_job_repo.claim.call_args[0][:2] == (1, grading_service.worker_id)
+
+    def test_process_job_skips_job_claimed_elsewhere(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.side_effect = [
+            SandboxJob(id=1, submission_id=100, status='queued'),
+            SandboxJob(id=1, submission_id=100, status='cancelled'),
+        ]
+        mock_sandbox_job_repo.claim.return_value = None
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'cancelled'
+        grading_service.sandbox_service.run_all_tests.assert_not_called()
+
+    def test_grade_submission_persists_score_and_results(self, grading_service, mock_submission):
+        results = grading_service.grade_submission(mock_submission)
+
+        assert results['score'] == 50.0
+        assert mock_submission.status == 'graded'
+        assert mock_submission.score == 50.0
+        assert mock_submission.grade_at is not None
+        assert grading_service.result_repo.save_result.call_count == 2
+        saved = grading_service.result_repo.save_result.call_args_list[0][0][0]
+        assert (saved.runtime_ms, saved.memory_kb) == (10, 9000)
+        grading_service.sandbox_service.run_all_tests.assert_called_once_with(
+            'print("hi")', grading_service.test_case_repo.list_by_assignment.return_value, 'python'
+        )
+
+    def test_process_job_completed(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(id=1, submission_id=100, status='running')
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'completed'
+        assert job.exit_code == 0
+
+    def test_process_job_claims_queued_job(self, grading_service, mock_sandbox_job_repo):
+        job = SandboxJob(id=1, submission_id=100, status='queued')
+        mock_sandbox_job_repo.get_by_id.return_value = job
+
+        def claim(job_id, worker_id, lease_seconds):
+            job.mark_running()
+            return job
+        mock_sandbox_job_repo.claim.side_effect = claim
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'completed'
+        assert job.started_at is not None
+
+    def test_process_job_timeout(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(
+            id=1, submission_id=100, status='running', timeout_seconds=2
+        )
+        grading_service.sandbox_service.run_all_tests.return_value = {
+            'score': 0.0,
+            'results': [{'test_case_id': 1, 'passed': False, 'timed_out': True}]
+        }
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'timeout'
+        assert '2s' in job.error_message
+
+    def test_process_job_grading_error(self, grading_service, mock_sandbox_job_repo, mock_submission):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(id=1, submission_id=100, status='running')
+        grading_service.sandbox_service.run_all_tests.side_effect = Exception("Crash")
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'failed'
+        assert job.error_message == 'Crash'
+        assert mock_submission.status == 'error'
+
+    def test_process_job_submission_missing(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(id=1, submission_id=100, status='running')
+        grading_service.submission_repo.get_by_id.return_value = None
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'failed'
+        grading_service.sandbox_service.run_all_tests.assert_not_called()
+
+    def test_regrade_replaces_previous_results(self, grading_service, mock_submission):
+        grading_service.grade_submission(mock_submission)
+
+        grading_service.result_repo.delete_by_submission.assert_called_once_with(100)
+
+    def test_results_record_test_case_hash(self, grading_service, mock_submission):
+        grading_service.grade_submission(mock_submission)
+
+        cases = grading_service.test_case_repo.list_by_assignment.return_value
+        saved = [c[0][0] for c in grading_service.result_repo.save_result.call_args_list]
+        assert [r.test_case_hash for r in saved] == [case_content_hash(tc) for tc in cases]
+
+    def test_regrade_reruns_only_changed_cases(self, grading_service, mock_submission):
+        unchanged, edited = _case(1, "hi"), _case(2, "bye")
+        new = _case(3, "new")
+        grading_service.test_case_repo.list_by_assignment.return_value = [unchanged, edited, new]
+        grading_service.result_repo.find_by_submission.return_value = [
+            _stored(unchanged, True),
+            _stored(edited, False, content_hash="before the edit")
+        ]
+        grading_service.sandbox_service.run_all_tests.return_value = {'results': [
+            {'test_case_id': 2, 'passed': True, 'stdout': 'bye', 'timed_out': False},
+            {'test_case_id': 3, 'passed': False, 'stdout': '', 'timed_out': False},
+        ]}
+
+        results = grading_service.grade_submission(mock_submission)
+
+        grading_service.sandbox_service.run_all_tests.assert_called_once_with(
+            'print("hi")', [edited, new], 'python'
+        )
+        assert [r['passed'] for r in results['results']] == [True, True, False]
+        assert results['results'][0]['reused'] is True
+        assert results['rerun_count'] == 2
+        assert results['score'] == pytest.approx(66.67)
+        assert mock_submission.score == pytest.approx(66.67)
+        saved = [c[0][0] for c in grading_service.result_repo.save_result.call_args_list]
+        assert [r.get_test_case_id() for r in saved] == [1, 2, 3]
+        assert saved[1].test_case_hash == case_content_hash(edited)
+
+    def test_regrade_with_unchanged_cases_runs_nothing(self, grading_service, mock_submission):
+        cases = grading_service.test_case_repo.list_by_assignment.return_value
+        grading_service.result_repo.find_by_submission.return_value = [
+            _stored(cases[0], True), _stored(cases[1], False)
+        ]
+
+        results = grading_service.grade_submission(mock_submission)
+
+        grading_service.sandbox_service.run_all_tests.assert_not_called()
+        assert results['score'] == 50.0
+        assert results['rerun_count'] == 0
+
+    def test_timed_out_results_are_always_rerun(self, grading_service, mock_submission):
+        grading_service.sandbox_service.run_all_tests.return_value = {
+            'score': 0.0,
+            'results': [{'test_case_id': 1, 'passed': False, 'timed_out': True},
+                        {'test_case_id': 2, 'passed': False, 'transient': True}]
+        }
+
+        grading_service.grade_submission(mock_submission)
+
+        saved = [c[0][0] for c in grading_service.result_repo.save_result.call_args_list]
+        assert [r.test_case_hash for r in saved] == [None, None]
+
+    def test_cancelled_job_is_not_run(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(id=1, submission_id=100, status='cancelled')
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'cancelled'
+        grading_service.sandbox_service.run_all_tests.assert_not_called()
+
+    def test_process_job_not_found(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = None
+        with pytest.raises(ValidationError, match="Sandbox job not found"):
+            grading_service.process_job(999)
+
+
+@pytest.mark.unit
+class TestTestRunJobs:
+
+    def test_process_job_runs_test_run(self, grading_service, mock_sandbox_job_repo):
+        grading_service.test_run_service = Mock()
+        grading_service.test_run_service.execute.return_value = Mock(status='completed')
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(
+            id=1, submission_id=None, status='running', lane='interactive', test_run_id=7
+        )
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'completed'
+        grading_service.test_run_service.execute.assert_called_once_with(7)
+        grading_service.sandbox_service.run_all_tests.assert_not_called()
+
+    def test_failed_test_run_fails_job(self, grading_service, mock_sandbox_job_repo):
+        grading_service.test_run_service = Mock()
+        grading_service.test_run_service.execute.return_value = Mock(status='failed', error_message='boom')
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(
+            id=1, submission_id=None, status='running', lane='interactive', test_run_id=7
+        )
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'failed'
+        assert job.error_message == 'boom'
+
+    def test_test_run_without_service_fails_job(self, grading_service, mock_sandbox_job_repo):
+        mock_sandbox_job_repo.get_by_id.return_value = SandboxJob(
+            id=1, submission_id=None, status='running', lane='interactive', test_run_id=7
+        )
+
+        job = grading_service.process_job(1)
+
+        assert job.status == 'failed'
@@ -0,0 +1,186 @@
+import io
+import mmap
+import random
+import pytest
+from types import SimpleNamespace
+
+from core.services.output_comparator import (
+    COMPARE_MODES, SNIPPET_CHARS, compare_output, compare_values, comparison_settings, iter_lines
+)
+
+
+@pytest.mark.unit
+class TestIterLines:
+
+    @pytest.mark.parametrize("text", ["", "a", "a\n", "a\nb", "a\n\nb\n\n"])
+    def test_string_and_file_match_split(self, text):
+        expected = list(enumerate(text.split('\n'), 1))
+        assert list(iter_lines(text)) == expected
+        assert list(iter_lines(io.StringIO(text))) == expected
+
+
+@pytest.mark.unit
+class TestExact:
+
+    def test_ignores_surrounding_whitespace_only(self):
+        assert compare_output("\n  hello\nworld  \n\n", "hello\nworld").passed
+        assert not compare_output("hello\n\nworld", "hello\nworld").passed
+
+    def test_empty_outputs_match(self):
+        assert compare_output("  \n", "").passed
+
+    def test_reports_first_difference(self):
+        result = compare_output("line one\nline twp\nline 3", "line one\nline two\nline 3")
+
+        assert (result.line, result.column) == (2, 8)
+        assert (result.expected, result.actual) == ("line two", "line twp")
+        assert result.describe() == "Line 2, column 8: expected 'line two' but got 'line twp'"
+
+    def test_missing_and_extra_lines(self):
+        short = compare_output("a\nb", "a\nb\nc")
+        assert (short.line, short.expected, short.actual) == (3, "c", None)
+        assert "output ended" in short.describe()
+
+        extra = compare_output("a\nb\nc", "a\nb")
+        assert (extra.line, extra.expected, extra.actual) == (3, None, "c")
+
+    def test_expected_from_file(self):
+        expected = io.StringIO("".join(f"{i}\n" for i in range(10000)))
+        actual = "\n".join(str(i) for i in range(10000))
+        assert compare_output(actual, expected).passed
+
+    def test_stops_at_first_mismatch(self):
+        consumed = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"{i}\n"
+
+        compare_output("0\n1\nX\n", lines())
+        assert len(consumed) < 10
+
+    def test_string_fast_path_agrees_with_line_comparison(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            expected = "".join(rng.choice("ab \n") for _ in range(rng.randint(0, 12)))
+            actual = "".join(rng.choice("ab \n") for _ in range(rng.randint(0, 12)))
+            assert compare_output(actual, expected) == compare_output(io.StringIO(actual), expected), (actual, expected)
+
+    def test_expected_as_bytes_and_mmap(self, tmp_path):
+        path = tmp_path / "expected.out"
+        path.write_bytes("\n héllo\nwörld\n".encode('utf-8'))
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            assert compare_output("héllo\nwörld", mapping).passed
+            result = compare_output("héllo\nwörle", mapping)
+            assert (result.line, result.column, result.expected) == (2, 5, "wörld")
+            assert compare_output("héllo  wörld", mapping, "whitespace").passed
+
+    def test_bytes_fast_path_agrees_with_text(self):
+        rng = random.Random(11)
+        for _ in range(500):
+            expected = "".join(rng.choice("aé \n") for _ in range(rng.randint(0, 12)))
+            actual = "".join(rng.choice("aé \n") for _ in range(rng.randint(0, 12)))
+            assert compare_output(actual, expected.encode('utf-8')) == compare_output(io.StringIO(actual), expected)
+
+    def test_long_lines_are_clipped_around_the_difference(self):
+        expected = "x" * 500 + "a" + "x" * 500
+        actual = "x" * 500 + "b" + "x" * 500
+
+        result = compare_output(actual, expected)
+
+        assert result.column == 501
+        assert len(result.expected) == SNIPPET_CHARS
+        assert "a" in result.expected and "b" in result.actual
+
+
+@pytest.mark.unit
+class TestOtherModes:
+
+    def test_whitespace(self):
+        assert compare_output("1  2\n3\t4\n", "1 2 3 4", "whitespace").passed
+        result = compare_output("1 2\n3 5", "1 2 3 4", "whitespace")
+        assert (result.line, result.column, result.expected, result.actual) == (2, 3, "4", "5")
+
+    def test_lines(self):
+        assert compare_output("  a  \n b\n\n\n", "a\nb", "lines").passed
+        assert not compare_output("a b\nc", "a  b\nc", "lines").passed
+        assert not compare_output("a\n\nb", "a\nb", "lines").passed
+
+    def test_float(self):
+        assert compare_output("0.3333333 x\n2.0", "0.333333333 x 2", "float").passed
+        assert not compare_output("0.34", "0.333", "float").passed
+        assert compare_output("0.34", "0.333", "float", tolerance=0.01).passed
+        assert not compare_output("nan", "0", "float").passed
+
+    def test_float_non_numbers_must_match(self):
+        result = compare_output("total 3.0", "sum 3", "float")
+        assert (result.column, result.expected, result.actual) == (1, "sum", "total")
+
+    def test_unordered(self):
+        assert compare_output("b\na\n  c\n\n", "a\nb\nc", "unordered").passed
+        assert not compare_output("a\na\nb", "a\nb\nb", "unordered").passed
+        extra = compare_output("a\nb\nz", "a\nb", "unordered")
+        assert (extra.line, extra.actual) == (3, "z")
+        missing = compare_output("a", "a\nb", "unordered")
+        assert (missing.expected, missing.actual) == ("b", None)
+
+    def test_regex(self):
+        assert compare_output("id: 42\nok", r"id: \d+" + "\nok|done", "regex").passed
+        result = compare_output("id: x", r"id: \d+", "regex")
+        assert (result.line, result.expected) == (1, r"id: \d+")
+        assert not compare_output("a", "(", "regex").passed
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="Invalid compare mode"):
+            compare_output("a", "a", "fuzzy")
+
+
+@pytest.mark.unit
+class TestCompareValues:
+
+    def test_equal_structures(self):
+        assert compare_values({"a": [1, 2.0, None], "b": "x"}, {"b": "x", "a": [1, 2, None]}).passed
+
+    def test_booleans_are_not_numbers(self):
+        result = compare_values([True], [1])
+        assert not result.passed
+        assert result.path == "[0]"
+
+    def test_reports_path_of_first_difference(self):
+        result = compare_values({"rows": [[1, 2], [3, 5]]}, {"rows": [[1, 2], [3, 4]]})
+        assert (result.path, result.expected, result.actual) == ("['rows'][1][1]", "4", "5")
+        assert result.describe() == "Return value['rows'][1][1]: expected 4 but got 5"
+
+    def test_missing_and_extra_elements(self):
+        assert compare_values([1], [1, 2]).describe() == "Return value[1]: expected 2 but it is missing"
+        assert compare_values({"a": 1, "b": 2}, {"a": 1}).describe() == "Return value['b']: unexpected 2"
+
+    def test_float_mode_uses_tolerance(self):
+        assert compare_values([0.3333], [1 / 3], 'float', 1e-3).passed
+        assert not compare_values([0.3333], [1 / 3], 'exact').passed
+
+    def test_unordered_mode_ignores_top_level_order(self):
+        assert compare_values([[2, 1], [0]], [[0], [2, 1]], 'unordered').passed
+        assert not compare_values([[1, 2], [0]], [[0], [2, 1]], 'unordered').passed
+
+    def test_whole_value_of_another_type(self):
+        result = compare_values("3", 3)
+        assert result.path == ""
+        assert result.describe() == 'Return value: expected 3 but got "3"'
+
+
+@pytest.mark.unit
+class TestComparisonSettings:
+
+    def test_from_test_case(self):
+        tc = SimpleNamespace(compare_mode='float', compare_tolerance=0.5)
+        assert comparison_settings(tc) == ('float', 0.5)
+
+    def test_defaults_for_objects_without_settings(self):
+        assert comparison_settings(object()) == ('exact', None)
+        assert comparison_settings(SimpleNamespace(compare_mode='bogus', compare_tolerance=-1)) == ('exact', None)
+
+    def test_modes_match_schema(self):
+        assert set(COMPARE_MODES) == {'exact', 'whitespace', 'lines', 'float', 'unordered', 'regex'}
@@ -0,0 +1,140 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from core.entities.regrade_batch import RegradeBatch
+from core.entities.user import User
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from core.services.regrade_service import RegradeService
+
+
+@pytest.fixture
+def instructor():
+    return User(1, "Prof", "p@t.com", "p", "instructor")
+
+
+@pytest.fixture
+def batch_repo():
+    repo = Mock()
+    repo.create.side_effect = lambda batch, timeout, mem: RegradeBatch(
+        id=9, scope=batch.scope, scope_id=batch.scope_id, requested_by=batch.requested_by, total=4
+    )
+    repo.get_by_id.return_value = RegradeBatch(id=9, scope='assignment', scope_id=3, total=4)
+    repo.update.side_effect = lambda batch: batch
+    repo.first_started_at.return_value = None
+    return repo
+
+
+@pytest.fixture
+def service(batch_repo):
+    sandbox = Mock(timeout=5, memory_limit_mb=256)
+    assignment = Mock()
+    assignment.get_course_id.return_value = 7
+    course = Mock()
+    course.get_instructor_id.return_value = 1
+    assignment_repo = Mock()
+    assignment_repo.get_by_id.return_value = assignment
+    course_repo = Mock()
+    course_repo.get_by_id.return_value = course
+    return RegradeService(
+        sandbox_service=sandbox,
+        regrade_batch_repo=batch_repo,
+        submission_repo=Mock(),
+        assignment_repo=assignment_repo,
+        course_repo=course_repo
+    )
+
+
+@pytest.mark.unit
+class TestRegradeService:
+
+    def test_regrade_assignment(self, service, batch_repo, instructor):
+        batch = service.regrade_assignment(instructor, 3)
+
+        assert (batch.scope, batch.scope_id, batch.requested_by) == ('assignment', 3, 1)
+        created = batch_repo.create.call_args.args
+        assert created[1:] == (5, 256)
+
+    def test_regrade_course(self, service, instructor):
+        batch = service.regrade_course(instructor, 7)
+        assert (batch.scope, batch.scope_id) == ('course', 7)
+
+    def test_other_instructor_is_refused(self, service, batch_repo):
+        other = User(2, "Other", "o@t.com", "p", "instructor")
+        with pytest.raises(AuthError):
+            service.regrade_assignment(other, 3)
+        batch_repo.create.assert_not_called()
+
+    def test_admin_may_regrade_any_course(self, service):
+        admin = User(5, "Admin", "a@t.com", "p", "admin")
+        assert service.regrade_course(admin, 7).scope_id == 7
+
+    def test_unknown_assignment(self, service, instructor):
+        service.assignment_repo.get_by_id.return_value = None
+        with pytest.raises(ValidationError, match="Assignment not found"):
+            service.regrade_assignment(instructor, 3)
+
+    def test_regrade_submission_uses_regrade_lane(self, service, instructor):
+        submission = Mock()
+        submission.get_id.return_value = 12
+        submission.get_student_id.return_value = 40
+
+        service.regrade_submission(instructor, submission)
+
+        assert submission.status == 'queued'
+        service.submission_repo.update.assert_called_once_with(submission)
+        service.sandbox_service.create_job.assert_called_once_with(12, lane='regrade', student_id=40)
+
+    def test_progress_with_eta(self, service, batch_repo, instructor):
+        batch_repo.count_jobs.return_value = {'completed': 1, 'timeout': 1, 'running': 1, 'queued': 1}
+        batch_repo.first_started_at.return_value = (datetime.utcnow() - timedelta(seconds=10)).isoformat()
+
+        progress = service.get_progress(instructor, 9)
+
+        assert (progress['done'], progress['failed'], progress['queued'], progress['running']) == (2, 0, 1, 1)
+        assert progress['percent'] == 50.0
+        assert progress['per_minute'] == pytest.approx(12, rel=0.1)
+        assert progress['eta_s'] == pytest.approx(10, rel=0.1)
+        assert progress['batch']['status'] == 'running'
+
+    def test_progress_completes_batch(self, service, batch_repo, instructor):
+        batch_repo.count_jobs.return_value = {'completed': 3, 'failed': 1}
+        batch_repo.first_started_at.return_value = (datetime.utcnow() - timedelta(seconds=4)).isoformat()
+
+        progress = service.get_progress(instructor, 9)
+
+        assert progress['batch']['status'] == 'completed'
+        assert progress['failed'] == 1
+        assert progress['percent'] == 100.0
+        assert progress['eta_s'] is None
+        batch_repo.update.assert_called_once()
+
+    def test_progress_before_any_job_started(self, service, batch_repo, instructor):
+        batch_repo.count_jobs.return_value = {'queued': 4}
+
+        progress = service.get_progress(instructor, 9)
+
+        assert progress['eta_s'] is None
+        assert progress['percent'] == 0.0
+
+    def test_progress_unknown_batch(self, service, batch_repo, instructor):
+        batch_repo.get_by_id.return_value = None
+        with pytest.raises(ValidationError, match="Regrade not found"):
+            service.get_progress(instructor, 9)
+
+    def test_cancel(self, service, batch_repo, instructor):
+        batch_repo.count_jobs.return_value = {'completed': 1, 'cancelled': 3}
+
+        progress = service.cancel(instructor, 9)
+
+        batch_repo.cancel.assert_called_once_with(9)
+        assert progress['cancelled'] == 3
+
+    def test_cancel_finished_batch_is_a_no_op(self, service, batch_repo, instructor):
+        batch_repo.get_by_id.return_value = RegradeBatch(id=9, scope='assignment', scope_id=3, status='completed')
+        batch_repo.count_jobs.return_value = {'completed': 4}
+
+        service.cancel(instructor, 9)
+
+        batch_repo.cancel.assert_not_called()
@@ -0,0 +1,130 @@
+import sys
+import pytest
+
+from core.services.execution_context import ExecutionContext
+from core.services.sandbox_process import RLIMITS_SUPPORTED, build_rlimits, clip_output, run_process
+from infrastructure.sandbox.payload_store import PayloadStore
+
+needs_rlimits = pytest.mark.skipif(not RLIMITS_SUPPORTED, reason="needs resource and os.wait4")
+
+
+def _run(code, stdin='', timeout=5, memory_limit_mb=256, tmp_path=None, max_output=None):
+    context = ExecutionContext('python', timeout, memory_limit_mb)
+    return run_process(
+        [sys.executable, '-c', code], stdin, context,
+        cwd=str(tmp_path) if tmp_path else None, env=None,
+        limits=build_rlimits(context, max_open_files=32, max_processes=0),
+        max_output=max_output
+    )
+
+
+@pytest.mark.unit
+class TestBuildRlimits:
+
+    def test_limits_follow_context(self):
+        limits = build_rlimits(ExecutionContext('python', 2.5, 128), max_open_files=64, max_processes=50)
+
+        assert limits['RLIMIT_AS'] == (128 * 1024 * 1024, 128 * 1024 * 1024)
+        assert limits['RLIMIT_CPU'] == (4, 5)
+        assert limits['RLIMIT_NOFILE'] == (64, 64)
+        assert limits['RLIMIT_NPROC'] == (50, 50)
+
+    def test_address_space_limit_can_be_disabled(self):
+        context = ExecutionContext('java', 1, 128)
+        limits = build_rlimits(context, max_open_files=64, max_processes=0, limit_address_space=False)
+        assert 'RLIMIT_AS' not in limits
+
+    def test_process_limit_can_be_disabled(self):
+        limits = build_rlimits(ExecutionContext('python', 1, 128), max_open_files=64, max_processes=0)
+        assert 'RLIMIT_NPROC' not in limits
+
+
+@pytest.mark.unit
+class TestClipOutput:
+
+    def test_short_output_unchanged(self):
+        assert clip_output("abc", excerpt=2) == "abc"
+        assert clip_output("abcd", excerpt=2) == "abcd"
+
+    def test_keeps_head_and_tail(self):
+        clipped = clip_output("HEAD" + "x" * 100 + "TAIL", excerpt=4)
+
+        assert clipped.startswith("HEAD\n")
+        assert clipped.endswith("\nTAIL")
+        assert "100 characters omitted" in clipped
+
+
+@needs_rlimits
+@pytest.mark.unit
+class TestRunProcess:
+
+    def test_reports_cpu_time_not_sleep(self):
+        code = (
+            "import time\n"
+            "t = time.process_time()\n"
+            "while time.process_time() - t < 0.2: pass\n"
+            "time.sleep(0.4)\n"
+        )
+        result = _run(code)
+
+        assert result['exit_code'] == 0
+        assert 150 <= result['cpu_ms'] < 500
+        assert result['wall_ms'] >= 600
+
+    def test_reports_peak_memory(self):
+        small = _run("print(1)")
+        large = _run("x = b'x' * (64 * 1024 * 1024); print(len(x))")
+
+        assert large['exit_code'] == 0
+        assert large['memory_kb'] - small['memory_kb'] > 60 * 1024
+
+    def test_memory_not_inflated_by_parent_process(self):
+        ballast = b'x' * (128 * 1024 * 1024)  # noqa: F841 - the parent is now >128 MB
+        assert _run("print(1)")['memory_kb'] < 64 * 1024
+
+    def test_memory_limit_enforced(self):
+        result = _run("x = bytearray(512 * 1024 * 1024)", memory_limit_mb=128)
+
+        assert result['exit_code'] != 0
+        assert 'MemoryError' in result['stderr']
+
+    def test_open_files_limited(self):
+        result = _run("fs = [open('/dev/null') for _ in range(100)]")
+        assert 'Too many open files' in result['stderr']
+
+    def test_timeout_kills_and_reaps(self):
+        result = _run("while True: pass", timeout=0.5)
+
+        assert result['timed_out'] is True
+        assert result['exit_code'] == -1
+        assert result['wall_ms'] < 2000
+
+    def test_large_stdin_and_stdout(self):
+        data = "x" * 500_000
+        result = _run("import sys; sys.stdout.write(sys.stdin.read())", stdin=data)
+        assert result['stdout'] == data
+
+    def test_stdin_from_payload_file(self, tmp_path):
+        data = "1 2\n" * 100_000
+        payload = PayloadStore(root=str(tmp_path)).put(data)
+
+        result = _run("import sys; print(sum(map(int, sys.stdin.read().split())))", stdin=payload)
+
+        assert result['stdout'] == "300000\n"
+
+    def test_output_cap_kills_print_loop(self):
+        result = _run("while True: print('spam')", max_output=10_000)
+
+        assert result['output_truncated'] is True
+        assert result['timed_out'] is False
+        assert result['wall_ms'] < 2000
+        assert len(result['stdout']) == 10_000
+        assert result['stdout'].startswith('spam\n')
+
+    def test_output_cap_applies_per_stream(self):
+        code = "import sys; print('x' * 800); sys.stderr.write('e' * 800)"
+
+        assert _run(code, max_output=1000)['output_truncated'] is False
+        result = _run("import sys; sys.stderr.write('e' * 5000)", max_output=1000)
+        assert result['output_truncated'] is True
+        assert result['stderr'] == 'e' * 1000
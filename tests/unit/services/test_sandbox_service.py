@@ -1,9 +1,13 @@
 import pytest
 from unittest.mock import Mock, MagicMock, patch
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from core.services.sandbox_service import SandboxService
+from core.services.sandbox_service import SandboxService, canonicalize_code, case_content_hash, result_cache_key
+from core.services.execution_context import ExecutionContext
 from core.entities.sandbox_job import SandboxJob
+from core.entities.test_case import Testcase
+from core.exceptions.sandbox_busy_error import SandboxBusyError
+from infrastructure.sandbox.payload_store import PayloadStore
 
 
 @pytest.fixture
@@ -98,7 +102,7 @@ class TestSandboxService:
         mock_test_case.name = "Test Addition"
         mock_test_case.stdin = "5 3"
         mock_test_case.expected_out = "8"
-        mock_test_case.timeout_seconds = 5  # Add timeout
+        mock_test_case.timeout_ms = 5000  # Add timeout
         
         code = '''
 a, b = map(int, input().split())
@@ -116,7 +120,7 @@ print(a + b)
         mock_test_case.name = "Test Fail"
         mock_test_case.stdin = ""
         mock_test_case.expected_out = "expected"
-        mock_test_case.timeout_seconds = 5  # Add timeout
+        mock_test_case.timeout_ms = 5000  # Add timeout
         
         code = 'print("actual")'
         result = sandbox_service.run_test_case(code, mock_test_case)
@@ -125,6 +129,23 @@ print(a + b)
         assert result['actual_output'] == 'actual'
         assert result['expected_output'] == 'expected'
     
+    def test_run_test_case_reports_first_difference(self, sandbox_service):
+        tc = Testcase(1, 1, "Lines", "", None, "alpha\nbeta\ngamma", 5000, 256, 1, True, 0, None)
+
+        result = sandbox_service.run_test_case('print("alpha"); print("bet"); print("gamma")', tc)
+
+        assert result['passed'] is False
+        assert (result['first_diff']['line'], result['first_diff']['column']) == (2, 4)
+
+    def test_run_test_case_uses_compare_mode(self, sandbox_service):
+        tc = Testcase(1, 1, "Float", "", None, "0.333", 5000, 256, 1, True, 0, None,
+                      compare_mode='float', compare_tolerance=0.001)
+
+        result = sandbox_service.run_test_case('print(1 / 3)', tc)
+
+        assert result['passed'] is True
+        assert result['first_diff'] is None
+
     def test_run_all_tests(self, sandbox_service):
         """Test running multiple test cases."""
         tc1 = Mock()
@@ -132,14 +153,14 @@ print(a + b)
         tc1.stdin = ""
         tc1.expected_out = "hello"
         tc1.points = 50
-        tc1.timeout_seconds = 5  # Add timeout
+        tc1.timeout_ms = 5000  # Add timeout
         
         tc2 = Mock()
         tc2.name = "Test 2"
         tc2.stdin = ""
         tc2.expected_out = "hello"
         tc2.points = 50
-        tc2.timeout_seconds = 5  # Add timeout
+        tc2.timeout_ms = 5000  # Add timeout
         
         code = 'print("hello")'
         result = sandbox_service.run_all_tests(code, [tc1, tc2])
@@ -176,6 +197,38 @@ print(a + b)
         mock_sandbox_job_repo.create.assert_called_once()
         assert job.get_submission_id() == 100
     
+    def test_create_job_in_lane_for_submission_owner(self, sandbox_service, mock_sandbox_job_repo, mock_submission_repo):
+        mock_sandbox_job_repo.create.side_effect = lambda job: job
+        mock_submission_repo.get_by_id.return_value = Mock(get_student_id=Mock(return_value=7))
+
+        job = sandbox_service.create_job(submission_id=100, lane='regrade')
+
+        assert job.lane == 'regrade'
+        assert job.student_id == 7
+
+    def test_create_job_rejects_unknown_lane(self, sandbox_service):
+        with pytest.raises(ValueError):
+            sandbox_service.create_job(submission_id=100, lane='vip', student_id=1)
+
+    def test_queue_stats(self, sandbox_service, mock_sandbox_job_repo):
+        now = datetime.utcnow()
+        mock_sandbox_job_repo.count_queued_by_lane.return_value = {
+            'regrade': (40, (now - timedelta(seconds=90)).isoformat())
+        }
+        mock_sandbox_job_repo.get_recent_waits.return_value = [
+            ('interactive', '2026-01-01T12:00:00', f'2026-01-01T12:00:{s:02d}') for s in range(1, 21)
+        ] + [('submission', '2026-01-01 12:00:00', '2026-01-01T12:01:00')]
+
+        stats = sandbox_service.queue_stats()
+
+        assert stats['regrade']['queued'] == 40
+        assert 89 <= stats['regrade']['oldest_wait_s'] < 100
+        assert stats['interactive'] == {
+            'queued': 0, 'oldest_wait_s': None, 'started': 20, 'wait_p50_s': 10.0, 'wait_p95_s': 19.0
+        }
+        assert stats['submission']['wait_p95_s'] == 60.0
+        assert stats['regrade']['wait_p50_s'] is None
+
     def test_get_job(self, sandbox_service, mock_sandbox_job_repo):
         """Test getting a sandbox job."""
         job = sandbox_service.get_job(1)
@@ -254,7 +307,7 @@ print(a + b)
 
     def test_execute_via_piston_unsupported_language(self, sandbox_service):
         """Line 58: Error for unsupported language in Piston"""
-        result = sandbox_service._execute_via_piston("code", language="brainfuck")
+        result = sandbox_service._execute_via_piston("code", "", sandbox_service.make_context("brainfuck"))
         assert result["success"] is False
         assert "not supported" in result["stderr"]
 
@@ -263,7 +316,7 @@ print(a + b)
         from unittest.mock import patch
         with patch("os.unlink", side_effect=Exception("Permission Denied")):
             # This should not crash despite unlink failure
-            result = sandbox_service._execute_via_subprocess("print('hi')", language="python")
+            result = sandbox_service._execute_via_subprocess("print('hi')", "", sandbox_service.make_context())
             assert result["success"] is True
             assert result["stdout"].strip() == "hi"
 
@@ -274,7 +327,7 @@ print(a + b)
         tc.name = "Test"
         tc.stdin = ""
         tc.expected_out = "hi"
-        tc.timeout_seconds = 5
+        tc.timeout_ms = 5000
         
         if hasattr(tc, 'points'):
             del tc.points # Ensure it doesn't have it
@@ -287,3 +340,836 @@ print(a + b)
         """Test scoring with no test cases"""
         result = sandbox_service.run_all_tests("code", [])
         assert result['score'] == 0.0
+
+    def test_run_all_tests_parallel_keeps_order(self, sandbox_service):
+        """Concurrent mode returns results in test case order with the same aggregation"""
+        sandbox_service.parallelism = 4
+        test_cases = []
+        for i in range(6):
+            tc = Mock()
+            tc.name = f"Test {i}"
+            tc.stdin = str(i)
+            tc.expected_out = str(i * 2) if i % 2 == 0 else "wrong"
+            tc.points = 10
+            tc.timeout_ms = 5000
+            test_cases.append(tc)
+
+        code = 'print(int(input()) * 2)'
+        result = sandbox_service.run_all_tests(code, test_cases)
+
+        assert [r['test_name'] for r in result['results']] == [f"Test {i}" for i in range(6)]
+        assert [r['actual_output'] for r in result['results']] == [str(i * 2) for i in range(6)]
+        assert result['passed_count'] == 3
+        assert result['earned_points'] == 30
+        assert result['total_points'] == 60
+        assert result['score'] == 50.0
+
+    def test_run_all_tests_parallel_wall_clock(self, sandbox_service):
+        """Wall-clock time tracks the slowest test, not the sum"""
+        import time
+        sandbox_service.parallelism = 4
+        test_cases = []
+        for i in range(4):
+            tc = Mock()
+            tc.name = f"Sleep {i}"
+            tc.stdin = ""
+            tc.expected_out = "done"
+            tc.points = 1
+            tc.timeout_ms = 5000
+            test_cases.append(tc)
+
+        code = 'import time; time.sleep(1); print("done")'
+        start = time.monotonic()
+        result = sandbox_service.run_all_tests(code, test_cases)
+        elapsed = time.monotonic() - start
+
+        assert result['passed_count'] == 4
+        assert elapsed < 3.5
+
+    def test_run_all_tests_reports_each_case(self, sandbox_service):
+        """on_result sees every case once, with its index, as it finishes"""
+        sandbox_service.parallelism = 3
+        test_cases = [_make_test_case(f"T{i}", str(i), str(i)) for i in range(5)]
+        reported = []
+
+        result = sandbox_service.run_all_tests(
+            'print(input())', test_cases, on_result=lambda i, r: reported.append((i, r['test_name']))
+        )
+
+        assert sorted(reported) == [(i, f"T{i}") for i in range(5)]
+        assert result['passed_count'] == 5
+
+    def test_run_all_tests_reports_in_completion_order(self, sandbox_service):
+        """A fast case is reported before a slower one listed ahead of it"""
+        sandbox_service.parallelism = 2
+        test_cases = [_make_test_case("slow", "1", "ok"), _make_test_case("fast", "0", "ok")]
+        reported = []
+
+        sandbox_service.run_all_tests(
+            'import time\ntime.sleep(float(input()))\nprint("ok")', test_cases,
+            on_result=lambda i, r: reported.append(i)
+        )
+
+        assert reported == [1, 0]
+
+    def test_execute_code_does_not_mutate_shared_timeout(self, sandbox_service):
+        """Per-call timeouts must not leak into the shared service"""
+        sandbox_service.execute_code('print(1)', timeout=2)
+        assert sandbox_service.timeout == 5
+
+
+@pytest.mark.unit
+class TestOutputLimit:
+
+    @pytest.fixture
+    def capped_service(self, mock_sandbox_job_repo, mock_submission_repo):
+        return SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo,
+            submission_repo=mock_submission_repo,
+            use_external_api=False,
+            max_output_bytes=100_000
+        )
+
+    def test_print_loop_is_killed_and_flagged(self, capped_service):
+        result = capped_service.execute_code('i = 0\nwhile True:\n    print(i)\n    i += 1', timeout=10)
+
+        assert result['output_truncated'] is True
+        assert result['success'] is False
+        assert result['timed_out'] is False
+        assert result['runtime_ms'] < 5000
+        assert result['stdout'].startswith('0\n1\n2\n')
+        assert 'characters omitted' in result['stdout']
+        assert len(result['stdout']) < 20_000
+        assert result['stderr'] == 'Output limit exceeded (100000 bytes per stream)'
+
+    def test_output_under_the_cap_is_untouched(self, capped_service):
+        result = capped_service.execute_code('print("x" * 90_000)')
+
+        assert result['output_truncated'] is False
+        assert result['stdout'] == 'x' * 90_000 + '\n'
+
+    def test_piston_output_is_capped(self, mock_sandbox_job_repo, mock_submission_repo):
+        client = Mock()
+        client.get_version.return_value = '3.10'
+        client.execute.return_value = Mock(
+            status_code=200, json=lambda: {'run': {'stdout': 'y' * 200_000, 'stderr': '', 'code': 0}}
+        )
+        service = SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo,
+            submission_repo=mock_submission_repo,
+            piston_client=client,
+            max_output_bytes=100_000
+        )
+
+        result = service.execute_code('print("y" * 200_000)')
+
+        assert result['output_truncated'] is True
+        assert result['success'] is False
+        assert len(result['stdout']) < 20_000
+
+
+def _make_test_case(name, stdin, expected, timeout=5, points=10):
+    tc = Mock()
+    tc.name = name
+    tc.stdin = stdin
+    tc.expected_out = expected
+    tc.timeout_ms = timeout * 1000
+    tc.memory_limit_mb = 256
+    tc.points = points
+    return tc
+
+
+@pytest.mark.unit
+class TestFileBackedTestCases:
+
+    @pytest.fixture
+    def file_case(self, tmp_path):
+        store = PayloadStore(root=str(tmp_path), inline_max_bytes=0)
+        return Testcase(
+            None, 1, "Big", "", "", "", 5000, 256, 10, True, 1, None,
+            stdin_file=store.put("2 3\n" * 1000), expected_out_file=store.put("5\n" * 1000)
+        )
+
+    def test_file_payloads_are_streamed_and_compared(self, sandbox_service, file_case):
+        code = 'import sys\nfor line in sys.stdin:\n    a, b = map(int, line.split())\n    print(a + b)'
+
+        result = sandbox_service.run_test_case(code, file_case)
+
+        assert result['passed'] is True
+        assert result['expected_output'].startswith("5\n5")
+
+    def test_first_difference_in_file_expected_output(self, sandbox_service, file_case):
+        result = sandbox_service.run_test_case('for i in range(1000): print(5 if i != 7 else 6)', file_case)
+
+        assert result['passed'] is False
+        assert result['first_diff']['line'] == 8
+
+    def test_digest_stands_in_for_content_in_hashes(self, file_case):
+        context = ExecutionContext('python', 5, 256)
+        inline = file_case.clone()
+        inline.stdin, inline.expected_out = file_case.stdin, file_case.expected_out
+
+        assert result_cache_key('x', file_case, context) != result_cache_key('x', inline, context)
+        assert result_cache_key('x', file_case, context) == result_cache_key('x', file_case.clone(), context)
+
+    def test_batch_mode_skips_file_backed_cases(self, mock_sandbox_job_repo, mock_submission_repo, file_case):
+        service = SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo, submission_repo=mock_submission_repo,
+            timeout=5, use_external_api=False, batch_mode=True
+        )
+        code = 'import sys\nfor line in sys.stdin:\n    a, b = map(int, line.split())\n    print(a + b)'
+
+        with patch.object(service, '_run_batched') as batched:
+            result = service.run_all_tests(code, [file_case, file_case.clone()])
+
+        batched.assert_not_called()
+        assert result['passed_count'] == 2
+
+
+def _complexity_case(max_class='n log n', sizes=(1000, 2000, 4000, 8000)):
+    return Testcase(
+        1, 1, "Growth", None, None, "", 5000, 256, 10, True, 1, None,
+        kind='complexity', generator='n = int(input())\nprint(n)', complexity_sizes=sizes,
+        complexity_repeats=2, complexity_max_class=max_class
+    )
+
+
+@pytest.mark.unit
+class TestComplexityTestCases:
+
+    @staticmethod
+    def fake_executor(cpu_ms, calls):
+        """execute_in_context stand-in: the generator echoes n, the submission takes cpu_ms(n, run)."""
+        def execute(code, stdin, context):
+            calls.append((code, stdin))
+            if code.startswith('n = int'):
+                return {'success': True, 'stdout': stdin, 'stderr': '', 'exit_code': 0,
+                        'runtime_ms': 20, 'timed_out': False}
+            n = int(stdin)
+            runs = sum(1 for c, s in calls if s == stdin and not c.startswith('n = int'))
+            return {'success': True, 'stdout': '', 'stderr': '', 'exit_code': 0,
+                    'runtime_ms': cpu_ms(n, runs), 'wall_ms': 1, 'timed_out': False}
+        return execute
+
+    def test_quadratic_solution_fails_n_log_n_limit(self, sandbox_service):
+        calls = []
+        sandbox_service.execute_in_context = self.fake_executor(lambda n, run: 20 + n * n // 200_000, calls)
+
+        result = sandbox_service.run_all_tests('solve()', [_complexity_case()])['results'][0]
+
+        assert result['passed'] is False
+        assert result['measurements']['best_fit'] == 'n^2'
+        assert result['measurements']['sizes'] == [1000, 2000, 4000, 8000]
+        assert result['actual_output'] == "Measured growth: O(n^2)"
+        assert result['expected_output'] == "O(n log n) or better"
+        # One generator run per size, two timed runs per size
+        assert len(calls) == 4 * 3
+
+    def test_fastest_repetition_is_kept(self, sandbox_service):
+        calls = []
+        # The first run at each size is disturbed; the second shows linear growth
+        sandbox_service.execute_in_context = self.fake_executor(
+            lambda n, run: 20 + n // 40 + (500 if run == 1 else 0), calls
+        )
+
+        result = sandbox_service.run_all_tests('solve()', [_complexity_case()])['results'][0]
+
+        assert result['passed'] is True
+        assert result['measurements']['cpu_ms'] == [45, 70, 120, 220]
+
+    def test_failed_run_stops_measuring(self, sandbox_service):
+        def execute(code, stdin, context):
+            if code.startswith('n = int'):
+                return {'success': True, 'stdout': stdin, 'stderr': '', 'exit_code': 0,
+                        'runtime_ms': 1, 'timed_out': False}
+            slow = int(stdin) >= 4000
+            return {'success': not slow, 'stdout': '', 'stderr': 'Execution timed out' if slow else '',
+                    'exit_code': -1 if slow else 0, 'runtime_ms': 5000 if slow else 30, 'timed_out': slow}
+        sandbox_service.execute_in_context = execute
+
+        result = sandbox_service.run_all_tests('solve()', [_complexity_case()])['results'][0]
+
+        assert result['passed'] is False
+        assert result['timed_out'] is True
+        assert result['stderr'] == "n=4000: Execution timed out"
+        assert result['measurements']['sizes'] == [1000, 2000]
+
+    def test_generator_runs_in_the_sandbox(self, sandbox_service):
+        case = _complexity_case(max_class='n^3', sizes=(10, 20, 40))
+        case.generator = 'n = int(input())\nprint(" ".join(["1"] * n))'
+
+        result = sandbox_service.run_all_tests('print(len(input().split()))', [case])['results'][0]
+
+        assert result['passed'] is True
+        assert result['measurements']['best_fit'] is not None
+
+    def test_not_cached_or_batched(self, mock_sandbox_job_repo, mock_submission_repo):
+        cache = Mock()
+        service = SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo, submission_repo=mock_submission_repo,
+            timeout=5, use_external_api=False, batch_mode=True, result_cache=cache
+        )
+        service.execute_in_context = self.fake_executor(lambda n, run: 20 + n // 40, [])
+
+        with patch.object(service, '_run_batched') as batched:
+            service.run_all_tests('solve()', [_complexity_case(), _complexity_case()])
+
+        batched.assert_not_called()
+        cache.get.assert_not_called()
+        cache.put.assert_not_called()
+
+
+def _function_case(args, expected, function_name='solve', timeout=5, compare_mode='exact'):
+    return Testcase(
+        1, 1, f"{function_name}{args}", args, None, expected, timeout * 1000, 256, 10, True, 1, None,
+        compare_mode=compare_mode, kind='function', function_name=function_name
+    )
+
+
+@pytest.mark.unit
+class TestFunctionCallTestCases:
+
+    CODE = (
+        'import time\n'
+        'calls = 0\n'
+        'def solve(xs, k=1):\n'
+        '    global calls\n'
+        '    calls += 1\n'
+        '    return sorted(xs)[:k]\n'
+        'def divide(a, b):\n'
+        '    return a / b\n'
+        'def spin():\n'
+        '    while True: pass\n'
+        'def counted():\n'
+        '    return calls\n'
+        'if __name__ == "__main__":\n'
+        '    print(solve([int(x) for x in input().split()]))\n'
+    )
+
+    def test_module_is_imported_once_for_all_calls(self, sandbox_service):
+        cases = [_function_case(f'[[{i}, 3, 1]]', '[1]') for i in range(1, 201)]
+        cases.append(_function_case('[]', '200', function_name='counted'))
+
+        with patch.object(sandbox_service, '_execute_via_subprocess',
+                          wraps=sandbox_service._execute_via_subprocess) as spy:
+            result = sandbox_service.run_all_tests(self.CODE, cases)
+
+        assert spy.call_count == 1
+        assert result['passed_count'] == 201
+
+    def test_return_values_compare_structurally(self, sandbox_service):
+        cases = [
+            _function_case('{"args": [[5, 2, 9]], "kwargs": {"k": 2}}', '[2, 5]'),
+            _function_case('[1, 4]', '0.25', function_name='divide'),
+            _function_case('[1, 3]', '0.3333', function_name='divide', compare_mode='float'),
+            _function_case('[[3, 1]]', '[2]'),
+        ]
+        cases[2].compare_tolerance = 1e-3
+
+        results = sandbox_service.run_all_tests(self.CODE, cases)['results']
+
+        assert [r['passed'] for r in results] == [True, True, True, False]
+        assert results[0]['actual_output'] == '[2, 5]'
+        assert results[3]['first_diff']['path'] == '[0]'
+        assert results[3]['first_diff']['message'] == "Return value[0]: expected 2 but got 1"
+
+    def test_exceptions_and_timeouts_fail_only_their_call(self, sandbox_service):
+        cases = [
+            _function_case('[1, 0]', '0', function_name='divide'),
+            _function_case('[]', 'null', function_name='spin', timeout=1),
+            _function_case('[]', 'null', function_name='missing'),
+            _function_case('[[2, 1]]', '[1]'),
+        ]
+
+        results = sandbox_service.run_all_tests(self.CODE, cases)['results']
+
+        assert 'ZeroDivisionError' in results[0]['stderr']
+        assert 'line 8, in divide' in results[0]['stderr']
+        assert results[1]['timed_out'] is True
+        assert 'timed out after 1 seconds' in results[1]['stderr']
+        assert 'does not define a function missing()' in results[2]['stderr']
+        assert [r['passed'] for r in results] == [False, False, False, True]
+
+    def test_import_error_fails_every_call(self, sandbox_service):
+        cases = [_function_case('[[1]]', '[1]'), _function_case('[[2]]', '[2]')]
+
+        results = sandbox_service.run_all_tests('raise ValueError("broken")', cases)['results']
+
+        assert all(not r['passed'] and 'ValueError: broken' in r['stderr'] for r in results)
+
+    def test_crash_is_isolated_to_its_call(self, sandbox_service):
+        code = 'import os\ndef solve(x):\n    if x == 0:\n        os._exit(3)\n    return x\n'
+        cases = [_function_case(f'[{i}]', str(i)) for i in range(3)]
+
+        results = sandbox_service.run_all_tests(code, cases)['results']
+
+        assert [r['passed'] for r in results] == [False, True, True]
+        assert results[0]['exit_code'] == 3
+
+    def test_mixed_with_io_cases(self, sandbox_service):
+        cases = [_make_test_case("io", "3 1", "[1]"), _function_case('[[3, 1]]', '[1]')]
+
+        result = sandbox_service.run_all_tests(self.CODE, cases)
+
+        assert result['passed_count'] == 2
+
+    def test_function_name_is_part_of_the_hashes(self):
+        case = _function_case('[1]', '1')
+        other = _function_case('[1]', '1', function_name='other')
+
+        assert case_content_hash(case) != case_content_hash(other)
+
+
+GENERATOR = (
+    'import random\n'
+    'size, seed = map(int, input().split())\n'
+    'random.seed(seed)\n'
+    'print(size)\n'
+    'print(*(random.randint(1, 100) for _ in range(size)))\n'
+)
+SUM_SOLUTION = 'input()\nprint(sum(map(int, input().split())))\n'
+
+
+def _generated_case(size=1000, seed=1, generator=GENERATOR, reference=SUM_SOLUTION):
+    return Testcase(
+        1, 1, "Large", None, None, "", 5000, 256, 10, True, 1, None,
+        kind='generated', generator=generator, generator_size=size, generator_seed=seed,
+        reference_solution=reference
+    )
+
+
+@pytest.mark.unit
+class TestGeneratedTestCases:
+
+    def test_dataset_is_generated_once_across_submissions(
+        self, mock_sandbox_job_repo, mock_submission_repo, generated_dataset_repo
+    ):
+        service = SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo, submission_repo=mock_submission_repo,
+            timeout=5, use_external_api=False, dataset_cache=generated_dataset_repo
+        )
+
+        with patch.object(service, 'execute_in_context', wraps=service.execute_in_context) as execute:
+            correct = service.run_all_tests(SUM_SOLUTION, [_generated_case()])
+            wrong = service.run_all_tests('input()\nprint(0)', [_generated_case()])
+
+        generated = [c for c in execute.call_args_list if c.args[0] in (GENERATOR, SUM_SOLUTION)]
+        # Generator and reference once; then the correct submission itself
+        assert len(generated) == 3
+        assert correct['passed_count'] == 1
+        assert wrong['passed_count'] == 0
+
+    def test_seed_fixes_the_input(self, sandbox_service):
+        case, same, other = _generated_case(seed=1), _generated_case(seed=1), _generated_case(seed=2)
+        for tc in (case, same, other):
+            sandbox_service.run_test_case(SUM_SOLUTION, tc)
+
+        assert case.stdin == same.stdin != other.stdin
+        assert case.stdin.startswith('1000\n')
+        assert case.expected_out == str(sum(map(int, case.stdin.split()[1:]))) + '\n'
+
+    def test_generator_failure_is_transient(self, sandbox_service):
+        results = sandbox_service.run_all_tests(SUM_SOLUTION, [
+            _generated_case(generator='1 / 0'),
+            _generated_case(reference='raise SystemExit("no")'),
+        ])['results']
+
+        assert results[0]['stderr'].startswith('Input generator failed: ')
+        assert 'ZeroDivisionError' in results[0]['stderr']
+        assert results[1]['stderr'].startswith('Reference solution failed: ')
+        assert all(r['transient'] and not r['passed'] for r in results)
+
+    def test_recipe_is_part_of_the_hashes(self):
+        case = _generated_case()
+
+        assert case_content_hash(case) == case_content_hash(_generated_case())
+        assert case_content_hash(case) != case_content_hash(_generated_case(seed=2))
+        assert case_content_hash(case) != case_content_hash(_generated_case(size=10))
+
+
+@pytest.mark.unit
+class TestBatchedExecution:
+
+    @pytest.fixture
+    def batch_service(self, mock_sandbox_job_repo, mock_submission_repo):
+        return SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo,
+            submission_repo=mock_submission_repo,
+            timeout=5,
+            use_external_api=False,
+            batch_mode=True
+        )
+
+    def test_single_execution_for_all_cases(self, batch_service):
+        cases = [_make_test_case(f"T{i}", f"{i} {i}", str(i * 2)) for i in range(5)]
+        code = 'a, b = map(int, input().split())\nprint(a + b)'
+
+        with patch.object(batch_service, '_execute_via_subprocess',
+                          wraps=batch_service._execute_via_subprocess) as spy:
+            result = batch_service.run_all_tests(code, cases)
+
+        assert spy.call_count == 1
+        assert result['passed_count'] == 5
+        assert result['score'] == 100.0
+        assert [r['actual_output'] for r in result['results']] == [str(i * 2) for i in range(5)]
+
+    def test_result_shape_matches_run_test_case(self, batch_service):
+        cases = [_make_test_case("A", "", "x"), _make_test_case("B", "", "x")]
+        batched = batch_service.run_all_tests('print("x")', cases)['results'][0]
+        single = batch_service.run_test_case('print("x")', cases[0])
+
+        assert set(batched) == set(single)
+        assert batched['stdout'] == single['stdout'] == 'x\n'
+
+    def test_cases_are_isolated(self, batch_service):
+        code = (
+            'import sys\n'
+            'try:\n'
+            '    counter += 1\n'
+            'except NameError:\n'
+            '    counter = 1\n'
+            'print(counter, "fractions" in sys.modules)\n'
+            'import fractions\n'
+        )
+        cases = [_make_test_case(f"T{i}", "", "1 False") for i in range(3)]
+
+        result = batch_service.run_all_tests(code, cases)
+
+        assert result['passed_count'] == 3
+
+    def test_per_case_errors_timeouts_and_exit_codes(self, batch_service):
+        code = (
+            'import sys\n'
+            'n = int(input())\n'
+            'if n == 0:\n'
+            '    while True: pass\n'
+            'if n == 1:\n'
+            '    1/0\n'
+            'if n == 2:\n'
+            '    sys.exit(4)\n'
+            'print(n)\n'
+        )
+        cases = [
+            _make_test_case("loop", "0", "", timeout=1),
+            _make_test_case("crash", "1", ""),
+            _make_test_case("exit", "2", ""),
+            _make_test_case("ok", "3", "3"),
+        ]
+
+        results = batch_service.run_all_tests(code, cases)['results']
+
+        assert results[0]['timed_out'] is True
+        assert results[0]['exit_code'] == -1
+        assert 'timed out after 1 seconds' in results[0]['stderr']
+        assert results[1]['exit_code'] == 1
+        assert 'ZeroDivisionError' in results[1]['stderr']
+        assert results[2]['exit_code'] == 4
+        assert results[3]['passed'] is True
+
+    def test_syntax_error_reported_for_every_case(self, batch_service):
+        cases = [_make_test_case(f"T{i}", "", "x") for i in range(3)]
+
+        results = batch_service.run_all_tests('print("x"', cases)['results']
+
+        assert all(r['exit_code'] == 1 and 'SyntaxError' in r['stderr'] for r in results)
+
+    def test_output_cap_stops_only_the_noisy_case(self, batch_service):
+        batch_service.max_output_bytes = 50_000
+        code = 'if input() == "loop":\n    while True: print("spam")\nprint("ok")'
+        cases = [_make_test_case("noisy", "loop", "ok"), _make_test_case("quiet", "x", "ok")]
+
+        results = batch_service.run_all_tests(code, cases)['results']
+
+        assert results[0]['output_truncated'] is True
+        assert results[0]['passed'] is False
+        assert 'Output limit exceeded' in results[0]['stderr']
+        assert 'characters omitted' in results[0]['stdout']
+        assert results[1]['output_truncated'] is False
+        assert results[1]['passed'] is True
+
+    def test_cases_read_their_stdin_from_fd_0(self, batch_service):
+        # Each case closes fd 0; the next still gets its own input
+        code = 'with open(0) as f:\n    print(sum(map(int, f.read().split())))'
+        cases = [
+            _make_test_case("T1", "1 2 3", "6"),
+            _make_test_case("T2", "4 5", "9"),
+            _make_test_case("large", "1 " * 100_000, "100000"),
+        ]
+
+        with patch.object(batch_service, '_execute_via_subprocess',
+                          wraps=batch_service._execute_via_subprocess) as spy:
+            result = batch_service.run_all_tests(code, cases)
+
+        assert spy.call_count == 1
+        assert [r['passed'] for r in result['results']] == [True] * 3
+
+        cases = [_make_test_case("T1", "abc", "3"), _make_test_case("T2", "", "0")]
+        result = batch_service.run_all_tests('import os\nprint(len(os.read(0, 100)))', cases)
+
+        assert result['passed_count'] == 2
+
+    def test_falls_back_when_harness_output_is_incomplete(self, batch_service):
+        cases = [_make_test_case(f"T{i}", "", "hi") for i in range(2)]
+
+        with patch('core.services.sandbox_service.parse_harness_output', return_value=None):
+            result = batch_service.run_all_tests('print("hi")', cases)
+
+        assert result['passed_count'] == 2
+
+
+@pytest.mark.unit
+class TestSyntaxPrecheck:
+
+    def test_uncompilable_code_is_never_executed(self, sandbox_service):
+        cases = [_make_test_case(f"T{i}", "", "x") for i in range(3)]
+
+        with patch.object(sandbox_service, 'execute_in_context') as execute:
+            result = sandbox_service.run_all_tests('print("x"', cases)
+
+        execute.assert_not_called()
+        assert result['passed_count'] == 0
+        assert result['score'] == 0
+        for r in result['results']:
+            assert r['passed'] is False
+            assert r['exit_code'] == 1
+            assert 'SyntaxError' in r['stderr']
+            assert 'File "main.py", line 1' in r['stderr']
+
+    def test_message_matches_a_real_run(self, sandbox_service):
+        code = 'def f():\nreturn 1'
+        precheck = sandbox_service.run_all_tests(code, [_make_test_case("T", "", "")])['results'][0]
+        real = sandbox_service.execute_code(code)
+
+        assert 'IndentationError' in precheck['stderr']
+        assert precheck['stderr'].strip().splitlines()[-1] == real['stderr'].strip().splitlines()[-1]
+
+    def test_remediation_still_detects_syntax_errors(self, sandbox_service):
+        from core.services.remediation_service import RemediationService
+
+        result = sandbox_service.run_all_tests('if True print(1)', [_make_test_case("T", "", "1")])
+        remediation = RemediationService(remediation_repo=Mock())
+
+        assert remediation.detect_failure_pattern(result['results'][0]['stderr']) == 'syntax_error'
+
+    def test_other_languages_are_not_prechecked(self, sandbox_service):
+        with patch.object(sandbox_service, 'execute_in_context', return_value={
+            'success': True, 'stdout': 'x', 'stderr': '', 'exit_code': 0, 'runtime_ms': 1, 'timed_out': False
+        }) as execute:
+            sandbox_service.run_all_tests('print("x"', [_make_test_case("T", "", "x")], language='javascript')
+
+        execute.assert_called_once()
+
+
+class DictResultCache:
+    """In-memory stand-in for ResultCacheRepository."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, test_case_id, result):
+        self.entries[key] = dict(result)
+
+
+@pytest.mark.unit
+class TestResultCache:
+
+    @pytest.fixture
+    def cache(self):
+        return DictResultCache()
+
+    @pytest.fixture
+    def cached_service(self, mock_sandbox_job_repo, mock_submission_repo, cache):
+        return SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo,
+            submission_repo=mock_submission_repo,
+            use_external_api=False,
+            result_cache=cache
+        )
+
+    def _case(self, name="T1", stdin="", expected="hi"):
+        return _make_test_case(name, stdin, expected)
+
+    def test_canonicalize_code(self):
+        assert canonicalize_code('x = 1  \r\nprint(x)\t\r\n\n\n') == 'x = 1\nprint(x)'
+
+    def test_cache_key_ignores_whitespace_noise(self):
+        tc = self._case()
+        ctx = ExecutionContext('python', 5, 256)
+        assert result_cache_key('print(1)\n', tc, ctx) == result_cache_key('print(1)   \r\n\r\n', tc, ctx)
+        assert result_cache_key('print(1)', tc, ctx) != result_cache_key('print(2)', tc, ctx)
+        assert result_cache_key('print(1)', tc, ctx) != \
+            result_cache_key('print(1)', tc, ExecutionContext('python', 6, 256))
+
+    def test_cache_key_covers_test_case_content(self):
+        a, b = self._case(expected="1"), self._case(expected="2")
+        ctx = ExecutionContext('python', 5, 256)
+        assert result_cache_key('x', a, ctx) != result_cache_key('x', b, ctx)
+
+    def test_run_test_case_hit_skips_execution(self, cached_service):
+        tc = self._case()
+        first = cached_service.run_test_case('print("hi")', tc)
+
+        with patch.object(cached_service, 'execute_in_context') as execute:
+            second = cached_service.run_test_case('print("hi")  \r\n', tc)
+
+        execute.assert_not_called()
+        assert second == first
+        assert second['passed'] is True
+
+    def test_hit_is_evaluated_against_current_test_case(self, cached_service, cache):
+        tc = self._case(expected="hi")
+        cached_service.run_test_case('print("hi")', tc)
+        # The name is not part of the key, the hit still reports the current one
+        tc.name = "Renamed"
+
+        result = cached_service.run_test_case('print("hi")', tc)
+
+        assert result['test_name'] == "Renamed"
+
+    def test_timeouts_are_not_cached(self, cached_service, cache):
+        tc = self._case()
+        tc.timeout_ms = 1000
+        result = cached_service.run_test_case('while True: pass', tc)
+
+        assert result['timed_out'] is True
+        assert cache.entries == {}
+
+    def test_transient_api_errors_are_not_cached(self, cached_service, cache):
+        transient = {'success': False, 'stdout': '', 'stderr': 'API error: 503', 'exit_code': 1,
+                     'runtime_ms': 3, 'timed_out': False, 'transient': True}
+        with patch.object(cached_service, 'execute_in_context', return_value=transient):
+            cached_service.run_test_case('print("hi")', self._case())
+
+        assert cache.entries == {}
+
+    def test_run_all_tests_only_executes_misses(self, cached_service):
+        code = 'print(input())'
+        cases = [self._case(f"T{i}", str(i), str(i)) for i in range(4)]
+        cached_service.run_all_tests(code, cases[:2])
+
+        with patch.object(cached_service, 'execute_in_context', wraps=cached_service.execute_in_context) as execute:
+            result = cached_service.run_all_tests(code, cases)
+
+        assert execute.call_count == 2
+        assert result['passed_count'] == 4
+        assert [r['test_name'] for r in result['results']] == ["T0", "T1", "T2", "T3"]
+
+    def test_batched_run_fills_cache(self, mock_sandbox_job_repo, mock_submission_repo, cache):
+        service = SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo,
+            submission_repo=mock_submission_repo,
+            use_external_api=False,
+            batch_mode=True,
+            result_cache=cache
+        )
+        cases = [self._case(f"T{i}", str(i), str(i)) for i in range(3)]
+        service.run_all_tests('print(input())', cases)
+
+        assert len(cache.entries) == 3
+        with patch.object(service, 'execute_in_context') as execute:
+            result = service.run_all_tests('print(input())', cases)
+        execute.assert_not_called()
+        assert result['passed_count'] == 3
+
+
+@pytest.mark.unit
+class TestConcurrentExecution:
+    """One SandboxService instance is shared by every request and grading thread."""
+
+    def test_each_call_sees_its_own_limits(self, sandbox_service):
+        """Stress: many threads with different limits; echo the limits each execution received."""
+        import random
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fake_execute(code, stdin, context):
+            time.sleep(random.uniform(0, 0.002))
+            return {'success': True, 'stdout': f"{context.timeout_ms} {context.memory_limit_mb}\n",
+                    'stderr': '', 'exit_code': 0, 'runtime_ms': 1, 'timed_out': False}
+
+        cases = []
+        for i in range(200):
+            tc = _make_test_case(f"T{i}", "", "")
+            tc.timeout_ms = 1000 + i
+            tc.memory_limit_mb = 32 + i
+            tc.expected_out = f"{tc.timeout_ms} {tc.memory_limit_mb}"
+            cases.append(tc)
+
+        with patch.object(sandbox_service, '_execute_via_subprocess', side_effect=fake_execute):
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                results = list(pool.map(lambda tc: sandbox_service.run_test_case('x', tc), cases * 5))
+
+        assert all(r['passed'] for r in results)
+        assert sandbox_service.timeout == 5
+        assert sandbox_service.memory_limit_mb == 256
+
+    def test_concurrent_real_runs_keep_their_timeouts(self, sandbox_service):
+        """Short-limit and long-limit test cases interleaved on real processes."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        code = 'import time; time.sleep(0.6); print("done")'
+        short = [_make_test_case(f"S{i}", "", "done", timeout=0.2) for i in range(4)]
+        long = [_make_test_case(f"L{i}", "", "done", timeout=5) for i in range(4)]
+        cases = [tc for pair in zip(short, long) for tc in pair]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda tc: sandbox_service.run_test_case(code, tc), cases))
+
+        for tc, result in zip(cases, results):
+            if tc.name.startswith("S"):
+                assert result['timed_out'] is True
+                assert '0.2 seconds' in result['stderr']
+            else:
+                assert result['passed'] is True
+
+
+@pytest.mark.unit
+class TestLoadShedding:
+
+    @staticmethod
+    def service(mock_sandbox_job_repo, mock_submission_repo, queued_submissions, admission=None):
+        mock_sandbox_job_repo.count_queued_by_lane.return_value = {
+            'submission': (queued_submissions, None), 'interactive': (1, None)
+        }
+        return SandboxService(
+            sandbox_job_repo=mock_sandbox_job_repo, submission_repo=mock_submission_repo,
+            use_external_api=False, admission=admission, shed_practice_queue_depth=100
+        )
+
+    def test_practice_is_shed_when_submissions_back_up(self, mock_sandbox_job_repo, mock_submission_repo):
+        service = self.service(mock_sandbox_job_repo, mock_submission_repo, queued_submissions=100)
+
+        with pytest.raises(SandboxBusyError) as busy:
+            service.admit(user_id=1)
+        assert busy.value.retry_after > 0
+
+        with service.admit(user_id=1, practice=False):
+            pass
+
+    def test_practice_runs_below_the_threshold(self, mock_sandbox_job_repo, mock_submission_repo):
+        admission = MagicMock()
+        service = self.service(mock_sandbox_job_repo, mock_submission_repo, 99, admission=admission)
+
+        with service.admit(user_id=1):
+            pass
+
+        admission.admit.assert_called_once_with(1)
+
+    def test_queue_depth_is_read_once_per_interval(self, mock_sandbox_job_repo, mock_submission_repo):
+        service = self.service(mock_sandbox_job_repo, mock_submission_repo, queued_submissions=5)
+
+        for _ in range(3):
+            service.check_practice_load()
+
+        mock_sandbox_job_repo.count_queued_by_lane.assert_called_once()
+
+    def test_zero_depth_never_sheds(self, mock_sandbox_job_repo, mock_submission_repo):
+        service = self.service(mock_sandbox_job_repo, mock_submission_repo, queued_submissions=10_000)
+        service.shed_practice_queue_depth = 0
+
+        service.check_practice_load()
+
+        mock_sandbox_job_repo.count_queued_by_lane.assert_not_called()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from core.services.similarity_engine import EmbeddingMatrix
+
+
+@pytest.mark.unit
+class TestEmbeddingMatrix:
+
+    def test_rows_are_normalized_float32(self):
+        matrix = EmbeddingMatrix([1, 2], [[3.0, 4.0], [0.0, 2.0]])
+
+        assert matrix.matrix.dtype == np.float32
+        assert matrix.matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(np.linalg.norm(matrix.matrix, axis=1), [1.0, 1.0], rtol=1e-6)
+        assert len(matrix) == 2
+        assert matrix.dimensions == 2
+
+    def test_scores_all_rows_at_once(self):
+        matrix = EmbeddingMatrix([1, 2, 3], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+
+        scores = matrix.scores([2.0, 0.0])
+
+        assert scores.dtype == np.float64
+        np.testing.assert_allclose(scores, [1.0, 0.0, 2 ** -0.5], rtol=1e-6)
+
+    def test_zero_vectors_score_zero(self):
+        matrix = EmbeddingMatrix([1, 2], [[0.0, 0.0], [1.0, 1.0]])
+
+        assert list(matrix.scores([1.0, 0.0])) == [0.0, pytest.approx(2 ** -0.5)]
+        assert list(matrix.scores([0.0, 0.0])) == [0.0, 0.0]
+
+    def test_empty(self):
+        matrix = EmbeddingMatrix([], [])
+
+        assert len(matrix) == 0
+        assert matrix.scores([1.0, 2.0]).size == 0
+
+    def test_rejects_mismatched_dimensions(self):
+        with pytest.raises(ValueError):
+            EmbeddingMatrix([1, 2], [[1.0, 0.0], [1.0]])
+
+        matrix = EmbeddingMatrix([1], [[1.0, 0.0]])
+        with pytest.raises(ValueError, match="3 dimensions, expected 2"):
+            matrix.scores([1.0, 0.0, 0.0])
+
+    def test_borderline_scores_are_exact(self):
+        vectors = [[0.6, 0.8], [0.8, 0.6]]
+        matrix = EmbeddingMatrix([1, 2], vectors)
+
+        scores = matrix.scores([1.0, 0.0], threshold=0.6)
+
+        # The row at the threshold is recomputed in double precision;
+        # the other is left as the float32 product gave it
+        assert scores[0] == 0.6
+        assert scores[1] == pytest.approx(0.8, abs=1e-6)
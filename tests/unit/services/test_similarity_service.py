@@ -1,6 +1,10 @@
+import random
+
+import numpy as np
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from core.services.similarity_service import SimilarityService
+from core.services.similarity_engine import EmbeddingMatrix
 from core.exceptions.validation_error import ValidationError
 
 
@@ -74,12 +78,16 @@ class TestSimilarityService:
         submission.get_assignment_id.return_value = 1
         mock_submission_repo.get_by_id.return_value = submission
 
-        # No other submissions (only same submission returned)
-        mock_submission_repo.list_by_assignment.return_value = [submission]
+        # No other submissions have embeddings
         mock_embedding_service.get_embedding_vector.return_value = [0.1, 0.2, 0.3]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([], [])
 
         result = similarity_service.analyze_submission(1)
 
+        mock_embedding_service.get_assignment_embeddings.assert_called_once_with(
+            1, 3, exclude_submission_id=1
+        )
+        mock_submission_repo.list_by_assignment.assert_not_called()
         assert result["submission_id"] == 1
         assert result["comparisons"] == []
         assert result["flag_created"] is None
@@ -111,17 +119,13 @@ class TestSimilarityService:
         submission1.get_id.return_value = 1
         submission1.get_assignment_id.return_value = 1
 
-        submission2 = Mock()
-        submission2.get_id.return_value = 2
-
         mock_submission_repo.get_by_id.return_value = submission1
-        mock_submission_repo.list_by_assignment.return_value = [submission1, submission2]
 
         # High similarity vectors
-        mock_embedding_service.get_embedding_vector.side_effect = [
-            [1.0, 0.0, 0.0],  # submission1
-            [0.99, 0.1, 0.0]  # submission2 - very similar
-        ]
+        mock_embedding_service.get_embedding_vector.return_value = [1.0, 0.0, 0.0]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix(
+            [2], [[0.99, 0.1, 0.0]]  # submission2 - very similar
+        )
 
         mock_comparison_repo.create.return_value = Mock()
         flag = Mock()
@@ -140,9 +144,8 @@ class TestSimilarityService:
         submission = Mock()
         submission.get_assignment_id.return_value = 1
         mock_submission_repo.get_by_id.return_value = submission
-        mock_submission_repo.list_by_assignment.return_value = [submission]
-
         mock_embedding_service.ensure_embedding.return_value = [0.1, 0.2, 0.3]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([], [])
 
         result = similarity_service.analyze_submission(
             1, 
@@ -159,8 +162,8 @@ class TestSimilarityService:
         submission = Mock()
         submission.get_assignment_id.return_value = 1
         mock_submission_repo.get_by_id.return_value = submission
-        mock_submission_repo.list_by_assignment.return_value = [submission]
         mock_embedding_service.get_embedding_vector.return_value = [0.1, 0.2, 0.3]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([], [])
 
         result = similarity_service.analyze_submission(1, threshold=0.95)
 
@@ -174,22 +177,16 @@ class TestSimilarityService:
         submission.get_assignment_id.return_value = 1
         mock_submission_repo.get_by_id.return_value = submission
         
-        other = Mock()
-        other.get_id.return_value = 2
-        mock_submission_repo.list_by_assignment.return_value = [submission, other]
-        
         mock_embedding_service.get_embedding_vector.return_value = [1.0, 0.0, 0.0]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix(
+            [2], [[1.0, 0.0, 0.0]]
+        )
         
-        # Mock _compute_cosine_similarity to raise exception
-        # We need to patch it on the instance or class, but since we have the instance:
-        original_method = similarity_service._compute_cosine_similarity
-        similarity_service._compute_cosine_similarity = Mock(side_effect=Exception("Math Error"))
-        
-        try:
+        # Make the vectorized scoring raise
+        with patch.object(EmbeddingMatrix, "scores", side_effect=Exception("Math Error")):
             result = similarity_service.analyze_submission(1)
-            assert result["comparisons"] == []
-        finally:
-            similarity_service._compute_cosine_similarity = original_method
+
+        assert result["comparisons"] == []
 
     def test_analyze_submission_no_assignment_id(self, similarity_service, mock_submission_repo):
         """Line 58: ValidationError when submission has no assignment_id"""
@@ -209,12 +206,9 @@ class TestSimilarityService:
         sub1.get_id.return_value = 1
         sub1.get_assignment_id.return_value = 1
         
-        sub2 = Mock()
-        sub2.get_id.return_value = 2
-        
         mock_submission_repo.get_by_id.return_value = sub1
-        mock_submission_repo.list_by_assignment.return_value = [sub1, sub2]
         mock_embedding_service.get_embedding_vector.return_value = [1.0] # simple vectors
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([2], [[1.0]])
         
         # Mock comparison record that causes error on update
         comp_rec = Mock()
@@ -241,11 +235,9 @@ class TestSimilarityService:
         """Line 151: Outer exception handling for linking"""
         sub1 = Mock()
         sub1.get_assignment_id.return_value = 1
-        sub2 = Mock()
-        sub2.get_id.return_value = 2
         mock_submission_repo.get_by_id.return_value = sub1
-        mock_submission_repo.list_by_assignment.return_value = [sub1, sub2]
         mock_embedding_service.get_embedding_vector.return_value = [1.0]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([2], [[1.0]])
         
         # High similarity
         similarity_service.threshold = 0.5
@@ -261,24 +253,95 @@ class TestSimilarityService:
         assert result["flag_created"] == flag
 
     def test_analyze_submission_other_embedding_missing(self, similarity_service, mock_submission_repo, mock_embedding_service):
-        """Line 84: Skip other submission if its embedding is missing"""
+        """Submissions without an embedding are not compared"""
         sub1 = Mock()
         sub1.get_id.return_value = 1
         sub1.get_assignment_id.return_value = 1
-        
-        sub2 = Mock()
-        sub2.get_id.return_value = 2
-        
         mock_submission_repo.get_by_id.return_value = sub1
-        mock_submission_repo.list_by_assignment.return_value = [sub1, sub2]
-        
-        # sub1 has embedding, sub2 does not
-        def get_embed(sid):
-            if sid == 1: return [1.0]
-            return None
-        
-        mock_embedding_service.get_embedding_vector.side_effect = get_embed
-        
+
+        # sub1 has embedding, no other submission does
+        mock_embedding_service.get_embedding_vector.return_value = [1.0]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([], np.empty((0, 1)))
+
         result = similarity_service.analyze_submission(1)
         assert result["comparisons"] == []
         assert result["highest_score"] == 0.0
+
+    def test_analyze_submission_fetches_embeddings_once(self, similarity_service, mock_submission_repo,
+                                                        mock_embedding_service):
+        """Classmates' embeddings come from one bulk fetch, not one lookup each"""
+        sub1 = Mock()
+        sub1.get_id.return_value = 1
+        sub1.get_assignment_id.return_value = 7
+        mock_submission_repo.get_by_id.return_value = sub1
+        mock_embedding_service.get_embedding_vector.return_value = [1.0, 0.0]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix(
+            list(range(2, 602)), np.tile([0.0, 1.0], (600, 1))
+        )
+
+        result = similarity_service.analyze_submission(1)
+
+        assert len(result["comparisons"]) == 600
+        mock_embedding_service.get_embedding_vector.assert_called_once_with(1)
+        mock_embedding_service.get_assignment_embeddings.assert_called_once_with(
+            7, 2, exclude_submission_id=1
+        )
+
+    def test_analyze_submission_matches_pure_python_scores(
+        self, similarity_service, mock_submission_repo, mock_embedding_service,
+        mock_comparison_repo, mock_similarity_repo
+    ):
+        """Vectorized scores and flags agree with the pure-Python helper"""
+        rng = random.Random(7)
+        query = [rng.uniform(-1, 1) for _ in range(64)]
+        vectors = {1: query}
+        for other_id in range(2, 40):
+            vectors[other_id] = [rng.uniform(-1, 1) for _ in range(64)]
+        # One near-duplicate just over the threshold and one exact copy
+        vectors[40] = [x + rng.uniform(-0.05, 0.05) for x in query]
+        vectors[41] = list(query)
+
+        submission = Mock()
+        submission.get_assignment_id.return_value = 1
+        mock_submission_repo.get_by_id.return_value = submission
+        mock_embedding_service.get_embedding_vector.return_value = query
+        other_ids = [sid for sid in vectors if sid != 1]
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix(
+            other_ids, np.array([vectors[sid] for sid in other_ids])
+        )
+        mock_similarity_repo.create.return_value = Mock()
+
+        result = similarity_service.analyze_submission(1)
+
+        expected = {
+            sid: similarity_service._compute_cosine_similarity(query, vec)
+            for sid, vec in vectors.items() if sid != 1
+        }
+        scores = {c["compared_submission_id"]: c["score"] for c in result["comparisons"]}
+        assert scores.keys() == expected.keys()
+        for sid, score in scores.items():
+            assert isinstance(score, float)
+            assert score == pytest.approx(expected[sid], abs=1e-6)
+        assert result["highest_pair"] in (40, 41)
+        assert result["highest_score"] == pytest.approx(1.0)
+        mock_similarity_repo.create.assert_called_once()
+
+    def test_analyze_submission_score_at_threshold_is_flagged(
+        self, similarity_service, mock_submission_repo, mock_embedding_service,
+        mock_similarity_repo
+    ):
+        """A score equal to the threshold in double precision still flags"""
+        sub1 = Mock()
+        sub1.get_id.return_value = 1
+        sub1.get_assignment_id.return_value = 1
+        mock_submission_repo.get_by_id.return_value = sub1
+        vec_a, vec_b = [1.0, 0.0], [0.6, 0.8]
+        mock_embedding_service.get_embedding_vector.return_value = vec_a
+        mock_embedding_service.get_assignment_embeddings.return_value = EmbeddingMatrix([2], [vec_b])
+        mock_similarity_repo.create.return_value = Mock()
+        threshold = similarity_service._compute_cosine_similarity(vec_a, vec_b)
+
+        result = similarity_service.analyze_submission(1, threshold=threshold)
+
+        assert result["comparisons"][0]["score"] == threshold
+        assert result["flag_created"] is not None
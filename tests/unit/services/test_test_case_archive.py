@@ -0,0 +1,85 @@
+import io
+import json
+import zipfile
+import pytest
+
+from core.exceptions.validation_error import ValidationError
+from core.services.test_case_archive import read_test_case_archive
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.unit
+class TestReadTestCaseArchive:
+
+    def test_pairs_in_natural_order(self):
+        archive = make_zip({
+            "tests/10.in": "10", "tests/10.out": "20",
+            "tests/2.in": "2", "tests/2.out": "4",
+            "tests/1.in": "1", "tests/1.out": "2",
+            "__MACOSX/tests/._1.in": "junk", "tests/.DS_Store": "junk"
+        })
+
+        cases = read_test_case_archive(archive)
+
+        assert [(c.key, c.stdin, c.expected_out) for c in cases] == [
+            ("1", "1", "2"), ("2", "2", "4"), ("10", "10", "20")
+        ]
+
+    def test_metadata_defaults_and_overrides(self):
+        metadata = {"defaults": {"points": 5}, "cases": {"02": {"name": "Edge", "points": 9, "is_visible": True}}}
+        archive = make_zip({
+            "01.in": "", "01.out": "a", "02.in": "", "02.out": "b", "metadata.json": json.dumps(metadata)
+        })
+
+        first, second = read_test_case_archive(archive)
+
+        assert first.metadata == {"points": 5}
+        assert second.metadata == {"points": 9, "name": "Edge", "is_visible": True}
+
+    def test_windows_line_endings_normalised(self):
+        case, = read_test_case_archive(make_zip({"a.in": "1\r\n2\r\n", "a.out": "3\r\n"}))
+        assert (case.stdin, case.expected_out) == ("1\n2\n", "3\n")
+
+    def test_all_problems_reported_together(self):
+        archive = make_zip({
+            "01.in": "", "02.out": "", "03.in": "", "03.out": b"\xff",
+            "notes.txt": "", "metadata.json": json.dumps({"cases": {"01": {"points": "x"}, "09": {}}})
+        })
+
+        with pytest.raises(ValidationError) as error:
+            read_test_case_archive(archive)
+
+        message = str(error.value)
+        for problem in ["01.out missing", "02.in missing", "03.out is not UTF-8", "notes.txt",
+                        "'01.points' has the wrong type", "describes '09'"]:
+            assert problem in message
+
+    def test_unknown_metadata_field(self):
+        archive = make_zip({"1.in": "", "1.out": "", "metadata.json": '{"defaults": {"weight": 2}}'})
+        with pytest.raises(ValidationError, match="unknown field 'weight'"):
+            read_test_case_archive(archive)
+
+    def test_limits_checked_before_reading(self):
+        archive = make_zip({"1.in": "x" * 2048, "1.out": ""})
+        with pytest.raises(ValidationError, match="limit"):
+            read_test_case_archive(archive, max_bytes=1024)
+
+        archive = make_zip({f"{i}.{ext}": "" for i in range(3) for ext in ("in", "out")})
+        with pytest.raises(ValidationError, match=r"3 test cases \(limit 2\)"):
+            read_test_case_archive(archive, max_cases=2)
+
+    def test_not_a_zip(self):
+        with pytest.raises(ValidationError, match="not a zip"):
+            read_test_case_archive(io.BytesIO(b"plain text"))
+
+    def test_empty_archive(self):
+        with pytest.raises(ValidationError, match="no NAME.in"):
+            read_test_case_archive(make_zip({}))
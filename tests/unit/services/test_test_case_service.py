@@ -1,6 +1,9 @@
+import io
+import zipfile
 import pytest
 from unittest.mock import Mock
 from core.services.test_case_service import TestCaseService
+from core.entities.test_case import Testcase
 from core.exceptions.auth_error import AuthError
 from core.exceptions.validation_error import ValidationError
 
@@ -59,6 +62,15 @@ def setup_instructor_owns(mock_assignment_repo, mock_course_repo, instructor_id=
     return assignment
 
 
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
 class TestTestCaseService:
     """Test suite for TestCaseService"""
 
@@ -124,6 +136,195 @@ class TestTestCaseService:
 
         mock_testcase_repo.update.assert_called_once()
 
+    def test_create_test_case_with_compare_mode(self, test_case_service, instructor_user,
+                                                mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        test_case_service.create_test_case(
+            instructor_user, 1, "Float", "", "0.5", 10, compare_mode="float", compare_tolerance=0.01
+        )
+
+        created = mock_testcase_repo.create.call_args[0][0]
+        assert (created.compare_mode, created.compare_tolerance) == ("float", 0.01)
+
+    def test_create_test_case_invalid_compare_mode(self, test_case_service, instructor_user,
+                                                   mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        with pytest.raises(ValidationError, match="Invalid compare mode"):
+            test_case_service.create_test_case(instructor_user, 1, "T", "", "x", 10, compare_mode="fuzzy")
+        mock_testcase_repo.create.assert_not_called()
+
+    def test_update_test_case_rejects_bad_pattern(self, test_case_service, instructor_user,
+                                                  mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        mock_testcase_repo.get_by_id.return_value = Testcase(
+            1, 1, "T", "", None, "ok", 5000, 256, 10, True, 0, None
+        )
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        with pytest.raises(ValidationError, match="Invalid pattern on line 2"):
+            test_case_service.update_test_case(instructor_user, 1, compare_mode="regex", expected_out="ok\n(")
+        mock_testcase_repo.update.assert_not_called()
+
+    def test_import_test_cases(self, test_case_service, instructor_user,
+                               mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        mock_testcase_repo.list_by_assignment.return_value = [Mock(sort_order=4)]
+        mock_testcase_repo.create_many.side_effect = len
+        archive = make_zip({
+            "1.in": "1", "1.out": "2", "2.in": "2", "2.out": "4",
+            "metadata.json": '{"cases": {"2": {"name": "Double", "points": 7}}}'
+        })
+
+        count = test_case_service.import_test_cases(instructor_user, 1, archive, points=3)
+
+        assert count == 2
+        created = mock_testcase_repo.create_many.call_args[0][0]
+        assert [(tc.name, tc.points, tc.sort_order) for tc in created] == [("Test 1", 3, 5), ("Double", 7, 6)]
+        assert created[1].stdin == "2"
+        mock_testcase_repo.create.assert_not_called()
+
+    def test_import_function_test_cases(self, test_case_service, instructor_user,
+                                       mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        mock_testcase_repo.list_by_assignment.return_value = []
+        mock_testcase_repo.create_many.side_effect = len
+        archive = make_zip({
+            "1.in": "[[2, 1]]", "1.out": "[1, 2]", "2.in": "[[]]", "2.out": "{bad",
+            "metadata.json": '{"defaults": {"kind": "function", "function_name": "sort_list"}}'
+        })
+
+        with pytest.raises(ValidationError, match="2: Expected return value is not valid JSON"):
+            test_case_service.import_test_cases(instructor_user, 1, archive)
+
+        archive = make_zip({
+            "1.in": "[[2, 1]]", "1.out": "[1, 2]",
+            "metadata.json": '{"defaults": {"kind": "function", "function_name": "sort_list"}}'
+        })
+        test_case_service.import_test_cases(instructor_user, 1, archive)
+        created = mock_testcase_repo.create_many.call_args[0][0]
+        assert (created[0].kind, created[0].function_name) == ("function", "sort_list")
+
+    def test_import_test_cases_writes_nothing_if_any_case_is_invalid(
+            self, test_case_service, instructor_user, mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        mock_testcase_repo.list_by_assignment.return_value = []
+        archive = make_zip({
+            "1.in": "", "1.out": "ok", "2.in": "", "2.out": "(",
+            "metadata.json": '{"defaults": {"compare_mode": "regex"}, "cases": {"1": {"points": 0}}}'
+        })
+
+        with pytest.raises(ValidationError) as error:
+            test_case_service.import_test_cases(instructor_user, 1, archive)
+
+        assert "1: Points must be greater than zero" in str(error.value)
+        assert "2: Invalid pattern on line 1" in str(error.value)
+        mock_testcase_repo.create_many.assert_not_called()
+
+    def test_import_test_cases_not_owner(self, test_case_service, instructor_user,
+                                         mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo, instructor_id=99)
+        with pytest.raises(AuthError):
+            test_case_service.import_test_cases(instructor_user, 1, make_zip({"1.in": "", "1.out": ""}))
+        mock_testcase_repo.create_many.assert_not_called()
+
+    def test_create_complexity_test_case(self, test_case_service, instructor_user,
+                                         mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        test_case_service.create_test_case(
+            instructor_user, 1, "Sort speed", "ignored", "ignored", 10, kind="complexity",
+            generator="n = int(input())\nprint(n)", complexity_sizes="1000, 2000 4000,8000",
+            complexity_repeats=3, complexity_max_class="n log n"
+        )
+
+        created = mock_testcase_repo.create.call_args[0][0]
+        assert created.kind == "complexity"
+        assert created.complexity_sizes == [1000, 2000, 4000, 8000]
+        assert (created.stdin, created.expected_out) == (None, "")
+
+    @pytest.mark.parametrize("overrides, message", [
+        ({"generator": ""}, "needs an input generator"),
+        ({"generator": "print(("}, "does not compile"),
+        ({"complexity_sizes": "10, 10, 20"}, "three distinct"),
+        ({"complexity_sizes": "10, x, 20"}, "whole numbers"),
+        ({"complexity_repeats": 50}, "Repetitions"),
+        ({"complexity_max_class": "n!"}, "Invalid complexity class"),
+    ])
+    def test_create_complexity_test_case_invalid(self, test_case_service, instructor_user, mock_testcase_repo,
+                                                 mock_assignment_repo, mock_course_repo, overrides, message):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        settings = {
+            "kind": "complexity", "generator": "print(1)", "complexity_sizes": "10, 20, 40",
+            "complexity_repeats": 3, "complexity_max_class": "n", **overrides
+        }
+
+        with pytest.raises(ValidationError, match=message):
+            test_case_service.create_test_case(instructor_user, 1, "T", "", "", 10, **settings)
+        mock_testcase_repo.create.assert_not_called()
+
+    def test_create_function_test_case(self, test_case_service, instructor_user,
+                                       mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        test_case_service.create_test_case(
+            instructor_user, 1, "Smallest", '{"args": [[3, 1]], "kwargs": {"k": 1}}', "[1]", 10,
+            kind="function", function_name="solve"
+        )
+
+        created = mock_testcase_repo.create.call_args[0][0]
+        assert (created.kind, created.function_name) == ("function", "solve")
+
+    @pytest.mark.parametrize("overrides, message", [
+        ({"function_name": "not a name"}, "name of the function"),
+        ({"stdin": "[1,"}, "Arguments are not valid JSON"),
+        ({"stdin": '"x"'}, "must be a JSON array"),
+        ({"stdin": '{"args": [], "extra": 1}'}, "must be a JSON array"),
+        ({"expected_out": "{oops}"}, "Expected return value is not valid JSON"),
+        ({"compare_mode": "lines"}, "Return values are compared with one of"),
+    ])
+    def test_create_function_test_case_invalid(self, test_case_service, instructor_user, mock_testcase_repo,
+                                               mock_assignment_repo, mock_course_repo, overrides, message):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        settings = {"stdin": "[1, 2]", "expected_out": "3", "kind": "function", "function_name": "add", **overrides}
+
+        with pytest.raises(ValidationError, match=message):
+            test_case_service.create_test_case(
+                instructor_user, 1, "T", settings.pop("stdin"), settings.pop("expected_out"), 10, **settings
+            )
+        mock_testcase_repo.create.assert_not_called()
+
+    def test_create_generated_test_case(self, test_case_service, instructor_user,
+                                        mock_testcase_repo, mock_assignment_repo, mock_course_repo):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+
+        test_case_service.create_test_case(
+            instructor_user, 1, "Large", "ignored", "ignored", 10,
+            kind="generated", generator="print(input())", generator_size=100000, generator_seed=3,
+            reference_solution="print(input())"
+        )
+
+        created = mock_testcase_repo.create.call_args[0][0]
+        assert (created.kind, created.generator_size, created.generator_seed) == ("generated", 100000, 3)
+        assert (created.stdin, created.expected_out) == (None, "")
+
+    @pytest.mark.parametrize("overrides, message", [
+        ({"generator": ""}, "needs an input generator"),
+        ({"reference_solution": "def f(:"}, "Reference solution does not compile"),
+        ({"generator_size": 0}, "input size must be a positive"),
+        ({"generator_size": None}, "input size must be a positive"),
+        ({"compare_mode": "regex"}, "cannot be compared as patterns"),
+    ])
+    def test_create_generated_test_case_invalid(self, test_case_service, instructor_user, mock_testcase_repo,
+                                                mock_assignment_repo, mock_course_repo, overrides, message):
+        setup_instructor_owns(mock_assignment_repo, mock_course_repo)
+        settings = {"kind": "generated", "generator": "print(input())", "generator_size": 10,
+                    "reference_solution": "print(input())", **overrides}
+
+        with pytest.raises(ValidationError, match=message):
+            test_case_service.create_test_case(instructor_user, 1, "T", "", "", 10, **settings)
+        mock_testcase_repo.create.assert_not_called()
+
     def test_update_test_case_not_found(self, test_case_service, instructor_user, mock_testcase_repo):
         """Test case not found raises ValidationError"""
         mock_testcase_repo.get_by_id.return_value = None
@@ -0,0 +1,189 @@
+import pytest
+from unittest.mock import Mock
+
+from core.entities.test_run import TestRun
+from core.entities.user import User
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from core.services.test_run_service import TestRunService, run_code_tests
+
+
+def _tc_result(name, passed, stderr=''):
+    return {
+        'test_name': name, 'passed': passed, 'stdout': 'out', 'stderr': stderr,
+        'expected_output': 'out', 'actual_output': 'out' if passed else 'err',
+        'runtime_ms': 3, 'timed_out': False
+    }
+
+
+def _visible_case(visible):
+    tc = Mock()
+    tc.is_visible = visible
+    return tc
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = Mock()
+    sandbox.timeout = 5
+    sandbox.memory_limit_mb = 256
+    sandbox.groq_client = None
+
+    def run_all_tests(code, test_cases, language, on_result=None):
+        results = [_tc_result(f"T{i}", i == 0) for i in range(len(test_cases))]
+        for i in reversed(range(len(results))):
+            on_result(i, results[i])
+        return {'results': results}
+
+    sandbox.run_all_tests.side_effect = run_all_tests
+    return sandbox
+
+
+@pytest.fixture
+def test_run_repo():
+    repo = Mock()
+    repo.create.side_effect = lambda run: TestRun(
+        id=11, user_id=run.get_user_id(), assignment_id=run.get_assignment_id(), code=run.code,
+        language=run.language, visible_only=run.visible_only, total_count=run.total_count
+    )
+    repo.update.side_effect = lambda run: run
+    repo.get_results.return_value = []
+    return repo
+
+
+@pytest.fixture
+def test_case_repo():
+    repo = Mock()
+    repo.list_by_assignment.return_value = [_visible_case(True), _visible_case(False), _visible_case(True)]
+    return repo
+
+
+@pytest.fixture
+def service(sandbox, test_run_repo, test_case_repo):
+    job_repo = Mock()
+    job_repo.create.side_effect = lambda job: job
+    return TestRunService(
+        sandbox_service=sandbox,
+        test_run_repo=test_run_repo,
+        sandbox_job_repo=job_repo,
+        test_case_repo=test_case_repo,
+        poll_interval=0.01
+    )
+
+
+@pytest.fixture
+def student():
+    return User(1, "Student", "s@t.com", "p", "student")
+
+
+def _run(status='queued', user_id=1, visible_only=True):
+    return TestRun(id=11, user_id=user_id, assignment_id=5, code='print(1)', visible_only=visible_only, status=status)
+
+
+@pytest.mark.unit
+class TestRunCodeTests:
+
+    def test_summary_and_views(self, sandbox):
+        summary = run_code_tests(sandbox, 'code', 'python', [Mock(), Mock()], on_result=lambda i, v: None)
+
+        assert summary['passed_count'] == 1
+        assert summary['total_count'] == 2
+        assert summary['score'] == 50.0
+        assert summary['test_results'][0] == {
+            'name': 'T0', 'passed': True, 'output': 'out', 'expected': 'out',
+            'actual': 'out', 'first_diff': None, 'measurements': None, 'runtime_ms': 3, 'timed_out': False
+        }
+        assert summary['ai_feedback'] is None
+
+    def test_on_result_receives_views(self, sandbox):
+        seen = []
+        run_code_tests(sandbox, 'code', 'python', [Mock(), Mock()], on_result=lambda i, v: seen.append((i, v['name'])))
+
+        assert seen == [(1, 'T1'), (0, 'T0')]
+
+    def test_no_test_cases_is_a_syntax_check(self, sandbox):
+        sandbox.execute_code.return_value = {'success': True, 'stdout': 'hi', 'stderr': '', 'runtime_ms': 2}
+        seen = []
+
+        summary = run_code_tests(sandbox, 'code', 'python', [], on_result=lambda i, v: seen.append(v))
+
+        assert summary['score'] == 100
+        assert summary['total_count'] == 1
+        assert seen == [{'name': 'Syntax Check', 'passed': True, 'output': 'hi', 'runtime_ms': 2}]
+
+
+@pytest.mark.unit
+class TestTestRunService:
+
+    def test_start_queues_interactive_job(self, service, student):
+        run, job = service.start(student, 5, 'print(1)', 'python')
+
+        assert run.status == 'queued'
+        assert run.visible_only is True
+        assert run.total_count == 2  # hidden case excluded for students
+        assert job.lane == 'interactive'
+        assert job.test_run_id == 11
+        assert job.get_submission_id() is None
+        assert job.student_id == 1
+
+    def test_instructors_run_hidden_cases(self, service):
+        instructor = User(2, "Prof", "p@t.com", "p", "instructor")
+
+        run, _ = service.start(instructor, 5, 'print(1)')
+
+        assert run.visible_only is False
+        assert run.total_count == 3
+
+    def test_get_run_checks_owner(self, service, test_run_repo, student):
+        test_run_repo.get_by_id.return_value = _run(user_id=99)
+        with pytest.raises(AuthError):
+            service.get_run(student, 11)
+
+        test_run_repo.get_by_id.return_value = None
+        with pytest.raises(ValidationError, match="Test run not found"):
+            service.get_run(student, 11)
+
+    def test_execute_stores_results_as_they_finish(self, service, test_run_repo):
+        test_run_repo.get_by_id.return_value = _run()
+
+        run = service.execute(11)
+
+        positions = [c.args[1] for c in test_run_repo.add_result.call_args_list]
+        assert positions == [1, 0]
+        assert run.status == 'completed'
+        assert (run.passed_count, run.total_count, run.score) == (1, 2, 50.0)
+        assert run.completed_at is not None
+
+    def test_execute_failure_marks_run_failed(self, service, sandbox, test_run_repo):
+        test_run_repo.get_by_id.return_value = _run()
+        sandbox.run_all_tests.side_effect = RuntimeError("sandbox down")
+
+        run = service.execute(11)
+
+        assert run.status == 'failed'
+        assert run.error_message == 'sandbox down'
+
+    def test_wait_returns_new_results_immediately(self, service, test_run_repo):
+        test_run_repo.get_by_id.return_value = _run(status='running')
+        test_run_repo.get_results.return_value = [(4, 0, {'name': 'T0'})]
+
+        run, results = service.wait_for_results(11, after=3, timeout=5)
+
+        assert results == [(4, 0, {'name': 'T0'})]
+        test_run_repo.get_results.assert_called_once_with(11, 3)
+
+    def test_wait_times_out_without_progress(self, service, test_run_repo):
+        test_run_repo.get_by_id.return_value = _run(status='running')
+
+        run, results = service.wait_for_results(11, timeout=0.05)
+
+        assert results == []
+        assert test_run_repo.get_results.call_count > 1
+
+    def test_wait_returns_when_finished(self, service, test_run_repo):
+        test_run_repo.get_by_id.return_value = _run(status='completed')
+
+        run, results = service.wait_for_results(11, timeout=5)
+
+        assert run.is_finished()
+        assert test_run_repo.get_results.call_count == 1
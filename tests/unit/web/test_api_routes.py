@@ -1,18 +1,29 @@
 import pytest
 import os
 import json
+from contextlib import nullcontext
 from unittest.mock import Mock, patch
 from flask import Flask, session
 from core.entities.user import User
+from core.entities.sandbox_job import SandboxJob
+from core.entities.test_run import TestRun
+from core.entities.regrade_batch import RegradeBatch
+from core.exceptions.auth_error import AuthError
+from core.exceptions.validation_error import ValidationError
+from core.exceptions.sandbox_busy_error import SandboxBusyError
 
 @pytest.fixture
 def mock_services():
+    sandbox_service = Mock()
+    sandbox_service.admit.return_value = nullcontext()
     return {
         'user_repo': Mock(),
         'assignment_repo': Mock(),
         'test_case_service': Mock(),
-        'sandbox_service': Mock(),
+        'sandbox_service': sandbox_service,
         'draft_service': Mock(),
+        'test_run_service': Mock(),
+        'regrade_service': Mock(),
     }
 
 @pytest.fixture
@@ -121,6 +132,21 @@ class TestApiRoutes:
         assert data['passed_count'] == 1
         assert data['score'] == 100
 
+    def test_test_code_busy_returns_429(self, client, user_session, mock_services):
+        mock_services['assignment_repo'].get_by_id.return_value = Mock()
+        mock_services['test_case_service'].list_test_cases.return_value = []
+        mock_services['sandbox_service'].admit.side_effect = SandboxBusyError("The sandbox is busy", 7)
+
+        response = client.post('/api/test-code',
+                               data=json.dumps({'code': 'print(1)', 'assignment_id': 1}),
+                               content_type='application/json')
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '7'
+        assert json.loads(response.data)['retry_after'] == 7
+        mock_services['sandbox_service'].admit.assert_called_once_with(1)
+        mock_services['sandbox_service'].execute_code.assert_not_called()
+
     def test_test_code_exception(self, client, user_session, mock_services):
         mock_services['assignment_repo'].get_by_id.return_value = Mock()
         mock_services['test_case_service'].list_test_cases.side_effect = Exception("DB error")
@@ -290,3 +316,146 @@ class TestApiRoutes:
         # caught by Exception block line 208 -> returns 500
         assert response.status_code == 500
         assert b'invalid literal for int()' in response.data.lower()
+
+
+def _test_run(status='running'):
+    return TestRun(id=11, user_id=1, assignment_id=1, code='print(1)', status=status, total_count=2)
+
+
+class TestAsyncTestRuns:
+    def test_start_returns_run_and_urls(self, client, user_session, mock_services):
+        mock_services['assignment_repo'].get_by_id.return_value = Mock()
+        mock_services['test_run_service'].start.return_value = (
+            _test_run('queued'), SandboxJob(id=3, submission_id=None, lane='interactive', test_run_id=11)
+        )
+
+        response = client.post('/api/test-runs',
+                               data=json.dumps({'code': 'print(1)', 'assignment_id': 1}),
+                               content_type='application/json')
+
+        assert response.status_code == 202
+        data = json.loads(response.data)
+        assert data['run']['id'] == 11
+        assert data['run']['status'] == 'queued'
+        assert 'code' not in data['run']
+        assert data['job_id'] == 3
+        assert data['results_url'] == '/api/test-runs/11'
+        assert data['events_url'] == '/api/test-runs/11/events'
+        mock_services['test_run_service'].start.assert_called_once_with(user_session, 1, 'print(1)', 'python')
+
+    def test_start_is_shed_when_grading_is_backed_up(self, client, user_session, mock_services):
+        mock_services['assignment_repo'].get_by_id.return_value = Mock()
+        mock_services['sandbox_service'].check_practice_load.side_effect = SandboxBusyError("Paused", 5)
+
+        response = client.post('/api/test-runs',
+                               data=json.dumps({'code': 'print(1)', 'assignment_id': 1}),
+                               content_type='application/json')
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '5'
+        mock_services['test_run_service'].start.assert_not_called()
+
+    def test_start_unknown_assignment(self, client, user_session, mock_services):
+        mock_services['assignment_repo'].get_by_id.return_value = None
+        response = client.post('/api/test-runs',
+                               data=json.dumps({'code': 'print(1)', 'assignment_id': 99}),
+                               content_type='application/json')
+        assert response.status_code == 404
+        mock_services['test_run_service'].start.assert_not_called()
+
+    def test_poll_returns_results_after_cursor(self, client, user_session, mock_services):
+        service = mock_services['test_run_service']
+        service.get_run.return_value = _test_run()
+        service.wait_for_results.return_value = (_test_run(), [(5, 1, {'name': 'B', 'passed': True})])
+
+        response = client.get('/api/test-runs/11?after=4&wait=2')
+
+        data = json.loads(response.data)
+        assert data['results'] == [{'cursor': 5, 'index': 1, 'name': 'B', 'passed': True}]
+        assert data['cursor'] == 5
+        assert data['run']['status'] == 'running'
+        service.wait_for_results.assert_called_once_with(11, 4, 2.0)
+
+    def test_poll_wait_is_capped(self, client, user_session, mock_services):
+        from config.settings import TEST_RUN_LONG_POLL_SECONDS
+        service = mock_services['test_run_service']
+        service.wait_for_results.return_value = (_test_run(), [])
+
+        data = json.loads(client.get('/api/test-runs/11?after=7&wait=3600').data)
+
+        assert data['cursor'] == 7
+        service.wait_for_results.assert_called_once_with(11, 7, TEST_RUN_LONG_POLL_SECONDS)
+
+    def test_poll_someone_elses_run(self, client, user_session, mock_services):
+        mock_services['test_run_service'].get_run.side_effect = AuthError("You do not own this test run")
+        assert client.get('/api/test-runs/11').status_code == 403
+
+    def test_poll_unknown_run(self, client, user_session, mock_services):
+        mock_services['test_run_service'].get_run.side_effect = ValidationError("Test run not found")
+        assert client.get('/api/test-runs/11').status_code == 404
+
+    def test_events_stream_results_then_done(self, client, user_session, mock_services):
+        service = mock_services['test_run_service']
+        service.wait_for_results.side_effect = [
+            (_test_run(), [(5, 1, {'name': 'B'})]),
+            (_test_run(), []),
+            (_test_run('completed'), [(6, 0, {'name': 'A'})]),
+        ]
+
+        response = client.get('/api/test-runs/11/events', headers={'Last-Event-ID': '4'})
+        body = response.get_data(as_text=True)
+
+        assert response.mimetype == 'text/event-stream'
+        assert body.index('id: 5\nevent: result') < body.index(': keep-alive') < body.index('id: 6\nevent: result')
+        assert body.rstrip().split('\n')[-2] == 'event: done'
+        assert service.wait_for_results.call_args_list[0].args[:2] == (11, 4)
+        assert service.wait_for_results.call_args_list[2].args[:2] == (11, 5)
+
+
+@pytest.fixture
+def instructor_session(client, mock_services):
+    mock_user = User(2, "Prof", "p@t.com", "p", "instructor")
+    mock_services['user_repo'].get_by_id.return_value = mock_user
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+        sess['user_role'] = 'instructor'
+    return mock_user
+
+
+class TestRegradeRoutes:
+    def test_regrade_assignment(self, client, instructor_session, mock_services):
+        mock_services['regrade_service'].regrade_assignment.return_value = RegradeBatch(
+            id=9, scope='assignment', scope_id=3, total=40
+        )
+
+        response = client.post('/api/assignments/3/regrade')
+
+        assert response.status_code == 202
+        data = json.loads(response.data)
+        assert data['batch']['total'] == 40
+        assert data['progress_url'] == '/api/regrades/9'
+        assert data['cancel_url'] == '/api/regrades/9/cancel'
+        mock_services['regrade_service'].regrade_assignment.assert_called_once_with(instructor_session, 3)
+
+    def test_regrade_course_not_owner(self, client, instructor_session, mock_services):
+        mock_services['regrade_service'].regrade_course.side_effect = AuthError("You do not own this course")
+        assert client.post('/api/courses/7/regrade').status_code == 403
+
+    def test_progress(self, client, instructor_session, mock_services):
+        mock_services['regrade_service'].get_progress.return_value = {'done': 3, 'total': 4, 'eta_s': 2.5}
+
+        data = json.loads(client.get('/api/regrades/9').data)
+
+        assert data == {'success': True, 'done': 3, 'total': 4, 'eta_s': 2.5}
+
+    def test_progress_unknown_batch(self, client, instructor_session, mock_services):
+        mock_services['regrade_service'].get_progress.side_effect = ValidationError("Regrade not found")
+        assert client.get('/api/regrades/9').status_code == 404
+
+    def test_cancel(self, client, instructor_session, mock_services):
+        mock_services['regrade_service'].cancel.return_value = {'cancelled': 5}
+
+        response = client.post('/api/regrades/9/cancel')
+
+        assert json.loads(response.data)['cancelled'] == 5
+        mock_services['regrade_service'].cancel.assert_called_once_with(instructor_session, 9)
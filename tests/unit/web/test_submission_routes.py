@@ -11,6 +11,7 @@ def mock_services():
         'result_repo': Mock(),
         'assignment_repo': Mock(),
         'sandbox_service': Mock(),
+        'regrade_service': Mock(),
         'user_repo': Mock(),
     }
 
@@ -126,7 +127,7 @@ class TestSubmissionRoutes:
         
         response = client.post('/submissions/1/regrade', follow_redirects=True)
         assert b'Regrade requested' in response.data
-        mock_services['sandbox_service'].regrade_submission.assert_called_with(mock_sub)
+        mock_services['regrade_service'].regrade_submission.assert_called_with(instructor_session, mock_sub)
 
     def test_regrade_submission_not_found(self, client, instructor_session, mock_services):
         mock_services['submission_repo'].get_by_id.return_value = None
@@ -1,3 +1,4 @@
+import io
 import pytest
 import os
 import sqlite3
@@ -152,3 +153,36 @@ class TestTestCaseRoutes:
         mock_services['test_case_service'].delete_test_case.side_effect = Exception("failed")
         response = client.post('/test-cases/1/delete', follow_redirects=True)
         assert b'failed' in response.data
+
+    @patch('web.routes.test_case.render_template')
+    def test_import_test_cases_get(self, mock_render, client, instructor_session, mock_services):
+        mock_render.return_value = 'Import form'
+        response = client.get('/test-cases/import/1')
+        assert response.status_code == 200
+        mock_render.assert_called_once_with('test_case/import.html', assignment_id=1)
+
+    def test_import_test_cases_success(self, client, instructor_session, mock_services):
+        mock_services['test_case_service'].import_test_cases.return_value = 12
+        data = {'archive': (io.BytesIO(b'PK'), 'cases.zip'), 'points': '2'}
+        response = client.post('/test-cases/import/1', data=data, content_type='multipart/form-data',
+                               follow_redirects=True)
+        assert b'Imported 12 test cases' in response.data
+        kwargs = mock_services['test_case_service'].import_test_cases.call_args.kwargs
+        assert (kwargs['assignment_id'], kwargs['points'], kwargs['is_visible']) == (1, 2, False)
+
+    @patch('web.routes.test_case.render_template')
+    @patch('web.routes.test_case.flash')
+    def test_import_test_cases_without_file(self, mock_flash, mock_render, client, instructor_session, mock_services):
+        mock_render.return_value = 'Import form'
+        client.post('/test-cases/import/1', data={})
+        mock_flash.assert_called_once_with('No archive provided', 'error')
+        mock_services['test_case_service'].import_test_cases.assert_not_called()
+
+    @patch('web.routes.test_case.render_template')
+    @patch('web.routes.test_case.flash')
+    def test_import_test_cases_error(self, mock_flash, mock_render, client, instructor_session, mock_services):
+        mock_render.return_value = 'Import form'
+        mock_services['test_case_service'].import_test_cases.side_effect = ValidationError("01.out missing")
+        data = {'archive': (io.BytesIO(b'PK'), 'cases.zip')}
+        client.post('/test-cases/import/1', data=data, content_type='multipart/form-data')
+        assert '01.out missing' in mock_flash.call_args.args[0]